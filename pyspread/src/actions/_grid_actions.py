@@ -53,6 +53,8 @@ import src.lib.i18n as i18n
 import shutil
 import tempfile
 import types
+from xml.parsers.expat import ExpatError
+import zipfile
 
 try:
     import xlrd
@@ -65,21 +67,23 @@ except ImportError:
     xlwt = None
 
 try:
-    import odf
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
 except ImportError:
-    odf = None
+    openpyxl = None
 
+import numpy
 import wx
 
 from src.config import config
 from src.sysvars import get_default_font, is_gtk
 from src.gui._grid_table import GridTable
-from src.interfaces.pys import Pys
+from src.interfaces.pys import Pys, BinaryPys, BINARY_PYS_VERSION
+from src.interfaces.pys import is_binary_pys
+from src.interfaces.journal import PysJournal
 from src.interfaces.xls import Xls
-try:
-    from src.interfaces.ods import Ods
-except ImportError:
-    Ods = None
+from src.interfaces.xlsx import Xlsx
+from src.interfaces.ods import Ods
 
 try:
     from src.lib.gpg import sign, verify
@@ -89,7 +93,10 @@ except ImportError:
     GPG_PRESENT = False
 
 from src.lib.selection import Selection
-from src.lib.fileio import AOpen, Bz2AOpen
+from src.lib.fileio import AOpen, ParallelBz2AOpen
+from src.lib.autosave import Autosave
+from src.lib.progress import ProgressReporter
+import src.lib.undo as undo
 
 from src.actions._main_window_actions import Actions
 from src.actions._grid_cell_actions import CellActions
@@ -107,10 +114,20 @@ class FileActions(Actions):
         Actions.__init__(self, grid)
 
         # The pys file version that are expected.
-        # The latter version is created
-        self.pys_versions = ["0.1"]
+        # The version that is created is set in config["pys_save_version"]
+        self.pys_versions = ["0.1", BINARY_PYS_VERSION]
 
         self.saving = False
+        self.opening = False
+
+        # Progress display of the current operation
+        self.progress = None
+
+        # Change log of the current pys file if journaled saving is active
+        self.journal = None
+
+        # Autosave file of this pyspread process
+        self.autosaver = Autosave()
 
         self.main_window.Bind(self.EVT_CMD_GRID_ACTION_OPEN, self.open)
         self.main_window.Bind(self.EVT_CMD_GRID_ACTION_SAVE, self.save)
@@ -123,9 +140,16 @@ class FileActions(Actions):
             "ods": Ods,
         }
 
+        if openpyxl is not None:
+            # Stream xlsx files instead of loading them via xlrd
+            self.type2interface["xlsx"] = Xlsx
+
     def _is_aborted(self, cycle, statustext, total_elements=None, freq=None):
         """Displays progress and returns True if abort
 
+        Progress is displayed in time intervals. A new operation starts
+        with cycle 0.
+
         Parameters
         ----------
 
@@ -136,54 +160,47 @@ class FileActions(Actions):
         total_elements: Integer:
         \tThe number of elements that have to be processed
         freq: Integer, defaults to None
-        \tNo. operations between two abort possibilities, 1000 if None
+        \tStatusbar text is only displayed if not None
 
         """
 
-        if total_elements is None:
-            statustext += _("{nele} elements processed. Press <Esc> to abort.")
-        else:
-            statustext += _("{nele} of {totalele} elements processed. "
-                            "Press <Esc> to abort.")
+        if not cycle or self.progress is None:
+            if total_elements is None:
+                statustext += _("{done} elements processed. "
+                                "Press <Esc> to abort.")
+            else:
+                statustext += _("{done} of {total} elements processed. "
+                                "Press <Esc> to abort.")
 
-        if freq is None:
-            show_msg = False
-            freq = 1000
-        else:
-            show_msg = True
+            self.progress = ProgressReporter(self.main_window, statustext,
+                                             total=total_elements)
 
-        # Show progress in statusbar each freq (1000) cells
-        if cycle % freq == 0:
-            if show_msg:
-                text = statustext.format(nele=cycle, totalele=total_elements)
-                try:
-                    post_command_event(self.main_window, self.StatusBarMsg,
-                                       text=text)
-                except TypeError:
-                    # The main window does not exist any more
-                    pass
+        if self.progress.is_due():
+            self.progress.done = cycle
+            self.progress.report(show_msg=freq is not None)
 
-            # Now wait for the statusbar update to be written on screen
-            if is_gtk():
-                try:
-                    wx.Yield()
-                except:
-                    pass
+        return self.need_abort
 
-            # Abort if we have to
-            if self.need_abort:
-                # We have to abort`
-                return True
+    def validate_signature(self, filename):
+        """Returns True if a valid signature is present for filename
 
-        # Continue
-        return False
+        If filename has a journal then the journal has to be signed, too.
 
-    def validate_signature(self, filename):
-        """Returns True if a valid signature is present for filename"""
+        """
 
         if not GPG_PRESENT:
             return False
 
+        journal = PysJournal(self.code_array, filename)
+        if journal.exists() and \
+           not self._validate_file_signature(journal.journal_path):
+            return False
+
+        return self._validate_file_signature(filename)
+
+    def _validate_file_signature(self, filename):
+        """Returns True if a valid signature is present for a single file"""
+
         sigfilename = filename + '.sig'
 
         try:
@@ -210,6 +227,7 @@ class FileActions(Actions):
 
         # Clear result cache
         self.code_array.result_cache.clear()
+        self.code_array.result_versions.clear()
 
         # Execute macros
         self.main_window.actions.execute_macros()
@@ -252,6 +270,7 @@ class FileActions(Actions):
 
         # Clear result cache
         self.code_array.result_cache.clear()
+        self.code_array.result_versions.clear()
 
     def _get_file_version(self, infile):
         """Returns infile version string."""
@@ -280,6 +299,9 @@ class FileActions(Actions):
 
         """
 
+        # Stop journaling changes of the previous file
+        self._stop_journal()
+
         # Without setting this explicitly, the cursor is set too late
         self.grid.actions.cursor = 0, 0, 0
         self.grid.current_table = 0
@@ -293,6 +315,9 @@ class FileActions(Actions):
         # Clear attributes
         del self.code_array.dict_grid.cell_attributes[:]
 
+        # Clear array blocks
+        del self.code_array.dict_grid.array_blocks[:]
+
         if shape is not None:
             # Set shape
             self.code_array.shape = shape
@@ -306,11 +331,53 @@ class FileActions(Actions):
 
         # Clear caches
         self.code_array.result_cache.clear()
+        self.code_array.result_versions.clear()
 
         # Clear globals
         self.code_array.clear_globals()
         self.code_array.reload_modules()
 
+    def _start_journal(self, filepath):
+        """Starts journaling changes if journaled saving is enabled"""
+
+        if config["journal_save"]:
+            self.journal = PysJournal(self.code_array, filepath)
+            self.journal.start()
+
+    def _stop_journal(self):
+        """Stops journaling changes"""
+
+        if self.journal is not None:
+            self.journal.stop()
+            self.journal = None
+
+    def _open_journal(self, filepath):
+        """Replays the journal of filepath if present and starts journaling
+
+        Parameters
+        ----------
+
+        filepath: String
+        \tPath of the pys file that has been loaded
+
+        """
+
+        journal = PysJournal(self.code_array, filepath)
+
+        if journal.exists():
+            try:
+                records = journal.replay()
+
+            except (IOError, ValueError), err:
+                post_command_event(self.main_window, self.StatusBarMsg,
+                                   text=unicode(err))
+            else:
+                statustext = _("{records} journal records replayed.")
+                post_command_event(self.main_window, self.StatusBarMsg,
+                                   text=statustext.format(records=records))
+
+        self._start_journal(filepath)
+
     def open(self, event):
         """Opens a file that is specified in event.attr
 
@@ -339,9 +406,11 @@ class FileActions(Actions):
                 filetype = "pys"
 
         type2opener = {
-            "pys": (Bz2AOpen, [filepath, "r"], {"main_window":
-                                                self.main_window}),
-            "pysu": (AOpen, [filepath, "r"], {"main_window": self.main_window})
+            "pys": (ParallelBz2AOpen, [filepath, "r"], {"main_window":
+                                                        self.main_window}),
+            "pysu": (AOpen, [filepath, "r"],
+                     {"main_window": self.main_window}),
+            "ods": (open, [filepath, "rb"], {}),
         }
 
         if xlrd is not None:
@@ -351,13 +420,18 @@ class FileActions(Actions):
             type2opener["xlsx"] = \
                 (xlrd.open_workbook, [filepath], {"formatting_info": False})
 
-        if odf is not None and Ods is not None:
-            type2opener["ods"] = (open, [filepath, "rb"], {})
+        if openpyxl is not None:
+            type2opener["xlsx"] = (open, [filepath, "rb"], {})
 
         # Specify the interface that shall be used
         opener, op_args, op_kwargs = type2opener[filetype]
         Interface = self.type2interface[filetype]
 
+        if filetype == "pys" and is_binary_pys(filepath):
+            # Binary pys containers are not bz2 compressed as a whole
+            opener, op_args, op_kwargs = open, [filepath, "rb"], {}
+            Interface = BinaryPys
+
         # Set state for file open
         self.opening = True
 
@@ -366,10 +440,14 @@ class FileActions(Actions):
                 # Make loading safe
                 self.approve(filepath)
 
-                if xlrd is None:
-                    interface_errors = (ValueError, )
-                else:
-                    interface_errors = (ValueError, xlrd.biffh.XLRDError)
+                interface_errors = (ValueError, zipfile.BadZipfile,
+                                    ExpatError)
+
+                if xlrd is not None:
+                    interface_errors += (xlrd.biffh.XLRDError, )
+
+                if openpyxl is not None:
+                    interface_errors += (InvalidFileException, )
 
                 try:
                     wx.BeginBusyCursor()
@@ -377,6 +455,8 @@ class FileActions(Actions):
                     self.clear()
                     interface = Interface(self.grid.code_array, infile)
                     interface.to_code_array()
+                    if filetype in ["pys", "pysu"]:
+                        self._open_journal(filepath)
                     self.grid.main_window.macro_panel.codetext_ctrl.SetText(
                         self.grid.code_array.macros)
 
@@ -488,6 +568,8 @@ class FileActions(Actions):
         tmpfilepath: String
         \tTemporary file file path for xls file
 
+        Returns True if the file has been moved.
+
         """
 
         try:
@@ -496,6 +578,9 @@ class FileActions(Actions):
         except OSError, err:
             # No tmp file present
             post_command_event(self.main_window, self.StatusBarMsg, text=err)
+            return False
+
+        return True
 
     def _save_xls(self, filepath):
         """Saves file as xls workbook
@@ -525,6 +610,56 @@ class FileActions(Actions):
                 # The main window does not exist any more
                 pass
 
+    def _save_xlsx(self, filepath):
+        """Saves file as xlsx workbook
+
+        Parameters
+        ----------
+
+        filepath: String
+        \tTarget file path for xlsx file
+
+        """
+
+        Interface = self.type2interface["xlsx"]
+
+        try:
+            with open(filepath, "wb") as outfile:
+                interface = Interface(self.grid.code_array, outfile)
+                interface.from_code_array()
+
+        except IOError, err:
+            try:
+                post_command_event(self.main_window, self.StatusBarMsg,
+                                   text=err)
+            except TypeError:
+                # The main window does not exist any more
+                pass
+
+    def _save_ods(self, filepath):
+        """Saves file as ods file
+
+        Parameters
+        ----------
+
+        filepath: String
+        \tTarget file path for ods file
+
+        """
+
+        try:
+            with open(filepath, "wb") as outfile:
+                interface = Ods(self.grid.code_array, outfile)
+                interface.from_code_array()
+
+        except IOError, err:
+            try:
+                post_command_event(self.main_window, self.StatusBarMsg,
+                                   text=err)
+            except TypeError:
+                # The main window does not exist any more
+                pass
+
     def _save_pys(self, filepath):
         """Saves file as pys file and returns True if save success
 
@@ -536,10 +671,17 @@ class FileActions(Actions):
 
         """
 
+        opener_kwargs = {"main_window": self.main_window}
+
+        if config["pys_save_version"] == BINARY_PYS_VERSION:
+            Opener, Interface = AOpen, BinaryPys
+        else:
+            Opener, Interface = ParallelBz2AOpen, Pys
+            opener_kwargs["processes"] = config["bz2_processes"]
+
         try:
-            with Bz2AOpen(filepath, "wb",
-                          main_window=self.main_window) as outfile:
-                interface = Pys(self.grid.code_array, outfile)
+            with Opener(filepath, "wb", **opener_kwargs) as outfile:
+                interface = Interface(self.grid.code_array, outfile)
                 interface.from_code_array()
 
         except (IOError, ValueError), err:
@@ -602,6 +744,49 @@ class FileActions(Actions):
                 post_command_event(self.main_window, self.StatusBarMsg,
                                    text=msg)
 
+    def _is_journal_save(self, filepath, filetype, compact):
+        """Returns True if changes are appended to the journal of filepath
+
+        A full save compacts the journal. It is done on request, if
+        journaled saving is disabled, if the file differs from the
+        journaled file or if the journal is large compared to the file.
+
+        """
+
+        if compact or self.journal is None or \
+           not config["journal_save"] or \
+           filetype not in ["pys", "pysu"] or \
+           self.journal.filepath != filepath or \
+           not os.path.isfile(filepath):
+            return False
+
+        max_size = os.path.getsize(filepath) * \
+            config["journal_compaction_ratio"]
+
+        return self.journal.get_size() <= max_size
+
+    def _save_journal(self):
+        """Appends changes to the journal and signs the journal"""
+
+        try:
+            if self.journal.append():
+                self._save_sign(self.journal.journal_path)
+
+        except (IOError, OSError), err:
+            try:
+                post_command_event(self.main_window, self.StatusBarMsg,
+                                   text=unicode(err))
+            except TypeError:
+                # The main window does not exist any more
+                pass
+
+    def _compact_journal(self, filepath):
+        """Removes journal after a full save of filepath, restarts journal"""
+
+        self._stop_journal()
+        PysJournal(self.code_array, filepath).remove()
+        self._start_journal(filepath)
+
     def save(self, event):
         """Saves a file that is specified in event.attr
 
@@ -609,6 +794,8 @@ class FileActions(Actions):
         ----------
         event.attr: Dict
         \tkey filepath contains file path of file to be saved
+        \tkey filetype contains file type, defaults to pys
+        \tkey compact forces a full save of journaled files if True
 
         """
 
@@ -619,10 +806,18 @@ class FileActions(Actions):
         except KeyError:
             filetype = "pys"
 
+        compact = event.attr.get("compact", False)
+
         # If saving is already in progress abort
         if self.saving:
             return
 
+        if self._is_journal_save(filepath, filetype, compact):
+            self._set_save_states()
+            self._save_journal()
+            self._release_save_states()
+            return
+
         # Use tmpfile to make sure that old save file does not get lost
         # on abort save
 
@@ -634,11 +829,24 @@ class FileActions(Actions):
             self._move_tmp_file(tmpfilepath, filepath)
             self._release_save_states()
 
+        elif filetype == "xlsx":
+            self._set_save_states()
+            self._save_xlsx(tmpfilepath)
+            self._move_tmp_file(tmpfilepath, filepath)
+            self._release_save_states()
+
+        elif filetype == "ods":
+            self._set_save_states()
+            self._save_ods(tmpfilepath)
+            self._move_tmp_file(tmpfilepath, filepath)
+            self._release_save_states()
+
         elif filetype == "pys" or filetype == "all":
             self._set_save_states()
             if self._save_pys(tmpfilepath):
                 # Writing was successful
-                self._move_tmp_file(tmpfilepath, filepath)
+                if self._move_tmp_file(tmpfilepath, filepath):
+                    self._compact_journal(filepath)
                 self._save_sign(filepath)
             self._release_save_states()
 
@@ -646,7 +854,8 @@ class FileActions(Actions):
             self._set_save_states()
             if self._save_pysu(tmpfilepath):
                 # Writing was successful
-                self._move_tmp_file(tmpfilepath, filepath)
+                if self._move_tmp_file(tmpfilepath, filepath):
+                    self._compact_journal(filepath)
                 self._save_sign(filepath)
             self._release_save_states()
 
@@ -660,6 +869,42 @@ class FileActions(Actions):
         except OSError:
             pass
 
+    def autosave(self):
+        """Writes a snapshot of the grid to the autosave file
+
+        The snapshot is taken in the GUI thread and serialized in a
+        background thread so that the user may continue editing.
+        Nothing is done while a file is opened or saved or while the
+        previous autosave is running. The autosave file is removed if
+        there are no unsaved changes.
+
+        """
+
+        if self.saving or self.opening or self.autosaver.is_running():
+            return
+
+        if not undo.stack().haschanged():
+            self.autosaver.remove()
+            return
+
+        def on_error(message):
+            statustext = _("Autosave failed: {msg}").format(msg=message)
+            try:
+                post_command_event(self.main_window, self.StatusBarMsg,
+                                   text=statustext)
+            except TypeError:
+                # The main window does not exist any more
+                pass
+
+        snapshot = self.code_array.snapshot()
+        self.autosaver.save(snapshot, self.main_window.filepath, on_error)
+
+    def stop_autosave(self):
+        """Waits for a running autosave and removes the autosave file"""
+
+        self.autosaver.join()
+        self.autosaver.remove()
+
 
 class TableRowActionsMixin(Actions):
     """Table row controller actions"""
@@ -900,35 +1145,35 @@ class TableActions(TableRowActionsMixin, TableColumnActionsMixin,
 
         no_pasted_cells = 0
 
-        for src_row, row_data in enumerate(data):
-            target_row = tl_row + src_row
+        # Cells are written in one step when the transaction is left
+        with self.grid.actions.cell_transaction():
+            for src_row, row_data in enumerate(data):
+                target_row = tl_row + src_row
 
-            if self.grid.actions._is_aborted(src_row, _("Pasting cells... "),
-                                             freq=freq):
-                self._abort_paste()
-                return False
+                if self.grid.actions._is_aborted(src_row,
+                                                 _("Pasting cells... "),
+                                                 freq=freq):
+                    self._abort_paste()
+                    return False
 
-            # Check if rows fit into grid
-            if target_row >= grid_rows:
-                row_overflow = True
-                break
+                # Check if rows fit into grid
+                if target_row >= grid_rows:
+                    row_overflow = True
+                    break
 
-            for src_col, cell_data in enumerate(row_data):
-                target_col = tl_col + src_col
+                for src_col, cell_data in enumerate(row_data):
+                    target_col = tl_col + src_col
 
-                if target_col >= grid_cols:
-                    col_overflow = True
-                    break
+                    if target_col >= grid_cols:
+                        col_overflow = True
+                        break
 
-                if cell_data is not None:
-                    # Is only None if pasting into selection
-                    key = target_row, target_col, tl_tab
+                    if cell_data is not None:
+                        # Is only None if pasting into selection
+                        key = target_row, target_col, tl_tab
 
-                    try:
                         CellActions.set_code(self, key, cell_data)
                         no_pasted_cells += 1
-                    except KeyError:
-                        pass
 
         if row_overflow or col_overflow:
             self._show_final_overflow_message(row_overflow, col_overflow)
@@ -938,37 +1183,265 @@ class TableActions(TableRowActionsMixin, TableColumnActionsMixin,
 
         self.pasting = False
 
-    def selection_paste_data_gen(self, selection, data, freq=None):
-        """Generator that yields data for selection paste"""
+    def paste_chunks(self, tl_key, chunks, freq=None):
+        """Pastes chunks of rows into grid from top left cell tl_key
 
-        (bb_top, bb_left), (bb_bottom, bb_right) = \
-            selection.get_grid_bbox(self.grid.code_array.shape)
-        bbox_height = bb_bottom - bb_top + 1
-        bbox_width = bb_right - bb_left + 1
+        In contrast to paste_to_current_cell, each chunk is written into
+        the grid in one go. The pasted chunks are undone together.
+
+        Parameters
+        ----------
+
+        tl_key: Tuple
+        \tKey of top left cell of paste area
+        chunks: Iterable of lists of sequences of strings
+        \tEach chunk is a list of rows. None values are not pasted.
+        \tChunks may also be 2-dim numpy arrays of strings.
+        freq: Integer, defaults to None
+        \tStatus message frequency
+
+        """
+
+        # Mark content as changed
+        post_command_event(self.main_window, self.ContentChangedMsg)
+
+        self.pasting = True
+
+        grid_rows, grid_cols, __ = self.grid.code_array.shape
+
+        self.need_abort = False
+
+        tl_row, tl_col, tl_tab = self._get_full_key(tl_key)
+
+        row_overflow = False
+        col_overflow = False
+
+        no_pasted_cells = 0
+
+        target_row = tl_row
+        max_cols = grid_cols - tl_col
+
+        with undo.group(_("Paste")):
+            for chunk in chunks:
+                if self.grid.actions._is_aborted(target_row - tl_row,
+                                                 _("Pasting cells... "),
+                                                 freq=freq):
+                    self._abort_paste()
+                    return False
+
+                # Check if rows fit into grid
+                if target_row + len(chunk) > grid_rows:
+                    chunk = chunk[:grid_rows - target_row]
+                    row_overflow = True
+
+                if isinstance(chunk, numpy.ndarray):
+                    # Dense block of code strings
+                    if chunk.shape[1] > max_cols:
+                        col_overflow = True
+                        chunk = chunk[:, :max_cols]
+
+                    rows = xrange(target_row, target_row + len(chunk))
+                    cols = xrange(tl_col, tl_col + chunk.shape[1])
+                    keys = itertools.product(rows, cols, [tl_tab])
+                    cells = zip(keys, chunk.ravel().tolist())
+                    target_row += len(chunk)
+
+                else:
+                    cells = []
+
+                    for row_data in chunk:
+                        if len(row_data) > max_cols:
+                            col_overflow = True
+                            row_data = row_data[:max_cols]
+
+                        cells.extend(
+                            ((target_row, tl_col + col, tl_tab), code)
+                            for col, code in enumerate(row_data)
+                            if code is not None)
+                        target_row += 1
+
+                if cells:
+                    self.grid.code_array.set_cells(cells)
+                    no_pasted_cells += len(cells)
+
+                if row_overflow:
+                    break
+
+        if row_overflow or col_overflow:
+            self._show_final_overflow_message(row_overflow, col_overflow)
 
-        for row, row_data in enumerate(itertools.cycle(data)):
-            # Break if row is not in selection bbox
-            if row >= bbox_height:
-                break
+        else:
+            self._show_final_paste_message(tl_key, no_pasted_cells)
 
-            # Duplicate row data if selection is wider than row data
-            row_data = list(row_data)
-            duplicated_row_data = row_data * (bbox_width // len(row_data) + 1)
-            duplicated_row_data = duplicated_row_data[:bbox_width]
+        self.pasting = False
 
-            for col in xrange(len(duplicated_row_data)):
-                if (bb_top, bb_left + col) not in selection:
-                    duplicated_row_data[col] = None
+    def paste_arrays(self, tl_key, arrays):
+        """Places arrays as array blocks side by side from tl_key
 
-            yield duplicated_row_data
+        The arrays are not copied into cells. Empty cells in the block
+        areas resolve to the array values. All blocks are undone together.
+
+        Parameters
+        ----------
+
+        tl_key: Tuple
+        \tKey of top left cell of the first block
+        arrays: List of source, array tuples
+        \tSource is a tuple of file path and array name in npz file or None
+
+        """
+
+        # Mark content as changed
+        post_command_event(self.main_window, self.ContentChangedMsg)
+
+        grid_rows, grid_cols, __ = self.grid.code_array.shape
+        array_blocks = self.grid.code_array.array_blocks
+
+        top, left, tab = self._get_full_key(tl_key)
+
+        row_overflow = False
+        col_overflow = False
+
+        no_cells = 0
+
+        with undo.group(_("Import arrays")):
+            for source, array in arrays:
+                rows, cols = array_blocks.get_block_shape(array)
+
+                row_overflow = row_overflow or top + rows > grid_rows
+                col_overflow = col_overflow or left + cols > grid_cols
+
+                array_blocks.append((top, left, tab, array, source))
+
+                no_cells += rows * cols
+                left += cols
+
+        # Cells may reference empty cells that are now backed by arrays
+        self.grid.code_array.result_cache.clear()
+        self.grid.code_array.result_versions.clear()
+
+        if row_overflow or col_overflow:
+            self._show_final_overflow_message(row_overflow, col_overflow)
+
+        else:
+            self._show_final_paste_message(tl_key, no_cells)
+
+    def _get_selection_spans(self, selection):
+        """Generator of (row, left, right) spans of cells in selection
+
+        The spans are taken from the block, row, column and cell parts
+        of the selection and clipped to the grid. right is exclusive.
+        Spans of different parts may overlap.
+
+        Parameters
+        ----------
+
+        selection: Selection
+        \tSelection that is split into spans
+
+        """
+
+        grid_rows, grid_cols, __ = self.grid.code_array.shape
+
+        for (top, left), (bottom, right) in \
+                zip(selection.block_tl, selection.block_br):
+            top = 0 if top is None else top
+            left = 0 if left is None else left
+            bottom = grid_rows - 1 if bottom is None else bottom
+            right = grid_cols - 1 if right is None else right
+
+            for row in xrange(top, min(bottom + 1, grid_rows)):
+                yield row, left, min(right + 1, grid_cols)
+
+        for row in selection.rows:
+            if row < grid_rows:
+                yield row, 0, grid_cols
+
+        for col in selection.cols:
+            if col < grid_cols:
+                for row in xrange(grid_rows):
+                    yield row, col, col + 1
+
+        for row, col in selection.cells:
+            if row < grid_rows and col < grid_cols:
+                yield row, col, col + 1
 
     def paste_to_selection(self, selection, data, freq=None):
-        """Pastes data into grid selection"""
+        """Pastes data into grid selection
+
+        data is tiled over the selection, starting at the top left cell
+        of its bounding box. Cells outside the selection are left as is.
+        All cells are written in one step.
+
+        Parameters
+        ----------
 
-        (bb_top, bb_left), (bb_bottom, bb_right) = \
+        selection: Selection
+        \tSelection that is pasted into
+        data: iterable of iterables where inner iterable returns string
+        \tThe outer iterable represents rows
+        freq: Integer, defaults to None
+        \tStatus message frequency
+
+        """
+
+        self.pasting = True
+        self.need_abort = False
+
+        (bb_top, bb_left), __ = \
             selection.get_grid_bbox(self.grid.code_array.shape)
-        adjusted_data = self.selection_paste_data_gen(selection, data)
-        self.paste_to_current_cell((bb_top, bb_left), adjusted_data, freq=freq)
+        tl_key = self._get_full_key((bb_top, bb_left))
+        tab = tl_key[2]
+
+        pattern = [list(row_data) for row_data in data]
+
+        cells = []
+
+        # Tiled pattern rows are shared by spans with equal columns
+        tiles = {}
+
+        if pattern:
+            for i, (row, left, right) in \
+                    enumerate(self._get_selection_spans(selection)):
+                if self.grid.actions._is_aborted(i, _("Pasting cells... "),
+                                                 freq=freq):
+                    self._abort_paste()
+                    return False
+
+                tile_key = (row - bb_top) % len(pattern), left, right
+
+                try:
+                    tile = tiles[tile_key]
+
+                except KeyError:
+                    pattern_row = pattern[tile_key[0]]
+                    width = len(pattern_row)
+                    tile = []
+
+                    if width:
+                        # Repeat the pattern row so that it covers the span
+                        offset = (left - bb_left) % width
+                        repeats = (offset + right - left) // width + 1
+                        codes = pattern_row * repeats
+                        tile = [(col, code) for col, code in itertools.izip(
+                                xrange(left, right), codes[offset:])
+                                if code is not None]
+
+                    tiles[tile_key] = tile
+
+                cells.extend(((row, col, tab), code) for col, code in tile)
+
+        if len(selection.block_tl) + len(selection.rows) + \
+           len(selection.cols) + len(selection.cells) > 1:
+            # Spans of different selection parts may overlap
+            cells = dict(cells).items()
+
+        if cells:
+            self.grid.code_array.set_cells(cells)
+
+        self._show_final_paste_message(tl_key, len(cells))
+
+        self.pasting = False
 
     def paste(self, tl_key, data, freq=None):
         """Pastes data into grid, marks grid changed
@@ -1019,6 +1492,7 @@ class TableActions(TableRowActionsMixin, TableColumnActionsMixin,
 
         # Clear caches
         self.code_array.result_cache.clear()
+        self.code_array.result_versions.clear()
 
     def replace_cells(self, key, sorted_row_idxs):
         """Replaces cells in current selection so that they are sorted"""
@@ -1039,11 +1513,12 @@ class TableActions(TableRowActionsMixin, TableColumnActionsMixin,
                         self.grid.code_array((__row, __col, __tab))
                     del_keys.append((__row, __col, __tab))
 
-        for key in del_keys:
-            self.grid.code_array.pop(key)
+        with self.grid.actions.cell_transaction():
+            for key in del_keys:
+                CellActions.delete_cell(self, key)
 
-        for key in new_keys:
-            CellActions.set_code(self, key, new_keys[key])
+            for key in new_keys:
+                CellActions.set_code(self, key, new_keys[key])
 
     def sort_ascending(self, key):
         """Sorts selection (or grid if none) corresponding to column of key"""
@@ -1379,6 +1854,9 @@ class GridActions(Actions):
         no_tabs = self.grid.code_array.shape[2] - 1
 
         if 0 <= newtable <= no_tabs:
+            # Load table content if it has not been accessed yet
+            self.grid.code_array.dict_grid.load_table(newtable)
+
             self.grid.current_table = newtable
 
             self.grid.SetToolTip(None)
@@ -1522,10 +2000,43 @@ class SelectionActions(Actions):
                 for col in xrange(col_slc.start, col_slc.stop, col_slc.step):
                     self.select_cell(row, col, add_to_selected=True)
 
+    def _is_area_selected(self, selection, top, left, bottom, right):
+        """Returns True if all cells of the area are in selection
+
+        Only areas that are covered by one block, by rows, by columns or
+        by one cell of the selection are detected.
+
+        Parameters
+        ----------
+
+        selection: Selection
+        \tSelection that is checked
+        top, left, bottom, right: Integer
+        \tBounding box of the area
+
+        """
+
+        for (sel_top, sel_left), (sel_bottom, sel_right) in \
+                itertools.izip(selection.block_tl, selection.block_br):
+            if (sel_top is None or sel_top <= top) and \
+               (sel_left is None or sel_left <= left) and \
+               (sel_bottom is None or bottom <= sel_bottom) and \
+               (sel_right is None or right <= sel_right):
+                return True
+
+        if set(xrange(top, bottom + 1)).issubset(selection.rows) or \
+           set(xrange(left, right + 1)).issubset(selection.cols):
+            return True
+
+        return top == bottom and left == right and \
+            (top, left) in selection.cells
+
     def delete_selection(self, selection=None):
         """Deletes selection, marks content as changed
 
         If selection is None then the current grid selection is used.
+        Array blocks that lie completely inside of the selection are
+        removed.
 
         Parameters
         ----------
@@ -1543,11 +2054,31 @@ class SelectionActions(Actions):
 
         current_table = self.grid.current_table
 
-        for row, col, tab in self.grid.code_array.dict_grid.keys():
-            if tab == current_table and (row, col) in selection:
-                self.grid.actions.delete_cell((row, col, tab))
+        def delete_cells():
+            """Deletes cells with code in selection in one undo step"""
+
+            with self.grid.actions.cell_transaction():
+                for row, col, tab in self.grid.code_array.dict_grid.keys():
+                    if tab == current_table and (row, col) in selection:
+                        self.grid.actions.delete_cell((row, col, tab))
+
+        array_blocks = self.grid.code_array.array_blocks
+
+        kept_blocks = [block for block, bbox in itertools.izip(
+                       array_blocks, array_blocks.get_bboxes())
+                       if block[2] != current_table or
+                       not self._is_area_selected(selection, *bbox)]
+
+        if len(kept_blocks) < len(array_blocks):
+            with undo.group(_("Delete")):
+                array_blocks.set_blocks(kept_blocks)
+                delete_cells()
+
+        else:
+            delete_cells()
 
         self.grid.code_array.result_cache.clear()
+        self.grid.code_array.result_versions.clear()
 
     def delete(self):
         """Deletes a selection if any else deletes the cursor cell
@@ -1573,11 +2104,14 @@ class SelectionActions(Actions):
 
         selection = self.get_selection()
         current_table = self.grid.current_table
-        for row, col, tab in self.grid.code_array.dict_grid.keys():
-            if tab == current_table and (row, col) in selection:
-                self.grid.actions.quote_code((row, col, tab))
+
+        with self.grid.actions.cell_transaction():
+            for row, col, tab in self.grid.code_array.dict_grid.keys():
+                if tab == current_table and (row, col) in selection:
+                    self.grid.actions.quote_code((row, col, tab))
 
         self.grid.code_array.result_cache.clear()
+        self.grid.code_array.result_versions.clear()
 
     def copy_selection_access_string(self):
         """Copys access_string to selection to the clipboard
@@ -1805,11 +2339,12 @@ class FindActions(Actions):
         # Mark content as changed
         post_command_event(self.main_window, self.ContentChangedMsg)
 
-        for findpos in findpositions:
-            old_code = self.grid.code_array(findpos)
-            new_code = old_code.replace(find_string, replace_string)
+        with self.grid.actions.cell_transaction():
+            for findpos in findpositions:
+                old_code = self.grid.code_array(findpos)
+                new_code = old_code.replace(find_string, replace_string)
 
-            self.grid.code_array[findpos] = new_code
+                self.grid.actions.set_code(findpos, new_code)
 
         statustext = _("Replaced {no_cells} cells.")
         statustext = statustext.format(no_cells=len(findpositions))
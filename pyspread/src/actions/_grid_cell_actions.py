@@ -19,6 +19,8 @@
 # along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
 # --------------------------------------------------------------------
 
+from contextlib import contextmanager
+
 import wx
 
 import src.lib.i18n as i18n
@@ -47,9 +49,55 @@ Provides:
 class CellActions(Actions):
     """Mixin class that supplies Cell code additions, changes and deletion"""
 
+    # Key, code tuples that are collected inside cell_transaction
+    _transaction_cells = None
+
+    @contextmanager
+    def cell_transaction(self):
+        """Context manager that defers cell changes until it is left
+
+        Inside the transaction, set_code and delete_cell only collect the
+        changes. On normal exit, all changes are written with one set_cells
+        call, which is one undo step and resets the result cache once.
+        Cells whose code does not change are skipped. One ContentChangedMsg
+        is posted if any cell has changed. If an exception is raised inside
+        the transaction then the collected changes are discarded. Nested
+        transactions are merged into the outermost one.
+
+        """
+
+        if self._transaction_cells is not None:
+            yield
+            return
+
+        self._transaction_cells = []
+
+        try:
+            yield
+            cells = self._transaction_cells
+
+        finally:
+            self._transaction_cells = None
+
+        code_array = self.grid.code_array
+
+        # The last change of a cell wins
+        cells = [(key, code) for key, code in dict(cells).iteritems()
+                 if (code or None) != code_array(key)]
+
+        if cells:
+            code_array.set_cells(cells)
+
+            # Mark content as changed
+            post_command_event(self.main_window, self.ContentChangedMsg)
+
     def set_code(self, key, code):
         """Sets code of cell key, marks grid as changed"""
 
+        if self._transaction_cells is not None:
+            self._transaction_cells.append((key, code))
+            return
+
         old_code = self.grid.code_array(key)
 
         try:
@@ -80,6 +128,10 @@ class CellActions(Actions):
     def delete_cell(self,  key):
         """Deletes key cell"""
 
+        if self._transaction_cells is not None:
+            self._transaction_cells.append((key, None))
+            return
+
         try:
             self.code_array.pop(key)
 
@@ -87,6 +139,7 @@ class CellActions(Actions):
             pass
 
         self.grid.code_array.result_cache.clear()
+        self.grid.code_array.result_versions.clear()
 
     def _get_absolute_reference(self, ref_key):
         """Returns absolute reference code for key."""
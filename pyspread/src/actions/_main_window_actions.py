@@ -43,7 +43,9 @@ Provides:
 import ast
 import base64
 import bz2
+from itertools import izip
 import os
+import zipfile
 
 import wx
 import wx.html
@@ -57,8 +59,12 @@ import src.lib.i18n as i18n
 from src.sysvars import get_help_path
 
 from src.config import config
+from src.interfaces.sqlite import SqliteQuery, get_table_names
+from src.interfaces.sqlite import quote_identifier, write_table
 from src.lib.__csv import CsvInterface, TxtGenerator
+from src.lib.arrayio import NpyFile, get_area_array, save_array
 from src.lib.charts import fig2bmp, fig2x
+from src.lib.resultstrings import get_result_string, iter_result_strings
 from src.gui._printout import Printout
 from src.gui._events import post_command_event, EventMixin
 from src.lib._grid_cairo_renderer import GridCairoRenderer
@@ -69,6 +75,12 @@ try:
 except ImportError:
     cairo = None
 
+try:
+    import sqlite3
+
+except ImportError:
+    sqlite3 = None
+
 # use ugettext instead of getttext to avoid unicode errors
 _ = i18n.language.ugettext
 
@@ -114,6 +126,76 @@ class ExchangeActions(Actions):
 
         return TxtGenerator(self.main_window, path)
 
+    def _import_npy(self, path):
+        """NumPy npy and npz import workflow
+
+        Large arrays are memory-mapped instead of being read into memory.
+
+        """
+
+        try:
+            return NpyFile(path)
+
+        except (IOError, ValueError, KeyError, zipfile.BadZipfile), err:
+            msg = _("Error reading array file {filepath}.\n \n"
+                    "Error message:\n{msg}").format(filepath=path, msg=err)
+            short_msg = _('Error reading array file')
+            self.main_window.interfaces.display_warning(msg, short_msg)
+
+    def _import_sqlite(self, path):
+        """SQLite query import workflow
+
+        The query result is fetched in chunks when it is pasted. Errors
+        that occur while fetching are reported and end the import.
+
+        """
+
+        try:
+            table_names = get_table_names(path)
+
+        except sqlite3.Error, err:
+            msg = _("Error reading database {filepath}.\n \n"
+                    "Error message:\n{msg}").format(filepath=path, msg=err)
+            short_msg = _('Error reading SQLite database')
+            self.main_window.interfaces.display_warning(msg, short_msg)
+            return
+
+        if table_names:
+            default_query = u"SELECT * FROM " + \
+                quote_identifier(table_names[0])
+        else:
+            default_query = u""
+
+        query = self.main_window.interfaces.get_text_from_user(
+            _("Enter SQL query. The result is imported at the cursor."),
+            _("SQLite import"), default_query)
+
+        if not query:
+            return
+
+        def on_error(err):
+            """Reports errors that occur while the query result is pasted"""
+
+            msg = _("The query could not be run completely. Rows up to the "
+                    "error have been imported.\n \n"
+                    "Error message:\n{msg}").format(msg=err)
+            short_msg = _('Error in SQL query')
+            self.main_window.interfaces.display_warning(msg, short_msg)
+
+        sqlite_query = SqliteQuery(path, query, on_error=on_error)
+
+        try:
+            sqlite_query.check()
+
+        except sqlite3.Error, err:
+            msg = _("The query could not be run.\n \n"
+                    "Error message:\n{msg}").format(msg=err)
+            short_msg = _('Error in SQL query')
+            self.main_window.interfaces.display_warning(msg, short_msg)
+            return
+
+        return sqlite_query
+
     def import_file(self, filepath, filterindex):
         """Imports external file
 
@@ -123,7 +205,8 @@ class ExchangeActions(Actions):
         filepath: String
         \tPath of import file
         filterindex: Integer
-        \tIndex for type of file, 0: csv, 1: tab-delimited text file
+        \tIndex for type of file, 0: csv, 1: tab-delimited text file,
+        \t2: npy or npz file, 3: SQLite database
 
         """
 
@@ -136,6 +219,12 @@ class ExchangeActions(Actions):
         elif filterindex == 1:
             # TXT import option choice
             return self._import_txt(filepath)
+        elif filterindex == 2:
+            # NumPy array import option choice
+            return self._import_npy(filepath)
+        elif filterindex == 3:
+            # SQLite query import option choice
+            return self._import_sqlite(filepath)
         else:
             msg = _("Unknown import choice {choice}.")
             msg = msg.format(choice=filterindex)
@@ -184,6 +273,76 @@ class ExchangeActions(Actions):
             short_msg = _('Error writing CSV file')
             self.main_window.interfaces.display_warning(msg, short_msg)
 
+    def _export_npy(self, filepath, data):
+        """NumPy npy export of code_array results
+
+        Parameters
+        ----------
+        filepath: String
+        \tPath of export file
+        data: CsvExportData
+        \tExport area of the code array
+
+        """
+
+        array = get_area_array(data.code_array, data.top, data.bottom,
+                               data.left, data.right, data.tab)
+
+        try:
+            save_array(filepath, array)
+
+        except IOError, err:
+            msg = _("The file {filepath} could not be fully written\n \n"
+                    "Error message:\n{msg}")
+            msg = msg.format(filepath=filepath, msg=err)
+            short_msg = _('Error writing array file')
+            self.main_window.interfaces.display_warning(msg, short_msg)
+
+    def _export_sqlite(self, filepath, data):
+        """SQLite table export of code_array results
+
+        Parameters
+        ----------
+        filepath: String
+        \tPath of database file
+        data: CsvExportData
+        \tExport area of the code array
+
+        """
+
+        interfaces = self.main_window.interfaces
+
+        table_name = interfaces.get_text_from_user(
+            _("Enter name of the database table."), _("SQLite export"),
+            u"table_{tab}".format(tab=data.tab))
+
+        if not table_name:
+            return
+
+        try:
+            replace = table_name in get_table_names(filepath)
+
+            if replace:
+                msg = _("Table {table} exists. Replace it?").format(
+                    table=table_name)
+                short_msg = _("Replace table")
+                if not interfaces.get_warning_choice(msg, short_msg):
+                    return
+
+            # Columns are named after the grid columns
+            column_names = [u"col_{col}".format(col=col)
+                            for col in xrange(data.left, data.right)]
+
+            write_table(filepath, table_name, data, column_names,
+                        replace=replace)
+
+        except sqlite3.Error, err:
+            msg = _("The table {table} could not be written to {filepath}\n"
+                    " \nError message:\n{msg}")
+            msg = msg.format(table=table_name, filepath=filepath, msg=err)
+            short_msg = _('Error writing SQLite database')
+            interfaces.display_warning(msg, short_msg)
+
     def _export_figure(self, filepath, data, format):
         """Export of single cell that contains a matplotlib figure
 
@@ -237,6 +396,12 @@ class ExchangeActions(Actions):
         elif __filter == "csv":
             self._export_csv(filepath, data, preview_data=preview_data)
 
+        elif __filter == "npy":
+            self._export_npy(filepath, data)
+
+        elif __filter == "sqlite":
+            self._export_sqlite(filepath, data)
+
         elif __filter in ["pdf", "svg"]:
             self.export_cairo(filepath, __filter)
 
@@ -408,33 +573,28 @@ class ClipboardActions(Actions):
 
         """
 
-        data = self.grid.code_array(key)
-        self.grid.code_array.result_cache.clear()
+        dict_grid = self.grid.code_array.dict_grid
 
-        return data
+        # Bypasses the index checks of the DataArray, which dominate copy
+        dict_grid.load_table(key[2])
 
-    def copy(self, selection, getter=None, delete=False):
-        """Returns code from selection in a tab separated string
+        return dict.get(dict_grid, key)
 
-        Cells that are not in selection are included as empty.
+    def _get_copy_bboxes(self, selection):
+        """Returns selection bounding box and copied bounding box
+
+        The selection bounding box is None if there is no selection. The
+        copied bounding box is the cursor cell in this case. It contains
+        no None values.
 
         Parameters
         ----------
 
         selection: Selection object
         \tSelection of cells in current table that shall be copied
-        getter: Function, defaults to _get_code
-        \tGetter function for copy content
-        delete: Bool
-        \tDeletes all cells inside selection
 
         """
 
-        if getter is None:
-            getter = self._get_code
-
-        tab = self.grid.current_table
-
         selection_bbox = selection.get_bbox()
 
         if not selection_bbox:
@@ -444,41 +604,126 @@ class ClipboardActions(Actions):
         else:
             replace_none = self.main_window.grid.actions._replace_bbox_none
             (bb_top, bb_left), (bb_bottom, bb_right) = \
-                replace_none(selection.get_bbox())
+                replace_none(selection_bbox)
+
+        return selection_bbox, ((bb_top, bb_left), (bb_bottom, bb_right))
+
+    def _get_copy_keys(self, selection, selection_bbox, bbox, tab, sparse):
+        """Returns list of keys of cells in bbox that are copied
+
+        Parameters
+        ----------
+
+        selection: Selection object
+        \tSelection of cells in current table that shall be copied
+        selection_bbox: Tuple or None
+        \tBounding box of selection, None if there is no selection
+        bbox: Tuple
+        \tBounding box without None values
+        tab: Integer
+        \tTable of the cells
+        sparse: Bool
+        \tOnly filled cells are returned if True
+
+        """
+
+        (bb_top, bb_left), (bb_bottom, bb_right) = bbox
+
+        dict_grid = self.grid.code_array.dict_grid
+
+        def is_copied(row, col):
+            """Returns True if cell is in selection or there is none"""
+
+            return not selection_bbox or (row, col) in selection
+
+        if sparse:
+            dict_grid.load_table(tab)
+
+            area = (bb_bottom - bb_top + 1) * (bb_right - bb_left + 1)
+
+            if area > dict.__len__(dict_grid):
+                # Filled cells are fewer than cells in the area
+                return [(row, col, key_tab)
+                        for row, col, key_tab in dict.iterkeys(dict_grid)
+                        if key_tab == tab and
+                        bb_top <= row <= bb_bottom and
+                        bb_left <= col <= bb_right and is_copied(row, col)]
+
+            return [(row, col, tab)
+                    for row in xrange(bb_top, bb_bottom + 1)
+                    for col in xrange(bb_left, bb_right + 1)
+                    if dict.__contains__(dict_grid, (row, col, tab)) and
+                    is_copied(row, col)]
+
+        return [(row, col, tab)
+                for row in xrange(bb_top, bb_bottom + 1)
+                for col in xrange(bb_left, bb_right + 1)
+                if is_copied(row, col)]
+
+    def copy(self, selection, getter=None, delete=False):
+        """Returns code from selection in a tab separated string
 
-        data = []
+        Cells that are not in selection are included as empty.
+        Without getter, only filled cells are visited.
+
+        Parameters
+        ----------
+
+        selection: Selection object
+        \tSelection of cells in current table that shall be copied
+        getter: Function, defaults to _get_code
+        \tGetter function for copy content, called for all cells
+        delete: Bool
+        \tDeletes all cells inside selection in one undo step
 
-        for __row in xrange(bb_top, bb_bottom + 1):
-            data.append([])
+        """
+
+        sparse = getter is None
 
-            for __col in xrange(bb_left, bb_right + 1):
-                # Only copy content if cell is in selection or
-                # if there is no selection
+        if sparse:
+            getter = self._get_code
+
+        tab = self.grid.current_table
 
-                if (__row, __col) in selection or not selection_bbox:
-                    content = getter((__row, __col, tab))
+        selection_bbox, bbox = self._get_copy_bboxes(selection)
+        (bb_top, bb_left), (bb_bottom, bb_right) = bbox
 
-                    # Delete cell if delete flag is set
+        keys = self._get_copy_keys(selection, selection_bbox, bbox, tab,
+                                   sparse)
 
-                    if delete:
-                        try:
-                            self.grid.code_array.pop((__row, __col, tab))
+        # Maps rows to dicts of column contents
+        row_contents = {}
 
-                        except KeyError:
-                            pass
+        for key in keys:
+            content = getter(key)
 
-                    # Store data
+            if content is not None:
+                row, col, __ = key
+                row_contents.setdefault(row, {})[col] = content
 
-                    if content is None:
-                        data[-1].append(u"")
+        if delete:
+            # Only cells with code are deleted
+            dict_grid = self.grid.code_array.dict_grid
+            cells = [(key, None) for key in keys
+                     if dict.__contains__(dict_grid, key)]
 
-                    else:
-                        data[-1].append(content)
+            if cells:
+                self.grid.code_array.set_cells(cells)
 
+        cols = xrange(bb_left, bb_right + 1)
+        empty_line = u"\t" * (len(cols) - 1)
+
+        def lines():
+            """Generator of tab separated lines of all rows in bbox"""
+
+            for row in xrange(bb_top, bb_bottom + 1):
+                if row in row_contents:
+                    contents = row_contents[row]
+                    yield "\t".join(contents.get(col, u"") for col in cols)
                 else:
-                    data[-1].append(u"")
+                    yield empty_line
 
-        return "\n".join("\t".join(line) for line in data)
+        return "\n".join(lines())
 
     def _get_result_string(self, key):
         """Returns unicode string of result for given key (one cell)
@@ -491,18 +736,46 @@ class ClipboardActions(Actions):
 
         """
 
-        row, col, tab = key
+        return get_result_string(self.grid.code_array[key])
 
-        result_obj = self.grid.code_array[row, col, tab]
+    def _get_result_strings(self, keys):
+        """Returns dict that maps keys to result strings, None if aborted
+
+        Uncached cells are evaluated in chunks, in worker processes if
+        possible. Progress is shown and <Esc> aborts.
+
+        Parameters
+        ----------
+
+        keys: List of 3-Tuples of Integer
+        \tCell keys
+
+        """
+
+        grid_actions = self.grid.actions
+        grid_actions.need_abort = False
+
+        result_strings = {}
+
+        chunks = iter_result_strings(self.grid.code_array, keys)
 
         try:
-            # Numpy object arrays are converted because of numpy repr bug
-            result_obj = result_obj.tolist()
+            for chunk_keys, strings in chunks:
+                if grid_actions._is_aborted(len(result_strings),
+                                            _("Copying results... "),
+                                            total_elements=len(keys),
+                                            freq=1):
+                    statustext = _("Copy results aborted.")
+                    post_command_event(self.main_window, self.StatusBarMsg,
+                                       text=statustext)
+                    return
 
-        except AttributeError:
-            pass
+                result_strings.update(izip(chunk_keys, strings))
+
+        finally:
+            chunks.close()
 
-        return unicode(result_obj)
+        return result_strings
 
     def copy_result(self, selection):
         """Returns result
@@ -510,7 +783,8 @@ class ClipboardActions(Actions):
         If selection consists of one cell only and result is a bitmap then
         the bitmap is returned.
         Otherwise the method returns string representations of the result
-        for the given selection in a tab separated string.
+        for the given selection in a tab separated string. None is
+        returned if the user aborts the evaluation of the results.
 
         """
 
@@ -548,9 +822,19 @@ class ClipboardActions(Actions):
                                dpi, zoom)
 
         # So we have result strings to be returned
-        getter = self._get_result_string
+        tab = self.grid.current_table
+
+        selection_bbox, bbox = self._get_copy_bboxes(selection)
+        keys = self._get_copy_keys(selection, selection_bbox, bbox, tab,
+                                   False)
+
+        result_strings = self._get_result_strings(keys)
+
+        if result_strings is None:
+            # Copy has been aborted
+            return
 
-        return self.copy(selection, getter=getter)
+        return self.copy(selection, getter=result_strings.get)
 
     def img2code(self, key, img):
         """Pastes wx.Image into single cell"""
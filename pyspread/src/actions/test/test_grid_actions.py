@@ -37,6 +37,7 @@ try:
 except ImportError:
     gnupg = None
 
+import numpy
 import pytest
 
 import wx
@@ -319,6 +320,9 @@ class TestFileActions(object):
         savefile = open(self.filename_save)
 
         assert savefile
+
+        # Pys version 0.1 files are bz2 compressed
+        assert savefile.read(3) == "BZh"
         savefile.close()
 
         # Test double filename
@@ -691,6 +695,78 @@ class TestTableActions(object):
         # Test equality of code_array after undo and subsequent redo
         undo_test(self.grid)
 
+    param_paste_to_selection = [
+        {'selection': Selection([(1, 1)], [(4, 4)], [], [], []),
+         'data': [["1", "2"], ["3"]]},
+        {'selection': Selection([(1, 1)], [(2, 2)], [], [], []),
+         'data': [["1", "2", "3"], ["4", "5", "6"], ["7", "8", "9"]]},
+        {'selection': Selection([(0, 0)], [(3, 3)], [], [], [(2, 5)]),
+         'data': [["1", None], ["3", "4"]]},
+        {'selection': Selection([], [], [997, 999], [], []),
+         'data': [["1", "2", "3"]]},
+        {'selection': Selection([], [], [], [98], [(5, 96)]),
+         'data': [["1"], ["2"], ["3"]]},
+        {'selection': Selection([(2, 2)], [(3, 3)], [], [], [(3, 3)]),
+         'data': [["1", "2"], []]},
+    ]
+
+    @params(param_paste_to_selection)
+    def test_paste_to_selection(self, selection, data):
+        """Tests paste_to_selection, which tiles data over selection"""
+
+        self.grid.actions.paste_to_selection(selection, data)
+
+        (bb_top, bb_left), __ = \
+            selection.get_grid_bbox(self.code_array.shape)
+
+        rows, cols, __ = self.code_array.shape
+
+        for row in xrange(rows):
+            for col in xrange(cols):
+                row_data = data[(row - bb_top) % len(data)]
+                if (row, col) in selection and row_data:
+                    res = row_data[(col - bb_left) % len(row_data)]
+                else:
+                    res = None
+
+                assert self.code_array((row, col, 0)) == res
+
+        # Test equality of code_array after undo and subsequent redo
+        undo_test(self.grid)
+
+    param_paste_chunks = [
+        {'tl_cell': (0, 0, 0), 'chunks': [[["78"]]],
+         'test_key': (0, 0, 0), 'test_val': "78"},
+        {'tl_cell': (40, 0, 0), 'chunks': [[[None]]],
+         'test_key': (40, 0, 0), 'test_val': None},
+        {'tl_cell': (40, 0, 0), 'chunks': [[[""]]],
+         'test_key': (40, 0, 0), 'test_val': None},
+        {'tl_cell': (0, 0, 0), 'chunks': [[["1", "2"]], [["3", "4"]]],
+         'test_key': (1, 1, 0), 'test_val': "4"},
+        {'tl_cell': (1, 1, 2), 'chunks': [[["1", "2"], ["3", "4"]]],
+         'test_key': (2, 1, 2), 'test_val': "3"},
+        {'tl_cell': (998, 99, 2), 'chunks': [[["1", "2"]], [["3", "4"]]],
+         'test_key': (999, 99, 2), 'test_val': "3"},
+        {'tl_cell': (999, 0, 0), 'chunks': [[["1"], ["2"]], [["3"]]],
+         'test_key': (999, 0, 0), 'test_val': "1"},
+        {'tl_cell': (1, 1, 2),
+         'chunks': [numpy.array([["1", "2"], ["3", "4"]], dtype="O")],
+         'test_key': (2, 2, 2), 'test_val': "4"},
+        {'tl_cell': (998, 98, 2),
+         'chunks': [numpy.array([["1", "2", "3"]] * 3, dtype="O")],
+         'test_key': (999, 99, 2), 'test_val': "2"},
+    ]
+
+    @params(param_paste_chunks)
+    def test_paste_chunks(self, tl_cell, chunks, test_key, test_val):
+        """Tests paste_chunks into self.grid"""
+
+        basic_setup_test(self.grid, self.grid.actions.paste_chunks, test_key,
+                         test_val, tl_cell, chunks)
+
+        # Test equality of code_array after undo and subsequent redo
+        undo_test(self.grid)
+
     param_change_grid_shape = [
         {'shape': (1, 1, 1)},
         {'shape': (2, 1, 3)},
@@ -1056,6 +1132,24 @@ class TestSelectionActions(object):
         # Test equality of code_array after undo and subsequent redo
         undo_test(self.grid)
 
+    def test_delete_selection_array_blocks(self):
+        """Tests that delete_selection removes selected array blocks"""
+
+        array_blocks = self.grid.code_array.array_blocks
+        array_blocks.append((1, 1, 0, numpy.ones((2, 2)), ("a.npy", None)))
+        array_blocks.append((5, 1, 0, numpy.ones((2, 2)), ("b.npy", None)))
+
+        # Partly selected blocks are kept
+        selection = Selection([(0, 0)], [(5, 5)], [], [], [])
+        self.grid.actions.delete_selection(selection)
+
+        assert [block[4][0] for block in array_blocks] == ["b.npy"]
+        assert self.grid.code_array[1, 1, 0] is None
+        assert self.grid.code_array[5, 1, 0] == 1
+
+        undo_stack().undo()
+        assert len(array_blocks) == 2
+
     def test_quote_selection(self):
         """Tests for quote_selection"""
 
@@ -43,6 +43,7 @@ from src.gui._main_window import MainWindow
 from src.lib.selection import Selection
 
 from src.lib.testlib import params, pytest_generate_tests
+from src.lib.undo import stack as undo_stack
 
 
 class TestCellActions(object):
@@ -89,6 +90,68 @@ class TestCellActions(object):
 
         assert self.grid.code_array(key) is None
 
+    def test_cell_transaction(self):
+        """Unit test for cell_transaction"""
+
+        actions = self.grid.actions
+
+        actions.set_code((0, 0, 0), "1")
+        actions.set_code((1, 0, 0), "2")
+        undo_stack().clear()
+
+        with actions.cell_transaction():
+            actions.set_code((0, 0, 0), "3")
+            actions.delete_cell((1, 0, 0))
+
+            with actions.cell_transaction():
+                actions.set_code((2, 0, 0), "4")
+
+            # Changes are deferred until the transaction is left
+            assert self.code_array((0, 0, 0)) == "1"
+            assert self.code_array((2, 0, 0)) is None
+
+        assert self.code_array((0, 0, 0)) == "3"
+        assert self.code_array((1, 0, 0)) is None
+        assert self.code_array((2, 0, 0)) == "4"
+
+        # All changes are undone in one step
+        assert undo_stack().undocount() == 1
+
+        undo_stack().undo()
+
+        assert self.code_array((0, 0, 0)) == "1"
+        assert self.code_array((1, 0, 0)) == "2"
+        assert self.code_array((2, 0, 0)) is None
+
+        # Unchanged cells do not create an undo step
+        undo_stack().clear()
+
+        with actions.cell_transaction():
+            actions.set_code((0, 0, 0), "1")
+            actions.set_code((2, 0, 0), "5")
+            actions.delete_cell((2, 0, 0))
+            actions.delete_cell((3, 0, 0))
+
+        assert undo_stack().undocount() == 0
+
+        # Changes are discarded if an exception is raised
+        try:
+            with actions.cell_transaction():
+                actions.set_code((0, 0, 0), "6")
+                raise ValueError
+
+        except ValueError:
+            pass
+
+        assert self.code_array((0, 0, 0)) == "1"
+        assert undo_stack().undocount() == 0
+
+        # A new transaction can be started after the exception
+        with actions.cell_transaction():
+            actions.set_code((0, 0, 0), "7")
+
+        assert self.code_array((0, 0, 0)) == "7"
+
     param_get_reference = [
         {'cursor': (0, 0, 0), 'ref_key': (0, 0, 0), 'abs_ref': "S[0, 0, 0]",
          'rel_ref': "S[X, Y, Z]"},
@@ -44,6 +44,7 @@ from src.gui._main_window import MainWindow
 from src.lib.selection import Selection
 from src.lib.testlib import grid_values, restore_basic_grid
 from src.lib.testlib import params, pytest_generate_tests, basic_setup_test
+from src.lib.undo import stack as undo_stack
 
 from src.actions._main_window_actions import CsvInterface, TxtGenerator
 
@@ -204,6 +205,10 @@ class TestClipboardActions(object):
          'result': "1\n3"},
         {'selection': Selection([(0, 1)], [(1, 2)], [], [], []),
          'result': "1\t2\n3\t4"},
+        {'selection': Selection([(0, 0)], [(2, 2)], [], [], []),
+         'result': "'Test'\t1\t2\n\t3\t4\n\t\t"},
+        {'selection': Selection([], [], [], [1], []),
+         'result': "1\n3" + "\n" * 998},
     ]
 
     @params(param_copy)
@@ -223,6 +228,22 @@ class TestClipboardActions(object):
                     assert self.code_array[key] is None
                     self.code_array[key] = grid_values[key]
 
+    def test_cut_undo(self):
+        """Test that cut is undone in one step"""
+
+        restore_basic_grid(self.grid)
+        undo_stack().clear()
+
+        self.main_window.actions.cut(Selection([], [], [0, 1, 999], [], []))
+
+        assert undo_stack().undocount() == 1
+        assert not any(key[2] == 0 for key in self.code_array.dict_grid)
+
+        undo_stack().undo()
+
+        assert self.code_array((999, 99, 0)) == "$^%&$^"
+        assert self.code_array((1, 1, 0)) == "3"
+
     @params(param_copy)
     def test_copy(self, selection, result):
         """Test copy of single values, lists and matrices"""
@@ -68,6 +68,30 @@ class DefaultConfig(object):
         self.default_open_filetype = "'pys'"
         self.default_save_filetype = "'pys'"
 
+        # Version of saved pys files, "0.1" is the bz2 compressed text format
+        # "2.0" is the binary container format with tables loaded on demand
+        self.pys_save_version = "'0.1'"
+
+        # Number of processes for bz2 compression of pys version 0.1 files
+        # Values above 1 create multi-stream bz2 files for large workbooks,
+        # which are truncated by pyspread versions that use bz2.BZ2File
+        self.bz2_processes = "1"
+
+        # Number of worker processes for CSV and TXT import and export and
+        # for copying results of many cells. Workers are forked copies of
+        # pyspread. 1 does all work in the pyspread process.
+        self.worker_processes = "1"
+
+        # Journaled saving appends changes to <filepath>.journal on save
+        self.journal_save = "False"
+
+        # Full save if the journal exceeds this fraction of the pys file size
+        self.journal_compaction_ratio = "0.5"
+
+        # Interval in s for saving unsaved changes for crash recovery
+        # 0 disables autosave
+        self.autosave_interval = "300"
+
         # Window configuration
         # --------------------
 
@@ -97,6 +121,9 @@ class DefaultConfig(object):
         # Maximum result length in a cell in characters
         self.max_result_length = "100000"
 
+        # Memory budget in MB for cached cell bitmaps
+        self.cell_cache_size = "128"
+
         # Colors
         self.grid_color = repr(wx.SYS_COLOUR_GRAYTEXT)
         self.selection_color = repr(wx.SYS_COLOUR_HIGHLIGHT)
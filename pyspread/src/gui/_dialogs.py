@@ -1215,7 +1215,8 @@ class PreferencesDialog(wx.Dialog):
     """Dialog for changing pyspread's configuration preferences"""
 
     open_filetypes = ["pys", "pysu", "xls", "xlsx", "all"]
-    save_filetypes = ["pys", "pysu", "xls", "all"]
+    save_filetypes = ["pys", "pysu", "xls", "xlsx", "ods", "all"]
+    pys_save_versions = ["0.1", "2.0"]
 
     parameters = [
         ("grid_rows", {
@@ -1250,6 +1251,15 @@ class PreferencesDialog(wx.Dialog):
             "widget_kwargs": {"min": 0, "allow_long": True},
             "prepocessor": int,
         }),
+        ("cell_cache_size", {
+            "label": _(u"Cell cache size"),
+            "tooltip": _(u"Memory in MB for cached cell bitmaps. Least "
+                         u"recently drawn cells are evicted first."),
+            "widget": wx.lib.intctrl.IntCtrl,
+            "widget_args": [],
+            "widget_kwargs": {"min": 0, "allow_long": True},
+            "prepocessor": int,
+        }),
         ("timeout", {
             "label": _(u"Timeout"),
             "tooltip": _(u"Maximum time that an evaluation process may take."),
@@ -1290,6 +1300,47 @@ class PreferencesDialog(wx.Dialog):
             "widget_kwargs": {"choices": save_filetypes},
             "prepocessor": save_filetypes.index,
         }),
+        ("pys_save_version", {
+            "label": _(u"Pys version"),
+            "tooltip": _(u"Version of saved pys files. Version 0.1 can be "
+                         u"opened by older pyspread releases. Version 2.0 "
+                         u"loads tables on demand but cannot be opened by "
+                         u"older releases."),
+            "widget": wx.Choice,
+            "widget_args": [(100, 50)],
+            "widget_kwargs": {"choices": pys_save_versions},
+            "prepocessor": pys_save_versions.index,
+        }),
+        ("bz2_processes", {
+            "label": _(u"Compression processes"),
+            "tooltip": _(u"Number of processes that compress pys version "
+                         u"0.1 files. Large files that are saved with more "
+                         u"than 1 process cannot be opened by older pyspread "
+                         u"versions."),
+            "widget": wx.lib.intctrl.IntCtrl,
+            "widget_args": [],
+            "widget_kwargs": {"min": 1, "allow_long": True},
+            "prepocessor": int,
+        }),
+        ("worker_processes", {
+            "label": _(u"Worker processes"),
+            "tooltip": _(u"Number of processes for importing and exporting "
+                         u"large CSV and text files and for copying results "
+                         u"of many cells. 1 disables worker processes."),
+            "widget": wx.lib.intctrl.IntCtrl,
+            "widget_args": [],
+            "widget_kwargs": {"min": 1, "allow_long": True},
+            "prepocessor": int,
+        }),
+        ("autosave_interval", {
+            "label": _(u"Autosave interval"),
+            "tooltip": _(u"Interval in seconds for saving unsaved changes "
+                         u"for crash recovery. 0 disables autosave."),
+            "widget": wx.lib.intctrl.IntCtrl,
+            "widget_args": [],
+            "widget_kwargs": {"min": 0, "allow_long": True},
+            "prepocessor": int,
+        }),
 #        ("font_save_enabled", {
 #            "label": _(u"Save font in pys"),
 #            "tooltip": _(u"Enable font saving in pys and pysu files."),
@@ -73,6 +73,8 @@ class MainWindowEventMixin(object):
 
     CloseMsg, EVT_CMD_CLOSE = new_command_event()
 
+    AutosaveRecoveryMsg, EVT_CMD_AUTOSAVE_RECOVERY = new_command_event()
+
     SpellCheckMsg, EVT_SPELL_CHECK = new_command_event()
 
     CopyFormatMsg, EVT_CMD_COPY_FORMAT = new_command_event()
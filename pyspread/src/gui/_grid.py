@@ -1596,6 +1596,7 @@ class GridEventHandlers(GridActionEventMixin):
             pass
 
         self.grid.code_array.result_cache.clear()
+        self.grid.code_array.result_versions.clear()
 
         post_command_event(self.grid.main_window, self.grid.TableChangedMsg,
                            updated_cell=True)
@@ -1633,6 +1634,7 @@ class GridEventHandlers(GridActionEventMixin):
             pass
 
         self.grid.code_array.result_cache.clear()
+        self.grid.code_array.result_versions.clear()
 
         post_command_event(self.grid.main_window, self.grid.TableChangedMsg,
                            updated_cell=True)
@@ -72,6 +72,7 @@ class GridCellEditor(wx.grid.PyGridCellEditor, GridEventMixin):
 
         if locked:
             grid.code_array.result_cache.clear()
+            grid.code_array.result_versions.clear()
             self._execute_cell_code(key[0], key[1], grid)
 
         self._tc.SetInsertionPoint(0)
@@ -143,6 +144,7 @@ class GridCellEditor(wx.grid.PyGridCellEditor, GridEventMixin):
 
         if locked:
             grid.code_array.result_cache.clear()
+            grid.code_array.result_versions.clear()
             self._execute_cell_code(row, col, grid)
 
         # Mirror our changes onto the main_window's code bar
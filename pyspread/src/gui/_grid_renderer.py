@@ -37,6 +37,7 @@ import wx.lib.mixins.gridlabelrenderer as glr
 from src.sysvars import get_color
 from src.config import config
 import src.lib.i18n as i18n
+from src.lib.bitmapcache import BitmapCache
 from src.lib._grid_cairo_renderer import GridCellCairoRenderer
 from src.gui._events import post_command_event, EventMixin
 
@@ -63,8 +64,8 @@ class GridRenderer(wx.grid.PyGridCellRenderer, EventMixin):
 
         self.data_array = data_array
 
-        # Cache for cell content
-        self.cell_cache = {}
+        # Cache for cell content with memory budget in bytes
+        self.cell_cache = BitmapCache(config["cell_cache_size"] * 1024 ** 2)
 
         # Video cell register, contains keys
         self.video_cells = {}
@@ -222,41 +223,48 @@ class GridRenderer(wx.grid.PyGridCellRenderer, EventMixin):
         return rect
 
     def _get_draw_cache_key(self, grid, key, drawn_rect, is_selected):
-        """Returns key for the screen draw cache"""
+        """Returns key for the screen draw cache
+
+        The key consists of versions of the cell content, result and
+        attributes and of the borders of the neighbor cells, which the
+        model increases on changes.
+
+        """
 
         row, col, tab = key
-        cell_attributes = grid.code_array.cell_attributes
+        code_array = grid.code_array
+        cell_attributes = code_array.cell_attributes
 
         zoomed_width = drawn_rect.width / self.zoom
         zoomed_height = drawn_rect.height / self.zoom
 
+        attr_version, border_version = cell_attributes.get_versions(key)
+
         # Button cells shall not be executed for preview
-        if grid.code_array.cell_attributes[key]["button_cell"]:
-            cell_preview = repr(grid.code_array(key))[:100]
+        if cell_attributes[key]["button_cell"]:
+            result_version = None
         else:
-            cell_preview = repr(grid.code_array[key])[:100]
-
-        sorted_keys = sorted(grid.code_array.cell_attributes[key].iteritems())
-
-        key_above_left = row - 1, col - 1, tab
-        key_above = row - 1, col, tab
-        key_above_right = row - 1, col + 1, tab
-        key_left = row, col - 1, tab
-        key_right = row, col + 1, tab
-        key_below_left = row + 1, col - 1, tab
-        key_below = row + 1, col, tab
-
-        borders = []
+            result_version = code_array.get_result_version(key)
+
+        neighbor_keys = [
+            (row - 1, col - 1, tab),
+            (row - 1, col, tab),
+            (row - 1, col + 1, tab),
+            (row, col - 1, tab),
+            (row, col + 1, tab),
+            (row + 1, col - 1, tab),
+            (row + 1, col, tab),
+        ]
 
-        for k in [key, key_above_left, key_above, key_above_right,
-                  key_left, key_right, key_below_left, key_below]:
-            borders.append(cell_attributes[k]["borderwidth_bottom"])
-            borders.append(cell_attributes[k]["borderwidth_right"])
-            borders.append(cell_attributes[k]["bordercolor_bottom"])
-            borders.append(cell_attributes[k]["bordercolor_right"])
+        # Versions only increase. Therefore, the maximum changes if the
+        # borders of any neighbor cell change.
+        for neighbor_key in neighbor_keys:
+            border_version = max(border_version,
+                                 cell_attributes.get_versions(neighbor_key)[1])
 
-        return (zoomed_width, zoomed_height, is_selected, cell_preview,
-                tuple(sorted_keys), tuple(borders))
+        return (key, zoomed_width, zoomed_height, is_selected,
+                code_array.dict_grid.get_version(key), result_version,
+                attr_version, border_version)
 
     def _get_cairo_bmp(self, mdc, key, rect, is_selected, view_frozen):
         """Returns a wx.Bitmap of cell key in size rect"""
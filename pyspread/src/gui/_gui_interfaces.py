@@ -340,6 +340,32 @@ class ModalDialogInterfaceMixin(object):
 
         return integer
 
+    def get_text_from_user(self, message, title, default_value=u""):
+        """Opens a text entry dialog and returns text or None if cancelled
+
+        Parameters
+        ----------
+        message: String
+        \tMessage that is shown above the entry field
+        title: String
+        \tDialog title
+        default_value: String, defaults to u""
+        \tInitial text of the entry field
+
+        """
+
+        dlg = wx.TextEntryDialog(self.main_window, message, title,
+                                 default_value)
+
+        if dlg.ShowModal() == wx.ID_OK:
+            text = dlg.GetValue()
+        else:
+            text = None
+
+        dlg.Destroy()
+
+        return text
+
     def get_pasteas_parameters_from_user(self, obj):
         """Opens a PasteAsDialog and returns parameters dict"""
 
@@ -57,6 +57,8 @@ from src.gui._widgets import EntryLineToolbarPanel, StatusBar
 from src.gui._widgets import TableChoiceListCtrl
 from src.gui._dialogs import DependencyDialog, MacroPanel
 
+from src.lib.__csv import CsvExportData
+from src.lib.autosave import get_orphaned_autosaves
 from src.lib.clipboard import Clipboard
 from src.lib.filetypes import get_filetypes2wildcards
 import src.lib.undo as undo
@@ -167,6 +169,12 @@ class MainWindow(wx.Frame, EventMixin):
         self._do_layout()
         self._bind()
 
+        # Autosave timer
+        self.autosave_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.handlers.OnAutosaveTimer,
+                  self.autosave_timer)
+        self.set_autosave_timer()
+
         if is_gtk():
             try:
                 wx.Yield()
@@ -326,6 +334,7 @@ class MainWindow(wx.Frame, EventMixin):
         self.Bind(self.EVT_CMD_SAFE_MODE_EXIT, handlers.OnSafeModeExit)
         self.Bind(wx.EVT_CLOSE, handlers.OnClose)
         self.Bind(self.EVT_CMD_CLOSE, handlers.OnClose)
+        self.Bind(self.EVT_CMD_AUTOSAVE_RECOVERY, handlers.OnAutosaveRecovery)
         self.Bind(self.EVT_SPELL_CHECK, handlers.OnSpellCheckToggle)
 
         # Preferences events
@@ -404,6 +413,14 @@ class MainWindow(wx.Frame, EventMixin):
         self.Bind(self.EVT_CMD_MACROLOAD, handlers.OnMacroListLoad)
         self.Bind(self.EVT_CMD_MACROSAVE, handlers.OnMacroListSave)
 
+    def set_autosave_timer(self):
+        """(Re)starts autosave timer from config, stops it if interval is 0"""
+
+        self.autosave_timer.Stop()
+
+        if config["autosave_interval"] > 0:
+            self.autosave_timer.Start(config["autosave_interval"] * 1000)
+
     def set_icon(self, bmp):
         """Sets main window icon to given wx.Bitmap"""
 
@@ -552,6 +569,11 @@ class MainWindowEventHandlers(EventMixin):
                 # User wants to save content
                 post_command_event(self.main_window, self.main_window.SaveMsg)
 
+        # Remove the autosave of this session
+
+        self.main_window.autosave_timer.Stop()
+        self.main_window.grid.actions.stop_autosave()
+
         # Save the AUI state
 
         config["window_layout"] = repr(self.main_window._mgr.SavePerspective())
@@ -577,6 +599,66 @@ class MainWindowEventHandlers(EventMixin):
             dummyfile.close()
             os.chmod(pyspreadrc_path, 0600)
 
+    def OnAutosaveTimer(self, event):
+        """Autosave timer event handler"""
+
+        self.main_window.grid.actions.autosave()
+
+    def OnAutosaveRecovery(self, event):
+        """Offers to recover autosaves of pyspread sessions that crashed
+
+        The newest autosave that the user accepts is opened. It is marked
+        as unsaved and belongs to the file that was edited in the session.
+        Autosaves that have been offered are removed.
+
+        """
+
+        for autosave in get_orphaned_autosaves():
+            filepath = autosave.get_info().get("filepath")
+
+            if filepath is None:
+                filename = _("an unsaved file")
+            else:
+                filename = os.path.basename(filepath)
+
+            msg = _("pyspread has not been closed properly. Recover the "
+                    "autosaved changes of {filename}? Otherwise, the "
+                    "autosave is deleted.").format(filename=filename)
+            short_msg = _("Recover autosave")
+
+            if not self.interfaces.get_warning_choice(msg, short_msg):
+                autosave.remove()
+                continue
+
+            # The autosave is loaded synchronously because it is removed
+            open_msg = self.main_window.GridActionOpenMsg(
+                id=-1, attr={"filepath": autosave.pys_path,
+                             "filetype": "pys"})
+            self.main_window.grid.actions.open(open_msg)
+
+            autosave.remove()
+
+            self.main_window.filepath = filepath
+
+            if filepath is not None:
+                title_text = os.path.basename(filepath) + " - pyspread"
+                post_command_event(self.main_window,
+                                   self.main_window.TitleMsg, text=title_text)
+                os.chdir(os.path.dirname(filepath) or os.curdir)
+
+            # Recovered content has not been saved
+            undo.stack().clear()
+
+            self.main_window.grid.ForceRefresh()
+
+            try:
+                post_command_event(self.main_window, self.ContentChangedMsg)
+            except TypeError:
+                # The main window does not exist any more
+                pass
+
+            break
+
     def OnSpellCheckToggle(self, event):
         """Spell checking toggle event handler"""
 
@@ -603,7 +685,11 @@ class MainWindowEventHandlers(EventMixin):
                 else:
                     config[key] = ast.literal_eval(preferences[key])
 
-        self.main_window.grid.grid_renderer.cell_cache.clear()
+        self.main_window.set_autosave_timer()
+
+        cell_cache = self.main_window.grid.grid_renderer.cell_cache
+        cell_cache.set_max_bytes(config["cell_cache_size"] * 1024 ** 2)
+        cell_cache.clear()
         self.main_window.grid.ForceRefresh()
 
     def OnNewGpgKey(self, event):
@@ -906,13 +992,21 @@ class MainWindowEventHandlers(EventMixin):
         except (KeyError, AttributeError):
             filetype = None
 
+        try:
+            # Full save of journaled files
+            compact = event.attr["compact"]
+
+        except (KeyError, AttributeError):
+            compact = False
+
         filepath = self.main_window.filepath
         if filepath is None:
             filetype = config["default_save_filetype"]
 
         if filetype is None:
 
-            f2w = get_filetypes2wildcards(["pys", "pysu", "xls", "all"])
+            f2w = get_filetypes2wildcards(["pys", "pysu", "xls", "xlsx",
+                                           "ods", "all"], save=True)
             __filetypes = f2w.keys()
 
             # Check if the file extension matches any valid save filetype
@@ -933,7 +1027,7 @@ class MainWindowEventHandlers(EventMixin):
         post_command_event(self.main_window,
                            self.main_window.GridActionSaveMsg,
                            attr={"filepath": self.main_window.filepath,
-                                 "filetype": filetype})
+                                 "filetype": filetype, "compact": compact})
 
         # Update undo stack savepoint
         undo.stack().savepoint()
@@ -950,7 +1044,8 @@ class MainWindowEventHandlers(EventMixin):
 
         # Get filepath from user
 
-        f2w = get_filetypes2wildcards(["pys", "pysu", "xls", "all"])
+        f2w = get_filetypes2wildcards(["pys", "pysu", "xls", "xlsx",
+                                       "ods", "all"], save=True)
         filetypes = f2w.keys()
         wildcards = f2w.values()
 
@@ -1012,16 +1107,17 @@ class MainWindowEventHandlers(EventMixin):
         post_command_event(self.main_window, self.main_window.TitleMsg,
                            text=title_text)
 
-        # Now jump to save
+        # Now jump to save, Save As always writes the complete file
         post_command_event(self.main_window, self.main_window.SaveMsg,
-                           attr={"filetype": filetype})
+                           attr={"filetype": filetype, "compact": True})
 
     def OnImport(self, event):
         """File import event handler"""
 
         # Get filepath from user
 
-        wildcards = get_filetypes2wildcards(["csv", "txt"]).values()
+        wildcards = get_filetypes2wildcards(["csv", "txt", "npy",
+                                             "sqlite"]).values()
         wildcard = "|".join(wildcards)
 
         message = _("Choose file to import.")
@@ -1044,7 +1140,15 @@ class MainWindowEventHandlers(EventMixin):
         grid = self.main_window.grid
         tl_cell = grid.GetGridCursorRow(), grid.GetGridCursorCol()
 
-        grid.actions.paste(tl_cell, import_data)
+        if hasattr(import_data, "arrays"):
+            # Arrays back grid areas without being copied into cells
+            grid.actions.paste_arrays(tl_cell, import_data.arrays)
+        elif hasattr(import_data, "iter_chunks") and \
+           not grid.actions.get_selection():
+            # Converted rows are written into the grid chunk by chunk
+            grid.actions.paste_chunks(tl_cell, import_data.iter_chunks())
+        else:
+            grid.actions.paste(tl_cell, import_data)
 
         self.main_window.grid.ForceRefresh()
 
@@ -1064,7 +1168,7 @@ class MainWindowEventHandlers(EventMixin):
 
         selection_bbox = selection.get_bbox()
 
-        f2w = get_filetypes2wildcards(["csv", "pdf", "svg"])
+        f2w = get_filetypes2wildcards(["csv", "npy", "sqlite", "pdf", "svg"])
         filters = f2w.keys()
         wildcards = f2w.values()
 
@@ -1079,20 +1183,15 @@ class MainWindowEventHandlers(EventMixin):
         else:
             (top, left), (bottom, right) = selection_bbox
 
-        # Generator of row and column keys in correct order
+        # Results of the export area, rows in correct order
 
         __top = 0 if top is None else top
         __bottom = code_array.shape[0] if bottom is None else bottom + 1
         __left = 0 if left is None else left
         __right = code_array.shape[1] if right is None else right + 1
 
-        def data_gen(top, bottom, left, right):
-            for row in xrange(top, bottom):
-                yield (code_array[row, col, tab]
-                       for col in xrange(left, right))
-
-        data = data_gen(__top, __bottom, __left, __right)
-        preview_data = data_gen(__top, __bottom, __left, __right)
+        data = CsvExportData(code_array, __top, __bottom, __left, __right, tab)
+        preview_data = iter(data)
 
         # Get target filepath from user
 
@@ -1284,8 +1383,12 @@ class MainWindowEventHandlers(EventMixin):
         selection = self.main_window.grid.selection
         data = self.main_window.actions.copy_result(selection)
 
+        if data is None:
+            # Copy has been aborted
+            pass
+
         # Check if result is a bitmap
-        if type(data) is wx._gdi.Bitmap:
+        elif type(data) is wx._gdi.Bitmap:
             # Copy bitmap to clipboard
             self.main_window.clipboard.set_clipboard(data, datatype="bitmap")
 
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+journal
+=======
+
+This file contains the change log for journaled saving of pys files.
+
+A journal is stored next to its base pys file in <filepath>.journal.
+It starts with a header that contains the SHA-1 digest of the base file.
+Each save appends one record with all changes since the previous save.
+A record is a 4 byte length followed by a zlib compressed marshal string.
+
+Provides
+--------
+
+ * PysJournal: Append-only change log of a pys file
+
+"""
+
+import hashlib
+from itertools import izip
+import marshal
+import os
+import struct
+import zipfile
+import zlib
+
+from src.lib.arrayio import load_block_array
+import src.lib.i18n as i18n
+from src.lib.selection import Selection
+
+# Use ugettext instead of getttext to avoid unicode errors
+_ = i18n.language.ugettext
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_HEADER = "[Pyspread journal version]\n0.1\n"
+
+RECORD_LENGTH = struct.Struct(">I")
+
+MARSHAL_VERSION = 2
+
+
+def get_file_digest(filepath):
+    """Returns SHA-1 hex digest of the file content
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of the file
+
+    """
+
+    digest = hashlib.sha1()
+
+    with open(filepath, "rb") as infile:
+        for block in iter(lambda: infile.read(1024 * 1024), ""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+class PysJournal(object):
+    """Append-only change log of a pys file
+
+    Changes of cells, row heights and column widths are tracked via the
+    changed_keys sets of the model's KeyValueStores. Cell attributes,
+    array blocks, macros and shape are compared to a snapshot that is taken
+    when tracking starts. Array blocks are recorded by their file sources.
+    Pending tables are loaded when tracking starts because attribute
+    changes are recorded by list position.
+
+    Parameters
+    ----------
+
+    code_array: model.CodeArray object
+    \tThe code_array object data structure
+    filepath: String
+    \tPath of the base pys file
+
+    """
+
+    def __init__(self, code_array, filepath):
+        self.code_array = code_array
+        self.filepath = filepath
+        self.journal_path = filepath + JOURNAL_SUFFIX
+
+        self.attributes = None
+        self.array_blocks = None
+        self.macros = None
+        self.shape = None
+
+    def _get_stores(self):
+        """Returns list of name, KeyValueStore tuples that are tracked"""
+
+        dict_grid = self.code_array.dict_grid
+
+        return [
+            ("cells", dict_grid),
+            ("row_heights", dict_grid.row_heights),
+            ("col_widths", dict_grid.col_widths),
+        ]
+
+    def exists(self):
+        """Returns True if the journal file exists"""
+
+        return os.path.exists(self.journal_path)
+
+    def get_size(self):
+        """Returns size of the journal file in bytes, 0 if not present"""
+
+        try:
+            return os.path.getsize(self.journal_path)
+
+        except OSError:
+            return 0
+
+    def start(self):
+        """Starts change tracking from the current state of code_array"""
+
+        dict_grid = self.code_array.dict_grid
+        dict_grid.load_tables()
+
+        for __, store in self._get_stores():
+            store.changed_keys = set()
+
+        self.attributes = list(dict_grid.cell_attributes)
+        self.array_blocks = list(dict_grid.array_blocks)
+        self.macros = dict_grid.macros
+        self.shape = dict_grid.shape
+
+    def stop(self):
+        """Stops change tracking"""
+
+        for __, store in self._get_stores():
+            store.changed_keys = None
+
+        self.attributes = None
+        self.array_blocks = None
+
+    @staticmethod
+    def _get_prefix_length(old_items, new_items):
+        """Returns length of the unchanged part of a list snapshot
+
+        Parameters
+        ----------
+        old_items: List
+        \tSnapshot of the list at tracking start
+        new_items: List
+        \tCurrent list
+
+        """
+
+        prefix_length = 0
+        for old, new in izip(old_items, new_items):
+            if old is not new:
+                break
+            prefix_length += 1
+
+        return prefix_length
+
+    def get_record(self):
+        """Returns dict of changes since tracking start, None if unchanged"""
+
+        dict_grid = self.code_array.dict_grid
+        record = {}
+
+        if dict_grid.shape != self.shape:
+            record["shape"] = tuple(dict_grid.shape)
+
+        for name, store in self._get_stores():
+            if store.changed_keys:
+                record[name] = [(key, dict.get(store, key))
+                                for key in store.changed_keys]
+
+        cell_attributes = dict_grid.cell_attributes
+
+        prefix_length = self._get_prefix_length(self.attributes,
+                                                cell_attributes)
+
+        if prefix_length != len(self.attributes) or \
+           prefix_length != len(cell_attributes):
+            appended = [(selection.parameters, tab, attr_dict)
+                        for selection, tab, attr_dict
+                        in cell_attributes[prefix_length:]]
+            record["attributes"] = prefix_length, appended
+
+        array_blocks = dict_grid.array_blocks
+
+        prefix_length = self._get_prefix_length(self.array_blocks,
+                                                array_blocks)
+
+        if prefix_length != len(self.array_blocks) or \
+           prefix_length != len(array_blocks):
+            # Only the file sources are stored, not the arrays
+            appended = [(top, left, tab) + tuple(source)
+                        for top, left, tab, __, source
+                        in array_blocks[prefix_length:]]
+            record["array_blocks"] = prefix_length, appended
+
+        if dict_grid.macros != self.macros:
+            record["macros"] = dict_grid.macros
+
+        if record:
+            return record
+
+    def append(self):
+        """Appends changes since the last append to the journal
+
+        Returns True if a record has been written.
+
+        """
+
+        record = self.get_record()
+
+        if record is None:
+            return False
+
+        chunk = zlib.compress(marshal.dumps(record, MARSHAL_VERSION))
+
+        new_journal = not self.exists()
+
+        with open(self.journal_path, "ab") as journal_file:
+            if new_journal:
+                journal_file.write(JOURNAL_HEADER)
+                journal_file.write(get_file_digest(self.filepath) + "\n")
+
+            journal_file.write(RECORD_LENGTH.pack(len(chunk)))
+            journal_file.write(chunk)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+        self.start()
+
+        return True
+
+    def _apply_record(self, record):
+        """Applies one journal record to code_array"""
+
+        code_array = self.code_array
+        dict_grid = code_array.dict_grid
+
+        if "shape" in record:
+            code_array.shape = record["shape"]
+
+        for name, store in self._get_stores():
+            for key, value in record.get(name, []):
+                if value is None:
+                    if dict.__contains__(store, key):
+                        store.pop(key)
+                else:
+                    store[key] = value
+
+        if "attributes" in record:
+            prefix_length, appended = record["attributes"]
+
+            cell_attributes = dict_grid.cell_attributes
+            del cell_attributes[prefix_length:]
+            cell_attributes._attr_cache.clear()
+            cell_attributes._table_cache.clear()
+
+            for parameters, tab, attr_dict in appended:
+                cell_attributes.append((Selection(*parameters), tab,
+                                        attr_dict))
+
+        if "array_blocks" in record:
+            prefix_length, appended = record["array_blocks"]
+
+            array_blocks = dict_grid.array_blocks
+            del array_blocks[prefix_length:]
+
+            for block_source in appended:
+                top, left, tab = block_source[:3]
+                source = tuple(block_source[3:])
+
+                try:
+                    array = load_block_array(source)
+
+                except (IOError, ValueError, KeyError, zipfile.BadZipfile):
+                    # Missing array files leave the block area empty
+                    continue
+
+                list.append(array_blocks, (top, left, tab, array, source))
+
+            code_array.result_cache.clear()
+            code_array.result_versions.clear()
+
+        if "macros" in record:
+            dict_grid.macros = record["macros"]
+
+    def replay(self):
+        """Applies all records of the journal to code_array
+
+        Returns the number of replayed records.
+        A truncated last record, e.g. from a crash, is ignored.
+        Raises ValueError if the journal does not belong to the base file.
+
+        """
+
+        with open(self.journal_path, "rb") as journal_file:
+            data = journal_file.read()
+
+        header_length = len(JOURNAL_HEADER)
+
+        if not data.startswith(JOURNAL_HEADER):
+            raise ValueError(_("Journal format unsupported."))
+
+        digest_end = data.find("\n", header_length)
+        base_digest = data[header_length:digest_end]
+
+        if digest_end == -1 or base_digest != get_file_digest(self.filepath):
+            msg = _("Journal {journal} does not match {filepath}.")
+            raise ValueError(msg.format(journal=self.journal_path,
+                                        filepath=self.filepath))
+
+        self.code_array.dict_grid.load_tables()
+
+        records = 0
+        pos = digest_end + 1
+
+        while pos + RECORD_LENGTH.size <= len(data):
+            length, = RECORD_LENGTH.unpack_from(data, pos)
+            pos += RECORD_LENGTH.size
+
+            if pos + length > len(data):
+                # Truncated record
+                break
+
+            try:
+                record = marshal.loads(zlib.decompress(data[pos:pos + length]))
+
+            except (zlib.error, ValueError, EOFError, TypeError):
+                break
+
+            self._apply_record(record)
+            records += 1
+            pos += length
+
+        return records
+
+    def remove(self):
+        """Removes journal file and journal signature if present"""
+
+        for path in [self.journal_path, self.journal_path + ".sig"]:
+            try:
+                os.remove(path)
+
+            except OSError:
+                pass
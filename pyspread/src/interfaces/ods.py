@@ -26,24 +26,38 @@ ods
 
 This file contains interfaces to the OpenDocument Spreadsheet file format.
 
-It is split into the following sections
+Files are read and written row by row via src.lib.odsstream. Cell
+content, column widths, row heights and basic cell formats are written.
+Only cell content is read.
 
- * shape
- * code
- * attributes
- * row_heights
- * col_widths
- * macros
+Provides
+--------
+
+ * Ods: Interface between code_array and ods file
 
 """
 
-from src.lib.ODSReader import ODSReader
+from itertools import groupby
+from operator import itemgetter
+
+import wx
 
 import src.lib.i18n as i18n
+from src.lib.odsstream import OdsStreamReader, OdsStreamWriter
+from src.sysvars import get_dpi
 
 # Use ugettext instead of getttext to avoid unicode errors
 _ = i18n.language.ugettext
 
+# Cell attributes that are written as cell styles
+ODS_STYLE_KEYS = (
+    "textfont", "pointsize", "fontweight", "fontstyle", "textcolor",
+    "underline", "strikethrough", "justification", "vertical_align",
+    "bgcolor", "borderwidth_right", "borderwidth_bottom", "bordercolor_right",
+    "bordercolor_bottom",
+)
+
+
 class Ods(object):
     """Interface between code_array and ods file
 
@@ -64,53 +78,302 @@ class Ods(object):
         self.code_array = code_array
         self.ods_file = ods_file
 
-    def _get_tables(self, ods):
-        """Returns list of table nodes from ods object"""
+        # Cell style names by style signature
+        self._style_names = {}
 
-        childnodes = ods.spreadsheet.childNodes
-        qname_childnodes = [(s.qname[1], s) for s in childnodes]
-        return [node for name, node in qname_childnodes if name == u"table"]
+    def _ods2code(self):
+        """Updates code in code_array
 
-    def _get_rows(self, table):
-        """Returns rows from table"""
+        content.xml is streamed and each filled row is loaded into the
+        grid in one go. The undo history is bypassed.
 
-        childnodes = table.childNodes
-        qname_childnodes = [(s.qname[1], s) for s in childnodes]
-        return [node for name, node in qname_childnodes
-                if name == u'table-row']
+        Returns the shape that covers all filled cells and all tables.
 
-    def _get_cells(self, row):
-        """Returns rows from row"""
+        """
 
-        childnodes = row.childNodes
-        qname_childnodes = [(s.qname[1], s) for s in childnodes]
-        return [node for name, node in qname_childnodes
-                if name == u'table-cell']
+        dict_grid = self.code_array.dict_grid
 
-    def _ods2code(self):
-        """Updates code in code_array"""
+        reader = OdsStreamReader(self.ods_file)
+
+        max_row = max_col = 0
+
+        for tab, row, cells in reader:
+            dict.update(dict_grid,
+                        (((row, col, tab), code) for col, code in cells))
+
+            max_row = max(max_row, row)
+            max_col = max(max_col, cells[-1][0])
+
+        return max_row + 1, max_col + 1, max(1, len(reader.table_names))
+
+    # Writing
+    # -------
+
+    def rgb2hex(self, rgb):
+        """Returns ods color string for a pyspread color"""
+
+        color = wx.Colour()
+        color.SetRGB(rgb)
+        red, green, blue = color.Get()[:3]
+
+        return "#{0:02x}{1:02x}{2:02x}".format(red, green, blue)
+
+    def _get_border(self, width, color):
+        """Returns fo:border value for pyspread border width and color"""
+
+        if width == 0:
+            return "none"
+
+        width_points = width / float(get_dpi()[0]) * 72.0
+
+        return "{0:.2f}pt solid {1}".format(width_points, self.rgb2hex(color))
+
+    def _get_style_properties(self, attrs):
+        """Returns cell style properties for the style attributes in attrs
+
+        Attributes with default values have to be left out of attrs.
+
+        """
+
+        defaults = self.code_array.cell_attributes.default_cell_attributes
+
+        properties = []
+
+        # Cell
+
+        if "bgcolor" in attrs:
+            properties.append(("table-cell", "fo:background-color",
+                               self.rgb2hex(attrs["bgcolor"])))
+
+        for side in ["right", "bottom"]:
+            width_key = "borderwidth_" + side
+            color_key = "bordercolor_" + side
+
+            if width_key in attrs or color_key in attrs:
+                width = attrs.get(width_key, defaults[width_key])
+                color = attrs.get(color_key, defaults[color_key])
+                properties.append(("table-cell", "fo:border-" + side,
+                                   self._get_border(width, color)))
+
+        if "vertical_align" in attrs:
+            properties.append(("table-cell", "style:vertical-align",
+                               attrs["vertical_align"]))
+
+        # Paragraph
+
+        if "justification" in attrs:
+            properties.append(("paragraph", "fo:text-align",
+                               attrs["justification"]))
+
+        # Text
+
+        if "textfont" in attrs:
+            properties.append(("text", "fo:font-family", attrs["textfont"]))
+
+        if "pointsize" in attrs:
+            properties.append(("text", "fo:font-size",
+                               "{0}pt".format(attrs["pointsize"])))
+
+        if "fontweight" in attrs:
+            fontweight = "bold" if attrs["fontweight"] == wx.BOLD else "normal"
+            properties.append(("text", "fo:font-weight", fontweight))
+
+        if "fontstyle" in attrs:
+            fontstyle = "italic" if attrs["fontstyle"] == wx.ITALIC \
+                else "normal"
+            properties.append(("text", "fo:font-style", fontstyle))
+
+        if "textcolor" in attrs:
+            properties.append(("text", "fo:color",
+                               self.rgb2hex(attrs["textcolor"])))
+
+        if attrs.get("underline"):
+            properties.append(("text", "style:text-underline-style",
+                               "solid"))
+
+        if attrs.get("strikethrough"):
+            properties.append(("text", "style:text-line-through-style",
+                               "solid"))
+
+        return tuple(properties)
+
+    def _get_style_name(self, writer, attrs):
+        """Returns cell style name for style attributes, None if unstyled"""
+
+        defaults = self.code_array.cell_attributes.default_cell_attributes
+
+        signature = tuple(sorted((key, value)
+                                 for key, value in attrs.iteritems()
+                                 if value != defaults[key]))
+
+        try:
+            return self._style_names[signature]
+
+        except KeyError:
+            pass
 
-        ods = ODSReader(self.ods_file, clonespannedcolumns=True)
-        tables = ods.sheets
-        for tab_id, table in enumerate(tables):
-            for row_id in xrange(len(table)):
-                for col_id in xrange(len(table[row_id])):
-                    key = row_id, col_id, tab_id
-                    text = unicode(table[row_id][col_id])
-                    self.code_array[key] = text
+        properties = self._get_style_properties(dict(signature))
 
+        if properties:
+            style_name = writer.get_cell_style(properties)
+        else:
+            style_name = None
+
+        self._style_names[signature] = style_name
+
+        return style_name
+
+    def _get_tab_entries(self, tab):
+        """Returns cell attribute entries of tab sorted by top row
+
+        Each entry is a tuple (top, bottom, left, right, index, selection,
+        attr_dict) with the bounding box of the selection. Attribute dicts
+        only contain style keys.
+
+        """
+
+        shape = self.code_array.shape
+        style_keys = set(ODS_STYLE_KEYS)
+
+        entries = []
+
+        for index, (selection, __tab, attr_dict) in \
+                enumerate(self.code_array.cell_attributes):
+            if __tab != tab or not selection:
+                continue
+
+            attrs = dict((key, value) for key, value in attr_dict.iteritems()
+                         if key in style_keys)
+
+            if not attrs:
+                continue
+
+            (top, left), (bottom, right) = selection.get_grid_bbox(shape)
+
+            entries.append((top, bottom, left, right, index, selection,
+                            attrs))
+
+        entries.sort()
+
+        return entries
+
+    def _iter_rows(self, writer, tab, row_styles):
+        """Yields (row, cells, row style name) for the rows of tab
+
+        Filled rows and rows with row styles are yielded in ascending
+        order. cells contains (col, code, cell style name) tuples of the
+        filled cells. The attribute entries are swept from top to bottom
+        so that only the entries that cover a row are checked.
+
+        Parameters
+        ----------
+        writer: OdsStreamWriter
+        \tWriter that provides the cell style names
+        tab: Integer
+        \tTable of the rows
+        row_styles: Dict
+        \tRow style names by row
+
+        """
+
+        dict_grid = self.code_array.dict_grid
+
+        keys = sorted(key for key in dict_grid.iterkeys() if key[2] == tab)
+
+        styled_rows = sorted(row_styles)
+        styled_row_idx = 0
+
+        entries = self._get_tab_entries(tab)
+        entry_idx = 0
+        active = []
+
+        for row, row_keys in groupby(keys, itemgetter(0)):
+            while styled_row_idx < len(styled_rows) and \
+                    styled_rows[styled_row_idx] < row:
+                styled_row = styled_rows[styled_row_idx]
+                yield styled_row, [], row_styles[styled_row]
+                styled_row_idx += 1
+
+            if styled_row_idx < len(styled_rows) and \
+               styled_rows[styled_row_idx] == row:
+                styled_row_idx += 1
+
+            # Sweep: Entries that end above the row are dropped
+            active = [entry for entry in active if entry[1] >= row]
+            while entry_idx < len(entries) and entries[entry_idx][0] <= row:
+                if entries[entry_idx][1] >= row:
+                    active.append(entries[entry_idx])
+                entry_idx += 1
+            active.sort(key=itemgetter(4))
+
+            cells = []
+
+            for key in row_keys:
+                col = key[1]
+
+                attrs = {}
+                for __, __, left, right, __, selection, attr_dict in active:
+                    if left <= col <= right and (row, col) in selection:
+                        attrs.update(attr_dict)
+
+                cells.append((col, dict_grid[key],
+                              self._get_style_name(writer, attrs)))
+
+            yield row, cells, row_styles.get(row)
+
+        for styled_row in styled_rows[styled_row_idx:]:
+            yield styled_row, [], row_styles[styled_row]
 
     # Access via model.py data
     # ------------------------
 
     def from_code_array(self):
-        """Replaces everything in pys_file from code_array"""
+        """Writes everything from code_array to ods_file
 
-        raise NotImplementedError
+        Cells without code are not written. Therefore, formats of empty
+        cells are lost.
 
+        """
 
-    def to_code_array(self):
-        """Replaces everything in code_array from pys_file"""
+        dict_grid = self.code_array.dict_grid
+        dict_grid.load_tables()
+
+        __, __, tabs = self.code_array.shape
 
-        self._ods2code()
+        dpi_x, dpi_y = map(float, get_dpi())
+
+        writer = OdsStreamWriter(self.ods_file)
+
+        try:
+            # Column and row styles have to be known before the first table
+            tab2columns = dict((tab, []) for tab in xrange(tabs))
+            for (col, tab), width in sorted(dict_grid.col_widths.iteritems()):
+                if tab in tab2columns:
+                    width_str = "{0:.4f}in".format(width / dpi_x)
+                    tab2columns[tab].append(
+                        (col, writer.get_column_style(width_str)))
+
+            tab2row_styles = dict((tab, {}) for tab in xrange(tabs))
+            for (row, tab), height in dict_grid.row_heights.iteritems():
+                if tab in tab2row_styles:
+                    height_str = "{0:.4f}in".format(height / dpi_y)
+                    tab2row_styles[tab][row] = writer.get_row_style(height_str)
+
+            for tab in xrange(tabs):
+                writer.start_table(unicode(tab), tab2columns[tab])
+
+                for row, cells, row_style in \
+                        self._iter_rows(writer, tab, tab2row_styles[tab]):
+                    writer.write_row(row, cells, row_style)
+
+                writer.end_table()
+
+            writer.save()
+
+        finally:
+            writer.close()
+
+    def to_code_array(self):
+        """Replaces everything in code_array from ods_file"""
 
+        self.code_array.shape = self._ods2code()
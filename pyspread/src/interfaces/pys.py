@@ -26,33 +26,59 @@ pys
 
 This file contains interfaces to the native pys file format.
 
-It is split into the following sections
+Pys handles the bz2 compressed text format (version 0.1).
+BinaryPys handles the binary container format (version 2.0), which
+supports loading tables on demand.
+
+The text format is split into the following sections
 
  * shape
  * code
  * attributes
  * row_heights
  * col_widths
+ * array_blocks (only present if arrays are referenced)
  * macros
 
 """
 
-import ast
 import base64
 from collections import OrderedDict
+from functools import partial
+import hashlib
 import src.lib.i18n as i18n
-from itertools import imap
+from itertools import imap, islice, izip, repeat
+import marshal
 import os
+import struct
 import tempfile
+import zipfile
+import zlib
 
-from matplotlib import font_manager
-
+from src.lib.arrayio import load_block_array
+from src.lib.fontcatalog import font_catalog
+from src.lib.parsers import fast_literal_eval, parse_selection
 from src.lib.selection import Selection
 from src.config import config
 
 # Use ugettext instead of getttext to avoid unicode errors
 _ = i18n.language.ugettext
 
+# Binary pys container format
+
+BINARY_PYS_VERSION = "2.0"
+BINARY_PYS_HEADER = "[Pyspread save file version]\n" + \
+                    BINARY_PYS_VERSION + "\n"
+
+# Offset and length of the index, written directly after the header
+INDEX_POSITION = struct.Struct(">QQ")
+
+MARSHAL_VERSION = 2
+
+# Bytes that are read and lines that are written in one call
+READ_CHUNK_SIZE = 1024 * 1024
+WRITE_CHUNK_LINES = 10000
+
 
 class Pys(object):
     """Interface between code_array and pys file
@@ -74,11 +100,17 @@ class Pys(object):
         self.code_array = code_array
         self.pys_file = pys_file
 
+        # Parsed attribute keys and values, which repeat in most files
+        self._attr_literals = {}
+
         if config["font_save_enabled"]:
             # Clean up fonts used info
             self.fonts_used = []
             self.temp_fontdir = tempfile.mkdtemp()
 
+            # Loaded font data by SHA-1 digest
+            self.font_blobs = {}
+
         self._section2reader = {
             "[Pyspread save file version]\n": self._pys_assert_version,
             "[shape]\n": self._pys2shape,
@@ -86,6 +118,7 @@ class Pys(object):
             "[attributes]\n": self._pys2attributes,
             "[row_heights]\n": self._pys2row_heights,
             "[col_widths]\n": self._pys2col_widths,
+            "[array_blocks]\n": self._pys2array_blocks,
             "[macros]\n": self._pys2macros,
         }
 
@@ -96,9 +129,16 @@ class Pys(object):
             ("[attributes]\n", self._attributes2pys),
             ("[row_heights]\n", self._row_heights2pys),
             ("[col_widths]\n", self._col_widths2pys),
-            ("[macros]\n", self._macros2pys),
         ])
 
+        # The section is omitted without arrays so that such files remain
+        # readable by previous versions
+        if code_array.array_blocks:
+            self._section2writer["[array_blocks]\n"] = \
+                self._array_blocks2pys
+
+        self._section2writer["[macros]\n"] = self._macros2pys
+
         # Update sections for font handling if it is activated
         if config["font_save_enabled"]:
             self._section2reader["[fonts]\n"] = self._pys2fonts
@@ -112,6 +152,32 @@ class Pys(object):
         else:
             return string.rstrip("\n").split("\t", maxsplit)
 
+    def _is_aborted(self):
+        """Returns True if reading or writing has been aborted by the user"""
+
+        # pys_file may not be opened via fileio.AOpen
+        return getattr(self.pys_file, "aborted", False)
+
+    def _write_lines(self, lines):
+        """Writes lines to pys_file in joined chunks
+
+        Parameters
+        ----------
+        lines: Iterable of strings
+        \tLines including line ends
+
+        """
+
+        lines = iter(lines)
+
+        while not self._is_aborted():
+            chunk = list(islice(lines, WRITE_CHUNK_LINES))
+
+            if not chunk:
+                break
+
+            self.pys_file.write("".join(chunk))
+
     def _get_key(self, *keystrings):
         """Returns int key tuple from key string list"""
 
@@ -157,13 +223,18 @@ class Pys(object):
 
         """
 
-        for key in self.code_array:
-            key_str = u"\t".join(repr(ele) for ele in key)
-            code_str = self.code_array(key)
-            if code_str is not None:
-                out_str = key_str + u"\t" + code_str + u"\n"
+        def code_lines():
+            """Generator of utf-8 encoded code lines"""
+
+            for key in self.code_array:
+                key_str = u"\t".join(repr(ele) for ele in key)
+                code_str = self.code_array(key)
+                if code_str is not None:
+                    out_str = key_str + u"\t" + code_str + u"\n"
+
+                    yield out_str.encode("utf-8")
 
-                self.pys_file.write(out_str.encode("utf-8"))
+        self._write_lines(code_lines())
 
     def _pys2code(self, line):
         """Updates code in pys code_array"""
@@ -173,15 +244,14 @@ class Pys(object):
 
         self.code_array.dict_grid[key] = unicode(code, encoding='utf-8')
 
-    def _attributes2pys(self):
-        """Writes attributes to pys file
+    def _get_purged_cell_attributes(self):
+        """Returns list of cell attributes with doublettes merged
 
-        Format:
-        <selection[0]>\t[...]\t<tab>\t<key>\t<value>\t[...]\n
+        Consecutive entries with identical selection and table are joined.
+        Used fonts are collected if font saving is enabled.
 
         """
 
-        # Remove doublettes
         purged_cell_attributes = []
         purged_cell_attributes_keys = []
         for selection, tab, attr_dict in self.code_array.cell_attributes:
@@ -190,45 +260,78 @@ class Pys(object):
                 purged_cell_attributes[-1][2].update(attr_dict)
             else:
                 purged_cell_attributes_keys.append((selection, tab))
-                purged_cell_attributes.append([selection, tab, attr_dict])
+                purged_cell_attributes.append([selection, tab,
+                                               dict(attr_dict)])
+
+        if config["font_save_enabled"]:
+            for selection, tab, attr_dict in purged_cell_attributes:
+                if "textfont" in attr_dict:
+                    self.fonts_used.append(attr_dict["textfont"])
+
+        return purged_cell_attributes
+
+    def _attributes2pys(self):
+        """Writes attributes to pys file
+
+        Format:
+        <selection[0]>\t[...]\t<tab>\t<key>\t<value>\t[...]\n
+
+        """
+
+        def attribute_lines():
+            """Generator of attribute lines"""
 
-        for selection, tab, attr_dict in purged_cell_attributes:
-            sel_list = [selection.block_tl, selection.block_br,
-                        selection.rows, selection.cols, selection.cells]
+            for selection, tab, attr_dict in \
+                    self._get_purged_cell_attributes():
+                sel_list = [selection.block_tl, selection.block_br,
+                            selection.rows, selection.cols, selection.cells]
 
-            tab_list = [tab]
+                tab_list = [tab]
 
-            attr_dict_list = []
-            for key in attr_dict:
-                attr_dict_list.append(key)
-                attr_dict_list.append(attr_dict[key])
+                attr_dict_list = []
+                for key in attr_dict:
+                    attr_dict_list.append(key)
+                    attr_dict_list.append(attr_dict[key])
 
-                if config["font_save_enabled"] and key == 'textfont':
-                    self.fonts_used.append(attr_dict[key])
+                line_list = map(repr, sel_list + tab_list + attr_dict_list)
 
-            line_list = map(repr, sel_list + tab_list + attr_dict_list)
+                yield u"\t".join(line_list) + u"\n"
 
-            self.pys_file.write(u"\t".join(line_list) + u"\n")
+        self._write_lines(attribute_lines())
 
     def _pys2attributes(self, line):
         """Updates attributes in code_array"""
 
         splitline = self._split_tidy(line)
 
-        selection_data = map(ast.literal_eval, splitline[:5])
-        selection = Selection(*selection_data)
+        selection = parse_selection(splitline[:5])
 
         tab = int(splitline[5])
 
-        attrs = {}
-        for col, ele in enumerate(splitline[6:]):
-            if not (col % 2):
-                # Odd entries are keys
-                key = ast.literal_eval(ele)
+        attr_literals = self._attr_literals
+        literals = []
 
-            else:
-                # Even cols are values
-                attrs[key] = ast.literal_eval(ele)
+        for ele in splitline[6:]:
+            try:
+                literal = attr_literals[ele]
+
+            except KeyError:
+                literal = fast_literal_eval(ele)
+
+                try:
+                    hash(literal)
+
+                except TypeError:
+                    # Mutable values must not be shared between cells
+                    pass
+
+                else:
+                    attr_literals[ele] = literal
+
+            literals.append(literal)
+
+        # Odd entries are keys, even entries are values
+        attrs = dict(izip(literals[::2], literals[1::2]))
 
         self.code_array.cell_attributes.append((selection, tab, attrs))
 
@@ -239,12 +342,17 @@ class Pys(object):
 
         """
 
-        for row, tab in self.code_array.dict_grid.row_heights:
-            if row < self.code_array.shape[0] and \
-               tab < self.code_array.shape[2]:
-                height = self.code_array.dict_grid.row_heights[(row, tab)]
-                height_strings = map(repr, [row, tab, height])
-                self.pys_file.write(u"\t".join(height_strings) + u"\n")
+        def row_height_lines():
+            """Generator of row height lines"""
+
+            for row, tab in self.code_array.dict_grid.row_heights:
+                if row < self.code_array.shape[0] and \
+                   tab < self.code_array.shape[2]:
+                    height = self.code_array.dict_grid.row_heights[(row, tab)]
+                    height_strings = map(repr, [row, tab, height])
+                    yield u"\t".join(height_strings) + u"\n"
+
+        self._write_lines(row_height_lines())
 
     def _pys2row_heights(self, line):
         """Updates row_heights in code_array"""
@@ -270,12 +378,17 @@ class Pys(object):
 
         """
 
-        for col, tab in self.code_array.dict_grid.col_widths:
-            if col < self.code_array.shape[1] and \
-               tab < self.code_array.shape[2]:
-                width = self.code_array.dict_grid.col_widths[(col, tab)]
-                width_strings = map(repr, [col, tab, width])
-                self.pys_file.write(u"\t".join(width_strings) + u"\n")
+        def col_width_lines():
+            """Generator of column width lines"""
+
+            for col, tab in self.code_array.dict_grid.col_widths:
+                if col < self.code_array.shape[1] and \
+                   tab < self.code_array.shape[2]:
+                    width = self.code_array.dict_grid.col_widths[(col, tab)]
+                    width_strings = map(repr, [col, tab, width])
+                    yield u"\t".join(width_strings) + u"\n"
+
+        self._write_lines(col_width_lines())
 
     def _pys2col_widths(self, line):
         """Updates col_widths in code_array"""
@@ -294,6 +407,75 @@ class Pys(object):
         except ValueError:
             pass
 
+    def _get_array_block_sources(self):
+        """Returns list of top, left, tab and source tuples of array blocks
+
+        The arrays are not stored. Only their files are referenced. The
+        source consists of filepath, name and, for blocks that are cut,
+        the row and column windows within the array.
+
+        """
+
+        return [(top, left, tab) + tuple(source)
+                for top, left, tab, __, source in self.code_array.array_blocks
+                if tab < self.code_array.shape[2]]
+
+    def _load_array_block(self, top, left, tab, filepath, name, *windows):
+        """Appends array block if its array can be loaded
+
+        Loading bypasses the undoable append of the model.
+
+        Parameters
+        ----------
+        top, left, tab: Integer
+        \tTop left cell of the block
+        filepath: String
+        \tPath of npy or npz file
+        name: String
+        \tName of array in npz file, None for npy files
+        windows: 2-tuples of Integer
+        \tOptional row and column windows (start, stop) of cut blocks
+
+        """
+
+        source = (filepath, name) + windows
+
+        try:
+            array = load_block_array(source)
+
+        except (IOError, ValueError, KeyError, zipfile.BadZipfile):
+            # Missing or changed array files leave the block area empty
+            return
+
+        list.append(self.code_array.array_blocks,
+                    (top, left, tab, array, source))
+
+    def _array_blocks2pys(self):
+        """Writes array block references to pys file
+
+        Format: <top>\t<left>\t<tab>\t<repr(filepath)>\t<repr(name)>\n
+        Cut blocks have two more columns with the reprs of their row and
+        column windows.
+
+        """
+
+        def array_block_lines():
+            """Generator of array block lines"""
+
+            for block_source in self._get_array_block_sources():
+                yield u"\t".join(map(repr, block_source)) + u"\n"
+
+        self._write_lines(array_block_lines())
+
+    def _pys2array_blocks(self, line):
+        """Appends array block to code_array"""
+
+        split_line = self._split_tidy(line)
+        top, left, tab = self._get_key(*split_line[:3])
+        source = map(fast_literal_eval, split_line[3:7])
+
+        self._load_array_block(top, left, tab, *source)
+
     def _macros2pys(self):
         """Writes macros to pys file
 
@@ -316,25 +498,38 @@ class Pys(object):
 
         self.code_array.dict_grid.macros += line.decode("utf-8")
 
-    def _fonts2pys(self):
-        """Writes fonts to pys file"""
+    def _get_used_fonts(self):
+        """Generator of font name, font data tuples of used fonts
 
-        # Get mapping from fonts to fontfiles
+        Font names that share a font file, e.g. the faces of a font
+        collection, share the font data string.
 
-        system_fonts = font_manager.findSystemFonts()
+        """
 
-        font_name2font_file = {}
-        for sys_font in system_fonts:
-            font_name = font_manager.FontProperties(fname=sys_font).get_name()
-            if font_name in self.fonts_used:
-                font_name2font_file[font_name] = sys_font
+        font_name2font_file = font_catalog().get_font_files()
+        font_file2font_data = {}
 
         # Only include fonts that have been used in the attributes
-        for font_name in font_name2font_file:
+        for font_name in set(self.fonts_used):
+            try:
+                font_file = font_name2font_file[font_name]
+
+            except KeyError:
+                # Font is not installed
+                continue
+
+            if font_file not in font_file2font_data:
+                with open(font_file, "rb") as fontfile:
+                    font_file2font_data[font_file] = fontfile.read()
+
+            yield font_name, font_file2font_data[font_file]
+
+    def _fonts2pys(self):
+        """Writes fonts to pys file"""
+
+        for font_name, font_data in self._get_used_fonts():
             # Serialize font
-            with open(font_name2font_file[font_name]) as fontfile:
-                font_data = fontfile.read()
-                ascii_font_data = base64.b64encode(font_data)
+            ascii_font_data = base64.b64encode(font_data)
 
             # Store font in pys file
             font_line_list = [font_name, ascii_font_data]
@@ -346,19 +541,32 @@ class Pys(object):
         font_name, ascii_font_data = self._split_tidy(line)
         font_data = base64.b64decode(ascii_font_data)
 
-        # Get system font names
-        system_fonts = font_manager.findSystemFonts()
+        self._set_font(font_name, font_data)
 
-        system_font_names = []
-        for sys_font in system_fonts:
-            system_font_names.append(
-                font_manager.FontProperties(fname=sys_font).get_name()
-            )
+    def _set_font(self, font_name, font_data):
+        """Makes font available, stores it as custom font if not a system font
+
+        Parameters
+        ----------
+        font_name: String
+        \tName of the font
+        font_data: String
+        \tContent of the font file
+
+        """
+
+        # Identical font data is stored and registered only once
+        digest = hashlib.sha1(font_data).hexdigest()
+        is_new_blob = digest not in self.font_blobs
+        font_data = self.font_blobs.setdefault(digest, font_data)
 
         # Use the system font if applicable
-        if font_name not in system_font_names:
+        if font_name not in font_catalog().get_font_files():
             self.code_array.custom_fonts[font_name] = font_data
 
+        if not is_new_blob:
+            return
+
         with open(self.temp_fontdir + os.sep + font_name, "wb") as font_file:
             font_file.write(font_data)
 
@@ -378,12 +586,8 @@ class Pys(object):
             self.pys_file.write(key)
             self._section2writer[key]()
 
-            try:
-                if self.pys_file.aborted:
-                    break
-            except AttributeError:
-                # pys_file is not opened via fileio.BZAopen
-                pass
+            if self._is_aborted():
+                break
 
         if config["font_save_enabled"]:
             # Clean up fonts used info
@@ -392,25 +596,320 @@ class Pys(object):
     def to_code_array(self):
         """Replaces everything in code_array from pys_file"""
 
-        state = None
-
         # Check if version section starts with first line
         first_line = True
 
         # Reset pys_file to start to enable multiple calls of this method
         self.pys_file.seek(0)
 
-        for line in self.pys_file:
+        section2reader = self._section2reader
+
+        # Reader of the current section
+        reader = None
+
+        # Lines are read in chunks, an empty chunk marks end of file or abort
+        for lines in iter(partial(self.pys_file.readlines, READ_CHUNK_SIZE),
+                          []):
             if first_line:
                 # If Version section does not start with first line then
                 # the file is invalid.
-                if line == "[Pyspread save file version]\n":
+                if lines[0] == "[Pyspread save file version]\n":
                     first_line = False
                 else:
                     raise ValueError(_("File format unsupported."))
 
-            if line in self._section2reader:
-                state = line
+            for line in lines:
+                if line in section2reader:
+                    reader = section2reader[line]
+
+                elif reader is not None:
+                    reader(line)
+
+
+def is_binary_pys(filepath):
+    """Returns True if filepath is a pys file in binary container format
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of the file to be checked
+
+    """
+
+    try:
+        with open(filepath, "rb") as infile:
+            return infile.read(len(BINARY_PYS_HEADER)) == BINARY_PYS_HEADER
+
+    except IOError:
+        return False
+
+
+class BinaryPys(Pys):
+    """Interface between code_array and binary pys container file
+
+    The container starts with the text version header of the pys format.
+    The header is followed by the file position of the index, the chunks
+    and the index itself.
+
+    The index maps "shape" to the grid shape, "macros", "fonts" and
+    "array_blocks" to chunk positions and "tables" to a dict for each
+    non-empty table.
+    These dicts map the table sections "grid", "attributes", "row_heights"
+    and "col_widths" to chunk positions. A chunk position is a tuple of
+    file offset and length. Each chunk is a zlib compressed marshal string.
+    The fonts chunk holds font name, SHA-1 digest tuples and a dict that
+    maps digests to font data so that each font file is stored once.
+
+    Only the first table is loaded in to_code_array. All other tables
+    become pending tables of the DictGrid, which loads them on first access.
+    Cell attributes of all tables are loaded in to_code_array because
+    undoing attribute changes relies on their list positions.
+
+    Parameters
+    ----------
+
+    code_array: model.CodeArray object
+    \tThe code_array object data structure
+    pys_file: file
+    \tFile like object in binary pys format, opened in binary mode
+
+    """
+
+    table_sections = ["grid", "attributes", "row_heights", "col_widths"]
+
+    def _encode(self, obj):
+        """Returns chunk string for obj"""
+
+        return zlib.compress(marshal.dumps(obj, MARSHAL_VERSION))
+
+    def _decode(self, chunk):
+        """Returns object from chunk string"""
+
+        try:
+            return marshal.loads(zlib.decompress(chunk))
+
+        except (zlib.error, ValueError, EOFError, TypeError):
+            raise ValueError(_("File content corrupted."))
+
+    def _write_chunk(self, obj):
+        """Writes obj as chunk to pys_file and returns its position"""
+
+        chunk = self._encode(obj)
+        offset = self.pys_file.tell()
+        self.pys_file.write(chunk)
+
+        return offset, len(chunk)
+
+    def _get_table_data(self):
+        """Returns dict that maps tables to dicts of table section data"""
+
+        shape = self.code_array.shape
+        dict_grid = self.code_array.dict_grid
+
+        tables = {}
+
+        def get_table(tab):
+            """Returns section data dict of tab, creates it if not present"""
+
+            if tab not in tables:
+                tables[tab] = {
+                    "grid": ([], [], []),
+                    "attributes": [],
+                    "row_heights": {},
+                    "col_widths": {},
+                }
+            return tables[tab]
+
+        for (row, col, tab), code in dict_grid.iteritems():
+            if code is not None:
+                rows, cols, codes = get_table(tab)["grid"]
+                rows.append(row)
+                cols.append(col)
+                codes.append(code)
+
+        for selection, tab, attr_dict in self._get_purged_cell_attributes():
+            get_table(tab)["attributes"].append((selection.parameters,
+                                                 attr_dict))
+
+        for (row, tab), height in dict_grid.row_heights.iteritems():
+            if row < shape[0] and tab < shape[2]:
+                get_table(tab)["row_heights"][row] = height
+
+        for (col, tab), width in dict_grid.col_widths.iteritems():
+            if col < shape[1] and tab < shape[2]:
+                get_table(tab)["col_widths"][col] = width
+
+        return tables
+
+    def _get_font_data(self):
+        """Returns font name, digest tuple list and digest to font data dict
+
+        Each font file is stored once even if it provides multiple fonts.
+
+        """
+
+        font_digests = []
+        font_blobs = {}
+
+        for font_name, font_data in self._get_used_fonts():
+            digest = hashlib.sha1(font_data).hexdigest()
+            font_blobs[digest] = font_data
+            font_digests.append((font_name, digest))
+
+        return font_digests, font_blobs
+
+    def _load_table_attributes(self, tab, chunk):
+        """Appends cell attributes of a table to code_array
+
+        Parameters
+        ----------
+        tab: Integer
+        \tTable of the cell attributes
+        chunk: String
+        \tChunk string of the attributes table section
+
+        """
+
+        cell_attributes = self.code_array.dict_grid.cell_attributes
+        for parameters, attr_dict in self._decode(chunk):
+            list.append(cell_attributes,
+                        (Selection(*parameters), tab, attr_dict))
+        cell_attributes._attr_cache.clear()
+        cell_attributes._table_cache.clear()
+
+    def _load_table(self, tab, table_chunks):
+        """Loads table from its chunks into code_array
+
+        Loading bypasses the undoable methods of the model so that lazily
+        loaded tables do not show up in the undo stack.
+        Cell attributes are not loaded here, see _load_table_attributes.
+
+        Parameters
+        ----------
+        tab: Integer
+        \tTable that is loaded
+        table_chunks: Dict
+        \tMaps table sections to chunk strings
+
+        """
+
+        dict_grid = self.code_array.dict_grid
+        shape = dict_grid.shape
+
+        rows, cols, codes = self._decode(table_chunks["grid"])
+        dict.update(dict_grid, izip(izip(rows, cols, repeat(tab)), codes))
+
+        row_heights = self._decode(table_chunks["row_heights"])
+        for row in row_heights:
+            if row < shape[0]:
+                dict.__setitem__(dict_grid.row_heights, (row, tab),
+                                 row_heights[row])
+
+        col_widths = self._decode(table_chunks["col_widths"])
+        for col in col_widths:
+            if col < shape[1]:
+                dict.__setitem__(dict_grid.col_widths, (col, tab),
+                                 col_widths[col])
+
+    # Access via model.py data
+    # ------------------------
+
+    def from_code_array(self):
+        """Replaces everything in pys_file from code_array"""
+
+        # Tables that have not been shown yet are stored as well
+        self.code_array.dict_grid.load_tables()
+
+        self.pys_file.write(BINARY_PYS_HEADER)
+
+        # Placeholder for the index position
+        index_position_offset = self.pys_file.tell()
+        self.pys_file.write(INDEX_POSITION.pack(0, 0))
+
+        index = {"shape": tuple(self.code_array.shape), "tables": {}}
+
+        for tab, table_data in sorted(self._get_table_data().iteritems()):
+            index["tables"][tab] = table_index = {}
+            for section in self.table_sections:
+                table_index[section] = self._write_chunk(table_data[section])
+
+            if self._is_aborted():
+                return
+
+        index["macros"] = self._write_chunk(self.code_array.dict_grid.macros)
+
+        if self.code_array.array_blocks:
+            index["array_blocks"] = \
+                self._write_chunk(self._get_array_block_sources())
+
+        if config["font_save_enabled"]:
+            index["fonts"] = self._write_chunk(self._get_font_data())
+
+            # Clean up fonts used info
+            self.fonts_used = []
+
+        index_offset, index_length = self._write_chunk(index)
+
+        self.pys_file.seek(index_position_offset)
+        self.pys_file.write(INDEX_POSITION.pack(index_offset, index_length))
+        self.pys_file.seek(0, os.SEEK_END)
+
+    def to_code_array(self):
+        """Replaces everything in code_array from pys_file
+
+        Only the first table is loaded, the others are loaded on demand.
+
+        """
+
+        self.pys_file.seek(0)
+        data = self.pys_file.read()
+
+        if not data.startswith(BINARY_PYS_HEADER):
+            raise ValueError(_("File format unsupported."))
+
+        def get_chunk(position):
+            """Returns chunk string at position"""
+
+            offset, length = position
+            return data[offset:offset + length]
+
+        header_length = len(BINARY_PYS_HEADER)
+
+        try:
+            index_position = INDEX_POSITION.unpack(
+                data[header_length:header_length + INDEX_POSITION.size])
+
+        except struct.error:
+            raise ValueError(_("File content corrupted."))
+
+        index = self._decode(get_chunk(index_position))
+
+        self.code_array.shape = index["shape"]
+        self.code_array.dict_grid.macros = \
+            self._decode(get_chunk(index["macros"]))
+
+        if config["font_save_enabled"] and "fonts" in index:
+            font_digests, font_blobs = self._decode(get_chunk(index["fonts"]))
+            for font_name, digest in font_digests:
+                self._set_font(font_name, font_blobs[digest])
+
+        if "array_blocks" in index:
+            for block_source in self._decode(get_chunk(index["array_blocks"])):
+                self._load_array_block(*block_source)
+
+        dict_grid = self.code_array.dict_grid
+
+        for tab, table_index in sorted(index["tables"].iteritems()):
+            # Attributes are loaded before any undoable attribute change so
+            # that lazy table loading does not append behind such changes
+            self._load_table_attributes(
+                tab, get_chunk(table_index["attributes"]))
+
+            # Keep only the chunks of the table so that data can be freed
+            table_chunks = dict((section, get_chunk(table_index[section]))
+                                for section in self.table_sections
+                                if section != "attributes")
+            dict_grid.pending_tables[tab] = \
+                partial(self._load_table, tab, table_chunks)
 
-            elif state is not None:
-                self._section2reader[state](line)
+        dict_grid.load_table(0)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+sqlite
+======
+
+This file contains an interface to SQLite databases.
+
+Query results are fetched in chunks with fetchmany and converted to
+cell code, which the grid pastes chunk by chunk. Grid areas are
+written to a database table with executemany in one transaction. The
+column types of the table are inferred from the cell results.
+
+Provides
+--------
+
+ * quote_identifier: Returns SQL identifier in double quotes
+ * get_table_names: Returns names of the tables of a database
+ * value2code: Returns cell code for a database value
+ * result2value: Returns database value for a cell result
+ * get_column_type: Returns column type for the types of column values
+ * SqliteQuery: Iterates over the rows of a query result as cell code
+ * write_table: Writes rows of cell results to a database table
+
+"""
+
+from itertools import izip
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+import numpy
+
+# Rows that are fetched from the database cursor at once
+SQLITE_CHUNK_ROWS = 10000
+
+# Range of SQLite INTEGER values, larger integers are stored as text
+SQLITE_MIN_INTEGER = -2 ** 63
+SQLITE_MAX_INTEGER = 2 ** 63 - 1
+
+# Column types of Python value types that sqlite3 accepts
+VALUE_TYPE2COLUMN_TYPE = {
+    int: "INTEGER",
+    long: "INTEGER",
+    bool: "INTEGER",
+    float: "REAL",
+    unicode: "TEXT",
+    buffer: "BLOB",
+}
+
+
+def quote_identifier(identifier):
+    """Returns SQL identifier in double quotes"""
+
+    return u'"{}"'.format(identifier.replace(u'"', u'""'))
+
+
+def get_table_names(filepath):
+    """Returns names of the tables of a database
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of SQLite database file
+
+    """
+
+    connection = sqlite3.connect(filepath)
+
+    try:
+        cursor = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+        return [name for name, in cursor]
+
+    finally:
+        connection.close()
+
+
+def value2code(value):
+    """Returns cell code for a database value, None for NULL
+
+    Parameters
+    ----------
+    value: None, Integer, Float, Unicode or Buffer
+    \tValue from a database row
+
+    """
+
+    if value is None:
+        return
+
+    elif isinstance(value, buffer):
+        return repr(str(value))
+
+    return repr(value)
+
+
+def result2value(result):
+    """Returns database value for a cell result
+
+    Results that sqlite3 cannot store are stored as text. This includes
+    integers that do not fit into 64 bits.
+
+    Parameters
+    ----------
+    result: Object
+    \tCell result
+
+    """
+
+    if isinstance(result, numpy.generic):
+        # numpy scalars are not accepted as parameters
+        result = result.item()
+
+    if type(result) in (int, long) and \
+       not SQLITE_MIN_INTEGER <= result <= SQLITE_MAX_INTEGER:
+        return unicode(result)
+
+    if result is None or type(result) in VALUE_TYPE2COLUMN_TYPE:
+        return result
+
+    elif isinstance(result, str):
+        return result.decode("utf-8", "replace")
+
+    return unicode(result)
+
+
+def get_column_type(value_types):
+    """Returns column type for the types of the values of a column
+
+    Columns of integers and floats become REAL. Columns with other
+    mixed types get no type so that values keep their storage class.
+
+    Parameters
+    ----------
+    value_types: Set of types
+    \tTypes of the non-NULL values of the column
+
+    """
+
+    column_types = set(VALUE_TYPE2COLUMN_TYPE[value_type]
+                       for value_type in value_types)
+
+    if column_types == set(["INTEGER", "REAL"]):
+        return "REAL"
+
+    elif len(column_types) == 1:
+        return column_types.pop()
+
+    return ""
+
+
+class SqliteQuery(object):
+    """Iterates over the rows of a query result as cell code
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of SQLite database file
+    query: String
+    \tSQL query
+    has_header: Bool, defaults to True
+    \tThe column names of the result are yielded as first row if True
+    on_error: Function, defaults to None
+    \tCalled with the sqlite3.Error if running the query fails. Iteration
+    \tstops after the rows that have been fetched. Errors are raised if
+    \ton_error is None.
+
+    """
+
+    def __init__(self, filepath, query, has_header=True, on_error=None):
+        self.filepath = filepath
+        self.query = query
+        self.has_header = has_header
+        self.on_error = on_error
+
+    def check(self):
+        """Raises sqlite3.Error if the query cannot be compiled
+
+        The query is explained but not run.
+
+        """
+
+        connection = sqlite3.connect(self.filepath)
+
+        try:
+            connection.execute(u"EXPLAIN " + self.query)
+
+        finally:
+            connection.close()
+
+    def __iter__(self):
+        """Generator of rows of cell code"""
+
+        for chunk in self.iter_chunks():
+            for row in chunk:
+                yield row
+
+    def iter_chunks(self, chunk_rows=SQLITE_CHUNK_ROWS):
+        """Generator of lists of up to chunk_rows rows of cell code
+
+        Parameters
+        ----------
+        chunk_rows: Integer, defaults to SQLITE_CHUNK_ROWS
+        \tNumber of rows that are fetched at once
+
+        """
+
+        connection = sqlite3.connect(self.filepath)
+
+        try:
+            cursor = connection.execute(self.query)
+
+            if self.has_header and cursor.description is not None:
+                yield [[repr(column[0]) for column in cursor.description]]
+
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+
+                if not rows:
+                    break
+
+                yield [map(value2code, row) for row in rows]
+
+        except sqlite3.Error, err:
+            # Runtime errors are not detected by check
+            if self.on_error is None:
+                raise
+
+            self.on_error(err)
+
+        finally:
+            connection.close()
+
+
+def write_table(filepath, table_name, data, column_names, replace=False):
+    """Writes rows of cell results to a database table
+
+    The column types are inferred in a first pass over data. All rows
+    are inserted with executemany in one transaction.
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of SQLite database file, which is created if not present
+    table_name: Unicode
+    \tName of the table
+    data: Iterable of iterables of results
+    \tRows of cell results, iterated twice
+    column_names: List of Unicode
+    \tNames of the table columns, one per result in each row
+    replace: Bool, defaults to False
+    \tAn existing table is replaced if True
+
+    """
+
+    value_types = [set() for __ in column_names]
+
+    for row in data:
+        for types, result in izip(value_types, row):
+            value = result2value(result)
+            if value is not None:
+                types.add(type(value))
+
+    columns = u", ".join(
+        u"{} {}".format(quote_identifier(name), get_column_type(types))
+        for name, types in izip(column_names, value_types))
+
+    quoted_table_name = quote_identifier(table_name)
+
+    create_statement = u"CREATE TABLE {} ({})".format(quoted_table_name,
+                                                      columns)
+    insert_statement = u"INSERT INTO {} VALUES ({})".format(
+        quoted_table_name, u", ".join([u"?"] * len(column_names)))
+
+    def value_rows():
+        """Generator of tuples of database values of each row"""
+
+        for row in data:
+            yield tuple(map(result2value, row))
+
+    # The transaction is explicit because sqlite3 commits implicitly
+    # before CREATE and DROP statements
+    connection = sqlite3.connect(filepath, isolation_level=None)
+
+    try:
+        connection.execute("BEGIN")
+
+        try:
+            if replace:
+                connection.execute(u"DROP TABLE IF EXISTS " +
+                                   quoted_table_name)
+
+            connection.execute(create_statement)
+            connection.executemany(insert_statement, value_rows())
+
+        except:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+    finally:
+        connection.close()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_journal
+============
+
+Unit tests for journal.py
+
+"""
+
+import os
+import sys
+
+import numpy
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.interfaces.journal import PysJournal
+from src.lib.selection import Selection
+from src.model.model import CodeArray
+
+NPY_PATH = TESTPATH + "journal_test_array.npy"
+
+
+class TestPysJournal(object):
+    """Unit tests for PysJournal"""
+
+    def setup_method(self, method):
+        """Creates base file and code_array with journal tracking"""
+
+        self.base_path = TESTPATH + "journal_test.pys"
+
+        with open(self.base_path, "wb") as base_file:
+            base_file.write("Base file content")
+
+        self.code_array = CodeArray((100, 10, 2))
+        self.code_array[0, 0, 0] = u"'Unchanged'"
+        self.code_array[1, 0, 0] = u"'Deleted'"
+
+        self.journal = PysJournal(self.code_array, self.base_path)
+        self.journal.start()
+
+    def teardown_method(self, method):
+        """Removes base and journal files"""
+
+        self.journal.remove()
+        os.remove(self.base_path)
+
+    def test_get_record(self):
+        """Test get_record method"""
+
+        assert self.journal.get_record() is None
+
+        self.code_array[2, 0, 1] = u"'New'"
+        self.code_array.pop((1, 0, 0))
+
+        record = self.journal.get_record()
+
+        assert sorted(record["cells"]) == [((1, 0, 0), None),
+                                           ((2, 0, 1), u"'New'")]
+        assert "attributes" not in record
+        assert "macros" not in record
+
+    def test_append_replay(self):
+        """Test that replaying appended records restores code_array"""
+
+        self.code_array[2, 0, 1] = u"'New'"
+        self.code_array.pop((1, 0, 0))
+        self.code_array.set_row_height(3, 0, 42.0)
+        assert self.journal.append()
+
+        # Nothing has changed since the last append
+        assert not self.journal.append()
+
+        selection = Selection([], [], [], [], [(2, 0)])
+        self.code_array.cell_attributes.append((selection, 1,
+                                                {"fontweight": 92}))
+        self.code_array.macros = u"a = 1\n"
+        self.code_array.shape = (100, 10, 3)
+        assert self.journal.append()
+
+        code_array = CodeArray((100, 10, 2))
+        code_array[0, 0, 0] = u"'Unchanged'"
+        code_array[1, 0, 0] = u"'Deleted'"
+
+        assert PysJournal(code_array, self.base_path).replay() == 2
+
+        assert code_array.shape == (100, 10, 3)
+        assert code_array.dict_grid == self.code_array.dict_grid
+        assert code_array.row_heights == self.code_array.row_heights
+        assert list(code_array.cell_attributes) == \
+            list(self.code_array.cell_attributes)
+        assert code_array.macros == u"a = 1\n"
+
+    def test_replay_truncated(self):
+        """Test that a truncated last record is ignored"""
+
+        self.code_array[2, 0, 1] = u"'New'"
+        self.journal.append()
+        self.code_array[3, 0, 1] = u"'Lost'"
+        self.journal.append()
+
+        with open(self.journal.journal_path, "rb") as journal_file:
+            data = journal_file.read()
+
+        with open(self.journal.journal_path, "wb") as journal_file:
+            journal_file.write(data[:-3])
+
+        code_array = CodeArray((100, 10, 2))
+
+        assert PysJournal(code_array, self.base_path).replay() == 1
+        assert code_array((2, 0, 1)) == u"'New'"
+        assert code_array((3, 0, 1)) is None
+
+    def test_replay_wrong_base(self):
+        """Test that journals of other base files are rejected"""
+
+        self.code_array[2, 0, 1] = u"'New'"
+        self.journal.append()
+
+        with open(self.base_path, "wb") as base_file:
+            base_file.write("Changed base file content")
+
+        try:
+            PysJournal(CodeArray((100, 10, 2)), self.base_path).replay()
+            assert False
+
+        except ValueError:
+            pass
+
+    def test_append_replay_array_blocks(self):
+        """Test that array blocks are restored from journal records"""
+
+        numpy.save(NPY_PATH, numpy.arange(6).reshape(3, 2))
+
+        try:
+            array = numpy.load(NPY_PATH)
+            self.code_array.array_blocks.append((5, 6, 1, array,
+                                                 (NPY_PATH, None)))
+            assert self.journal.append()
+            assert not self.journal.append()
+
+            code_array = CodeArray((100, 10, 2))
+            assert PysJournal(code_array, self.base_path).replay() == 1
+
+        finally:
+            os.remove(NPY_PATH)
+
+        assert len(code_array.array_blocks) == 1
+        assert code_array.array_blocks[0][:3] == (5, 6, 1)
+        assert code_array.array_blocks[0][4] == (NPY_PATH, None)
+        assert code_array[7, 7, 1] == 5
+
+        # Removed blocks are removed on replay
+        del self.code_array.array_blocks[:]
+        assert self.journal.append()
+
+        code_array = CodeArray((100, 10, 2))
+        assert PysJournal(code_array, self.base_path).replay() == 2
+        assert not code_array.array_blocks
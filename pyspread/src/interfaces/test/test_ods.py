@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_ods
+========
+
+Unit tests for ods.py
+
+"""
+
+
+import os
+import sys
+import zipfile
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.interfaces.ods import Ods
+from src.lib.selection import Selection
+from src.lib.testlib import params, pytest_generate_tests
+from src.model.model import CodeArray
+
+ODS_PATH = TESTPATH + "ods_test.ods"
+
+
+class TestOds(object):
+    """Unit tests for Ods"""
+
+    def setup_method(self, method):
+        """Creates code_array with code and cell attributes"""
+
+        self.code_array = CodeArray((1000, 100, 3))
+
+        for row in xrange(50):
+            for col in xrange(5):
+                self.code_array[row, col, 0] = repr(row * 5 + col)
+
+        self.code_array[3, 2, 1] = u"'Test  \n text'"
+        self.code_array[999, 99, 1] = u"1e5"
+
+        cell_attributes = self.code_array.cell_attributes
+
+        selection = Selection([(0, 0)], [(49, 0)], [], [], [])
+        cell_attributes.append((selection, 0, {"fontweight": wx.BOLD}))
+
+        selection = Selection([(5, 1)], [(9, 3)], [], [], [])
+        cell_attributes.append((selection, 0, {"bgcolor": 0x00FF00,
+                                               "borderwidth_bottom": 0}))
+
+        self.code_array.row_heights[2, 0] = 40.0
+        self.code_array.row_heights[500, 0] = 40.0
+        self.code_array.col_widths[1, 0] = 200.0
+
+    def teardown_method(self, method):
+        """Removes test ods file"""
+
+        if os.path.exists(ODS_PATH):
+            os.remove(ODS_PATH)
+
+    def write_ods(self):
+        """Writes code_array to test ods file"""
+
+        with open(ODS_PATH, "wb") as outfile:
+            Ods(self.code_array, outfile).from_code_array()
+
+    param_rgb2hex = [
+        {'rgb': 0x000000, 'res': "#000000"},
+        {'rgb': 0xFFFFFF, 'res': "#ffffff"},
+        {'rgb': wx.Colour(255, 0, 0).GetRGB(), 'res': "#ff0000"},
+        {'rgb': wx.Colour(0, 0, 128).GetRGB(), 'res': "#000080"},
+    ]
+
+    @params(param_rgb2hex)
+    def test_rgb2hex(self, rgb, res):
+        """Unit test for rgb2hex"""
+
+        assert Ods(self.code_array, None).rgb2hex(rgb) == res
+
+    def test_from_code_array(self):
+        """Test from_code_array method"""
+
+        self.write_ods()
+
+        with zipfile.ZipFile(ODS_PATH) as ods_file:
+            content = ods_file.read("content.xml")
+            styles = ods_file.read("styles.xml")
+
+        assert content.count("<table:table ") == 3
+        assert content.count("style:family=\"table-row\"") == 1
+        assert content.count("style:family=\"table-column\"") == 1
+        assert 'fo:font-weight="bold"' in styles
+        assert 'fo:background-color="#00ff00"' in styles
+        assert 'fo:border-bottom="none"' in styles
+
+        # Only the filled area is written
+        assert len(content) < 100000
+
+    def test_to_code_array(self):
+        """Test to_code_array method"""
+
+        self.write_ods()
+
+        code_array = CodeArray((1, 1, 1))
+
+        with open(ODS_PATH, "rb") as infile:
+            Ods(code_array, infile).to_code_array()
+
+        assert code_array.shape == (1000, 100, 3)
+
+        for key in self.code_array.dict_grid:
+            assert code_array(key) == self.code_array(key)
+
+        assert len(code_array.dict_grid) == len(self.code_array.dict_grid)
@@ -31,6 +31,8 @@ import bz2
 import os
 import sys
 
+import numpy
+
 import wx
 app = wx.App()
 
@@ -39,11 +41,14 @@ sys.path.insert(0, TESTPATH)
 sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
 sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
 
-from src.interfaces.pys import Pys
+from src.interfaces.pys import Pys, BinaryPys, is_binary_pys
 from src.lib.selection import Selection
 from src.lib.testlib import params, pytest_generate_tests
+from src.lib.undo import stack as undo_stack
 from src.model.model import CodeArray
 
+NPY_PATH = TESTPATH + "pys_test_array.npy"
+
 
 class TestPys(object):
     """Unit tests for Pys"""
@@ -185,6 +190,10 @@ class TestPys(object):
         {'code': "[]\t[]\t[]\t[]\t[(3, 4)]\t0\t'borderwidth_bottom'\t42\n",
          'selection': Selection([], [], [], [], [(3, 4)]), 'table': 0,
          'key': (3, 4, 0), 'attr': 'borderwidth_bottom', 'val': 42},
+        {'code': "[(1, 1)]\t[(5, 5)]\t[]\t[]\t[]\t1\t'merge_area'"
+                 "\t(1, 1, 5, 5)\n",
+         'selection': Selection([(1, 1)], [(5, 5)], [], [], []), 'table': 1,
+         'key': (1, 1, 1), 'attr': 'merge_area', 'val': (1, 1, 5, 5)},
     ]
 
     @params(param_attributes2pys)
@@ -304,3 +313,178 @@ class TestPys(object):
         self.pys_in.to_code_array()
 
         assert self.code_array((0, 0, 0)) == '"Hallo"'
+
+    def test_array_blocks(self):
+        """Test writing and reading of array block references"""
+
+        numpy.save(NPY_PATH, numpy.arange(6).reshape(3, 2))
+
+        try:
+            self.pys_in.to_code_array()
+            array = numpy.load(NPY_PATH)
+            self.code_array.array_blocks.append((5, 6, 1, array,
+                                                 (NPY_PATH, None)))
+            # Block that has been cut by a row deletion
+            self.code_array.array_blocks.append(
+                (9, 0, 1, array[2:3], (NPY_PATH, None, (2, 3), (0, 2))))
+            self.write_pys_out("from_code_array")
+
+            code_array = CodeArray((1, 1, 1))
+            with bz2.BZ2File(self.pys_outfile_path) as pys_file:
+                Pys(code_array, pys_file).to_code_array()
+
+        finally:
+            os.remove(NPY_PATH)
+            os.remove(self.pys_outfile_path)
+
+        assert code_array.macros == self.code_array.macros
+        assert len(code_array.array_blocks) == 2
+        assert code_array.array_blocks[0][4] == (NPY_PATH, None)
+        assert code_array[7, 7, 1] == 5
+
+        assert code_array.array_blocks[1][4] == \
+            (NPY_PATH, None, (2, 3), (0, 2))
+        assert code_array[9, 1, 1] == 5
+        assert code_array[10, 0, 1] is None
+
+        # Missing array files are skipped
+        code_array = CodeArray((1, 1, 1))
+        Pys(code_array, None)._pys2array_blocks(
+            "0\t0\t0\t'{}'\tNone\n".format(NPY_PATH))
+        assert not code_array.array_blocks
+
+
+class TestBinaryPys(object):
+    """Unit tests for BinaryPys"""
+
+    def setup_method(self, method):
+        """Loads test.pys into code_array and writes it as binary pys"""
+
+        self.code_array = CodeArray((1000, 100, 3))
+
+        pys_infile = bz2.BZ2File(TESTPATH + "pys_test1.pys")
+        Pys(self.code_array, pys_infile).to_code_array()
+        pys_infile.close()
+
+        self.code_array.dict_grid[(2, 3, 2)] = u"'Table 2'"
+        self.code_array.row_heights[(4, 2)] = 40.0
+
+        self.pys_outfile_path = TESTPATH + "pys_test3.pys"
+
+        with open(self.pys_outfile_path, "wb") as outfile:
+            BinaryPys(self.code_array, outfile).from_code_array()
+
+    def teardown_method(self, method):
+        """Removes the binary pys file"""
+
+        os.remove(self.pys_outfile_path)
+
+    def test_is_binary_pys(self):
+        """Test is_binary_pys function"""
+
+        assert is_binary_pys(self.pys_outfile_path)
+        assert not is_binary_pys(TESTPATH + "pys_test1.pys")
+        assert not is_binary_pys(TESTPATH + "nonexistent.pys")
+
+    def test_to_code_array(self):
+        """Test to_code_array method"""
+
+        code_array = CodeArray((1, 1, 1))
+
+        with open(self.pys_outfile_path, "rb") as infile:
+            BinaryPys(code_array, infile).to_code_array()
+
+        assert code_array.shape == self.code_array.shape
+        assert code_array.macros == self.code_array.macros
+        assert code_array((0, 0, 0)) == '"Hallo"'
+
+        # Table 2 is loaded on first access
+        assert 2 in code_array.dict_grid.pending_tables
+        assert code_array.row_heights[(4, 2)] != 40.0
+        assert code_array((2, 3, 2)) == u"'Table 2'"
+        assert 2 not in code_array.dict_grid.pending_tables
+        assert code_array.row_heights[(4, 2)] == 40.0
+
+        code_array.dict_grid.load_tables()
+        assert not code_array.dict_grid.pending_tables
+
+        assert code_array.dict_grid == self.code_array.dict_grid
+        assert code_array.row_heights == self.code_array.row_heights
+        assert code_array.col_widths == self.code_array.col_widths
+        assert list(code_array.cell_attributes) == \
+            list(self.code_array.cell_attributes)
+
+    def test_lazy_table_undo(self):
+        """Test that loading a pending table keeps attribute undo working"""
+
+        self.code_array.cell_attributes.append(
+            (Selection([], [], [], [], [(1, 1)]), 2, {"fontweight": 92}))
+
+        with open(self.pys_outfile_path, "wb") as outfile:
+            BinaryPys(self.code_array, outfile).from_code_array()
+
+        code_array = CodeArray((1, 1, 1))
+
+        with open(self.pys_outfile_path, "rb") as infile:
+            BinaryPys(code_array, infile).to_code_array()
+
+        assert 2 in code_array.dict_grid.pending_tables
+
+        selection = Selection([], [], [], [], [(0, 0)])
+        code_array.cell_attributes.append((selection, 0, {"fontweight": 93}))
+        assert code_array.cell_attributes[0, 0, 0]["fontweight"] == 93
+
+        # Switching to table 2 loads it
+        assert code_array((2, 3, 2)) == u"'Table 2'"
+
+        undo_stack().undo()
+
+        assert code_array.cell_attributes[0, 0, 0]["fontweight"] != 93
+        assert code_array.cell_attributes[1, 1, 2]["fontweight"] == 92
+        assert list(code_array.cell_attributes) == \
+            list(self.code_array.cell_attributes)
+
+    def test_corrupt_file(self):
+        """Test that truncated files raise ValueError"""
+
+        with open(self.pys_outfile_path, "rb") as infile:
+            data = infile.read()
+
+        with open(self.pys_outfile_path, "wb") as outfile:
+            outfile.write(data[:len(data) // 2])
+
+        with open(self.pys_outfile_path, "rb") as infile:
+            try:
+                BinaryPys(CodeArray((1, 1, 1)), infile).to_code_array()
+                assert False
+
+            except ValueError:
+                pass
+
+    def test_array_blocks(self):
+        """Test writing and reading of array block references"""
+
+        numpy.save(NPY_PATH, numpy.arange(6).reshape(3, 2))
+
+        try:
+            array = numpy.load(NPY_PATH)
+            self.code_array.array_blocks.append((5, 6, 0, array,
+                                                 (NPY_PATH, None)))
+            self.code_array.array_blocks.append(
+                (20, 0, 0, array[:, 1:], (NPY_PATH, None, (0, 3), (1, 2))))
+
+            with open(self.pys_outfile_path, "wb") as outfile:
+                BinaryPys(self.code_array, outfile).from_code_array()
+
+            code_array = CodeArray((1, 1, 1))
+            with open(self.pys_outfile_path, "rb") as infile:
+                BinaryPys(code_array, infile).to_code_array()
+
+        finally:
+            os.remove(NPY_PATH)
+
+        assert code_array.array_blocks[0][:3] == (5, 6, 0)
+        assert code_array[7, 7, 0] == 5
+        assert code_array.array_blocks[1][4] == \
+            (NPY_PATH, None, (0, 3), (1, 2))
+        assert code_array[22, 0, 0] == 5
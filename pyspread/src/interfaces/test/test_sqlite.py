@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_sqlite
+===========
+
+Unit tests for sqlite.py
+
+"""
+
+import os
+import sqlite3
+import sys
+
+import numpy
+import pytest
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.interfaces.sqlite import SqliteQuery, get_table_names, value2code
+from src.interfaces.sqlite import result2value, get_column_type, write_table
+from src.lib.__csv import CsvExportData
+from src.lib.testlib import params, pytest_generate_tests
+from src.model.model import CodeArray
+
+DB_PATH = TESTPATH + "sqlite_test.db"
+
+
+param_value2code = [
+    {'value': None, 'res': None},
+    {'value': 1, 'res': "1"},
+    {'value': 2.5, 'res': "2.5"},
+    {'value': u"a'b", 'res': "u\"a'b\""},
+    {'value': buffer("\x00x"), 'res': "'\\x00x'"},
+]
+
+
+@params(param_value2code)
+def test_value2code(value, res):
+    """Unit test for value2code"""
+
+    assert value2code(value) == res
+
+
+param_result2value = [
+    {'result': None, 'res': None},
+    {'result': True, 'res': True},
+    {'result': 3L, 'res': 3L},
+    {'result': numpy.int64(4), 'res': 4},
+    {'result': numpy.float32(0.5), 'res': 0.5},
+    {'result': "\xc3\xa4", 'res': u"\xe4"},
+    {'result': [1, 2], 'res': u"[1, 2]"},
+    {'result': 2 ** 63 - 1, 'res': 2 ** 63 - 1},
+    {'result': 2 ** 64, 'res': u"18446744073709551616"},
+    {'result': -2 ** 63 - 1, 'res': u"-9223372036854775809"},
+    {'result': numpy.uint64(2 ** 64 - 1), 'res': u"18446744073709551615"},
+]
+
+
+@params(param_result2value)
+def test_result2value(result, res):
+    """Unit test for result2value"""
+
+    value = result2value(result)
+
+    assert value == res
+    assert type(value) is type(res)
+
+
+param_get_column_type = [
+    {'value_types': set(), 'res': ""},
+    {'value_types': set([int, long, bool]), 'res': "INTEGER"},
+    {'value_types': set([int, float]), 'res': "REAL"},
+    {'value_types': set([unicode]), 'res': "TEXT"},
+    {'value_types': set([int, unicode]), 'res': ""},
+]
+
+
+@params(param_get_column_type)
+def test_get_column_type(value_types, res):
+    """Unit test for get_column_type"""
+
+    assert get_column_type(value_types) == res
+
+
+class TestSqlite(object):
+    """Unit tests for SqliteQuery and write_table"""
+
+    def setup_method(self, method):
+        """Creates test database"""
+
+        connection = sqlite3.connect(DB_PATH)
+        with connection:
+            connection.execute("CREATE TABLE t (a INTEGER, b TEXT, c REAL)")
+            connection.executemany("INSERT INTO t VALUES (?, ?, ?)",
+                                   [(i, u"x" + unicode(i), None)
+                                    for i in xrange(25)])
+        connection.close()
+
+    def teardown_method(self, method):
+        """Removes test database"""
+
+        if os.path.exists(DB_PATH):
+            os.remove(DB_PATH)
+
+    def test_get_table_names(self):
+        """Unit test for get_table_names"""
+
+        assert get_table_names(DB_PATH) == [u"t"]
+
+    def test_iter_chunks(self):
+        """Unit test for SqliteQuery.iter_chunks"""
+
+        query = SqliteQuery(DB_PATH, "SELECT * FROM t ORDER BY a")
+
+        chunks = list(query.iter_chunks(chunk_rows=10))
+
+        assert map(len, chunks) == [1, 10, 10, 5]
+        assert chunks[0] == [["'a'", "'b'", "'c'"]]
+        assert chunks[1][3] == ["3", "u'x3'", None]
+        assert list(query)[1:] == sum(chunks[1:], [])
+
+    def test_iter_chunks_error(self):
+        """Unit test for runtime errors in SqliteQuery.iter_chunks"""
+
+        query = "SELECT a, abs(a - 9223372036854775807 - 1 - 5) FROM t"
+
+        # The query compiles but fails in row 5
+        SqliteQuery(DB_PATH, query).check()
+
+        with pytest.raises(sqlite3.Error):
+            list(SqliteQuery(DB_PATH, query).iter_chunks(chunk_rows=2))
+
+        errors = []
+        sqlite_query = SqliteQuery(DB_PATH, query, on_error=errors.append)
+        chunks = list(sqlite_query.iter_chunks(chunk_rows=2))
+
+        assert len(errors) == 1
+        assert isinstance(errors[0], sqlite3.Error)
+        assert map(len, chunks) == [1, 2, 2]
+
+    def test_check(self):
+        """Unit test for SqliteQuery.check"""
+
+        SqliteQuery(DB_PATH, "SELECT a FROM t").check()
+
+        with pytest.raises(sqlite3.Error):
+            SqliteQuery(DB_PATH, "SELECT x FROM t").check()
+
+    def test_write_table(self):
+        """Unit test for write_table"""
+
+        code_array = CodeArray((100, 10, 3))
+        code_array[0, 0, 0] = "1"
+        code_array[1, 0, 0] = "2.5"
+        code_array[0, 1, 0] = "'text'"
+        code_array[1, 2, 0] = "[1, 2]"
+        code_array[2, 2, 0] = "3"
+        code_array[2, 1, 0] = "2 ** 64"
+
+        data = CsvExportData(code_array, 0, 3, 0, 3, 0)
+
+        write_table(DB_PATH, u"new", data, [u"c0", u"c1", u"c2"])
+
+        connection = sqlite3.connect(DB_PATH)
+
+        columns = connection.execute('PRAGMA table_info("new")').fetchall()
+        rows = connection.execute('SELECT * FROM "new"').fetchall()
+
+        connection.close()
+
+        assert [column[2] for column in columns] == ["REAL", "TEXT", ""]
+        assert rows == [(1.0, u"text", None), (2.5, None, u"[1, 2]"),
+                        (None, u"18446744073709551616", 3)]
+
+    def test_write_table_replace(self):
+        """Unit test for write_table with existing table"""
+
+        code_array = CodeArray((100, 10, 3))
+        code_array[0, 0, 0] = "1"
+
+        data = CsvExportData(code_array, 0, 1, 0, 1, 0)
+
+        with pytest.raises(sqlite3.Error):
+            write_table(DB_PATH, u"t", data, [u"c0"])
+
+        write_table(DB_PATH, u"t", data, [u"c0"], replace=True)
+
+        connection = sqlite3.connect(DB_PATH)
+        rows = connection.execute('SELECT * FROM t').fetchall()
+        connection.close()
+
+        assert rows == [(1,)]
@@ -51,12 +51,30 @@ sys.path.insert(0, TESTPATH)
 sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
 sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
 
-from src.interfaces.xls import Xls
+from src.interfaces.xls import Xls, runs2blocks
 from src.lib.selection import Selection
 from src.lib.testlib import params, pytest_generate_tests
 from src.model.model import CodeArray
 from src.sysvars import get_dpi, get_default_font
 
+param_runs2blocks = [
+    {'runs': [], 'res': ([], [])},
+    {'runs': [(0, 0, 3)], 'res': ([(0, 0)], [(0, 3)])},
+    {'runs': [(0, 0, 3), (1, 0, 3), (2, 0, 3)], 'res': ([(0, 0)], [(2, 3)])},
+    {'runs': [(0, 0, 3), (2, 0, 3)], 'res': ([(0, 0), (2, 0)],
+                                             [(0, 3), (2, 3)])},
+    {'runs': [(0, 0, 1), (0, 3, 4), (1, 0, 1), (1, 3, 5)],
+     'res': ([(0, 0), (0, 3), (1, 3)], [(1, 1), (0, 4), (1, 5)])},
+]
+
+
+@params(param_runs2blocks)
+def test_runs2blocks(runs, res):
+    """Unit test for runs2blocks"""
+
+    assert runs2blocks(runs) == res
+
+
 @pytest.mark.skipif(xlrd is None, reason="requires xlrd")
 class TestXls(object):
     """Unit tests for Xls"""
@@ -334,6 +352,20 @@ class TestXls(object):
         assert getattr(getattr(xfstyle, sec_key), subsec_key) == \
             getattr(getattr(style, sec_key), subsec_key)
 
+    @pytest.mark.skipif(xlwt is None, reason="requires xlwt")
+    def test_get_xfstyle_cache(self):
+        """Test that cells with equal attributes share one XFStyle"""
+
+        dict_grid = self.code_array.dict_grid
+        selection = Selection([(20, 0)], [(29, 1)], [], [], [])
+        dict_grid.cell_attributes.append((selection, 0, {"bgcolor": 0}))
+
+        xfstyle = self.xls_in._get_xfstyle([], (21, 0, 0))
+
+        assert self.xls_in._get_xfstyle([], (22, 0, 0)) is xfstyle
+        assert self.xls_in._get_xfstyle([], (22, 1, 0)) is xfstyle
+        assert self.xls_in._get_xfstyle([], (31, 1, 0)) is not xfstyle
+
     param_attributes2xls = [
         {'key': (14, 3, 0), 'attr': 'fontweight', 'val': 92},
         {'key': (14, 3, 0), 'attr': 'fontstyle', 'val': 90},
@@ -358,6 +390,20 @@ class TestXls(object):
         attrs = self.code_array.dict_grid.cell_attributes[key]
 
         assert attrs[attr] == val
+
+    def test_xls2attributes_blocks(self):
+        """Test that _xls2attributes stores formats as blocks"""
+
+        worksheet = self.xls_in.workbook.sheet_by_name("Sheet1")
+        self.xls_in._xls2attributes(worksheet, 0)
+
+        cell_attributes = self.code_array.dict_grid.cell_attributes
+
+        # Explicit cells are only used for cells with thicker borders
+        for selection, __, attrs in cell_attributes:
+            if selection.cells:
+                assert set(attrs).issubset(["borderwidth_bottom",
+                                            "borderwidth_right"])
 #
 #    param_cell_attribute_append = [
 #        {'row': 0, 'tab': 0, 'height': 0.1, 'code': "0\t0\t0.1\n"},
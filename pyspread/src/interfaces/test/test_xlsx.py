@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_xlsx
+=========
+
+Unit tests for xlsx.py
+
+"""
+
+
+import os
+import sys
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+import pytest
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.interfaces.xlsx import Xlsx
+from src.lib.selection import Selection
+from src.lib.testlib import params, pytest_generate_tests
+from src.model.model import CodeArray
+
+XLSX_PATH = TESTPATH + "xlsx_test.xlsx"
+
+
+@pytest.mark.skipif(openpyxl is None, reason="requires openpyxl")
+class TestXlsx(object):
+    """Unit tests for Xlsx"""
+
+    def setup_method(self, method):
+        """Creates code_array with code and cell attributes"""
+
+        self.code_array = CodeArray((100, 10, 2))
+
+        for row in xrange(50):
+            for col in xrange(5):
+                self.code_array[row, col, 0] = repr(row * 5 + col)
+
+        self.code_array[3, 2, 1] = "'Test'"
+
+        cell_attributes = self.code_array.cell_attributes
+
+        selection = Selection([(0, 0)], [(49, 0)], [], [], [])
+        cell_attributes.append((selection, 0, {"fontweight": wx.BOLD}))
+
+        selection = Selection([(5, 1)], [(9, 3)], [], [], [])
+        cell_attributes.append((selection, 0, {"bgcolor": 0x00FF00,
+                                               "borderwidth_bottom": 7}))
+
+        selection = Selection([(20, 1)], [(21, 2)], [], [], [])
+        cell_attributes.append((selection, 0, {"merge_area": (20, 1, 21, 2)}))
+
+        self.code_array.row_heights[2, 0] = 40.0
+
+    def teardown_method(self, method):
+        """Removes test xlsx file"""
+
+        if os.path.exists(XLSX_PATH):
+            os.remove(XLSX_PATH)
+
+    def write_xlsx(self):
+        """Writes code_array to test xlsx file"""
+
+        with open(XLSX_PATH, "wb") as outfile:
+            Xlsx(self.code_array, outfile).from_code_array()
+
+    param_rgb2hex = [
+        {'rgb': 0x000000, 'res': "FF000000"},
+        {'rgb': 0xFFFFFF, 'res': "FFFFFFFF"},
+        {'rgb': wx.Colour(255, 0, 0).GetRGB(), 'res': "FFFF0000"},
+        {'rgb': wx.Colour(0, 0, 128).GetRGB(), 'res': "FF000080"},
+    ]
+
+    @params(param_rgb2hex)
+    def test_rgb2hex(self, rgb, res):
+        """Unit test for rgb2hex"""
+
+        xlsx = Xlsx(self.code_array, None)
+
+        assert xlsx.rgb2hex(rgb) == res
+        assert xlsx.color2rgb(openpyxl.styles.colors.Color(rgb=res)) == rgb
+
+    def test_from_code_array(self):
+        """Test from_code_array method"""
+
+        self.write_xlsx()
+
+        workbook = openpyxl.load_workbook(XLSX_PATH)
+        worksheet = workbook.worksheets[0]
+
+        assert len(workbook.worksheets) == 2
+        assert worksheet["A1"].value == "0"
+        assert worksheet["E50"].value == "249"
+        assert worksheet["A1"].font.b
+        assert not worksheet["B1"].font.b
+        assert worksheet["B6"].fill.fgColor.rgb == "FF00FF00"
+        assert worksheet["B6"].border.bottom.style == "thick"
+        assert worksheet["B7"].border.top.style == "thick"
+        assert "B21:C22" in [str(cells) for cells in worksheet.merged_cells]
+        assert worksheet.row_dimensions[3].height is not None
+        assert workbook.worksheets[1]["C4"].value == "'Test'"
+
+    def test_to_code_array(self):
+        """Test to_code_array method"""
+
+        self.write_xlsx()
+
+        code_array = CodeArray((1000, 100, 3))
+
+        with open(XLSX_PATH, "rb") as infile:
+            Xlsx(code_array, infile).to_code_array()
+
+        assert code_array.shape == (50, 5, 2)
+        assert code_array((0, 0, 0)) == "0"
+        assert code_array((49, 4, 0)) == "249"
+        assert code_array((3, 2, 1)) == "'Test'"
+
+        cell_attributes = code_array.cell_attributes
+
+        assert cell_attributes[10, 0, 0]["fontweight"] == wx.BOLD
+        assert cell_attributes[10, 1, 0]["fontweight"] == wx.NORMAL
+        assert cell_attributes[6, 2, 0]["bgcolor"] == 0x00FF00
+        assert cell_attributes[6, 2, 0]["borderwidth_bottom"] == 7
+        assert cell_attributes[10, 2, 0]["bgcolor"] != 0x00FF00
+
+        # Equally formatted cells are stored as blocks
+        for selection, __, __ in cell_attributes:
+            assert not selection.cells
@@ -28,7 +28,6 @@ This file contains interfaces to Excel xls file format.
 
 """
 
-from copy import copy
 from collections import defaultdict
 from datetime import datetime
 from itertools import product, repeat
@@ -59,6 +58,121 @@ from src.config import config
 #use ugettext instead of getttext to avoid unicode errors
 _ = i18n.language.ugettext
 
+# Default palette of xlwt
+XLWT_COLORS = [
+    (0, 0, 0), (255, 255, 255), (255, 0, 0), (0, 255, 0), (0, 0, 255),
+    (255, 255, 0), (255, 0, 255), (0, 255, 255), (0, 0, 0),
+    (255, 255, 255), (255, 0, 0), (0, 255, 0), (0, 0, 255),
+    (255, 255, 0), (255, 0, 255), (0, 255, 255), (128, 0, 0),
+    (0, 128, 0), (0, 0, 128), (128, 128, 0), (128, 0, 128),
+    (0, 128, 128), (192, 192, 192), (128, 128, 128), (153, 153, 255),
+    (153, 51, 102), (255, 255, 204), (204, 255, 255), (102, 0, 102),
+    (255, 128, 128), (0, 102, 204), (204, 204, 255), (0, 0, 128),
+    (255, 0, 255), (255, 255, 0), (0, 255, 255), (128, 0, 128),
+    (128, 0, 0), (0, 128, 128), (0, 0, 255), (0, 204, 255),
+    (204, 255, 255), (204, 255, 204), (255, 255, 153), (153, 204, 255),
+    (255, 153, 204), (204, 153, 255), (255, 204, 153), (51, 102, 255),
+    (51, 204, 204), (153, 204, 0), (255, 204, 0), (255, 153, 0),
+    (255, 102, 0), (102, 102, 153), (150, 150, 150), (0, 51, 102),
+    (51, 153, 102), (0, 51, 0), (51, 51, 0), (153, 51, 0),
+    (153, 51, 102), (51, 51, 153), (51, 51, 51)
+]
+
+# Cell attributes that determine the XFStyle of a cell
+XFSTYLE_KEYS = (
+    "textfont", "pointsize", "fontweight", "fontstyle", "textcolor",
+    "underline", "strikethrough", "justification", "vertical_align", "angle",
+    "bgcolor", "borderwidth_right", "borderwidth_bottom", "bordercolor_right",
+    "bordercolor_bottom",
+)
+
+# Cell attributes of the cells above and left that determine the XFStyle
+XFSTYLE_ABOVE_KEYS = ("borderwidth_bottom", "bordercolor_bottom")
+XFSTYLE_LEFT_KEYS = ("borderwidth_right", "bordercolor_right")
+
+# Marks attributes that are not present in XFStyle signatures
+NO_ATTRIBUTE = object()
+
+# Cell attributes, for which a thicker border of a cell is kept on import
+BORDERWIDTH_KEYS = ("borderwidth_bottom", "borderwidth_right")
+
+
+class BlockBuilder(object):
+    """Merges runs of cells in a row into rectangles
+
+    Runs are added in row major order. Runs with equal columns in
+    consecutive rows are merged vertically so that each rectangle is as
+    high as possible. Only the runs of the last row are kept besides the
+    rectangles so that runs can be added while a sheet is streamed.
+
+    """
+
+    def __init__(self):
+        self.block_tl = []
+        self.block_br = []
+
+        # Block indices of the runs in the previous and the current row
+        self._above = {}
+        self._current = {}
+        self._current_row = None
+
+    def add(self, row, left, right):
+        """Adds run of consecutive cells in a row
+
+        Parameters
+        ----------
+        row: Integer
+        \tRow of the run, must not be smaller than for the previous run
+        left: Integer
+        \tLeft column of the run
+        right: Integer
+        \tRight column of the run
+
+        """
+
+        if row != self._current_row:
+            if self._current_row == row - 1:
+                self._above = self._current
+            else:
+                self._above = {}
+            self._current = {}
+            self._current_row = row
+
+        try:
+            idx = self._above[left, right]
+            self.block_br[idx] = row, right
+
+        except KeyError:
+            idx = len(self.block_tl)
+            self.block_tl.append((row, left))
+            self.block_br.append((row, right))
+
+        self._current[left, right] = idx
+
+    def get_selection(self):
+        """Returns Selection of all rectangles"""
+
+        return Selection(self.block_tl, self.block_br, [], [], [])
+
+
+def runs2blocks(runs):
+    """Returns top left and bottom right corners of rectangles from row runs
+
+    Parameters
+    ----------
+    runs: Iterable of 3-tuples
+    \t(row, left column, right column) of consecutive cells in a row,
+    \tsorted by row and left column
+
+    """
+
+    block_builder = BlockBuilder()
+
+    for row, left, right in runs:
+        block_builder.add(row, left, right)
+
+    return block_builder.block_tl, block_builder.block_br
+
 
 class Xls(object):
     """Interface between code_array and xls file
@@ -84,6 +198,15 @@ class Xls(object):
         self.xls_max_cols = 256
         self.xls_max_tabs = 256  # Limit tables to 255 to avoid cluttered Excel
 
+        # Memoized color2idx results
+        self._color2idx_cache = {}
+
+        # XFStyles by style signature so that equal cells share one style
+        self._xfstyle_cache = {}
+
+        # Border widths above 1 by cell of the table that is imported
+        self._border_widths = dict((key, {}) for key in BORDERWIDTH_KEYS)
+
     def idx2colour(self, idx):
         """Returns wx.Colour"""
 
@@ -92,30 +215,19 @@ class Xls(object):
     def color2idx(self, red, green, blue):
         """Get an Excel index from"""
 
-        xlwt_colors = [
-            (0, 0, 0), (255, 255, 255), (255, 0, 0), (0, 255, 0), (0, 0, 255),
-            (255, 255, 0), (255, 0, 255), (0, 255, 255), (0, 0, 0),
-            (255, 255, 255), (255, 0, 0), (0, 255, 0), (0, 0, 255),
-            (255, 255, 0), (255, 0, 255), (0, 255, 255), (128, 0, 0),
-            (0, 128, 0), (0, 0, 128), (128, 128, 0), (128, 0, 128),
-            (0, 128, 128), (192, 192, 192), (128, 128, 128), (153, 153, 255),
-            (153, 51, 102), (255, 255, 204), (204, 255, 255), (102, 0, 102),
-            (255, 128, 128), (0, 102, 204), (204, 204, 255), (0, 0, 128),
-            (255, 0, 255), (255, 255, 0), (0, 255, 255), (128, 0, 128),
-            (128, 0, 0), (0, 128, 128), (0, 0, 255), (0, 204, 255),
-            (204, 255, 255), (204, 255, 204), (255, 255, 153), (153, 204, 255),
-            (255, 153, 204), (204, 153, 255), (255, 204, 153), (51, 102, 255),
-            (51, 204, 204), (153, 204, 0), (255, 204, 0), (255, 153, 0),
-            (255, 102, 0), (102, 102, 153), (150, 150, 150), (0, 51, 102),
-            (51, 153, 102), (0, 51, 0), (51, 51, 0), (153, 51, 0),
-            (153, 51, 102), (51, 51, 153), (51, 51, 51)
-        ]
+        try:
+            return self._color2idx_cache[red, green, blue]
+
+        except KeyError:
+            pass
 
         distances = [abs(red - r) + abs(green - g) + abs(blue - b)
-                     for r, g, b in xlwt_colors]
+                     for r, g, b in XLWT_COLORS]
 
         min_dist_idx = distances.index(min(distances))
 
+        self._color2idx_cache[red, green, blue] = min_dist_idx
+
         return min_dist_idx
 
     def _shape2xls(self, worksheets):
@@ -511,16 +623,41 @@ class Xls(object):
 
         return borders
 
+    def _get_xfstyle_signature(self, pys_style, pys_style_above,
+                               pys_style_left):
+        """Returns tuple of all attribute values that define the XFStyle"""
+
+        def get_values(style, keys):
+            """Returns tuple of the values of keys in style"""
+
+            return tuple(style.get(key, NO_ATTRIBUTE) for key in keys)
+
+        return (get_values(pys_style, XFSTYLE_KEYS),
+                get_values(pys_style_above, XFSTYLE_ABOVE_KEYS),
+                get_values(pys_style_left, XFSTYLE_LEFT_KEYS))
+
     def _get_xfstyle(self, worksheets, key):
-        """Gets XFStyle for cell key"""
+        """Gets XFStyle for cell key
+
+        Cells with equal style relevant attributes share one XFStyle.
+
+        """
 
         row, col, tab = key
-        dict_grid = self.code_array.dict_grid
-        dict_grid.cell_attributes._update_table_cache()
+        cell_attributes = self.code_array.dict_grid.cell_attributes
+
+        pys_style = cell_attributes[key]
+        pys_style_above = cell_attributes[row - 1, col, tab]
+        pys_style_left = cell_attributes[row, col - 1, tab]
+
+        signature = self._get_xfstyle_signature(pys_style, pys_style_above,
+                                                pys_style_left)
 
-        pys_style = dict_grid.cell_attributes[key]
-        pys_style_above = dict_grid.cell_attributes[row - 1, col, tab]
-        pys_style_left = dict_grid.cell_attributes[row, col - 1, tab]
+        try:
+            return self._xfstyle_cache[signature]
+
+        except KeyError:
+            pass
 
         xfstyle = xlwt.XFStyle()
 
@@ -552,54 +689,59 @@ class Xls(object):
         if borders is not None:
             xfstyle.borders = borders
 
+        self._xfstyle_cache[signature] = xfstyle
+
         return xfstyle
 
     def _cell_attribute_append(self, selection, tab, attributes):
-        """Appends to cell_attributes with checks"""
+        """Appends to cell_attributes with checks
+
+        Cells that already have a thicker border than attributes keep it.
+        These cells are looked up in self._border_widths, which holds
+        the border widths above 1 that have been imported into the table.
+
+        """
 
         cell_attributes = self.code_array.cell_attributes
 
-        thick_bottom_cells = []
-        thick_right_cells = []
+        cell_attributes.append((selection, tab, attributes))
 
-        # Does any cell in selection.cells have a larger bottom border?
+        def selection_cells():
+            """Yields cells of the blocks and cells of selection"""
 
-        if "borderwidth_bottom" in attributes:
-            bwidth = attributes["borderwidth_bottom"]
-            for row, col in selection.cells:
-                __bwidth = cell_attributes[row, col, tab]["borderwidth_bottom"]
-                if __bwidth > bwidth:
-                    thick_bottom_cells.append((row, col))
+            for (top, left), (bottom, right) in zip(selection.block_tl,
+                                                    selection.block_br):
+                for row in xrange(top, bottom + 1):
+                    for col in xrange(left, right + 1):
+                        yield row, col
 
-        # Does any cell in selection.cells have a larger right border?
-        if "borderwidth_right" in attributes:
-            rwidth = attributes["borderwidth_right"]
-            for row, col in selection.cells:
-                __rwidth = cell_attributes[row, col, tab]["borderwidth_right"]
-                if __rwidth > rwidth:
-                    thick_right_cells.append((row, col))
+            for cell in selection.cells:
+                yield cell
 
-        for thick_cell in thick_bottom_cells + thick_right_cells:
-            try:
-                selection.cells.remove(thick_cell)
-            except ValueError:
-                pass
+        for key in BORDERWIDTH_KEYS:
+            if key not in attributes:
+                continue
 
-        cell_attributes.append((selection, tab, attributes))
+            width = attributes[key]
+            border_widths = self._border_widths[key]
+
+            if width <= 1 and not border_widths:
+                continue
 
-        if thick_bottom_cells:
-            bsel = copy(selection)
-            bsel.cells = thick_bottom_cells
-            battrs = copy(attributes)
-            battrs.pop("borderwidth_bottom")
-            cell_attributes.append((bsel, tab, battrs))
+            # Cells with a thicker border by border width
+            thick_cells = defaultdict(list)
 
-        if thick_right_cells:
-            rsel = copy(selection)
-            rsel.cells = thick_right_cells
-            rattrs = copy(attributes)
-            rattrs.pop("borderwidth_right")
-            cell_attributes.append((rsel, tab, rattrs))
+            for cell in selection_cells():
+                old_width = border_widths.get(cell, 1)
+                if old_width > width:
+                    thick_cells[old_width].append(cell)
+                elif width > 1:
+                    border_widths[cell] = width
+
+            for old_width, cells in thick_cells.iteritems():
+                thick_selection = Selection([], [], [], [], cells)
+                cell_attributes.append((thick_selection, tab,
+                                        {key: old_width}))
 
     def _xls2attributes(self, worksheet, tab):
         """Updates attributes in code_array"""
@@ -611,15 +753,26 @@ class Xls(object):
                                   [], [], [])
             self.code_array.cell_attributes.append((selection, tab, attrs))
 
-        # Which cell comprise which format ids
-        xf2cell = dict((xfid, []) for xfid in xrange(self.workbook.xfcount))
+        self._border_widths = dict((key, {}) for key in BORDERWIDTH_KEYS)
+
+        # Runs of consecutive cells in a row that share a format id
+        xf2runs = defaultdict(list)
         rows, cols = worksheet.nrows, worksheet.ncols
-        for row, col in product(xrange(rows), xrange(cols)):
-            xfid = worksheet.cell_xf_index(row, col)
-            xf2cell[xfid].append((row, col))
+        for row in xrange(rows):
+            xfids = [worksheet.cell_xf_index(row, col) for col in xrange(cols)]
+            left = 0
+            for col in xrange(1, cols + 1):
+                if col == cols or xfids[col] != xfids[left]:
+                    xf2runs[xfids[left]].append((row, left, col - 1))
+                    left = col
 
         for xfid, xf in enumerate(self.workbook.xf_list):
-            selection = Selection([], [], [], [], xf2cell[xfid])
+            if xfid not in xf2runs:
+                # Format is not used in this sheet
+                continue
+
+            block_tl, block_br = runs2blocks(xf2runs[xfid])
+            selection = Selection(block_tl, block_br, [], [], [])
             selection_above = selection.shifted(-1, 0)
             selection_left = selection.shifted(0, -1)
 
@@ -852,6 +1005,12 @@ class Xls(object):
     def from_code_array(self):
         """Returns xls workbook object with everything from code_array"""
 
+        dict_grid = self.code_array.dict_grid
+        dict_grid.load_tables()
+
+        # Cell attribute lookups rely on an up to date table cache
+        dict_grid.cell_attributes._update_table_cache()
+
         worksheets = []
         self._shape2xls(worksheets)
 
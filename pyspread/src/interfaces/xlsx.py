@@ -0,0 +1,701 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+xlsx
+====
+
+This file contains a streaming interface to the Excel xlsx file format.
+
+Worksheets are read row by row with openpyxl's read-only mode and
+written row by row with its write-only mode. Besides the code_array,
+only the current rows and the formats of the sheet are held in memory.
+
+Provides
+--------
+
+ * Xlsx: Interface between code_array and xlsx file
+
+"""
+
+from collections import defaultdict
+from datetime import date, time
+
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+    from openpyxl.styles.colors import COLOR_INDEX
+    from openpyxl.utils import get_column_letter
+
+except ImportError:
+    openpyxl = None
+
+import wx
+
+import src.lib.i18n as i18n
+
+from src.interfaces.xls import BlockBuilder
+from src.interfaces.xls import XFSTYLE_KEYS, XFSTYLE_ABOVE_KEYS
+from src.interfaces.xls import XFSTYLE_LEFT_KEYS, NO_ATTRIBUTE
+
+from src.sysvars import get_dpi, get_default_text_extent
+
+# Use ugettext instead of getttext to avoid unicode errors
+_ = i18n.language.ugettext
+
+# Line styles of imported borders
+BORDER_STYLE2WIDTH = {
+    "hair": 1,
+    "thin": 1,
+    "dotted": 1,
+    "dashed": 1,
+    "dashDot": 1,
+    "dashDotDot": 1,
+    "medium": 4,
+    "mediumDashed": 4,
+    "mediumDashDot": 4,
+    "mediumDashDotDot": 4,
+    "slantDashDot": 4,
+    "double": 7,
+    "thick": 7,
+}
+
+JUSTIFICATIONS = ["left", "center", "right"]
+
+VERTICAL_ALIGN2XLSX = {
+    "top": "top",
+    "middle": "center",
+    "bottom": "bottom",
+}
+
+XLSX2VERTICAL_ALIGN = {
+    "top": "top",
+    "center": "middle",
+    "justify": "middle",
+    "distributed": "middle",
+    "bottom": "bottom",
+}
+
+
+class Xlsx(object):
+    """Interface between code_array and xlsx file
+
+    Parameters
+    ----------
+
+    code_array: model.CodeArray object
+    \tThe code_array object data structure
+    xlsx_file: file
+    \tFile like object in xlsx format, opened in binary mode
+
+    """
+
+    def __init__(self, code_array, xlsx_file):
+        self.code_array = code_array
+        self.xlsx_file = xlsx_file
+
+        self.xlsx_max_rows = 1048576
+        self.xlsx_max_cols = 16384
+        self.xlsx_max_tabs = 256
+
+        # Cell styles by style signature so that equal cells share objects
+        self._style_cache = {}
+
+    # Colors
+    # ------
+
+    def rgb2hex(self, rgb):
+        """Returns openpyxl ARGB string for a pyspread color"""
+
+        color = wx.Colour()
+        color.SetRGB(rgb)
+        red, green, blue = color.Get()[:3]
+
+        return "FF{0:02X}{1:02X}{2:02X}".format(red, green, blue)
+
+    def color2rgb(self, color):
+        """Returns pyspread color for openpyxl Color or None if unknown
+
+        Theme colors cannot be resolved without the theme and are ignored.
+
+        """
+
+        if color is None:
+            return
+
+        if color.type == "rgb":
+            argb = color.rgb
+
+        elif color.type == "indexed" and 0 <= color.indexed < len(COLOR_INDEX):
+            argb = COLOR_INDEX[color.indexed]
+
+        else:
+            return
+
+        try:
+            red, green, blue = [int(argb[i:i + 2], 16) for i in (2, 4, 6)]
+
+        except (TypeError, ValueError):
+            return
+
+        return wx.Colour(red, green, blue).GetRGB()
+
+    # Reading
+    # -------
+
+    def _xlsx_value2code(self, value):
+        """Returns code string for a value of an xlsx cell"""
+
+        if value is None:
+            return
+
+        if isinstance(value, (date, time)):
+            return repr(value)
+
+        return unicode(value)
+
+    def _xlsx_style2attributes(self, cell):
+        """Returns attributes, attributes above and left for a cell style"""
+
+        attributes = {}
+
+        # Font
+
+        font = cell.font
+
+        if font is not None:
+            if font.name:
+                attributes["textfont"] = font.name
+
+            if font.sz:
+                attributes["pointsize"] = float(font.sz)
+
+            attributes["fontweight"] = wx.BOLD if font.b else wx.NORMAL
+
+            if font.i:
+                attributes["fontstyle"] = wx.ITALIC
+
+            if font.u:
+                attributes["underline"] = True
+
+            if font.strike:
+                attributes["strikethrough"] = True
+
+            textcolor = self.color2rgb(font.color)
+            if textcolor is not None:
+                attributes["textcolor"] = textcolor
+
+        # Background
+
+        fill = cell.fill
+
+        if fill is not None and getattr(fill, "patternType", None) == "solid":
+            bgcolor = self.color2rgb(fill.fgColor)
+            if bgcolor is not None:
+                attributes["bgcolor"] = bgcolor
+
+        # Alignment
+
+        alignment = cell.alignment
+
+        if alignment is not None:
+            if alignment.horizontal in JUSTIFICATIONS:
+                attributes["justification"] = alignment.horizontal
+
+            if alignment.vertical in XLSX2VERTICAL_ALIGN:
+                attributes["vertical_align"] = \
+                    XLSX2VERTICAL_ALIGN[alignment.vertical]
+
+            rotation = alignment.textRotation or 0
+            if 0 < rotation <= 90:
+                attributes["angle"] = float(rotation)
+            elif 90 < rotation <= 180:
+                attributes["angle"] = float(90 - rotation)
+
+        # Borders
+        # Top and left borders are bottom and right borders of the cells
+        # above and left
+
+        attributes_above = {}
+        attributes_left = {}
+
+        border = cell.border
+
+        if border is not None:
+            for side, attrs, key in [
+                    (border.bottom, attributes, "bottom"),
+                    (border.right, attributes, "right"),
+                    (border.top, attributes_above, "bottom"),
+                    (border.left, attributes_left, "right")]:
+
+                if side is None or side.style is None:
+                    continue
+
+                attrs["borderwidth_" + key] = \
+                    BORDER_STYLE2WIDTH.get(side.style, 1)
+
+                bordercolor = self.color2rgb(side.color)
+                if bordercolor is not None:
+                    attrs["bordercolor_" + key] = bordercolor
+
+        return attributes, attributes_above, attributes_left
+
+    def _xlsx2code(self, worksheet, tab):
+        """Updates code in code_array
+
+        Cells are streamed row by row and each row is loaded into the grid
+        in one go. The undo history is bypassed. Consecutive cells in a
+        row with equal style are merged into rectangles right away.
+
+        Returns a tuple of BlockBuilders by cell style, a sample cell by
+        cell style, the number of rows and the number of columns.
+
+        """
+
+        dict_grid = self.code_array.dict_grid
+        style2blocks = defaultdict(BlockBuilder)
+        style2cell = {}
+
+        nrows = ncols = 0
+
+        rows = worksheet.iter_rows(min_row=1, min_col=1)
+
+        for row, cells in enumerate(rows):
+            nrows = row + 1
+            ncols = max(ncols, len(cells))
+
+            left = 0
+            run_style = None
+
+            row_code = []
+
+            for col, cell in enumerate(cells):
+                code = self._xlsx_value2code(cell.value)
+                if code is not None:
+                    row_code.append(((row, col, tab), code))
+
+                try:
+                    style = tuple(cell.style_array)
+
+                except AttributeError:
+                    # Empty cell
+                    style = None
+
+                if style is not None and not any(style):
+                    # Default style of the workbook
+                    style = None
+
+                if style != run_style:
+                    if run_style is not None:
+                        style2blocks[run_style].add(row, left, col - 1)
+
+                    left = col
+                    run_style = style
+
+                    if style is not None and style not in style2cell:
+                        style2cell[style] = cell
+
+            if run_style is not None:
+                style2blocks[run_style].add(row, left, len(cells) - 1)
+
+            dict.update(dict_grid, row_code)
+
+        return style2blocks, style2cell, nrows, ncols
+
+    def _xlsx2attributes(self, style2blocks, style2cell, tab):
+        """Updates cell attributes in code_array from the cell style blocks"""
+
+        cell_attributes = self.code_array.cell_attributes
+
+        above_entries = []
+        left_entries = []
+
+        for style, block_builder in style2blocks.iteritems():
+            attributes, attributes_above, attributes_left = \
+                self._xlsx_style2attributes(style2cell[style])
+
+            selection = block_builder.get_selection()
+
+            if attributes:
+                cell_attributes.append((selection, tab, attributes))
+
+            if attributes_above:
+                above_entries.append((selection.shifted(-1, 0), tab,
+                                      attributes_above))
+
+            if attributes_left:
+                left_entries.append((selection.shifted(0, -1), tab,
+                                     attributes_left))
+
+        # Top and left borders override the neighbor cells' own borders
+        for entry in above_entries + left_entries:
+            cell_attributes.append(entry)
+
+    def pys_width2xlsx_width(self, pys_width):
+        """Returns xlsx width in characters from given pyspread width"""
+
+        width_0 = get_default_text_extent("0")[0]
+
+        # Scale relative to 12 point font instead of 10 point
+        return pys_width * 1.2 / width_0
+
+    # Writing
+    # -------
+
+    def _get_style_signature(self, pys_style, pys_style_above,
+                             pys_style_left):
+        """Returns tuple of all attribute values that define the cell style
+
+        Attributes with default values are left out so that cells without
+        formatting get no style.
+
+        """
+
+        defaults = self.code_array.cell_attributes.default_cell_attributes
+
+        def get_values(style, keys):
+            """Returns tuple of the non-default values of keys in style"""
+
+            return tuple(style[key] if style.get(key, defaults[key]) !=
+                         defaults[key] else NO_ATTRIBUTE for key in keys)
+
+        return (get_values(pys_style, XFSTYLE_KEYS),
+                get_values(pys_style_above, XFSTYLE_ABOVE_KEYS),
+                get_values(pys_style_left, XFSTYLE_LEFT_KEYS))
+
+    def _get_side(self, width, color):
+        """Returns openpyxl Side for pyspread border width and color"""
+
+        if width is NO_ATTRIBUTE and color is NO_ATTRIBUTE:
+            return Side()
+
+        defaults = self.code_array.cell_attributes.default_cell_attributes
+
+        if width is NO_ATTRIBUTE:
+            width = defaults["borderwidth_right"]
+
+        if color is NO_ATTRIBUTE:
+            color = defaults["bordercolor_right"]
+
+        if width == 0:
+            return Side()
+
+        if width < 2:
+            style = "thin"
+        elif width < 6:
+            style = "medium"
+        else:
+            style = "thick"
+
+        return Side(style=style, color=self.rgb2hex(color))
+
+    def _get_style(self, signature):
+        """Returns dict of openpyxl style objects for a style signature"""
+
+        try:
+            return self._style_cache[signature]
+
+        except KeyError:
+            pass
+
+        values, values_above, values_left = signature
+
+        attrs = dict((key, value) for key, value in zip(XFSTYLE_KEYS, values)
+                     if value is not NO_ATTRIBUTE)
+
+        style = {}
+
+        # Font
+
+        font_keys = ["textfont", "pointsize", "fontweight", "fontstyle",
+                     "textcolor", "underline", "strikethrough"]
+
+        if any(key in attrs for key in font_keys):
+            font_kwargs = {
+                "bold": attrs.get("fontweight") == wx.BOLD,
+                "italic": attrs.get("fontstyle") == wx.ITALIC,
+                "strike": attrs.get("strikethrough", False),
+            }
+
+            if "textfont" in attrs:
+                font_kwargs["name"] = attrs["textfont"]
+
+            if "pointsize" in attrs:
+                font_kwargs["size"] = attrs["pointsize"]
+
+            if "textcolor" in attrs:
+                font_kwargs["color"] = self.rgb2hex(attrs["textcolor"])
+
+            if attrs.get("underline"):
+                font_kwargs["underline"] = "single"
+
+            style["font"] = Font(**font_kwargs)
+
+        # Background
+
+        if "bgcolor" in attrs:
+            style["fill"] = PatternFill(fill_type="solid",
+                                        fgColor=self.rgb2hex(attrs["bgcolor"]))
+
+        # Alignment
+
+        alignment_keys = ["justification", "vertical_align", "angle"]
+
+        if any(key in attrs for key in alignment_keys):
+            alignment_kwargs = {}
+
+            if "justification" in attrs:
+                alignment_kwargs["horizontal"] = attrs["justification"]
+
+            if "vertical_align" in attrs:
+                alignment_kwargs["vertical"] = \
+                    VERTICAL_ALIGN2XLSX[attrs["vertical_align"]]
+
+            angle = int(round(attrs.get("angle", 0)))
+            if 0 < angle <= 90:
+                alignment_kwargs["text_rotation"] = angle
+            elif -90 <= angle < 0:
+                alignment_kwargs["text_rotation"] = 90 - angle
+
+            style["alignment"] = Alignment(**alignment_kwargs)
+
+        # Borders
+
+        if any(value is not NO_ATTRIBUTE
+               for value in values[-4:] + values_above + values_left):
+            width_right, width_bottom, color_right, color_bottom = values[-4:]
+            width_top, color_top = values_above
+            width_left, color_left = values_left
+
+            style["border"] = Border(
+                left=self._get_side(width_left, color_left),
+                right=self._get_side(width_right, color_right),
+                top=self._get_side(width_top, color_top),
+                bottom=self._get_side(width_bottom, color_bottom))
+
+        self._style_cache[signature] = style
+
+        return style
+
+    def _get_tab_entries(self, tab, max_row, max_col):
+        """Returns cell attribute entries of tab sorted by top row
+
+        Each entry is a tuple (top, bottom, left, right, index, selection,
+        attr_dict) with the bounding box of the selection clipped to
+        max_row and max_col. Attribute dicts only contain style keys.
+
+        """
+
+        shape = self.code_array.shape
+        style_keys = set(XFSTYLE_KEYS)
+
+        entries = []
+
+        for index, (selection, __tab, attr_dict) in \
+                enumerate(self.code_array.cell_attributes):
+            if __tab != tab or not selection:
+                continue
+
+            attrs = dict((key, value) for key, value in attr_dict.iteritems()
+                         if key in style_keys)
+
+            if not attrs:
+                continue
+
+            (top, left), (bottom, right) = selection.get_grid_bbox(shape)
+            top, left = max(top, 0), max(left, 0)
+            bottom, right = min(bottom, max_row), min(right, max_col)
+
+            if top <= bottom and left <= right:
+                entries.append((top, bottom, left, right, index, selection,
+                                attrs))
+
+        entries.sort()
+
+        return entries
+
+    def _iter_rows(self, worksheet, tab):
+        """Yields row lists of tab for the write-only worksheet
+
+        Rows are swept from top to bottom. Only the attribute entries that
+        cover the current or the previous row are checked for a cell.
+        Formatted cells without code are written within the rectangle of
+        the tab that contains code.
+
+        """
+
+        code_array = self.code_array
+
+        row2cols = defaultdict(list)
+        for row, col, __tab in code_array.dict_grid.iterkeys():
+            if __tab == tab and row < self.xlsx_max_rows and \
+               col < self.xlsx_max_cols:
+                row2cols[row].append(col)
+
+        if not row2cols:
+            return
+
+        max_row = max(row2cols)
+        max_col = max(max(cols) for cols in row2cols.itervalues())
+
+        entries = self._get_tab_entries(tab, max_row, max_col)
+        entry_idx = 0
+        active = []
+
+        def get_row_attrs(row, cols, col2attrs):
+            """Adds style attributes of the cells in cols of row to col2attrs
+
+            Attributes with default values may be missing.
+
+            """
+
+            row_entries = [entry for entry in active
+                           if entry[0] <= row <= entry[1]]
+
+            for col in cols:
+                attrs = {}
+                for __, __, left, right, __, selection, attr_dict in \
+                        row_entries:
+                    if left <= col <= right and (row, col) in selection:
+                        attrs.update(attr_dict)
+                col2attrs[col] = attrs
+
+        col2attrs = {}
+
+        for row in xrange(max_row + 1):
+            # Sweep: Entries that end above the previous row are dropped
+            active = [entry for entry in active if entry[1] >= row - 1]
+            while entry_idx < len(entries) and entries[entry_idx][0] <= row:
+                active.append(entries[entry_idx])
+                entry_idx += 1
+            active.sort(key=lambda entry: entry[4])
+
+            cols = set(row2cols.get(row, []))
+            for top, bottom, left, right, __, __, __ in active:
+                if top <= row <= bottom:
+                    cols.update(xrange(left, right + 1))
+
+            # The attributes of the previous row are reused for top borders
+            col2attrs_above = col2attrs
+            get_row_attrs(row - 1, cols.difference(col2attrs_above),
+                          col2attrs_above)
+
+            col2attrs = {}
+            get_row_attrs(row, cols.union(col - 1 for col in cols), col2attrs)
+
+            row_list = [None] * (max(cols) + 1 if cols else 0)
+
+            for col in cols:
+                code = code_array((row, col, tab))
+                style_signature = self._get_style_signature(
+                    col2attrs[col], col2attrs_above[col], col2attrs[col - 1])
+
+                style = self._get_style(style_signature)
+
+                if not style:
+                    # Plain values need no cell object
+                    row_list[col] = code
+                    continue
+
+                cell = WriteOnlyCell(worksheet, value=code)
+                for style_attr, style_value in style.iteritems():
+                    setattr(cell, style_attr, style_value)
+
+                row_list[col] = cell
+
+            yield row_list
+
+    # Access via model.py data
+    # ------------------------
+
+    def from_code_array(self):
+        """Writes everything from code_array to xlsx_file"""
+
+        dict_grid = self.code_array.dict_grid
+        dict_grid.load_tables()
+
+        workbook = openpyxl.Workbook(write_only=True)
+
+        __, __, tabs = self.code_array.shape
+        tabs = min(tabs, self.xlsx_max_tabs)
+
+        for tab in xrange(tabs):
+            worksheet = workbook.create_sheet(str(tab))
+
+            # Dimensions and merged cells have to be set before rows
+
+            for (row, __tab), height in dict_grid.row_heights.iteritems():
+                if __tab == tab and row < self.xlsx_max_rows:
+                    height_points = height / float(get_dpi()[1]) * 72.0
+                    worksheet.row_dimensions[row + 1].height = height_points
+
+            for (col, __tab), width in dict_grid.col_widths.iteritems():
+                if __tab == tab and col < self.xlsx_max_cols:
+                    col_letter = get_column_letter(col + 1)
+                    worksheet.column_dimensions[col_letter].width = \
+                        self.pys_width2xlsx_width(width)
+
+            for selection, __tab, attr_dict in dict_grid.cell_attributes:
+                merge_area = attr_dict.get("merge_area")
+                if __tab == tab and merge_area is not None:
+                    top, left, bottom, right = merge_area
+                    worksheet.merged_cells.add(
+                        "{0}{1}:{2}{3}".format(get_column_letter(left + 1),
+                                               top + 1,
+                                               get_column_letter(right + 1),
+                                               bottom + 1))
+
+            for row_list in self._iter_rows(worksheet, tab):
+                worksheet.append(row_list)
+
+        workbook.save(self.xlsx_file)
+
+    def to_code_array(self):
+        """Replaces everything in code_array from xlsx_file"""
+
+        workbook = openpyxl.load_workbook(self.xlsx_file, read_only=True,
+                                          data_only=True)
+
+        worksheets = workbook.worksheets[:self.xlsx_max_tabs]
+        tabs = max(1, len(worksheets))
+
+        # Dimension records are optional and may be wrong. Therefore, the
+        # grid is shrunk to the streamed cells afterwards.
+        self.code_array.shape = self.xlsx_max_rows, self.xlsx_max_cols, tabs
+
+        shape_rows = shape_cols = 1
+
+        try:
+            for tab, worksheet in enumerate(worksheets):
+                style2blocks, style2cell, nrows, ncols = \
+                    self._xlsx2code(worksheet, tab)
+                self._xlsx2attributes(style2blocks, style2cell, tab)
+
+                shape_rows = max(shape_rows, nrows)
+                shape_cols = max(shape_cols, ncols)
+
+        finally:
+            # Read-only workbooks keep the archive open
+            workbook.close()
+
+            self.code_array.shape = shape_rows, shape_cols, tabs
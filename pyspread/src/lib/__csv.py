@@ -31,17 +31,37 @@ Provides
  * csv_digest_gen
  * cell_key_val_gen
  * Digest: Converts any object to target type as good as possible
+ * get_column_converter: Returns converter of csv column values to code
+ * get_dialect_params: Returns picklable format parameters of csv dialect
+ * chunk_range_gen: Splits file into byte ranges at record boundaries
+ * iter_parallel_results: Generator of worker results in task order
+ * parse_csv_chunk: Worker that parses and converts a csv byte range
+ * get_numeric_block: Returns values of a numeric txt matrix as array
+ * parse_txt_chunk: Worker that parses a txt byte range
+ * render_csv_block: Worker that renders grid rows as csv text
+ * CsvExportData: Grid results of an export area
  * CsvInterface
  * TxtGenerator
 
 """
 
 import ast
+from collections import deque
+from cStringIO import StringIO
 import csv
 import datetime
+from itertools import islice, izip_longest
+import multiprocessing
 import os
+import re
 import types
 
+try:
+    from dateutil.parser import parse as parse_date
+except ImportError:
+    parse_date = None
+
+import numpy
 import wx
 
 from src.config import config
@@ -54,6 +74,40 @@ from src.lib.fileio import AOpen
 #use ugettext instead of getttext to avoid unicode errors
 _ = i18n.language.ugettext
 
+# Number of csv rows that are converted and pasted at once
+CSV_CHUNK_ROWS = 10000
+
+# Number of bytes of a file chunk that is parsed by one worker process
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# Files that are larger than this number of chunks are parsed in parallel
+PARALLEL_MIN_CHUNKS = 4
+
+# Number of grid rows that are rendered at once on csv export
+CSV_EXPORT_ROWS = 1000
+
+# Bytes that str.split treats as whitespace
+WHITESPACE_TABLE = numpy.zeros(256, dtype=bool)
+WHITESPACE_TABLE[[ord(char) for char in " \t\n\v\f\r"]] = True
+
+# Bytes of whitespace separated decimal numbers
+NUMERIC_TABLE = WHITESPACE_TABLE.copy()
+NUMERIC_TABLE[[ord(char) for char in "0123456789+-.eE"]] = True
+
+# Cell code that assigns a global variable
+ASSIGNMENT_RE = re.compile(r"\s*[A-Za-z_]\w*\s*=(?!=)")
+
+# Format parameters of csv dialects
+DIALECT_ATTRIBUTES = ["delimiter", "doublequote", "escapechar",
+                      "lineterminator", "quotechar", "quoting",
+                      "skipinitialspace", "strict"]
+
+# Digest types, for which whole columns are converted by numpy
+NUMPY_DIGEST_TYPES = {
+    types.IntType: numpy.int64,
+    types.FloatType: numpy.float64,
+}
+
 
 def sniff(filepath):
     """
@@ -262,10 +316,8 @@ class Digest(object):
         def make_date(obj):
             """Makes a date from comparable types"""
 
-            from dateutil.parser import parse
-
             try:
-                return parse(obj).date()
+                return parse_date(obj).date()
 
             except Exception:
                 return None
@@ -273,10 +325,8 @@ class Digest(object):
         def make_datetime(obj):
             """Makes a datetime from comparable types"""
 
-            from dateutil.parser import parse
-
             try:
-                return parse(obj)
+                return parse_date(obj)
 
             except Exception:
                 return None
@@ -284,10 +334,8 @@ class Digest(object):
         def make_time(obj):
             """Makes a time from comparable types"""
 
-            from dateutil.parser import parse
-
             try:
-                return parse(obj).time()
+                return parse_date(obj).time()
 
             except Exception:
                 return None
@@ -354,6 +402,568 @@ class Digest(object):
 # end of class Digest
 
 
+def get_column_converter(digest_type, encoding="utf-8"):
+    """Returns function that converts csv values of one column to code
+
+    The returned function takes a list of csv values and returns the list
+    of code strings. None values stay None. Values that cannot be
+    converted become empty strings.
+
+    Integer and float columns are converted by numpy as a whole. If this
+    fails, e.g. because of a malformed value, then each value is
+    converted on its own as for all other types.
+
+    Parameters
+    ----------
+    digest_type: Type
+    \tTarget type of the column values
+    encoding: String, defaults to "utf-8"
+    \tEncoding of the csv file
+
+    """
+
+    digest = Digest(acceptable_types=[digest_type], encoding=encoding)
+
+    def convert_values(values):
+        """Converts each value with the Digest of the column"""
+
+        codes = []
+
+        for value in values:
+            if value is None:
+                codes.append(None)
+                continue
+
+            try:
+                code = digest(value)
+
+                if code == "\b":
+                    code = None
+
+                elif digest_type is not types.CodeType:
+                    code = repr(code)
+
+            except Exception:
+                code = ""
+
+            codes.append(code)
+
+        return codes
+
+    if digest_type not in NUMPY_DIGEST_TYPES:
+        return convert_values
+
+    dtype = NUMPY_DIGEST_TYPES[digest_type]
+
+    def convert_numeric_values(values):
+        """Converts the non-empty values of the column with numpy"""
+
+        indices = [i for i, value in enumerate(values) if value]
+
+        try:
+            numbers = numpy.array([values[i] for i in indices]).astype(dtype)
+
+        except (ValueError, TypeError, OverflowError):
+            return convert_values(values)
+
+        # Empty values cannot be converted
+        codes = [None if value is None else "" for value in values]
+
+        for i, code in zip(indices, map(repr, numbers.tolist())):
+            codes[i] = code
+
+        return codes
+
+    return convert_numeric_values
+
+
+def get_dialect_params(dialect):
+    """Returns dict of the format parameters of a csv dialect
+
+    In contrast to dialect objects, the dict can be passed to worker
+    processes. It can be used as keyword arguments of csv.reader.
+
+    Parameters
+    ----------
+    dialect: Object
+    \tCsv dialect class or instance
+
+    """
+
+    return dict((attr, getattr(dialect, attr))
+                for attr in DIALECT_ATTRIBUTES if hasattr(dialect, attr))
+
+
+def get_record_end(block, quotechar=None):
+    """Returns position after the last complete record in block
+
+    A line end is a record end if an even number of quote characters
+    precedes it, i. e. if it is not located within a quoted field.
+    Doubled quote characters keep the count even.
+    None is returned if block contains no record end.
+
+    Parameters
+    ----------
+    block: String
+    \tData that starts at a record boundary
+    quotechar: String, defaults to None
+    \tQuote character, quoted fields are not considered if None
+
+    """
+
+    end = block.rfind("\n")
+
+    if quotechar is None:
+        return None if end < 0 else end + 1
+
+    quotes = block.count(quotechar, 0, end)
+
+    while end >= 0:
+        if not quotes % 2:
+            return end + 1
+
+        previous_end = block.rfind("\n", 0, end)
+        quotes -= block.count(quotechar, previous_end + 1, end)
+        end = previous_end
+
+
+def chunk_range_gen(filepath, start=0, chunk_bytes=CHUNK_BYTES,
+                    quotechar=None):
+    """Generator of start, end byte positions of chunks of filepath
+
+    The chunks are split at record boundaries so that they can be
+    parsed independently. Chunks are about chunk_bytes long. Records
+    that are longer than chunk_bytes are not split.
+
+    Without quotechar, each line end is a record boundary and the chunk
+    data does not have to be read.
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of the file to be split
+    start: Integer, defaults to 0
+    \tPosition of the first record, e. g. after a header line
+    chunk_bytes: Integer, defaults to CHUNK_BYTES
+    \tTarget size of the chunks
+    quotechar: String, defaults to None
+    \tQuote character, which may enclose line ends in csv fields
+
+    """
+
+    filesize = os.path.getsize(filepath)
+
+    with open(filepath, "rb") as infile:
+        while filesize - start > chunk_bytes:
+            if quotechar is None:
+                infile.seek(start + chunk_bytes - 1)
+                infile.readline()
+                end = infile.tell()
+
+            else:
+                infile.seek(start)
+                block = infile.read(chunk_bytes)
+                record_end = get_record_end(block, quotechar)
+
+                while record_end is None and start + len(block) < filesize:
+                    # The record is longer than the block
+                    block += infile.read(chunk_bytes)
+                    record_end = get_record_end(block, quotechar)
+
+                if record_end is None:
+                    break
+
+                end = start + record_end
+
+            yield start, end
+            start = end
+
+    if start < filesize:
+        yield start, filesize
+
+
+def read_chunk(filepath, start, end):
+    """Returns bytes from start to end of file filepath"""
+
+    with open(filepath, "rb") as infile:
+        infile.seek(start)
+        return infile.read(end - start)
+
+
+def iter_parallel_results(worker, tasks, processes, initializer=None,
+                          initargs=()):
+    """Generator of worker results in the order of the tasks
+
+    At most two tasks per process are queued to limit memory usage.
+    The workers are terminated when the generator is closed, e. g.
+    when an import is aborted.
+
+    Parameters
+    ----------
+    worker: Function
+    \tModule level function that is called with each task
+    tasks: Iterable
+    \tPicklable arguments of worker
+    processes: Integer
+    \tNumber of worker processes
+    initializer: Function, defaults to None
+    \tFunction that is called with initargs in each worker on start
+    initargs: Tuple, defaults to ()
+    \tArguments of initializer
+
+    """
+
+    pool = multiprocessing.Pool(processes, initializer, initargs)
+    pending = deque()
+    tasks = iter(tasks)
+
+    try:
+        while True:
+            for task in islice(tasks, 2 * processes - len(pending)):
+                pending.append(pool.apply_async(worker, (task,)))
+
+            if not pending:
+                break
+
+            yield pending.popleft().get()
+
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def parse_csv_chunk(task):
+    """Returns csv lines of a file chunk as code strings
+
+    Worker function of the parallel csv import
+
+    Parameters
+    ----------
+    task: Tuple
+    \tfilepath, start, end, dialect_params, digest_types, encoding
+
+    """
+
+    filepath, start, end, dialect_params, digest_types, encoding = task
+
+    csv_file = StringIO(read_chunk(filepath, start, end))
+    lines = list(csv.reader(csv_file, **dialect_params))
+
+    csv_interface = CsvInterface(None, filepath, None, digest_types, False,
+                                 encoding)
+
+    return csv_interface._get_chunk_codes(lines)
+
+
+def get_numeric_block(text):
+    """Returns 2-dim object array of the values of a numeric txt matrix
+
+    text is a numeric matrix if all lines contain the same number of
+    whitespace separated values, which consist of digits, signs,
+    decimal points and exponent characters only. Otherwise, None is
+    returned. The checks are vectorized over the bytes of text.
+
+    The value strings are not altered so that they evaluate as in the
+    generic import.
+
+    Parameters
+    ----------
+    text: String
+    \tLines of a whitespace separated txt file
+
+    """
+
+    data = numpy.frombuffer(text, dtype=numpy.uint8)
+
+    if not len(data) or not NUMERIC_TABLE[data].all():
+        return
+
+    # Values start after whitespace
+    is_space = WHITESPACE_TABLE[data]
+    is_start = ~is_space
+    is_start[1:] &= is_space[:-1]
+
+    is_line_end = data == ord("\n")
+    no_lines = is_line_end.sum() + (not text.endswith("\n"))
+
+    line_starts = numpy.cumsum(is_line_end)[is_start]
+    values_per_line = numpy.bincount(line_starts, minlength=no_lines)
+
+    width = values_per_line[0]
+
+    if not width or (values_per_line != width).any():
+        return
+
+    return numpy.array(text.split(), dtype="O").reshape(-1, width)
+
+
+def parse_txt_chunk(task):
+    """Returns whitespace separated values of a file chunk
+
+    Worker function of the parallel txt import
+
+    Parameters
+    ----------
+    task: Tuple
+    \tfilepath, start, end
+
+    """
+
+    text = read_chunk(*task)
+
+    block = get_numeric_block(text)
+    if block is not None:
+        return block
+
+    return [line.split() for line in StringIO(text)]
+
+
+# CsvExportData of a csv export worker process
+_worker_export_data = None
+
+
+def set_worker_export_data(export_data):
+    """Stores export data in a worker process
+
+    Initializer of csv export workers. The export data, including its
+    code array, is inherited from the parent process when the workers
+    are forked.
+
+    """
+
+    global _worker_export_data
+    _worker_export_data = export_data
+
+
+def render_csv_block(task):
+    """Returns csv text of a block of grid rows
+
+    Worker function of the parallel csv export
+
+    Parameters
+    ----------
+    task: Tuple
+    \tArguments of CsvExportData.render_block
+
+    """
+
+    return _worker_export_data.render_block(*task)
+
+
+class CsvExportData(object):
+    """Results of a rectangular grid area for csv export
+
+    Only filled cells are evaluated. Empty cells yield None and are
+    exported as empty fields.
+
+    Iterating yields a generator of results for each row. For writing
+    csv files, iter_csv_blocks renders blocks of CSV_EXPORT_ROWS rows.
+    Large exports are evaluated and rendered in forked worker processes
+    ahead of the writer. The workers inherit the code array.
+
+    Parameters
+    ----------
+    code_array: CodeArray
+    \tGrid, from which the results are taken
+    top: Integer
+    \tFirst row of the area
+    bottom: Integer
+    \tRow after the last row of the area
+    left: Integer
+    \tFirst column of the area
+    right: Integer
+    \tColumn after the last column of the area
+    tab: Integer
+    \tTable of the area
+
+    """
+
+    # Exports with more filled cells are evaluated in parallel
+    parallel_min_cells = 10000
+
+    def __init__(self, code_array, top, bottom, left, right, tab):
+        self.code_array = code_array
+        self.top = top
+        self.bottom = bottom
+        self.left = left
+        self.right = right
+        self.tab = tab
+
+        # Sorted list of (row, cols) for filled rows, created on first use
+        self._filled_rows = None
+
+    def __iter__(self):
+        """Generator of generators of results of each row"""
+
+        for start, end, filled_rows in self._iter_blocks():
+            row = start
+
+            for filled_row, cols in filled_rows:
+                for __ in xrange(row, filled_row):
+                    yield iter([None] * (self.right - self.left))
+
+                yield iter(self._get_row_results(filled_row, cols))
+                row = filled_row + 1
+
+            for __ in xrange(row, end):
+                yield iter([None] * (self.right - self.left))
+
+    def _get_filled_rows(self):
+        """Returns sorted list of (row, sorted cols) of filled cells"""
+
+        if self._filled_rows is None:
+            row_cols = {}
+
+            for row, col, tab in self.code_array.dict_grid.iterkeys():
+                if tab == self.tab and self.top <= row < self.bottom and \
+                   self.left <= col < self.right:
+                    row_cols.setdefault(row, []).append(col)
+
+            # Cells that are backed by array blocks are filled, too
+            array_blocks = self.code_array.array_blocks
+            for top, left, bottom, right in array_blocks.get_bboxes(self.tab):
+                cols = range(max(left, self.left),
+                             min(right + 1, self.right))
+                if not cols:
+                    continue
+
+                for row in xrange(max(top, self.top),
+                                  min(bottom + 1, self.bottom)):
+                    row_cols.setdefault(row, []).extend(cols)
+
+            self._filled_rows = sorted((row, sorted(set(cols)))
+                                       for row, cols in row_cols.iteritems())
+
+        return self._filled_rows
+
+    def _iter_blocks(self):
+        """Generator of start, end, filled rows of blocks of rows"""
+
+        filled_rows = self._get_filled_rows()
+        idx = 0
+
+        for start in xrange(self.top, self.bottom, CSV_EXPORT_ROWS):
+            end = min(start + CSV_EXPORT_ROWS, self.bottom)
+
+            block_start = idx
+            while idx < len(filled_rows) and filled_rows[idx][0] < end:
+                idx += 1
+
+            yield start, end, filled_rows[block_start:idx]
+
+    def _get_row_results(self, row, cols):
+        """Returns list of results of row with evaluated cells cols"""
+
+        results = [None] * (self.right - self.left)
+
+        for col in cols:
+            results[col - self.left] = self.code_array[row, col, self.tab]
+
+        return results
+
+    def _is_parallelizable(self):
+        """Returns True if cells may be evaluated in worker processes
+
+        Workers are forked so that they inherit the code array. Global
+        variable assignments have to be evaluated in the grid process
+        in row order.
+
+        """
+
+        if not hasattr(os, "fork") or self.code_array.safe_mode:
+            return False
+
+        filled_rows = self._get_filled_rows()
+
+        if sum(len(cols) for __, cols in filled_rows) < \
+           self.parallel_min_cells:
+            return False
+
+        code_array = self.code_array
+
+        for row, cols in filled_rows:
+            for col in cols:
+                code = code_array((row, col, self.tab))
+                if code is not None and ASSIGNMENT_RE.match(code):
+                    return False
+
+        return True
+
+    def render_block(self, start, end, filled_rows, dialect_params,
+                     encoding):
+        """Returns csv text of rows from start to end
+
+        Parameters
+        ----------
+        start: Integer
+        \tFirst row of the block
+        end: Integer
+        \tRow after the last row of the block
+        filled_rows: List
+        \tSorted list of (row, sorted cols) of filled cells in the block
+        dialect_params: Dict
+        \tFormat parameters of the csv dialect
+        encoding: String
+        \tTarget encoding
+
+        """
+
+        csv_file = StringIO()
+        csv_writer = csv.writer(csv_file, **dialect_params)
+
+        csv_writer.writerow([""] * (self.right - self.left))
+        empty_line = csv_file.getvalue()
+        csv_file.reset()
+        csv_file.truncate()
+
+        row = start
+
+        for filled_row, cols in filled_rows:
+            csv_file.write(empty_line * (filled_row - row))
+
+            results = self._get_row_results(filled_row, cols)
+            csv_writer.writerow(list(encode_gen(results, encoding)))
+
+            row = filled_row + 1
+
+        csv_file.write(empty_line * (end - row))
+
+        return csv_file.getvalue()
+
+    def iter_csv_blocks(self, dialect, encoding="utf-8", processes=None):
+        """Generator of csv text of blocks of rows in row order
+
+        Parameters
+        ----------
+        dialect: Object
+        \tCsv dialect
+        encoding: String, defaults to "utf-8"
+        \tTarget encoding
+        processes: Integer, defaults to None
+        \tNumber of worker processes, config["worker_processes"] if None
+
+        """
+
+        if processes is None:
+            processes = config["worker_processes"]
+
+        dialect_params = get_dialect_params(dialect)
+
+        tasks = ((start, end, filled_rows, dialect_params, encoding)
+                 for start, end, filled_rows in self._iter_blocks())
+
+        if processes > 1 and self._is_parallelizable():
+            blocks = iter_parallel_results(render_csv_block, tasks,
+                                           processes,
+                                           initializer=set_worker_export_data,
+                                           initargs=(self,))
+        else:
+            blocks = (self.render_block(*task) for task in tasks)
+
+        for block in blocks:
+            yield block
+
+
 class CsvInterface(StatusBarEventMixin):
     """CSV interface class
 
@@ -378,58 +988,190 @@ class CsvInterface(StatusBarEventMixin):
 
         self.first_line = False
 
+        # Column converters, which are created on first use
+        self.converters = []
+
     def __iter__(self):
         """Generator of generators that yield csv data"""
 
+        for chunk in self.iter_chunks():
+            for line in chunk:
+                yield iter(line)
+
+    def _get_converter(self, col):
+        """Returns converter for column col"""
+
+        while len(self.converters) <= col:
+            try:
+                digest_type = self.digest_types[len(self.converters)]
+            except IndexError:
+                digest_type = self.digest_types[0]
+
+            self.converters.append(
+                get_column_converter(digest_type, encoding=self.encoding))
+
+        return self.converters[col]
+
+    def _get_header_codes(self, line):
+        """Returns code strings of the header line"""
+
+        codes = []
+
+        for value in line:
+            try:
+                codes.append(repr(value.decode(self.encoding)))
+
+            except Exception:
+                codes.append("")
+
+        return codes
+
+    def _get_chunk_codes(self, lines):
+        """Returns code strings of lines, converted column by column
+
+        Parameters
+        ----------
+        lines: List of lists of strings
+        \tcsv lines, which may differ in length
+
+        """
+
+        columns = izip_longest(*lines)
+        code_columns = [self._get_converter(col)(list(column))
+                        for col, column in enumerate(columns)]
+
+        if not code_columns:
+            # All lines are empty
+            return [[] for line in lines]
+
+        return [code_line[:len(line)]
+                for code_line, line in zip(zip(*code_columns), lines)]
+
+    def _get_split_quotechar(self):
+        """Returns quote character that is relevant for splitting the file
+
+        None is returned if fields cannot be quoted.
+
+        """
+
+        if self.dialect.quoting == csv.QUOTE_NONE:
+            return
+
+        return self.dialect.quotechar
+
+    def _is_splittable(self):
+        """Returns True if the file can be parsed in independent chunks"""
+
+        # Escaped quote characters or line ends prevent finding
+        # record boundaries without parsing.
+        # Code objects cannot be passed to worker processes.
+
+        return self.dialect.escapechar is None and \
+            types.CodeType not in self.digest_types
+
+    def _iter_serial_chunks(self, chunk_rows):
+        """Generator of lists of up to chunk_rows converted csv lines"""
+
         with AOpen(self.path, "rb", main_window=self.main_window) as csv_file:
             csv_reader = csv.reader(csv_file, self.dialect)
 
-            self.first_line = self.has_header
+            if self.has_header:
+                for line in csv_reader:
+                    yield [self._get_header_codes(line)]
+                    break
 
-            for line in csv_reader:
-                yield self._get_csv_cells_gen(line)
-                break
+            while True:
+                lines = list(islice(csv_reader, chunk_rows))
+                if not lines:
+                    break
 
-            self.first_line = False
+                yield self._get_chunk_codes(lines)
 
-            for line in csv_reader:
-                yield self._get_csv_cells_gen(line)
+    def _iter_parallel_chunks(self, chunk_rows, processes, chunk_bytes):
+        """Generator of lists of up to chunk_rows converted csv lines
 
-        msg = _("File {filename} imported successfully.").format(
-            filename=self.csvfilename)
-        post_command_event(self.main_window, self.StatusBarMsg, text=msg)
+        File chunks of about chunk_bytes are parsed and converted in
+        worker processes.
 
-    def _get_csv_cells_gen(self, line):
-        """Generator of values in a csv line"""
+        """
 
-        digest_types = self.digest_types
+        quotechar = self._get_split_quotechar()
+        dialect_params = get_dialect_params(self.dialect)
+        start = 0
 
-        for j, value in enumerate(line):
-            if self.first_line:
-                digest_key = None
-                digest = lambda x: x.decode(self.encoding)
-            else:
-                try:
-                    digest_key = digest_types[j]
-                except IndexError:
-                    digest_key = digest_types[0]
+        if self.has_header:
+            with open(self.path, "rb") as csv_file:
+                header = csv_file.readline()
 
-                digest = Digest(acceptable_types=[digest_key],
-                                encoding=self.encoding)
+                # Line ends in quoted fields
+                while quotechar is not None and header.count(quotechar) % 2:
+                    line = csv_file.readline()
+                    if not line:
+                        break
+                    header += line
 
-            try:
-                digest_res = digest(value)
+                start = csv_file.tell()
 
-                if digest_res == "\b":
-                    digest_res = None
+            for line in csv.reader(StringIO(header), **dialect_params):
+                yield [self._get_header_codes(line)]
+                break
 
-                elif digest_key is not types.CodeType:
-                    digest_res = repr(digest_res)
+        tasks = ((self.path, chunk_start, chunk_end, dialect_params,
+                  self.digest_types, self.encoding)
+                 for chunk_start, chunk_end in
+                 chunk_range_gen(self.path, start, chunk_bytes, quotechar))
+
+        for codes in iter_parallel_results(parse_csv_chunk, tasks,
+                                           processes):
+            for i in xrange(0, len(codes), chunk_rows):
+                yield codes[i:i + chunk_rows]
+
+    def iter_chunks(self, chunk_rows=CSV_CHUNK_ROWS, processes=None,
+                    chunk_bytes=CHUNK_BYTES):
+        """Generator of lists of up to chunk_rows csv lines as code strings
+
+        Files that are larger than PARALLEL_MIN_CHUNKS chunks are split
+        at record boundaries and parsed in worker processes. The lines
+        are yielded in file order.
+
+        Parameters
+        ----------
+        chunk_rows: Integer, defaults to CSV_CHUNK_ROWS
+        \tMaximum number of lines per chunk
+        processes: Integer, defaults to None
+        \tNumber of worker processes, config["worker_processes"] if None
+        chunk_bytes: Integer, defaults to CHUNK_BYTES
+        \tSize of file chunks that are parsed by one worker
+
+        """
+
+        if processes is None:
+            processes = config["worker_processes"]
+
+        if processes > 1 and self._is_splittable() and \
+           os.path.getsize(self.path) > PARALLEL_MIN_CHUNKS * chunk_bytes:
+            chunks = self._iter_parallel_chunks(chunk_rows, processes,
+                                                chunk_bytes)
+        else:
+            chunks = self._iter_serial_chunks(chunk_rows)
 
-            except Exception:
-                digest_res = ""
+        for chunk in chunks:
+            yield chunk
 
-            yield digest_res
+        msg = _("File {filename} imported successfully.").format(
+            filename=self.csvfilename)
+        post_command_event(self.main_window, self.StatusBarMsg, text=msg)
+
+    def _get_csv_cells_gen(self, line):
+        """Generator of values in a csv line"""
+
+        if self.first_line:
+            codes = self._get_header_codes(line)
+        else:
+            codes = self._get_chunk_codes([line])[0]
+
+        for code in codes:
+            yield code
 
     def write(self, iterable):
         """Writes values from iterable into CSV file"""
@@ -440,6 +1182,14 @@ class CsvInterface(StatusBarEventMixin):
         try:
 
             with open(self.path, "wb") as csvfile:
+                if hasattr(iterable, "iter_csv_blocks"):
+                    # Rows are rendered in blocks, possibly in parallel
+                    for block in iterable.iter_csv_blocks(
+                            self.dialect, encoding=self.encoding):
+                        csvfile.write(block)
+
+                    return
+
                 csv_writer = csv.writer(csvfile, self.dialect)
 
                 for line in iterable:
@@ -464,6 +1214,8 @@ class TxtGenerator(StatusBarEventMixin):
 
     def __init__(self, main_window, path):
         self.main_window = main_window
+        self.path = path
+
         try:
             self.infile = open(path)
 
@@ -483,3 +1235,58 @@ class TxtGenerator(StatusBarEventMixin):
             yield (col for col in line.split())
 
         self.infile.close()
+
+    def iter_chunks(self, chunk_rows=CSV_CHUNK_ROWS, processes=None,
+                    chunk_bytes=CHUNK_BYTES):
+        """Generator of lists of up to chunk_rows lists of line values
+
+        Files that are larger than PARALLEL_MIN_CHUNKS chunks are split
+        at line ends and parsed in worker processes. The lines are
+        yielded in file order.
+
+        Chunks of numeric matrices are yielded as 2-dim object arrays,
+        which are pasted as dense blocks.
+
+        Parameters
+        ----------
+        chunk_rows: Integer, defaults to CSV_CHUNK_ROWS
+        \tMaximum number of lines per chunk
+        processes: Integer, defaults to None
+        \tNumber of worker processes, config["worker_processes"] if None
+        chunk_bytes: Integer, defaults to CHUNK_BYTES
+        \tSize of file chunks that are parsed by one worker
+
+        """
+
+        if self.infile is None:
+            return
+
+        if processes is None:
+            processes = config["worker_processes"]
+
+        try:
+            if processes > 1 and os.path.getsize(self.path) > \
+               PARALLEL_MIN_CHUNKS * chunk_bytes:
+                tasks = ((self.path, start, end) for start, end in
+                         chunk_range_gen(self.path, chunk_bytes=chunk_bytes))
+
+                for lines in iter_parallel_results(parse_txt_chunk, tasks,
+                                                   processes):
+                    for i in xrange(0, len(lines), chunk_rows):
+                        yield lines[i:i + chunk_rows]
+
+            else:
+                while True:
+                    lines = list(islice(self.infile, chunk_rows))
+                    if not lines:
+                        break
+
+                    block = get_numeric_block("".join(lines))
+
+                    if block is None:
+                        yield [line.split() for line in lines]
+                    else:
+                        yield block
+
+        finally:
+            self.infile.close()
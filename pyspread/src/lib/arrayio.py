@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+arrayio
+=======
+
+Import and export of NumPy npy and npz files
+
+Imported arrays are not split into cells. They back grid areas as a
+whole (see model.ArrayBlocks). Large arrays are memory-mapped read-only
+so that only the pages that are accessed are read from disk. This works
+for npy files and for uncompressed members of npz files.
+
+Provides
+--------
+
+ * NpyFile: Arrays of an npy or npz file
+ * load_array: Returns array from npy file or member of npz file
+ * load_block_array: Returns array of an array block source
+ * get_area_array: Returns array of the results of a grid area
+ * save_array: Writes array to npy file
+
+"""
+
+import struct
+import zipfile
+
+import numpy
+from numpy.lib import format as npy_format
+
+# Arrays with at least this number of bytes are memory-mapped
+MMAP_MIN_BYTES = 16 * 1024 * 1024
+
+# Size of the fixed part of a zip local file header
+ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def _get_member_memmap(filepath, info):
+    """Returns read-only memory map of uncompressed npz member or None
+
+    None is returned if the member cannot be mapped.
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of npz file
+    info: zipfile.ZipInfo
+    \tInfo of npz member
+
+    """
+
+    if info.compress_type != zipfile.ZIP_STORED or \
+       info.file_size < MMAP_MIN_BYTES:
+        return
+
+    with open(filepath, "rb") as infile:
+        # The local header may have another extra field than the directory
+        infile.seek(info.header_offset)
+        local_header = infile.read(ZIP_LOCAL_HEADER_SIZE)
+        name_length, extra_length = struct.unpack("<HH", local_header[26:])
+
+        infile.seek(info.header_offset + ZIP_LOCAL_HEADER_SIZE +
+                    name_length + extra_length)
+
+        version = npy_format.read_magic(infile)
+        if version == (1, 0):
+            shape, fortran_order, dtype = \
+                npy_format.read_array_header_1_0(infile)
+        else:
+            shape, fortran_order, dtype = \
+                npy_format.read_array_header_2_0(infile)
+
+        offset = infile.tell()
+
+    if dtype.hasobject:
+        # Pickled arrays cannot be mapped
+        return
+
+    order = "F" if fortran_order else "C"
+
+    return numpy.memmap(filepath, dtype=dtype, mode="r", shape=shape,
+                        offset=offset, order=order)
+
+
+def load_array(filepath, name=None):
+    """Returns array from npy file or member of npz file
+
+    Large arrays are memory-mapped read-only.
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of npy or npz file
+    name: String, defaults to None
+    \tName of array in npz file, None for npy files
+
+    """
+
+    if name is None:
+        with open(filepath, "rb") as infile:
+            infile.seek(0, 2)
+            mmap_mode = "r" if infile.tell() >= MMAP_MIN_BYTES else None
+
+        return numpy.load(filepath, mmap_mode=mmap_mode)
+
+    with zipfile.ZipFile(filepath) as npz_file:
+        info = npz_file.getinfo(name + ".npy")
+
+    array = _get_member_memmap(filepath, info)
+
+    if array is None:
+        npz_file = numpy.load(filepath)
+        try:
+            array = npz_file[name]
+        finally:
+            npz_file.close()
+
+    return array
+
+
+def load_block_array(source):
+    """Returns array of an array block source
+
+    Parameters
+    ----------
+    source: Tuple
+    \tFile path, array name in npz file or None and optionally the row
+    \tand column windows (start, stop) of the block within the array
+
+    """
+
+    array = load_array(*source[:2])
+
+    if len(source) > 2:
+        (row_start, row_stop), (col_start, col_stop) = source[2:]
+
+        array = array[row_start:row_stop]
+
+        if array.ndim > 1:
+            array = array[:, col_start:col_stop]
+
+    return array
+
+
+class NpyFile(object):
+    """Arrays of an npy or npz file
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of npy or npz file
+
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+        self.arrays = [((filepath, name), load_array(filepath, name))
+                       for name in self.get_names()]
+
+    def get_names(self):
+        """Returns list of array names, [None] for npy files"""
+
+        # npz files are zip archives, npy files are not
+        if not zipfile.is_zipfile(self.filepath):
+            return [None]
+
+        with zipfile.ZipFile(self.filepath) as npz_file:
+            return [filename[:-4] for filename in npz_file.namelist()
+                    if filename.endswith(".npy")]
+
+
+def get_area_array(code_array, top, bottom, left, right, tab):
+    """Returns array of the results of a grid area
+
+    If the area is exactly covered by an array block without code then
+    the block array is returned without evaluating cells.
+
+    Parameters
+    ----------
+    code_array: CodeArray
+    \tCode array of the grid
+    top, bottom: Integer
+    \tFirst and last + 1 row of the area
+    left, right: Integer
+    \tFirst and last + 1 column of the area
+    tab: Integer
+    \tTable of the area
+
+    """
+
+    has_code = any(key[2] == tab and top <= key[0] < bottom and
+                   left <= key[1] < right for key in code_array.dict_grid)
+
+    if not has_code:
+        array_blocks = code_array.array_blocks
+        for block_top, block_left, block_tab, array, __ in \
+                reversed(array_blocks):
+            rows, cols = array_blocks.get_block_shape(array)
+            if block_tab != tab or block_top >= bottom or \
+               block_left >= right or block_top + rows <= top or \
+               block_left + cols <= left:
+                continue
+
+            # Only the last block that intersects the area is visible
+            if (block_top, block_left, rows, cols) == \
+               (top, left, bottom - top, right - left):
+                return array
+
+            break
+
+    values = numpy.empty((bottom - top, right - left), dtype="O")
+
+    for row in xrange(top, bottom):
+        for col in xrange(left, right):
+            values[row - top, col - left] = code_array[row, col, tab]
+
+    # Prefer a numeric array if all results are numbers
+    try:
+        typed_values = numpy.array(values.tolist())
+
+    except (TypeError, ValueError):
+        return values
+
+    if typed_values.shape == values.shape and \
+       typed_values.dtype.kind in "biufc":
+        return typed_values
+
+    return values
+
+
+def save_array(filepath, array):
+    """Writes array to npy file
+
+    Parameters
+    ----------
+    filepath: String
+    \tPath of npy file, no extension is appended
+    array: numpy.ndarray
+    \tArray that is saved
+
+    """
+
+    with open(filepath, "wb") as outfile:
+        numpy.save(outfile, array)
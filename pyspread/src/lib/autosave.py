@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+autosave
+========
+
+Background autosave and crash recovery
+
+Each running pyspread instance owns one autosave file
+autosave-<pid>.pys in the autosave directory and an info file
+autosave-<pid>.json that holds the path of the edited file.
+Autosave files are removed on regular exit. Autosave files of processes
+that are not running any more are offered for recovery on start up.
+
+Provides
+--------
+
+ * get_autosave_dir: Returns default autosave directory
+ * Autosave: Autosave files of one pyspread process
+ * get_orphaned_autosaves: Returns autosaves of terminated processes
+
+"""
+
+import json
+import os
+import threading
+import time
+
+import wx
+
+from src.interfaces.pys import BinaryPys
+
+AUTOSAVE_DIRNAME = "autosave"
+AUTOSAVE_PREFIX = "autosave-"
+
+
+def get_autosave_dir():
+    """Returns default autosave directory in the user data directory"""
+
+    user_data_dir = wx.StandardPaths.Get().GetUserDataDir()
+
+    return os.path.join(user_data_dir, AUTOSAVE_DIRNAME)
+
+
+def _is_process_running(pid):
+    """Returns True if process pid may be running
+
+    Without a portable check, processes are considered running on
+    non-POSIX platforms so that no autosave of a running process is taken.
+
+    """
+
+    if os.name != "posix":
+        return pid == os.getpid()
+
+    try:
+        os.kill(pid, 0)
+
+    except OSError, err:
+        # EPERM means that the process exists
+        return err.errno == 1
+
+    return True
+
+
+class Autosave(object):
+    """Autosave files of one pyspread process
+
+    Parameters
+    ----------
+    pid: Integer, defaults to process id of the current process
+    \tId of the process that owns the autosave
+    autosave_dir: String, defaults to get_autosave_dir()
+    \tDirectory of the autosave files
+
+    """
+
+    def __init__(self, pid=None, autosave_dir=None):
+        if pid is None:
+            pid = os.getpid()
+
+        if autosave_dir is None:
+            autosave_dir = get_autosave_dir()
+
+        self.pid = pid
+        self.autosave_dir = autosave_dir
+
+        basepath = os.path.join(autosave_dir, AUTOSAVE_PREFIX + str(pid))
+        self.pys_path = basepath + ".pys"
+        self.info_path = basepath + ".json"
+
+        self.thread = None
+        self.error = None
+
+    def exists(self):
+        """Returns True if autosave file is present"""
+
+        return os.path.exists(self.pys_path) and \
+            os.path.exists(self.info_path)
+
+    def is_running(self):
+        """Returns True if a background save is in progress"""
+
+        return self.thread is not None and self.thread.is_alive()
+
+    def join(self):
+        """Waits until a background save is finished"""
+
+        if self.thread is not None:
+            self.thread.join()
+
+    def save(self, data_array, filepath=None, on_error=None):
+        """Writes data_array to the autosave file in a background thread
+
+        Parameters
+        ----------
+        data_array: model.DataArray
+        \tSnapshot that must not be changed while it is saved
+        filepath: String, defaults to None
+        \tPath of the file that is edited, None for unsaved grids
+        on_error: Callable, defaults to None
+        \tCalled in the GUI thread with the error message on failure
+
+        """
+
+        self.thread = threading.Thread(target=self._write,
+                                       args=(data_array, filepath, on_error))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _write(self, data_array, filepath, on_error):
+        """Thread target that serializes data_array via BinaryPys"""
+
+        tmp_path = self.pys_path + ".tmp"
+        info = {"filepath": filepath, "time": time.time(), "pid": self.pid}
+
+        try:
+            if not os.path.isdir(self.autosave_dir):
+                os.makedirs(self.autosave_dir)
+
+            with open(tmp_path, "wb") as outfile:
+                BinaryPys(data_array, outfile).from_code_array()
+
+            if os.name != "posix" and os.path.exists(self.pys_path):
+                # rename does not replace files on Windows
+                os.remove(self.pys_path)
+
+            os.rename(tmp_path, self.pys_path)
+
+            with open(self.info_path, "w") as infofile:
+                json.dump(info, infofile)
+
+            self.error = None
+
+        except (IOError, OSError, ValueError), err:
+            self.error = err
+
+            if on_error is not None:
+                wx.CallAfter(on_error, unicode(err))
+
+    def get_info(self):
+        """Returns dict with filepath and time of the autosave"""
+
+        with open(self.info_path) as infofile:
+            return json.load(infofile)
+
+    def remove(self):
+        """Removes the autosave files if present"""
+
+        for path in [self.pys_path, self.info_path, self.pys_path + ".tmp"]:
+            try:
+                os.remove(path)
+
+            except OSError:
+                pass
+
+
+def get_orphaned_autosaves(autosave_dir=None):
+    """Returns list of Autosaves of processes that are not running
+
+    The list is sorted by autosave time, newest first.
+    Incomplete autosaves are removed.
+
+    Parameters
+    ----------
+    autosave_dir: String, defaults to get_autosave_dir()
+    \tDirectory of the autosave files
+
+    """
+
+    if autosave_dir is None:
+        autosave_dir = get_autosave_dir()
+
+    try:
+        filenames = os.listdir(autosave_dir)
+
+    except OSError:
+        return []
+
+    autosaves = []
+
+    for filename in filenames:
+        name, ext = os.path.splitext(filename)
+
+        if not name.startswith(AUTOSAVE_PREFIX) or ext != ".pys":
+            continue
+
+        try:
+            pid = int(name[len(AUTOSAVE_PREFIX):])
+
+        except ValueError:
+            continue
+
+        if _is_process_running(pid):
+            continue
+
+        autosave = Autosave(pid, autosave_dir)
+
+        try:
+            info = autosave.get_info()
+
+        except (IOError, ValueError):
+            autosave.remove()
+            continue
+
+        autosaves.append((info.get("time", 0), autosave))
+
+    autosaves.sort(key=lambda time_autosave: time_autosave[0], reverse=True)
+
+    return [orphan for __, orphan in autosaves]
@@ -0,0 +1,798 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+benchmark
+=========
+
+Throughput benchmarks for the model, the file formats and the renderer.
+
+Synthetic workbooks are generated into the grid of an offscreen main window.
+Each benchmark is timed several times on freshly generated workbooks.
+Results are stored as JSON so that runs from different commits can be
+compared.
+
+Provides
+--------
+
+ * workbook: Decorator that registers a synthetic workbook generator
+ * benchmark: Decorator that registers a benchmark
+ * time_benchmark: Times a benchmark setup function
+ * run_benchmarks: Runs all registered benchmarks on all workbooks
+ * save_results: Stores benchmark results in a JSON file
+ * load_results: Loads benchmark results from a JSON file
+ * compare_results: Returns regressions between two result dicts
+
+"""
+
+import bz2
+import csv
+from collections import OrderedDict
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from timeit import default_timer
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+try:
+    import xlwt
+except ImportError:
+    xlwt = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import cairo
+except ImportError:
+    cairo = None
+
+import wx
+
+from src.interfaces.pys import Pys, BinaryPys
+from src.lib.fileio import ParallelBz2File, ParallelBz2AOpen
+from src.interfaces.xls import Xls
+from src.interfaces.xlsx import Xlsx
+from src.interfaces.ods import Ods
+from src.lib.__csv import CsvExportData, CsvInterface
+from src.lib.selection import Selection
+from src.lib.undo import stack as undo_stack
+
+# Registered workbook generators and benchmarks
+
+WORKBOOKS = OrderedDict()
+BENCHMARKS = OrderedDict()
+
+# Default number of rows and columns of the synthetic workbooks
+
+DEFAULT_ROWS = 1000
+DEFAULT_COLS = 10
+
+
+def workbook(name):
+    """Decorator that registers a synthetic workbook generator
+
+    The generator is called with the grid, the number of rows and
+    the number of columns. It fills the first table of the grid.
+
+    Parameters
+    ----------
+    name: String
+    \tName of the workbook in the result file
+
+    """
+
+    def wrapper(function):
+        WORKBOOKS[name] = function
+        return function
+
+    return wrapper
+
+
+def benchmark(name, requires=True):
+    """Decorator that registers a benchmark
+
+    The decorated function is a setup function. It is called with the grid
+    and a temporary directory and returns a callable without parameters.
+    Only this callable is timed.
+
+    Parameters
+    ----------
+    name: String
+    \tName of the benchmark in the result file
+    requires: Bool, defaults to True
+    \tIf False then the benchmark is skipped, e.g. for a missing library
+
+    """
+
+    def wrapper(function):
+        if requires:
+            BENCHMARKS[name] = function
+        return function
+
+    return wrapper
+
+
+# Synthetic workbooks
+# -------------------
+
+def _fill_numeric(grid, rows, cols):
+    """Fills rows x cols numeric cells into the first table"""
+
+    code_array = grid.code_array
+    for row in xrange(rows):
+        for col in xrange(cols):
+            code_array[row, col, 0] = repr(row * cols + col + 0.5)
+
+
+@workbook("dense_numeric")
+def dense_numeric(grid, rows, cols):
+    """Every cell contains a float literal"""
+
+    _fill_numeric(grid, rows, cols)
+
+
+@workbook("formula_chains")
+def formula_chains(grid, rows, cols):
+    """Each column is a chain, in which each cell references the one above"""
+
+    code_array = grid.code_array
+    for col in xrange(cols):
+        code_array[0, col, 0] = repr(col)
+    for row in xrange(1, rows):
+        for col in xrange(cols):
+            code_array[row, col, 0] = u"S[X-1, Y, Z] + 1"
+
+
+@workbook("heavy_formatting")
+def heavy_formatting(grid, rows, cols):
+    """Numeric cells with row blocks and many single cell formats"""
+
+    _fill_numeric(grid, rows, cols)
+
+    cell_attributes = grid.code_array.cell_attributes
+
+    for row in xrange(rows):
+        selection = Selection([(row, 0)], [(row, cols - 1)], [], [], [])
+        attrs = {"bgcolor": 0xEEEEEE if row % 2 else 0xFFFFFF,
+                 "borderwidth_bottom": 1 + row % 3}
+        cell_attributes.append((selection, 0, attrs))
+
+        for col in xrange(row % 3, cols, 3):
+            selection = Selection([], [], [], [], [(row, col)])
+            attrs = {"fontweight": wx.BOLD, "textcolor": 0xFF0000,
+                     "justification": "right"}
+            cell_attributes.append((selection, 0, attrs))
+
+
+@workbook("merged_areas")
+def merged_areas(grid, rows, cols):
+    """Numeric cells, in which each 2 x 2 block is merged"""
+
+    _fill_numeric(grid, rows, cols)
+
+    cell_attributes = grid.code_array.cell_attributes
+
+    for row in xrange(0, rows - 1, 2):
+        for col in xrange(0, cols - 1, 2):
+            merge_area = row, col, row + 1, col + 1
+            selection = Selection([(row, col)], [(row + 1, col + 1)],
+                                  [], [], [])
+            attrs = {"merge_area": merge_area, "locked": True}
+            cell_attributes.append((selection, 0, attrs))
+
+
+# Benchmarks
+# ----------
+
+def _sorted_keys(code_array):
+    """Returns keys of code_array in row major order"""
+
+    return sorted(code_array.keys())
+
+
+@benchmark("eval_cells")
+def bench_eval_cells(grid, tmpdir):
+    """Evaluates all cells with an empty result cache"""
+
+    code_array = grid.code_array
+    keys = _sorted_keys(code_array)
+    code_array.result_cache.clear()
+    code_array.result_versions.clear()
+
+    def run():
+        for key in keys:
+            code_array[key]
+
+    return run
+
+
+@benchmark("insert_rows")
+def bench_insert_rows(grid, tmpdir):
+    """Inserts 10 rows at the top of the first table"""
+
+    def run():
+        grid.code_array.insert(0, 10, axis=0, tab=0)
+
+    return run
+
+
+@benchmark("delete_rows")
+def bench_delete_rows(grid, tmpdir):
+    """Deletes 10 rows at the top of the first table"""
+
+    def run():
+        grid.code_array.delete(0, 10, axis=0, tab=0)
+
+    return run
+
+
+@benchmark("cell_attributes_lookup")
+def bench_cell_attributes_lookup(grid, tmpdir):
+    """Looks up the attributes of all filled cells with an empty cache"""
+
+    cell_attributes = grid.code_array.cell_attributes
+    keys = _sorted_keys(grid.code_array)
+    cell_attributes._attr_cache.clear()
+    cell_attributes._table_cache.clear()
+
+    def run():
+        for key in keys:
+            cell_attributes[key]
+
+    return run
+
+
+def _save_pys(code_array, filepath):
+    """Saves code_array as pys file without status messages"""
+
+    outfile = bz2.BZ2File(filepath, "wb")
+    Pys(code_array, outfile).from_code_array()
+    outfile.close()
+
+
+@benchmark("pys_save")
+def bench_pys_save(grid, tmpdir):
+    """Saves the workbook as pys file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.pys")
+
+    def run():
+        _save_pys(grid.code_array, filepath)
+
+    return run
+
+
+@benchmark("pys_load")
+def bench_pys_load(grid, tmpdir):
+    """Loads the workbook from a pys file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.pys")
+    _save_pys(grid.code_array, filepath)
+    grid.actions.clear(grid.code_array.shape)
+
+    def run():
+        infile = bz2.BZ2File(filepath)
+        Pys(grid.code_array, infile).to_code_array()
+        infile.close()
+
+    return run
+
+
+@benchmark("pys_parallel_save")
+def bench_pys_parallel_save(grid, tmpdir):
+    """Saves the workbook as pys file with one compression process per CPU"""
+
+    filepath = os.path.join(tmpdir, "benchmark_parallel.pys")
+
+    def run():
+        with ParallelBz2File(filepath, "wb") as outfile:
+            Pys(grid.code_array, outfile).from_code_array()
+
+    return run
+
+
+@benchmark("pys_parallel_load")
+def bench_pys_parallel_load(grid, tmpdir):
+    """Loads the workbook from a multi-stream pys file"""
+
+    filepath = os.path.join(tmpdir, "benchmark_parallel.pys")
+    with ParallelBz2File(filepath, "wb") as outfile:
+        Pys(grid.code_array, outfile).from_code_array()
+    grid.actions.clear(grid.code_array.shape)
+
+    def run():
+        with ParallelBz2File(filepath) as infile:
+            Pys(grid.code_array, infile).to_code_array()
+
+    return run
+
+
+@benchmark("pys_progress_load")
+def bench_pys_progress_load(grid, tmpdir):
+    """Loads the workbook from a pys file with progress display and abort"""
+
+    filepath = os.path.join(tmpdir, "benchmark.pys")
+    _save_pys(grid.code_array, filepath)
+    grid.actions.clear(grid.code_array.shape)
+
+    def run():
+        with ParallelBz2AOpen(filepath, "r", processes=1,
+                              main_window=grid.main_window) as infile:
+            Pys(grid.code_array, infile).to_code_array()
+
+    return run
+
+
+def _save_binary_pys(code_array, filepath):
+    """Saves code_array as binary pys file without status messages"""
+
+    with open(filepath, "wb") as outfile:
+        BinaryPys(code_array, outfile).from_code_array()
+
+
+@benchmark("binary_pys_save")
+def bench_binary_pys_save(grid, tmpdir):
+    """Saves the workbook as binary pys file"""
+
+    filepath = os.path.join(tmpdir, "benchmark_binary.pys")
+
+    def run():
+        _save_binary_pys(grid.code_array, filepath)
+
+    return run
+
+
+@benchmark("binary_pys_load")
+def bench_binary_pys_load(grid, tmpdir):
+    """Loads the workbook from a binary pys file including pending tables"""
+
+    filepath = os.path.join(tmpdir, "benchmark_binary.pys")
+    _save_binary_pys(grid.code_array, filepath)
+    grid.actions.clear(grid.code_array.shape)
+
+    def run():
+        with open(filepath, "rb") as infile:
+            BinaryPys(grid.code_array, infile).to_code_array()
+        grid.code_array.dict_grid.load_tables()
+
+    return run
+
+
+@benchmark("autosave_snapshot")
+def bench_autosave_snapshot(grid, tmpdir):
+    """Takes the grid snapshot that blocks the GUI during autosave"""
+
+    def run():
+        grid.code_array.snapshot()
+
+    return run
+
+
+@benchmark("xls_export", requires=xlwt is not None)
+def bench_xls_export(grid, tmpdir):
+    """Exports the workbook as xls file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.xls")
+
+    def run():
+        workbook = xlwt.Workbook()
+        Xls(grid.code_array, workbook).from_code_array()
+        workbook.save(filepath)
+
+    return run
+
+
+@benchmark("xls_import", requires=xlrd is not None and xlwt is not None)
+def bench_xls_import(grid, tmpdir):
+    """Imports the workbook from an xls file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.xls")
+    workbook = xlwt.Workbook()
+    Xls(grid.code_array, workbook).from_code_array()
+    workbook.save(filepath)
+    grid.actions.clear(grid.code_array.shape)
+
+    def run():
+        workbook = xlrd.open_workbook(filepath, formatting_info=True)
+        Xls(grid.code_array, workbook).to_code_array()
+
+    return run
+
+
+# Number of rows of the formatted xls file of the xls_import_formatted benchmark
+XLS_FORMATTED_ROWS = 50000
+
+
+def _write_formatted_xls(filepath, rows, cols):
+    """Writes xls file with banded rows, bold first column and thick borders"""
+
+    styles = [
+        xlwt.easyxf("pattern: pattern solid, fore_colour light_yellow"),
+        xlwt.easyxf("pattern: pattern solid, fore_colour ice_blue"),
+        xlwt.easyxf("font: bold on; align: horiz right"),
+        xlwt.easyxf("borders: bottom thick, right thin"),
+    ]
+
+    workbook = xlwt.Workbook()
+    worksheet = workbook.add_sheet("Benchmark")
+
+    for row in xrange(rows):
+        for col in xrange(cols):
+            if col == 0:
+                style = styles[2]
+            elif row % 10 == 9:
+                style = styles[3]
+            else:
+                style = styles[row // 5 % 2]
+
+            worksheet.write(row, col, row * cols + col + 0.5, style)
+
+    workbook.save(filepath)
+
+
+@benchmark("xls_import_formatted",
+           requires=xlrd is not None and xlwt is not None)
+def bench_xls_import_formatted(grid, tmpdir):
+    """Imports a formatted xls file with XLS_FORMATTED_ROWS rows
+
+    The file does not depend on the workbook and is written once.
+
+    """
+
+    filepath = os.path.join(tmpdir, "benchmark_formatted.xls")
+
+    if not os.path.exists(filepath):
+        _write_formatted_xls(filepath, XLS_FORMATTED_ROWS, DEFAULT_COLS)
+
+    def run():
+        workbook = xlrd.open_workbook(filepath, formatting_info=True)
+        Xls(grid.code_array, workbook).to_code_array()
+
+    return run
+
+
+@benchmark("xlsx_export", requires=openpyxl is not None)
+def bench_xlsx_export(grid, tmpdir):
+    """Exports the workbook as xlsx file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.xlsx")
+
+    def run():
+        with open(filepath, "wb") as outfile:
+            Xlsx(grid.code_array, outfile).from_code_array()
+
+    return run
+
+
+@benchmark("xlsx_import", requires=openpyxl is not None)
+def bench_xlsx_import(grid, tmpdir):
+    """Imports the workbook from an xlsx file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.xlsx")
+    with open(filepath, "wb") as outfile:
+        Xlsx(grid.code_array, outfile).from_code_array()
+    grid.actions.clear(grid.code_array.shape)
+
+    def run():
+        with open(filepath, "rb") as infile:
+            Xlsx(grid.code_array, infile).to_code_array()
+
+    return run
+
+
+@benchmark("ods_export")
+def bench_ods_export(grid, tmpdir):
+    """Exports the workbook as ods file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.ods")
+
+    def run():
+        with open(filepath, "wb") as outfile:
+            Ods(grid.code_array, outfile).from_code_array()
+
+    return run
+
+
+@benchmark("ods_import")
+def bench_ods_import(grid, tmpdir):
+    """Imports the workbook from an ods file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.ods")
+    with open(filepath, "wb") as outfile:
+        Ods(grid.code_array, outfile).from_code_array()
+    grid.actions.clear(grid.code_array.shape)
+
+    def run():
+        with open(filepath, "rb") as infile:
+            Ods(grid.code_array, infile).to_code_array()
+
+    return run
+
+
+def _csv_data_gen(code_array, rows, cols):
+    """Generator of result rows as used for CSV export"""
+
+    for row in xrange(rows):
+        yield (code_array[row, col, 0] for col in xrange(cols))
+
+
+@benchmark("csv_export")
+def bench_csv_export(grid, tmpdir):
+    """Exports the results of the workbook as CSV file"""
+
+    filepath = os.path.join(tmpdir, "benchmark.csv")
+    rows, cols, __ = grid.code_array.get_last_filled_cell(0)
+
+    def run():
+        csv_interface = CsvInterface(grid.main_window, filepath,
+                                     csv.excel, [], False)
+        csv_interface.write(CsvExportData(grid.code_array, 0, rows + 1,
+                                          0, cols + 1, 0))
+
+    return run
+
+
+@benchmark("csv_import")
+def bench_csv_import(grid, tmpdir):
+    """Imports a CSV file into the top left cell of the grid"""
+
+    filepath = os.path.join(tmpdir, "benchmark.csv")
+    rows, cols, __ = grid.code_array.get_last_filled_cell(0)
+    csv_interface = CsvInterface(grid.main_window, filepath, csv.excel,
+                                 [], False)
+    csv_interface.write(_csv_data_gen(grid.code_array, rows + 1, cols + 1))
+    grid.actions.clear(grid.code_array.shape)
+
+    def run():
+        csv_interface = CsvInterface(grid.main_window, filepath, csv.excel,
+                                     [float], False)
+        grid.actions.paste_chunks((0, 0, 0), csv_interface.iter_chunks())
+
+    return run
+
+
+@benchmark("find_all")
+def bench_find_all(grid, tmpdir):
+    """Finds all cells, which code contains the digit 5"""
+
+    def run():
+        grid.actions.find_all(u"5", ["DOWN"])
+
+    return run
+
+
+@benchmark("sort")
+def bench_sort(grid, tmpdir):
+    """Sorts the first table descending by its first column"""
+
+    def run():
+        grid.actions.sort_descending((0, 0, 0))
+
+    return run
+
+
+@benchmark("render", requires=cairo is not None)
+def bench_render(grid, tmpdir):
+    """Renders the top left 100 x 10 cells into an offscreen surface"""
+
+    from src.lib._grid_cairo_renderer import GridCairoRenderer
+
+    width, height = 842, 2480
+    rows = min(100, grid.code_array.shape[0])
+    cols = min(10, grid.code_array.shape[1])
+
+    def run():
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        context = cairo.Context(surface)
+        renderer = GridCairoRenderer(context, grid.code_array, (0, rows),
+                                     (0, cols), (0, 1), width, height,
+                                     "portrait")
+        renderer.draw()
+        surface.finish()
+
+    return run
+
+
+# Runner
+# ------
+
+def time_benchmark(setup, repeat=3):
+    """Returns list of timings in seconds for repeat runs
+
+    Parameters
+    ----------
+    setup: Function
+    \tCalled before each run, returns the callable that is timed
+    repeat: Integer, defaults to 3
+    \tNumber of timed runs
+
+    """
+
+    timings = []
+
+    for __ in xrange(repeat):
+        run = setup()
+        start = default_timer()
+        run()
+        timings.append(default_timer() - start)
+
+    return timings
+
+
+def _get_revision():
+    """Returns git revision of the source tree or None"""
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+
+    try:
+        revision = subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                           cwd=src_dir,
+                                           stderr=open(os.devnull, "w"))
+    except (OSError, subprocess.CalledProcessError):
+        return
+
+    return revision.strip()
+
+
+def run_benchmarks(grid, rows=DEFAULT_ROWS, cols=DEFAULT_COLS, repeat=3,
+                   workbooks=None, benchmarks=None, progress=None):
+    """Runs benchmarks on workbooks and returns result dict
+
+    Parameters
+    ----------
+    grid: Grid object
+    \tGrid of an (offscreen) main window
+    rows: Integer, defaults to DEFAULT_ROWS
+    \tNumber of rows of each synthetic workbook
+    cols: Integer, defaults to DEFAULT_COLS
+    \tNumber of columns of each synthetic workbook
+    repeat: Integer, defaults to 3
+    \tNumber of timed runs per benchmark
+    workbooks: List of strings, defaults to None
+    \tNames of workbooks to be used, all registered workbooks if None
+    benchmarks: List of strings, defaults to None
+    \tNames of benchmarks to be run, all registered benchmarks if None
+    progress: Function, defaults to None
+    \tCalled with workbook name and benchmark name before each benchmark
+
+    """
+
+    if workbooks is None:
+        workbooks = WORKBOOKS.keys()
+
+    if benchmarks is None:
+        benchmarks = BENCHMARKS.keys()
+
+    shape = rows + 20, cols, 1
+
+    results = OrderedDict()
+
+    tmpdir = tempfile.mkdtemp()
+
+    try:
+        for workbook_name in workbooks:
+            results[workbook_name] = OrderedDict()
+            generator = WORKBOOKS[workbook_name]
+
+            for benchmark_name in benchmarks:
+                if progress is not None:
+                    progress(workbook_name, benchmark_name)
+
+                bench_setup = BENCHMARKS[benchmark_name]
+
+                def setup():
+                    grid.actions.clear(shape)
+                    generator(grid, rows, cols)
+                    run = bench_setup(grid, tmpdir)
+                    undo_stack().clear()
+                    return run
+
+                timings = time_benchmark(setup, repeat=repeat)
+
+                results[workbook_name][benchmark_name] = OrderedDict([
+                    ("min", min(timings)),
+                    ("mean", sum(timings) / len(timings)),
+                    ("timings", timings),
+                ])
+
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        undo_stack().clear()
+
+    meta = OrderedDict([
+        ("timestamp", datetime.datetime.now().isoformat()),
+        ("revision", _get_revision()),
+        ("python", sys.version.split()[0]),
+        ("platform", platform.platform()),
+        ("rows", rows),
+        ("cols", cols),
+        ("repeat", repeat),
+    ])
+
+    return OrderedDict([("meta", meta), ("results", results)])
+
+
+def save_results(results, filepath):
+    """Stores benchmark results in JSON file filepath"""
+
+    with open(filepath, "w") as outfile:
+        json.dump(results, outfile, indent=2)
+
+
+def load_results(filepath):
+    """Returns benchmark results from JSON file filepath"""
+
+    with open(filepath) as infile:
+        return json.load(infile, object_pairs_hook=OrderedDict)
+
+
+def compare_results(old_results, new_results, tolerance=0.1):
+    """Returns list of regressions from old_results to new_results
+
+    A regression is a benchmark, which minimum time has grown by more than
+    tolerance relative to the old minimum time. Each regression is a tuple
+    (workbook, benchmark, old_min, new_min).
+
+    Parameters
+    ----------
+    old_results: Dict
+    \tResults of the reference run as returned by run_benchmarks
+    new_results: Dict
+    \tResults of the current run as returned by run_benchmarks
+    tolerance: Float, defaults to 0.1
+    \tRelative slowdown that is not considered a regression
+
+    """
+
+    regressions = []
+
+    old = old_results["results"]
+    new = new_results["results"]
+
+    for workbook_name in new:
+        if workbook_name not in old:
+            continue
+
+        for benchmark_name in new[workbook_name]:
+            if benchmark_name not in old[workbook_name]:
+                continue
+
+            old_min = old[workbook_name][benchmark_name]["min"]
+            new_min = new[workbook_name][benchmark_name]["min"]
+
+            if new_min > old_min * (1.0 + tolerance):
+                regressions.append((workbook_name, benchmark_name,
+                                    old_min, new_min))
+
+    return regressions
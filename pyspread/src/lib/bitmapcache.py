@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+bitmapcache
+===========
+
+Memory-budgeted cache for rendered cell bitmaps
+
+The cache accounts the memory of its bitmaps from width, height and
+color depth. When a new bitmap exceeds the memory budget, the least
+recently used bitmaps are evicted.
+
+Provides
+--------
+
+ * get_bitmap_nbytes: Returns memory size of a wx.Bitmap in bytes
+ * BitmapCache: LRU cache of bitmaps with a memory budget
+
+"""
+
+from collections import OrderedDict
+
+# Assumed color depth of bitmaps that report no depth
+DEFAULT_DEPTH = 32
+
+
+def get_bitmap_nbytes(bmp):
+    """Returns memory size of a wx.Bitmap in bytes
+
+    Parameters
+    ----------
+    bmp: wx.Bitmap
+    \tBitmap, for which the size is returned
+
+    """
+
+    depth = bmp.GetDepth()
+
+    if depth <= 0:
+        depth = DEFAULT_DEPTH
+
+    return bmp.GetWidth() * bmp.GetHeight() * depth // 8
+
+
+class BitmapCache(object):
+    """LRU cache of bitmaps with a memory budget
+
+    Looking up a key marks it as recently used. A bitmap that is larger
+    than the budget is not cached.
+
+    Parameters
+    ----------
+    max_bytes: Integer
+    \tMemory budget in bytes
+    get_nbytes: Function, defaults to get_bitmap_nbytes
+    \tReturns memory size of a cached object in bytes
+
+    """
+
+    def __init__(self, max_bytes, get_nbytes=get_bitmap_nbytes):
+        self.max_bytes = max_bytes
+        self.get_nbytes = get_nbytes
+
+        # Maps keys to (bitmap, nbytes) in the order of use
+        self._entries = OrderedDict()
+
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __getitem__(self, key):
+        """Returns bitmap of key and marks it as most recently used"""
+
+        entry = self._entries.pop(key)
+        self._entries[key] = entry
+
+        self.hits += 1
+
+        return entry[0]
+
+    def __setitem__(self, key, bmp):
+        """Caches bitmap bmp and evicts bitmaps that exceed the budget"""
+
+        self.misses += 1
+
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[1]
+
+        nbytes = self.get_nbytes(bmp)
+
+        if nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = bmp, nbytes
+        self.nbytes += nbytes
+
+        self.evict(self.max_bytes)
+
+    def evict(self, max_bytes):
+        """Evicts least recently used bitmaps until max_bytes are used
+
+        Parameters
+        ----------
+        max_bytes: Integer
+        \tMemory size in bytes that the cached bitmaps may use
+
+        """
+
+        while self.nbytes > max_bytes:
+            __, (__, nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
+
+    def set_max_bytes(self, max_bytes):
+        """Sets memory budget and evicts bitmaps that exceed it
+
+        Parameters
+        ----------
+        max_bytes: Integer
+        \tMemory budget in bytes
+
+        """
+
+        self.max_bytes = max_bytes
+        self.evict(max_bytes)
+
+    def clear(self):
+        """Removes all bitmaps, statistics are kept"""
+
+        self._entries.clear()
+        self.nbytes = 0
+
+    def get_stats(self):
+        """Returns dict of cache statistics
+
+        The keys are entries, nbytes, max_bytes, hits, misses and
+        evictions. Misses are bitmaps that have been stored.
+
+        """
+
+        return {
+            "entries": len(self._entries),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
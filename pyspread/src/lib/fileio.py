@@ -32,23 +32,37 @@ Provides
 --------
 
  * AOpen: Read and write files with status messages and abort option
+ * Bz2AOpen: Read and write bz2 files with status messages and abort option
+ * ParallelBz2File: Read and write bz2 files using multiple processes
+ * ParallelBz2AOpen: ParallelBz2File with status messages and abort option
 
 """
 
 import bz2
+from collections import deque
 import i18n
+from itertools import imap
+import multiprocessing
+import os
+import re
 
 import wx
 
 from src.gui._events import post_command_event
-from src.sysvars import is_gtk
+from src.lib.progress import ProgressReporter
 
 #use ugettext instead of getttext to avoid unicode errors
 _ = i18n.language.ugettext
 
 
 class AOpenMixin(object):
-    """AOpen mixin class"""
+    """AOpen mixin class
+
+    Progress is counted in bytes and displayed in time intervals.
+    The abort state is checked after each progress display because
+    <Esc> key events are processed during the display.
+
+    """
 
     def set_initial_state(self, kwargs):
         """Sets class state from kwargs attributes, pops extra kwargs"""
@@ -62,87 +76,93 @@ class AOpenMixin(object):
             statustext = ""
 
         try:
-            self.total_lines = kwargs.pop("total_lines")
-            self.statustext = statustext + \
-                _("{nele} of {totalele} elements processed.")
+            total_bytes = kwargs.pop("total_bytes")
 
         except KeyError:
-            self.total_lines = None
-            self.statustext = statustext + _("{nele} elements processed.")
+            total_bytes = None
 
-        try:
-            self.freq = kwargs.pop("freq")
+        if total_bytes is None:
+            statustext += _("{done} processed.")
+        else:
+            statustext += _("{done} of {total} processed.")
 
-        except KeyError:
-            self.freq = 1000
+        self.progress = ProgressReporter(self.main_window, statustext,
+                                         total=total_bytes, unit="bytes")
 
         # The aborted attribute makes next() to raise StopIteration
         self.aborted = False
 
-        # Line counter
-        self.line = 0
-
         # Bindings
         self.main_window.Bind(wx.EVT_KEY_DOWN, self.on_key)
 
-    def next(self):
+    def _is_aborted(self, nbytes, statustext):
+        """Counts nbytes, displays progress if due and returns abort state
+
+        Parameters
+        ----------
+        nbytes: Integer
+        \tNumber of bytes that have been processed
+        statustext: String
+        \tStatusbar text that is displayed on abort
+
+        """
+
+        progress = self.progress
+        progress.done += nbytes
 
-        """Next that shows progress in statusbar for each <freq> cells"""
+        if progress.is_due():
+            progress.report()
 
-        self.progress_status()
+            if self.aborted:
+                post_command_event(self.main_window,
+                                   self.main_window.StatusBarMsg,
+                                   text=statustext)
+
+        return self.aborted
+
+    def next(self):
+        """Next that shows progress in statusbar"""
 
-        # Check abortes state and raise StopIteration if aborted
         if self.aborted:
-            statustext = _("File loading aborted.")
-            post_command_event(self.main_window, self.main_window.StatusBarMsg,
-                               text=statustext)
             raise StopIteration
 
-        return self.parent_cls.next(self)
+        line = self.parent_cls.next(self)
+
+        if self._is_aborted(len(line), _("File loading aborted.")):
+            raise StopIteration
+
+        return line
+
+    def readlines(self, sizehint=0):
+        """Readlines that shows progress in statusbar
 
-    def write(self, *args, **kwargs):
-        """Write that shows progress in statusbar for each <freq> cells"""
+        Returns an empty list if aborted.
 
-        self.progress_status()
+        """
 
-        # Check abortes state and raise StopIteration if aborted
         if self.aborted:
-            statustext = _("File saving aborted.")
-            post_command_event(self.main_window, self.main_window.StatusBarMsg,
-                               text=statustext)
-            return False
+            return []
 
-        return self.parent_cls.write(self, *args, **kwargs)
+        lines = self.parent_cls.readlines(self, sizehint)
 
-    def progress_status(self):
-        """Displays progress in statusbar"""
+        if self._is_aborted(sum(imap(len, lines)),
+                            _("File loading aborted.")):
+            return []
 
-        if self.line % self.freq == 0:
-            text = self.statustext.format(nele=self.line,
-                                          totalele=self.total_lines)
+        return lines
 
-            if self.main_window.grid.actions.pasting:
-                try:
-                    post_command_event(self.main_window,
-                                       self.main_window.StatusBarMsg,
-                                       text=text)
-                except TypeError:
-                    # The main window does not exist any more
-                    pass
-            else:
-                # Write directly to the status bar because the event queue
-                # is not emptied during file access
+    def write(self, data):
+        """Write that shows progress in statusbar
 
-                self.main_window.GetStatusBar().SetStatusText(text)
+        Returns False if aborted.
 
-            # Now wait for the statusbar update to be written on screen
-            if is_gtk():
-                try:
-                    wx.Yield()
-                except:
-                    pass
+        """
+
+        if self.aborted or \
+           self._is_aborted(len(data), _("File saving aborted.")):
+            return False
 
-        self.line += 1
+        return self.parent_cls.write(self, data)
 
     def on_key(self, event):
         """Sets aborted state if escape is pressed"""
@@ -164,10 +184,8 @@ class AOpen(AOpenMixin, file):
     \tMain window object, must be set
     statustext: String, defaults to ""
     \tLeft text in statusbar to be displayed
-    total_lines: Integer, defaults to None
-    \tThe number of elements that have to be processed
-    freq: Integer, defaults to 1000
-    \tNo. operations between two abort possibilities
+    total_bytes: Integer, defaults to None
+    \tThe number of bytes that have to be processed
 
     """
 
@@ -175,6 +193,15 @@ class AOpen(AOpenMixin, file):
 
     def __init__(self, *args, **kwargs):
 
+        mode = args[1] if len(args) > 1 else kwargs.get("mode", "r")
+
+        if mode.startswith("r") and "total_bytes" not in kwargs:
+            try:
+                kwargs["total_bytes"] = os.path.getsize(args[0])
+
+            except (IndexError, OSError):
+                pass
+
         self.set_initial_state(kwargs)
 
         file.__init__(self, *args, **kwargs)
@@ -190,10 +217,8 @@ class Bz2AOpen(AOpenMixin, bz2.BZ2File):
     \tMain window object, must be set
     statustext: String, defaults to ""
     \tLeft text in statusbar to be displayed
-    total_lines: Integer, defaults to None
-    \tThe number of elements that have to be processed
-    freq: Integer, defaults to 1000
-    \tNo. operations between two abort possibilities
+    total_bytes: Integer, defaults to None
+    \tThe number of bytes that have to be processed
 
     """
 
@@ -204,3 +229,378 @@ class Bz2AOpen(AOpenMixin, bz2.BZ2File):
         self.set_initial_state(kwargs)
 
         bz2.BZ2File.__init__(self, *args, **kwargs)
+
+
+# Parallel bz2 compression
+# ------------------------
+
+# Uncompressed bytes per bz2 stream of multi-stream files
+BZ2_STREAM_SIZE = 4 * 1024 * 1024
+
+# Compressed bytes that are decompressed in one go when reading sequentially
+BZ2_READ_SIZE = 1024 * 1024
+
+# Start of a bz2 stream that contains data: Header and block magic
+BZ2_STREAM_START = re.compile(r"BZh[1-9]1AY&SY")
+
+
+def decompress_stream(data):
+    """Returns decompressed data of one complete bz2 stream
+
+    Raises ValueError if data is not exactly one complete bz2 stream.
+    The function is executed in worker processes.
+
+    Parameters
+    ----------
+    data: String
+    \tCompressed bz2 stream
+
+    """
+
+    decompressor = bz2.BZ2Decompressor()
+
+    try:
+        result = decompressor.decompress(data)
+
+    except (IOError, EOFError):
+        raise ValueError("Invalid bz2 stream")
+
+    if decompressor.unused_data:
+        raise ValueError("Data after end of bz2 stream")
+
+    try:
+        decompressor.decompress("")
+
+    except EOFError:
+        # End of stream has been reached
+        return result
+
+    raise ValueError("Incomplete bz2 stream")
+
+
+def iter_decompressed(data):
+    """Generator of decompressed blocks of single- or multi-stream bz2 data
+
+    Parameters
+    ----------
+    data: String
+    \tCompressed bz2 data
+
+    """
+
+    decompressor = bz2.BZ2Decompressor()
+
+    for pos in xrange(0, len(data), BZ2_READ_SIZE):
+        piece = data[pos:pos + BZ2_READ_SIZE]
+
+        try:
+            yield decompressor.decompress(piece)
+
+        except EOFError:
+            # Last stream ended exactly at the end of the previous piece
+            decompressor = bz2.BZ2Decompressor()
+            yield decompressor.decompress(piece)
+
+        while decompressor.unused_data:
+            # A new stream starts within piece
+            piece = decompressor.unused_data
+            decompressor = bz2.BZ2Decompressor()
+            yield decompressor.decompress(piece)
+
+
+class ParallelBz2File(object):
+    """Read and write bz2 files, compression is done in worker processes
+
+    Written data is split into blocks of BZ2_STREAM_SIZE bytes, which
+    are compressed in parallel and stored as consecutive bz2 streams.
+    Data that fits into one block results in a single-stream file.
+    If processes is 1 then one single stream is written without workers.
+
+    Reading supports single-stream and multi-stream files. Streams of
+    multi-stream files are decompressed in parallel.
+
+    Note that bz2.BZ2File of Python 2 reads only the first stream of a
+    multi-stream file.
+
+    Parameters
+    ----------
+    filename: String
+    \tPath of the bz2 file
+    mode: String, defaults to "r"
+    \t"r", "rb", "w" or "wb"
+    processes: Integer, defaults to None
+    \tNumber of worker processes, number of CPUs if None
+
+    """
+
+    def __init__(self, filename, mode="r", processes=None):
+        if mode not in ["r", "rb", "w", "wb"]:
+            raise ValueError("Mode {mode} not supported".format(mode=mode))
+
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        self.processes = max(1, processes)
+        self.writing = mode.startswith("w")
+
+        self._file = open(filename, mode[0] + "b")
+        self._pool = None
+
+        # Results of compression or decompression in file order
+        self._pending = deque()
+
+        if self.writing:
+            self._buffer = []
+            self._buffer_size = 0
+            if self.processes == 1:
+                self._compressor = bz2.BZ2Compressor()
+        else:
+            self._lines = self._iter_lines()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def _get_pool(self):
+        """Returns worker pool, which is created on first use"""
+
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.processes)
+
+        return self._pool
+
+    def _terminate_pool(self):
+        """Stops all workers"""
+
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+        self._pending.clear()
+
+    # Writing
+
+    def _submit_block(self, block):
+        """Compresses block in a worker and writes finished streams
+
+        At most two blocks per worker are queued to limit memory usage.
+
+        """
+
+        result = self._get_pool().apply_async(bz2.compress, (block,))
+        self._pending.append(result)
+
+        while len(self._pending) > 2 * self.processes:
+            self._file.write(self._pending.popleft().get())
+
+    def write(self, data):
+        """Writes data string"""
+
+        if isinstance(data, unicode):
+            data = str(data)
+
+        if self.processes == 1:
+            self._file.write(self._compressor.compress(data))
+            return
+
+        self._buffer.append(data)
+        self._buffer_size += len(data)
+
+        if self._buffer_size >= BZ2_STREAM_SIZE:
+            buffer_data = "".join(self._buffer)
+            end = len(buffer_data) - len(buffer_data) % BZ2_STREAM_SIZE
+
+            for pos in xrange(0, end, BZ2_STREAM_SIZE):
+                self._submit_block(buffer_data[pos:pos + BZ2_STREAM_SIZE])
+
+            self._buffer = [buffer_data[end:]]
+            self._buffer_size = len(buffer_data) - end
+
+    def _flush(self):
+        """Compresses remaining data and writes all pending streams"""
+
+        if self.processes == 1:
+            self._file.write(self._compressor.flush())
+            return
+
+        buffer_data = "".join(self._buffer)
+        self._buffer = []
+        self._buffer_size = 0
+
+        if self._pool is None:
+            # All data fits into one stream
+            self._file.write(bz2.compress(buffer_data))
+            return
+
+        if buffer_data:
+            self._submit_block(buffer_data)
+
+        while self._pending:
+            self._file.write(self._pending.popleft().get())
+
+    # Reading
+
+    def _iter_blocks(self):
+        """Generator of decompressed data blocks in file order"""
+
+        data = self._file.read()
+
+        offsets = [0]
+        offsets += [match.start()
+                    for match in BZ2_STREAM_START.finditer(data, 1)]
+
+        if len(offsets) == 1:
+            for block in iter_decompressed(data):
+                yield block
+            return
+
+        segments = [data[start:end]
+                    for start, end in zip(offsets, offsets[1:] + [None])]
+
+        pool = self._get_pool()
+        next_segment = 0
+
+        for i, start in enumerate(offsets):
+            # Keep the workers busy, but limit memory usage
+            while next_segment < len(segments) and \
+                    next_segment - i < 2 * self.processes:
+                self._pending.append(pool.apply_async(
+                    decompress_stream, (segments[next_segment],)))
+                next_segment += 1
+
+            try:
+                block = self._pending.popleft().get()
+
+            except ValueError:
+                # Stream header found inside compressed data.
+                # All previous segments are complete streams.
+                self._terminate_pool()
+                for block in iter_decompressed(data[start:]):
+                    yield block
+                return
+
+            yield block
+
+    def _iter_lines(self):
+        """Generator of lines including line ends"""
+
+        rest = ""
+
+        for block in self._iter_blocks():
+            lines = (rest + block).split("\n")
+            rest = lines.pop()
+
+            for line in lines:
+                yield line + "\n"
+
+        if rest:
+            yield rest
+
+    def next(self):
+        """Returns next line"""
+
+        return next(self._lines)
+
+    def read(self):
+        """Returns remaining content"""
+
+        return "".join(self._lines)
+
+    def readlines(self, sizehint=0):
+        """Returns list of lines
+
+        Parameters
+        ----------
+        sizehint: Integer, defaults to 0
+        \tLines are read until their total size reaches sizehint, all if 0
+
+        """
+
+        if sizehint <= 0:
+            return list(self._lines)
+
+        lines = []
+        size = 0
+
+        for line in self._lines:
+            lines.append(line)
+            size += len(line)
+
+            if size >= sizehint:
+                break
+
+        return lines
+
+    def seek(self, offset):
+        """Sets file position to the start of the file
+
+        Only offset 0 is supported.
+
+        """
+
+        if offset != 0:
+            raise IOError("ParallelBz2File only supports seeking to 0")
+
+        if self.writing:
+            raise IOError("Seeking is not supported when writing")
+
+        self._terminate_pool()
+        self._file.seek(0)
+        self._lines = self._iter_lines()
+
+    def close(self):
+        """Writes pending data and closes file"""
+
+        if self._file.closed:
+            return
+
+        try:
+            if self.writing:
+                self._flush()
+        finally:
+            self._terminate_pool()
+            self._file.close()
+
+    def discard(self):
+        """Stops all workers and closes file without writing pending data"""
+
+        self._terminate_pool()
+        self._file.close()
+
+
+class ParallelBz2AOpen(AOpenMixin, ParallelBz2File):
+    """Read and write bz2 files in parallel with status messages and abort
+
+    Extra Key Word Parameters (extends ParallelBz2File)
+    ---------------------------------------------------
+
+    main_window: Object
+    \tMain window object, must be set
+    statustext: String, defaults to ""
+    \tLeft text in statusbar to be displayed
+    total_bytes: Integer, defaults to None
+    \tThe number of bytes that have to be processed
+
+    """
+
+    parent_cls = ParallelBz2File
+
+    def __init__(self, *args, **kwargs):
+
+        self.set_initial_state(kwargs)
+
+        ParallelBz2File.__init__(self, *args, **kwargs)
+
+    def close(self):
+        """Closes file, pending data is not compressed if aborted"""
+
+        if self.aborted and self.writing:
+            self.discard()
+        else:
+            ParallelBz2File.close(self)
@@ -63,9 +63,14 @@ except ImportError:
     cairo = None
 
 try:
-    import odf
+    import openpyxl
 except ImportError:
-    odf = None
+    openpyxl = None
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
 
 import src.lib.i18n as i18n
 # use ugettext instead of gettext to avoid unicode errors
@@ -83,6 +88,9 @@ FILETYPE2WILDCARD = {
     # Import and export types
     "csv": _("CSV file") + " (*.*)|*.*",
     "txt": _("Tab delimited text file") + " (*.*)|*.*",
+    "npy": _("NumPy array file") + " (*.npy;*.npz)|*.npy;*.npz",
+    "sqlite": _("SQLite database") + " (*.db;*.sqlite;*.sqlite3)|"
+                                     "*.db;*.sqlite;*.sqlite3",
     "pdf": _("PDF file") + " (*.pdf)|*.pdf",
     "svg": _("SVG file") + " (*.svg)|*.svg",
     "py": _("Macro file") + " (*.py)|*.py",
@@ -91,14 +99,19 @@ FILETYPE2WILDCARD = {
 
 FILETYPE_AVAILABILITY = {
     "xls": xlrd is not None and xlwt is not None,  # Reading and writing
-    "xlsx": xlrd is not None,
+    "xlsx": xlrd is not None or openpyxl is not None,
     "pdf": cairo is not None,
     "svg": cairo is not None,
-    "ods": odf is not None
+    "sqlite": sqlite3 is not None,
+}
+
+# Filetypes that can be read with other libraries than they are written with
+FILETYPE_SAVE_AVAILABILITY = {
+    "xlsx": openpyxl is not None,
 }
 
 
-def get_filetypes2wildcards(filetypes):
+def get_filetypes2wildcards(filetypes, save=False):
     """Returns OrderedDict of filetypes to wildcards
 
     The filetypes that are provided in the filetypes parameter are checked for
@@ -108,10 +121,15 @@ def get_filetypes2wildcards(filetypes):
     ----------
     filetypes: Iterable of strings
     \tFiletype list
+    save: Bool, defaults to False
+    \tIf True, filetypes also have to be available for saving
 
     """
 
     def is_available(filetype):
+        if save and not FILETYPE_SAVE_AVAILABILITY.get(filetype, True):
+            return False
+
         return filetype not in FILETYPE_AVAILABILITY or \
                FILETYPE_AVAILABILITY[filetype]
 
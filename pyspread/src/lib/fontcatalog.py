@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+fontcatalog
+===========
+
+Persistent catalog of system fonts for font embedding in pys files
+
+Scanning all system fonts with matplotlib is slow on systems with many
+fonts. The catalog maps font names to font files and is stored as JSON
+in the user config directory. It is rebuilt if the modification time
+of a font directory has changed.
+
+Provides
+--------
+
+ * get_font_catalog_path: Returns default path of the catalog file
+ * FontCatalog: Font name to font file mapping with persistent cache
+ * font_catalog: Returns the FontCatalog that is shared in the process
+
+"""
+
+import json
+import os
+import sys
+
+import wx
+
+from matplotlib import font_manager
+
+FONT_CATALOG_FILENAME = ".pyspread_font_catalog.json"
+FONT_CATALOG_VERSION = 1
+
+
+def get_font_catalog_path():
+    """Returns path of the font catalog file in the user config directory"""
+
+    config_dir = wx.StandardPaths.Get().GetUserConfigDir()
+
+    return os.path.join(config_dir, FONT_CATALOG_FILENAME)
+
+
+def get_font_root_dirs():
+    """Returns list of platform font directories
+
+    New font sub-directories change the modification time of these.
+
+    """
+
+    home = os.path.expanduser("~")
+
+    if sys.platform == "win32":
+        font_dirs = [font_manager.win32FontDirectory()]
+
+    elif sys.platform == "darwin":
+        font_dirs = list(font_manager.OSXFontDirectories)
+
+    else:
+        font_dirs = list(font_manager.X11FontDirectories)
+
+    font_dirs += [os.path.join(home, ".fonts"),
+                  os.path.join(home, ".local", "share", "fonts")]
+
+    return font_dirs
+
+
+def get_dir_mtimes(dirs):
+    """Returns dict that maps directories to mtimes, None if not present
+
+    Parameters
+    ----------
+    dirs: Iterable of strings
+    \tDirectory paths
+
+    """
+
+    dir_mtimes = {}
+
+    for font_dir in dirs:
+        try:
+            dir_mtimes[font_dir] = os.stat(font_dir).st_mtime
+
+        except OSError:
+            dir_mtimes[font_dir] = None
+
+    return dir_mtimes
+
+
+class FontCatalog(object):
+    """Font name to font file mapping with persistent cache
+
+    Parameters
+    ----------
+    catalog_path: String, defaults to get_font_catalog_path()
+    \tPath of the JSON catalog file
+
+    """
+
+    def __init__(self, catalog_path=None):
+        if catalog_path is None:
+            catalog_path = get_font_catalog_path()
+
+        self.catalog_path = catalog_path
+
+        self.dir_mtimes = None
+        self.font_name2font_file = None
+
+    def is_valid(self):
+        """Returns True if no font directory has changed since the scan"""
+
+        if self.dir_mtimes is None:
+            return False
+
+        font_dirs = set(self.dir_mtimes).union(get_font_root_dirs())
+
+        return get_dir_mtimes(font_dirs) == self.dir_mtimes
+
+    def scan(self):
+        """Builds catalog from all system fonts and stores it"""
+
+        font_name2font_file = {}
+
+        for font_file in font_manager.findSystemFonts():
+            font_properties = font_manager.FontProperties(fname=font_file)
+            font_name2font_file[font_properties.get_name()] = font_file
+
+        font_dirs = set(map(os.path.dirname, font_name2font_file.values()))
+        font_dirs.update(get_font_root_dirs())
+
+        self.dir_mtimes = get_dir_mtimes(font_dirs)
+        self.font_name2font_file = font_name2font_file
+
+        self.save()
+
+    def load(self):
+        """Loads catalog file, returns False if not present or unreadable"""
+
+        try:
+            with open(self.catalog_path) as catalog_file:
+                catalog = json.load(catalog_file)
+
+        except (IOError, ValueError):
+            return False
+
+        if not isinstance(catalog, dict) or \
+           catalog.get("version") != FONT_CATALOG_VERSION:
+            return False
+
+        try:
+            self.dir_mtimes = dict(catalog["dir_mtimes"])
+            self.font_name2font_file = dict(catalog["fonts"])
+
+        except (KeyError, TypeError, ValueError):
+            return False
+
+        return True
+
+    def save(self):
+        """Writes catalog file, failures only cost a rescan on next use"""
+
+        catalog = {
+            "version": FONT_CATALOG_VERSION,
+            "dir_mtimes": self.dir_mtimes,
+            "fonts": self.font_name2font_file,
+        }
+
+        try:
+            with open(self.catalog_path, "w") as catalog_file:
+                json.dump(catalog, catalog_file)
+
+        except IOError:
+            pass
+
+    def get_font_files(self):
+        """Returns dict that maps font names to font files
+
+        The catalog is rescanned if a font directory has changed.
+
+        """
+
+        if not self.is_valid() and not (self.load() and self.is_valid()):
+            self.scan()
+
+        return self.font_name2font_file
+
+
+_font_catalog = None
+
+
+def font_catalog():
+    """Returns the FontCatalog that is shared in the process"""
+
+    global _font_catalog
+
+    if _font_catalog is None:
+        _font_catalog = FontCatalog()
+
+    return _font_catalog
@@ -0,0 +1,624 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+odsstream
+=========
+
+Streaming access to the content of OpenDocument spreadsheet files
+
+content.xml is read from the zip archive in chunks and parsed
+incrementally with expat. Only the rows that have been completed since
+the last chunk are held in memory. Repeated empty rows and cells
+advance the position without being expanded.
+
+content.xml is written row by row to a temporary file, which is added
+to the zip archive at the end. Gaps between filled cells and rows are
+written as repeated empty cells and rows.
+
+Provides
+--------
+
+ * OdsContentHandler: expat handler that collects rows of content.xml
+ * OdsStreamReader: Iterates over the filled rows of an ods file
+ * text2paragraphs: Returns text:p elements for a cell text
+ * OdsStreamWriter: Writes an ods file table by table and row by row
+
+"""
+
+import os
+import re
+import tempfile
+from xml.parsers import expat
+from xml.sax.saxutils import escape, quoteattr
+import zipfile
+
+# Bytes of content.xml that are parsed at once
+READ_CHUNK_SIZE = 2 ** 16
+
+# Separates namespace URI and local name in names that expat reports
+NS_SEPARATOR = " "
+
+NS_TABLE = "urn:oasis:names:tc:opendocument:xmlns:table:1.0" + NS_SEPARATOR
+NS_OFFICE = "urn:oasis:names:tc:opendocument:xmlns:office:1.0" + NS_SEPARATOR
+NS_TEXT = "urn:oasis:names:tc:opendocument:xmlns:text:1.0" + NS_SEPARATOR
+
+TABLE = NS_TABLE + "table"
+TABLE_ROW = NS_TABLE + "table-row"
+TABLE_CELL = NS_TABLE + "table-cell"
+COVERED_TABLE_CELL = NS_TABLE + "covered-table-cell"
+TABLE_NAME = NS_TABLE + "name"
+ROWS_REPEATED = NS_TABLE + "number-rows-repeated"
+COLUMNS_REPEATED = NS_TABLE + "number-columns-repeated"
+
+ANNOTATION = NS_OFFICE + "annotation"
+VALUE_TYPE = NS_OFFICE + "value-type"
+VALUE = NS_OFFICE + "value"
+BOOLEAN_VALUE = NS_OFFICE + "boolean-value"
+
+TEXT_P = NS_TEXT + "p"
+TEXT_H = NS_TEXT + "h"
+TEXT_S = NS_TEXT + "s"
+TEXT_C = NS_TEXT + "c"
+TEXT_TAB = NS_TEXT + "tab"
+TEXT_LINE_BREAK = NS_TEXT + "line-break"
+
+# Value types, for which office:value is used instead of the cell text
+NUMERIC_VALUE_TYPES = ["float", "percentage", "currency"]
+
+MIMETYPE = "application/vnd.oasis.opendocument.spreadsheet"
+
+NAMESPACE_DECLARATIONS = (
+    u'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    u'xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0" '
+    u'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    u'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+    u'xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:'
+    u'xsl-fo-compatible:1.0" '
+    u'office:version="1.2"')
+
+MANIFEST_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<manifest:manifest xmlns:manifest='
+    '"urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" '
+    'manifest:version="1.2">'
+    '<manifest:file-entry manifest:full-path="/" manifest:version="1.2" '
+    'manifest:media-type="' + MIMETYPE + '"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" '
+    'manifest:media-type="text/xml"/>'
+    '<manifest:file-entry manifest:full-path="styles.xml" '
+    'manifest:media-type="text/xml"/>'
+    '</manifest:manifest>')
+
+# Codes that are written as float cells
+FLOAT_CODE_RE = re.compile(r"^-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$")
+
+# Spaces that are collapsed in XML text unless written as text:s
+SPACES_RE = re.compile(u"^ +| +$| {2,}")
+
+# Characters that are not allowed in XML 1.0
+INVALID_XML_CHARS_RE = re.compile(u"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Properties elements of cell style property families
+STYLE_PROPERTIES_ELEMENTS = [
+    ("table-cell", u"style:table-cell-properties"),
+    ("paragraph", u"style:paragraph-properties"),
+    ("text", u"style:text-properties"),
+]
+
+
+class OdsContentHandler(object):
+    """expat handler that collects the filled rows of content.xml
+
+    The expat callbacks are used directly instead of xml.sax because
+    the SAX layer multiplies the parsing time of large files.
+    Completed rows are appended to rows as tuples
+    (tab, row, [(col, code), ...]) and have to be removed by the caller.
+
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.table_names = []
+
+        self._tab = -1
+        self._row = 0
+        self._row_repeat = 1
+        self._col = 0
+        self._cells = None
+
+        # State of the current cell
+        self._in_cell = False
+        self._col_repeat = 1
+        self._value = None
+        self._paragraphs = None
+        self._text = None
+        self._annotation_depth = 0
+
+    def _get_repeat(self, attrs, qname):
+        """Returns repeat attribute value, 1 if missing or invalid"""
+
+        if qname not in attrs:
+            return 1
+
+        try:
+            return max(1, int(attrs[qname]))
+
+        except ValueError:
+            return 1
+
+    def start_element(self, name, attrs):
+        """Expat StartElementHandler"""
+
+        if name == TABLE:
+            self._tab += 1
+            self._row = 0
+            self.table_names.append(attrs.get(TABLE_NAME, u""))
+
+        elif name == TABLE_ROW:
+            self._row_repeat = self._get_repeat(attrs, ROWS_REPEATED)
+            self._col = 0
+            self._cells = []
+
+        elif name == TABLE_CELL or name == COVERED_TABLE_CELL:
+            self._in_cell = True
+            self._col_repeat = self._get_repeat(attrs, COLUMNS_REPEATED)
+            self._paragraphs = []
+
+            value_type = attrs.get(VALUE_TYPE)
+            if value_type in NUMERIC_VALUE_TYPES:
+                self._value = attrs.get(VALUE)
+            elif value_type == "boolean":
+                boolean_value = attrs.get(BOOLEAN_VALUE, u"false")
+                self._value = unicode(boolean_value.lower() == u"true")
+            else:
+                self._value = None
+
+        elif not self._in_cell:
+            return
+
+        elif name == ANNOTATION:
+            self._annotation_depth += 1
+
+        elif self._annotation_depth or self._value is not None:
+            # The text of annotations and of typed values is not needed
+            return
+
+        elif name == TEXT_P or name == TEXT_H:
+            self._text = []
+
+        elif self._text is None:
+            return
+
+        elif name == TEXT_S:
+            self._text.append(u" " * self._get_repeat(attrs, TEXT_C))
+
+        elif name == TEXT_TAB:
+            self._text.append(u"\t")
+
+        elif name == TEXT_LINE_BREAK:
+            self._text.append(u"\n")
+
+    def end_element(self, name):
+        """Expat EndElementHandler"""
+
+        if name == TABLE_ROW:
+            if self._cells:
+                for row in xrange(self._row, self._row + self._row_repeat):
+                    self.rows.append((self._tab, row, self._cells))
+
+            self._row += self._row_repeat
+            self._cells = None
+
+        elif name == TABLE_CELL or name == COVERED_TABLE_CELL:
+            if self._value is None:
+                code = u"\n".join(self._paragraphs)
+            else:
+                code = self._value
+
+            if code and self._cells is not None:
+                for col in xrange(self._col, self._col + self._col_repeat):
+                    self._cells.append((col, code))
+
+            self._col += self._col_repeat
+            self._in_cell = False
+            self._paragraphs = None
+
+        elif name == ANNOTATION and self._annotation_depth:
+            self._annotation_depth -= 1
+
+        elif (name == TEXT_P or name == TEXT_H) and \
+                self._text is not None and not self._annotation_depth:
+            self._paragraphs.append(u"".join(self._text))
+            self._text = None
+
+    def characters(self, content):
+        """Expat CharacterDataHandler"""
+
+        if self._text is not None and not self._annotation_depth:
+            self._text.append(content)
+
+
+class OdsStreamReader(object):
+    """Iterates over the filled rows of an ods file
+
+    Each row is a tuple (tab, row, [(col, code), ...]). Cells without
+    content are left out. After the iteration, table_names holds the
+    names of all tables including empty ones.
+
+    Parameters
+    ----------
+    ods_file: File or String
+    \tOpenDocument spreadsheet file object or file path
+    chunk_size: Integer, defaults to READ_CHUNK_SIZE
+    \tBytes of content.xml that are parsed at once
+
+    """
+
+    def __init__(self, ods_file, chunk_size=READ_CHUNK_SIZE):
+        self.ods_file = ods_file
+        self.chunk_size = chunk_size
+
+        self.table_names = []
+
+    def __iter__(self):
+        handler = OdsContentHandler()
+        self.table_names = handler.table_names
+
+        parser = expat.ParserCreate(namespace_separator=NS_SEPARATOR)
+        parser.buffer_text = True
+        parser.StartElementHandler = handler.start_element
+        parser.EndElementHandler = handler.end_element
+        parser.CharacterDataHandler = handler.characters
+
+        archive = zipfile.ZipFile(self.ods_file)
+
+        try:
+            content = archive.open("content.xml")
+
+            for chunk in iter(lambda: content.read(self.chunk_size), ""):
+                parser.Parse(chunk, False)
+
+                for row in handler.rows:
+                    yield row
+                del handler.rows[:]
+
+            parser.Parse("", True)
+
+            for row in handler.rows:
+                yield row
+            del handler.rows[:]
+
+        finally:
+            archive.close()
+
+
+def text2paragraphs(text):
+    """Returns text:p elements for a cell text
+
+    Each line becomes a paragraph. Spaces that XML would collapse and
+    tabs are written as text:s and text:tab elements.
+
+    Parameters
+    ----------
+    text: Unicode
+    \tCell text
+
+    """
+
+    def spaces2xml(match):
+        """Returns text:s element for a run of spaces"""
+
+        spaces = len(match.group(0))
+        if spaces == 1:
+            return u"<text:s/>"
+        return u'<text:s text:c="{0}"/>'.format(spaces)
+
+    text = INVALID_XML_CHARS_RE.sub(u"", text)
+
+    paragraphs = []
+    for line in text.split(u"\n"):
+        line = SPACES_RE.sub(spaces2xml, escape(line))
+        paragraphs.append(u"<text:p>{0}</text:p>".format(
+            line.replace(u"\t", u"<text:tab/>")))
+
+    return u"".join(paragraphs)
+
+
+class OdsStreamWriter(object):
+    """Writes an ods file table by table and row by row
+
+    Column and row styles are automatic styles of content.xml. Therefore,
+    they have to be requested before the first table is started. Cell
+    styles are common styles in styles.xml and may be requested at any
+    time. Rows have to be written in ascending order.
+
+    Parameters
+    ----------
+    ods_file: File or String
+    \tTarget file object, opened in binary mode, or file path
+
+    """
+
+    def __init__(self, ods_file):
+        self.ods_file = ods_file
+
+        # Style names by style properties
+        self.column_styles = {}
+        self.row_styles = {}
+        self.cell_styles = {}
+
+        fd, self._content_path = tempfile.mkstemp(suffix=".xml")
+        self._content = os.fdopen(fd, "wb")
+
+        self._started = False
+        self._row = 0
+
+    def _write(self, text):
+        """Writes unicode text to content.xml"""
+
+        self._content.write(text.encode("utf-8"))
+
+    def _get_repeat_attr(self, name, repeat):
+        """Returns repeat attribute string, empty if repeat is 1"""
+
+        if repeat == 1:
+            return u""
+
+        return u' table:{0}="{1}"'.format(name, repeat)
+
+    def get_column_style(self, width):
+        """Returns style name for a column width string such as 1.2in"""
+
+        try:
+            return self.column_styles[width]
+
+        except KeyError:
+            name = u"co{0}".format(len(self.column_styles) + 1)
+            self.column_styles[width] = name
+            return name
+
+    def get_row_style(self, height):
+        """Returns style name for a row height string such as 0.3in"""
+
+        try:
+            return self.row_styles[height]
+
+        except KeyError:
+            name = u"ro{0}".format(len(self.row_styles) + 1)
+            self.row_styles[height] = name
+            return name
+
+    def get_cell_style(self, properties):
+        """Returns style name for cell style properties
+
+        Parameters
+        ----------
+        properties: Tuple of 3-tuples
+        \tProperties (family, attribute, value), where family is one of
+        \t"table-cell", "paragraph" and "text"
+
+        """
+
+        try:
+            return self.cell_styles[properties]
+
+        except KeyError:
+            name = u"ce{0}".format(len(self.cell_styles) + 1)
+            self.cell_styles[properties] = name
+            return name
+
+    def _get_automatic_styles(self):
+        """Returns office:automatic-styles element with column, row styles"""
+
+        styles = [u"<office:automatic-styles>"]
+
+        for width, name in sorted(self.column_styles.iteritems()):
+            styles.append(
+                u'<style:style style:name="{0}" '
+                u'style:family="table-column">'
+                u'<style:table-column-properties style:column-width="{1}"/>'
+                u'</style:style>'.format(name, width))
+
+        for height, name in sorted(self.row_styles.iteritems()):
+            styles.append(
+                u'<style:style style:name="{0}" style:family="table-row">'
+                u'<style:table-row-properties style:row-height="{1}" '
+                u'style:use-optimal-row-height="false"/>'
+                u'</style:style>'.format(name, height))
+
+        styles.append(u"</office:automatic-styles>")
+
+        return u"".join(styles)
+
+    def _get_styles_xml(self):
+        """Returns styles.xml content with the cell styles"""
+
+        styles = [u'<?xml version="1.0" encoding="UTF-8"?>\n'
+                  u"<office:document-styles {0}><office:styles>".format(
+                      NAMESPACE_DECLARATIONS)]
+
+        for properties, name in sorted(self.cell_styles.iteritems(),
+                                       key=lambda item: item[1]):
+            styles.append(u'<style:style style:name="{0}" '
+                          u'style:family="table-cell">'.format(name))
+
+            for family, element in STYLE_PROPERTIES_ELEMENTS:
+                attrs = u"".join(u" {0}={1}".format(attr, quoteattr(value))
+                                 for __family, attr, value in properties
+                                 if __family == family)
+                if attrs:
+                    styles.append(u"<{0}{1}/>".format(element, attrs))
+
+            styles.append(u"</style:style>")
+
+        styles.append(u"</office:styles></office:document-styles>")
+
+        return u"".join(styles).encode("utf-8")
+
+    def start_table(self, name, columns=None):
+        """Starts a new table
+
+        Parameters
+        ----------
+        name: Unicode
+        \tTable name
+        columns: List of 2-tuples, defaults to None
+        \tSorted (column, style name) tuples of styled columns
+
+        """
+
+        if not self._started:
+            self._write(u'<?xml version="1.0" encoding="UTF-8"?>\n'
+                        u"<office:document-content {0}>".format(
+                            NAMESPACE_DECLARATIONS))
+            self._write(self._get_automatic_styles())
+            self._write(u"<office:body><office:spreadsheet>")
+            self._started = True
+
+        table = [u"<table:table table:name={0}>".format(quoteattr(name))]
+
+        last_col = 0
+        for col, style_name in columns or []:
+            if col > last_col:
+                table.append(u"<table:table-column{0}/>".format(
+                    self._get_repeat_attr("number-columns-repeated",
+                                          col - last_col)))
+            table.append(u'<table:table-column table:style-name="{0}"/>'
+                         .format(style_name))
+            last_col = col + 1
+
+        if not columns:
+            table.append(u"<table:table-column/>")
+
+        self._write(u"".join(table))
+        self._row = 0
+
+    def write_row(self, row, cells, style_name=None):
+        """Writes a row, preceded by empty rows if row leaves a gap
+
+        Parameters
+        ----------
+        row: Integer
+        \tRow index, larger than the index of the previously written row
+        cells: List of 3-tuples
+        \tSorted (column, code, style name or None) tuples of the cells
+        style_name: Unicode, defaults to None
+        \tRow style name
+
+        """
+
+        parts = []
+
+        if row > self._row:
+            parts.append(u"<table:table-row{0}><table:table-cell/>"
+                         u"</table:table-row>".format(
+                             self._get_repeat_attr("number-rows-repeated",
+                                                   row - self._row)))
+
+        if style_name is None:
+            parts.append(u"<table:table-row>")
+        else:
+            parts.append(u'<table:table-row table:style-name="{0}">'
+                         .format(style_name))
+
+        last_col = 0
+        for col, code, cell_style_name in cells:
+            if col > last_col:
+                parts.append(u"<table:table-cell{0}/>".format(
+                    self._get_repeat_attr("number-columns-repeated",
+                                          col - last_col)))
+
+            if isinstance(code, str):
+                code = code.decode("utf-8")
+
+            if cell_style_name is None:
+                parts.append(u"<table:table-cell")
+            else:
+                parts.append(u'<table:table-cell table:style-name="{0}"'
+                             .format(cell_style_name))
+
+            if FLOAT_CODE_RE.match(code):
+                parts.append(u' office:value-type="float" '
+                             u'office:value="{0}"><text:p>{0}</text:p>'
+                             .format(code))
+            else:
+                parts.append(u' office:value-type="string">')
+                parts.append(text2paragraphs(code))
+
+            parts.append(u"</table:table-cell>")
+            last_col = col + 1
+
+        if not cells:
+            parts.append(u"<table:table-cell/>")
+
+        parts.append(u"</table:table-row>")
+
+        self._write(u"".join(parts))
+        self._row = row + 1
+
+    def end_table(self):
+        """Ends the current table"""
+
+        if self._row == 0:
+            # A table needs at least one row
+            self._write(u"<table:table-row><table:table-cell/>"
+                        u"</table:table-row>")
+
+        self._write(u"</table:table>")
+
+    def save(self):
+        """Writes the ods archive to ods_file"""
+
+        if not self._started:
+            self.start_table(u"Table1")
+            self.end_table()
+
+        self._write(u"</office:spreadsheet></office:body>"
+                    u"</office:document-content>")
+        self._content.close()
+
+        archive = zipfile.ZipFile(self.ods_file, "w", zipfile.ZIP_DEFLATED)
+
+        try:
+            # The mimetype has to be the first and an uncompressed entry
+            mimetype_info = zipfile.ZipInfo("mimetype")
+            mimetype_info.external_attr = 0644 << 16
+            archive.writestr(mimetype_info, MIMETYPE)
+            archive.writestr("META-INF/manifest.xml", MANIFEST_XML)
+            archive.writestr("styles.xml", self._get_styles_xml())
+            archive.write(self._content_path, "content.xml")
+
+        finally:
+            archive.close()
+
+    def close(self):
+        """Removes the temporary content.xml file"""
+
+        if not self._content.closed:
+            self._content.close()
+
+        try:
+            os.remove(self._content_path)
+
+        except OSError:
+            pass
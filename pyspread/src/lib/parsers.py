@@ -32,6 +32,8 @@ Provides
  * color2code
  * code2color
  * parse_dict_strings
+ * fast_literal_eval
+ * parse_selection
  * is_svg
 
 """
@@ -43,11 +45,33 @@ except ImportError:
     rsvg = None
 
 import ast
+import re
 
 import wx
 
+from src.lib.selection import Selection
 from src.sysvars import get_default_font
 
+# Literals as written by repr in pys attribute lines
+# Leading zeros are excluded because they denote octal literals
+_INT = r"-?(?:0|[1-9]\d*)"
+_PAIR = r"\(" + _INT + ", " + _INT + r"\)"
+
+_INT_RE = re.compile(_INT + r"\Z")
+_FLOAT_RE = re.compile(r"-?(?:(?:\d+\.\d*|\.\d+)(?:e[-+]?\d+)?|"
+                       r"\d+e[-+]?\d+)\Z")
+_INT_FINDALL = re.compile(_INT).findall
+_INT_LIST_RE = re.compile(r"\[(?:" + _INT + "(?:, " + _INT + r")*)?\]\Z")
+_INT_TUPLE_RE = re.compile(r"\((?:" + _INT + "(?:, " + _INT + ")+|" + _INT +
+                           r",)?\)\Z")
+_PAIR_LIST_RE = re.compile(r"\[(?:" + _PAIR + "(?:, " + _PAIR + r")*)?\]\Z")
+
+# Printable ASCII strings without escape sequences
+_SINGLE_QUOTED_RE = re.compile(r"(u?)'([\x20-\x26\x28-\x5b\x5d-\x7e]*)'\Z")
+_DOUBLE_QUOTED_RE = re.compile(r'(u?)"([\x20\x21\x23-\x5b\x5d-\x7e]*)"\Z')
+
+_CONSTANTS = {"True": True, "False": False, "None": None}
+
 
 def get_font_from_data(fontdata):
     """Returns wx.Font from fontdata string"""
@@ -156,6 +180,71 @@ def parse_dict_strings(code):
     yield code[chunk_start:i + 1].strip()
 
 
+def fast_literal_eval(code):
+    """Returns the literal in code string like ast.literal_eval
+
+    Literals that repr creates for pys attribute lines are parsed with
+    regular expressions: ints, floats, bools, None, ASCII strings without
+    escape sequences, lists and tuples of ints and lists of int pairs.
+    All other code is passed to ast.literal_eval so that malformed code
+    raises the same exceptions.
+
+    Parameters
+    ----------
+    code: String
+    \tString that contains a Python literal
+
+    """
+
+    first_char = code[:1]
+
+    if first_char == "[":
+        if _PAIR_LIST_RE.match(code):
+            ints = iter(map(int, _INT_FINDALL(code)))
+            return zip(ints, ints)
+
+        elif _INT_LIST_RE.match(code):
+            return map(int, _INT_FINDALL(code))
+
+    elif first_char == "(":
+        if _INT_TUPLE_RE.match(code):
+            return tuple(map(int, _INT_FINDALL(code)))
+
+    elif first_char in "'\"u":
+        match = _SINGLE_QUOTED_RE.match(code) or \
+            _DOUBLE_QUOTED_RE.match(code)
+        if match is not None:
+            prefix, string = match.groups()
+            return unicode(string) if prefix else str(string)
+
+    elif code in _CONSTANTS:
+        return _CONSTANTS[code]
+
+    elif _INT_RE.match(code):
+        return int(code)
+
+    elif _FLOAT_RE.match(code):
+        return float(code)
+
+    return ast.literal_eval(code)
+
+
+def parse_selection(selection_strings):
+    """Returns Selection from the repr strings of its five parameters
+
+    Parameters
+    ----------
+    selection_strings: Iterable of 5 strings
+    \tblock_tl, block_br, rows, cols and cells as written in pys files
+
+    """
+
+    block_tl, block_br, rows, cols, cells = map(fast_literal_eval,
+                                                selection_strings)
+
+    return Selection(block_tl, block_br, rows, cols, cells)
+
+
 def common_start(strings):
     """Returns start sub-string that is common for all given strings
 
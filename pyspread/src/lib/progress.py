@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+progress
+========
+
+Rate-limited progress display for long running operations
+
+A daemon thread increments a tick counter every PROGRESS_INTERVAL
+seconds. Loops only compare the counter to the value at the last
+display, so that progress bookkeeping costs an attribute lookup per
+iteration. When a tick has passed, the progress is shown in the
+statusbar and pending events, e.g. <Esc> for aborting, are processed.
+
+Provides
+--------
+
+ * format_size: Returns human readable size string
+ * ProgressClock: Daemon thread that counts ticks
+ * progress_clock: Returns the ProgressClock of the process
+ * ProgressReporter: Rate-limited progress display
+
+"""
+
+import threading
+import time
+
+import wx
+
+import src.lib.i18n as i18n
+from src.gui._events import post_command_event
+from src.sysvars import is_gtk
+
+# Use ugettext instead of getttext to avoid unicode errors
+_ = i18n.language.ugettext
+
+# Seconds between two progress displays
+PROGRESS_INTERVAL = 0.2
+
+
+def format_size(nbytes):
+    """Returns human readable string of a size in bytes
+
+    Parameters
+    ----------
+    nbytes: Integer
+    \tSize in bytes
+
+    """
+
+    size = float(nbytes)
+
+    for unit in ["B", "kB", "MB"]:
+        if size < 1024.0:
+            return u"{size:.1f} {unit}".format(size=size, unit=unit)
+        size /= 1024.0
+
+    return u"{size:.1f} GB".format(size=size)
+
+
+class ProgressClock(threading.Thread):
+    """Daemon thread that increments ticks every interval seconds
+
+    Parameters
+    ----------
+    interval: Float, defaults to PROGRESS_INTERVAL
+    \tSeconds between two ticks
+
+    """
+
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        threading.Thread.__init__(self, name="ProgressClock")
+
+        self.daemon = True
+        self.interval = interval
+        self.ticks = 0
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self.ticks += 1
+
+
+_progress_clock = None
+
+
+def progress_clock():
+    """Returns the ProgressClock of the process, starts it on first call"""
+
+    global _progress_clock
+
+    if _progress_clock is None:
+        _progress_clock = ProgressClock()
+        _progress_clock.start()
+
+    return _progress_clock
+
+
+class ProgressReporter(object):
+    """Rate-limited progress display
+
+    The loop adds processed bytes or elements to done and calls report
+    if is_due returns True.
+
+    Parameters
+    ----------
+    main_window: Object
+    \tMain window object
+    statustext: String
+    \tStatus text with the fields {done} and {total}
+    total: Integer, defaults to None
+    \tNumber of bytes or elements that have to be processed
+    unit: String, defaults to "elements"
+    \t"bytes" for sizes or "elements" for counts
+
+    """
+
+    def __init__(self, main_window, statustext, total=None, unit="elements"):
+        self.main_window = main_window
+        self.statustext = statustext
+        self.total = total
+        self.unit = unit
+
+        self.done = 0
+
+        self.clock = progress_clock()
+        self.tick = self.clock.ticks
+
+    def is_due(self):
+        """Returns True if progress display is due"""
+
+        return self.clock.ticks != self.tick
+
+    def _format(self, value):
+        """Returns display string for a number of bytes or elements"""
+
+        if value is None or self.unit != "bytes":
+            return value
+
+        return format_size(value)
+
+    def report(self, show_msg=True):
+        """Displays progress and processes pending events
+
+        Parameters
+        ----------
+        show_msg: Bool, defaults to True
+        \tStatusbar text is only updated if True
+
+        """
+
+        self.tick = self.clock.ticks
+
+        if show_msg:
+            text = self.statustext.format(done=self._format(self.done),
+                                          total=self._format(self.total))
+            try:
+                if self.main_window.grid.actions.pasting:
+                    post_command_event(self.main_window,
+                                       self.main_window.StatusBarMsg,
+                                       text=text)
+                else:
+                    # Write directly to the status bar because the event
+                    # queue is not emptied during file access
+                    self.main_window.GetStatusBar().SetStatusText(text)
+
+            except (TypeError, AttributeError):
+                # The main window does not exist any more
+                pass
+
+        # Now wait for the statusbar update to be written on screen
+        if is_gtk():
+            try:
+                wx.Yield()
+            except:
+                pass
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+resultstrings
+=============
+
+String representations of cell results for copying results
+
+Results are converted to unicode strings. Large numpy arrays are
+summarized by numpy instead of being converted to nested lists, which
+bounds the size of their representation.
+
+Many cells that are not in the result cache are evaluated in chunks in
+forked worker processes, which inherit the code array, as in the
+parallel csv export.
+
+Provides
+--------
+
+ * RESULT_MAX_ITEMS: Arrays with more items are summarized
+ * get_result_string: Returns unicode string of a cell result
+ * set_worker_code_array: Worker initializer that stores the code array
+ * get_chunk_result_strings: Worker that returns strings of cell results
+ * is_parallelizable: Checks if cells may be evaluated in workers
+ * iter_result_strings: Generator of chunks of keys and result strings
+
+"""
+
+from itertools import izip
+import os
+
+import numpy
+
+from src.config import config
+from src.lib.__csv import ASSIGNMENT_RE, iter_parallel_results
+
+# Arrays with more items are summarized
+RESULT_MAX_ITEMS = 10000
+
+# Number of cells that are evaluated in one chunk
+RESULT_CHUNK_CELLS = 1000
+
+# Number of uncached cells from which on cells are evaluated in workers
+PARALLEL_MIN_CELLS = 10000
+
+
+def get_result_string(result, max_items=RESULT_MAX_ITEMS):
+    """Returns unicode string of a cell result
+
+    Parameters
+    ----------
+    result: Object
+    \tCell result
+    max_items: Integer, defaults to RESULT_MAX_ITEMS
+    \tArrays with more items are summarized
+
+    """
+
+    if isinstance(result, numpy.ndarray) and result.size > max_items:
+        return unicode(numpy.array2string(result, threshold=max_items))
+
+    try:
+        # Numpy object arrays are converted because of numpy repr bug
+        result = result.tolist()
+
+    except AttributeError:
+        pass
+
+    return unicode(result)
+
+
+_worker_code_array = None
+
+
+def set_worker_code_array(code_array):
+    """Stores code array in a worker process
+
+    Initializer of result workers. The code array is inherited from
+    the parent process when the workers are forked.
+
+    """
+
+    global _worker_code_array
+    _worker_code_array = code_array
+
+
+def get_chunk_result_strings(keys):
+    """Returns list of result strings of the cells keys
+
+    Worker function of the parallel result evaluation
+
+    Parameters
+    ----------
+    keys: List of 3-tuples of Integer
+    \tKeys of the cells that are evaluated
+
+    """
+
+    return [get_result_string(_worker_code_array[key]) for key in keys]
+
+
+def _is_uncached(code_array, key):
+    """Returns True if the result of cell key has to be evaluated"""
+
+    return repr(key) not in code_array.result_cache and \
+        code_array(key) is not None and \
+        not code_array.cell_attributes[key]["frozen"]
+
+
+def is_parallelizable(code_array, keys, min_cells=PARALLEL_MIN_CELLS):
+    """Returns True if the cells keys may be evaluated in worker processes
+
+    Global variable assignments have to be evaluated in the grid process.
+
+    Parameters
+    ----------
+    code_array: CodeArray
+    \tCode array of the cells
+    keys: List of 3-tuples of Integer
+    \tKeys of the uncached cells
+    min_cells: Integer, defaults to PARALLEL_MIN_CELLS
+    \tMinimum number of cells for parallel evaluation
+
+    """
+
+    if not hasattr(os, "fork") or code_array.safe_mode or \
+       len(keys) < min_cells:
+        return False
+
+    return not any(ASSIGNMENT_RE.match(code_array(key)) for key in keys)
+
+
+def iter_result_strings(code_array, keys, processes=None,
+                        chunk_cells=RESULT_CHUNK_CELLS,
+                        min_cells=PARALLEL_MIN_CELLS):
+    """Generator of (keys, result strings) of chunks of cells
+
+    Cached, empty and frozen cells are converted first. The remaining
+    cells are evaluated in chunks of chunk_cells cells, in worker
+    processes if possible. Closing the generator stops the workers.
+
+    Parameters
+    ----------
+    code_array: CodeArray
+    \tCode array of the cells
+    keys: List of 3-tuples of Integer
+    \tKeys of the cells
+    processes: Integer, defaults to None
+    \tNumber of worker processes, config["worker_processes"] if None
+    chunk_cells: Integer, defaults to RESULT_CHUNK_CELLS
+    \tNumber of cells per chunk
+    min_cells: Integer, defaults to PARALLEL_MIN_CELLS
+    \tMinimum number of uncached cells for parallel evaluation
+
+    """
+
+    if processes is None:
+        processes = config["worker_processes"]
+
+    cached_keys = []
+    uncached_keys = []
+
+    for key in keys:
+        if _is_uncached(code_array, key):
+            uncached_keys.append(key)
+        else:
+            cached_keys.append(key)
+
+    if cached_keys:
+        yield cached_keys, [get_result_string(code_array[key])
+                            for key in cached_keys]
+
+    chunks = [uncached_keys[i:i + chunk_cells]
+              for i in xrange(0, len(uncached_keys), chunk_cells)]
+
+    if processes > 1 and is_parallelizable(code_array, uncached_keys,
+                                           min_cells):
+        chunk_strings = iter_parallel_results(
+            get_chunk_result_strings, chunks, processes,
+            initializer=set_worker_code_array, initargs=(code_array,))
+
+    else:
+        chunk_strings = ([get_result_string(code_array[key]) for key in chunk]
+                         for chunk in chunks)
+
+    try:
+        for chunk, strings in izip(chunks, chunk_strings):
+            yield chunk, strings
+
+    finally:
+        # Terminates the workers if the generator is closed early
+        chunk_strings.close()
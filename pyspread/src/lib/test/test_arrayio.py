@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_arrayio
+============
+
+Unit tests for arrayio.py
+
+"""
+
+import os
+import sys
+
+import numpy
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+import src.lib.arrayio as arrayio
+from src.lib.arrayio import NpyFile, load_array, load_block_array
+from src.lib.arrayio import get_area_array, save_array
+from src.lib.testlib import params, pytest_generate_tests
+from src.model.model import CodeArray
+
+NPY_PATH = TESTPATH + "arrayio_test.npy"
+NPZ_PATH = TESTPATH + "arrayio_test.npz"
+
+
+class TestArrayFiles(object):
+    """Unit tests for reading npy and npz files"""
+
+    def setup_method(self, method):
+        """Writes test npy and npz files"""
+
+        self.array = numpy.arange(20.0).reshape(4, 5)
+
+        numpy.save(NPY_PATH, self.array)
+        numpy.savez(NPZ_PATH, a=self.array, b=numpy.array([u"x", u"y"]))
+
+        self.mmap_min_bytes = arrayio.MMAP_MIN_BYTES
+
+    def teardown_method(self, method):
+        """Removes test npy and npz files"""
+
+        arrayio.MMAP_MIN_BYTES = self.mmap_min_bytes
+
+        for filepath in NPY_PATH, NPZ_PATH:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+    param_load_array = [
+        {'filepath': NPY_PATH, 'name': None, 'mmap_min_bytes': 2 ** 30,
+         'is_memmap': False},
+        {'filepath': NPY_PATH, 'name': None, 'mmap_min_bytes': 0,
+         'is_memmap': True},
+        {'filepath': NPZ_PATH, 'name': "a", 'mmap_min_bytes': 2 ** 30,
+         'is_memmap': False},
+        {'filepath': NPZ_PATH, 'name': "a", 'mmap_min_bytes': 0,
+         'is_memmap': True},
+    ]
+
+    @params(param_load_array)
+    def test_load_array(self, filepath, name, mmap_min_bytes, is_memmap):
+        """Unit test for load_array"""
+
+        arrayio.MMAP_MIN_BYTES = mmap_min_bytes
+
+        array = load_array(filepath, name)
+
+        assert isinstance(array, numpy.memmap) == is_memmap
+        assert array.shape == (4, 5)
+        assert (array == self.array).all()
+
+    param_load_block_array = [
+        {'source': (NPY_PATH, None), 'shape': (4, 5), 'first': 0.0},
+        {'source': (NPY_PATH, None, (1, 3), (2, 4)), 'shape': (2, 2),
+         'first': 7.0},
+        {'source': (NPZ_PATH, "b", (1, 2), (0, 1)), 'shape': (1,),
+         'first': u"y"},
+    ]
+
+    @params(param_load_block_array)
+    def test_load_block_array(self, source, shape, first):
+        """Unit test for load_block_array"""
+
+        array = load_block_array(source)
+
+        assert array.shape == shape
+        assert array.flat[0] == first
+
+    def test_npy_file(self):
+        """Unit test for NpyFile"""
+
+        npy_file = NpyFile(NPY_PATH)
+
+        assert npy_file.get_names() == [None]
+        assert npy_file.arrays[0][0] == (NPY_PATH, None)
+
+        npz_file = NpyFile(NPZ_PATH)
+
+        assert sorted(npz_file.get_names()) == ["a", "b"]
+        arrays = dict(npz_file.arrays)
+        assert list(arrays[(NPZ_PATH, "b")]) == [u"x", u"y"]
+
+
+param_get_area_array = [
+    {'code': {}, 'area': (1, 5, 2, 7), 'is_block': True},
+    {'code': {}, 'area': (1, 4, 2, 7), 'is_block': False},
+    {'code': {(0, 0, 0): "1"}, 'area': (1, 5, 2, 7), 'is_block': True},
+    {'code': {(2, 3, 0): "-1"}, 'area': (1, 5, 2, 7), 'is_block': False},
+]
+
+
+@params(param_get_area_array)
+def test_get_area_array(code, area, is_block):
+    """Unit test for get_area_array"""
+
+    code_array = CodeArray((100, 10, 3))
+
+    array = numpy.arange(20).reshape(4, 5)
+    code_array.array_blocks.append((1, 2, 0, array, (NPY_PATH, None)))
+
+    for key in code:
+        code_array[key] = code[key]
+
+    top, bottom, left, right = area
+    res = get_area_array(code_array, top, bottom, left, right, 0)
+
+    assert (res is array) == is_block
+    assert res.shape == (bottom - top, right - left)
+    assert res.dtype.kind == "i"
+
+    for row in xrange(top, bottom):
+        for col in xrange(left, right):
+            assert res[row - top, col - left] == code_array[row, col, 0]
+
+
+def test_get_area_array_object():
+    """Unit test for get_area_array with non-numeric results"""
+
+    code_array = CodeArray((100, 10, 3))
+    code_array[0, 0, 0] = "'a'"
+    code_array[1, 1, 0] = "2"
+
+    res = get_area_array(code_array, 0, 2, 0, 2, 0)
+
+    assert res.dtype == "O"
+    assert res.tolist() == [["a", None], [None, 2]]
+
+
+def test_save_array():
+    """Unit test for save_array"""
+
+    array = numpy.arange(6).reshape(2, 3)
+
+    # No extension is appended
+    filepath = NPY_PATH[:-4]
+
+    try:
+        save_array(filepath, array)
+        assert (numpy.load(filepath) == array).all()
+
+    finally:
+        os.remove(filepath)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_autosave
+=============
+
+Unit tests for autosave.py
+
+"""
+
+import os
+import shutil
+import sys
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.lib.autosave import Autosave, get_orphaned_autosaves
+from src.interfaces.pys import BinaryPys
+from src.model.model import DataArray, CodeArray
+
+AUTOSAVE_DIR = TESTPATH + "autosave_test"
+
+
+class TestAutosave(object):
+    """Unit tests for Autosave"""
+
+    def setup_method(self, method):
+        """Creates DataArray with content"""
+
+        self.data_array = DataArray((100, 10, 3))
+        self.data_array[0, 0, 0] = "'Test'"
+        self.data_array[99, 9, 2] = "2 + 2"
+
+    def teardown_method(self, method):
+        """Removes autosave directory"""
+
+        shutil.rmtree(AUTOSAVE_DIR, ignore_errors=True)
+
+    def test_save(self):
+        """Unit test for save"""
+
+        autosave = Autosave(autosave_dir=AUTOSAVE_DIR)
+
+        autosave.save(self.data_array.snapshot(), "/tmp/test.pys")
+        autosave.join()
+
+        assert not autosave.is_running()
+        assert autosave.error is None
+        assert autosave.exists()
+        assert autosave.get_info()["filepath"] == "/tmp/test.pys"
+
+        code_array = CodeArray((1, 1, 1))
+        with open(autosave.pys_path, "rb") as infile:
+            BinaryPys(code_array, infile).to_code_array()
+        code_array.dict_grid.load_tables()
+
+        assert code_array.shape == (100, 10, 3)
+        assert code_array((0, 0, 0)) == "'Test'"
+        assert code_array((99, 9, 2)) == "2 + 2"
+
+        autosave.remove()
+
+        assert not autosave.exists()
+
+    def test_get_orphaned_autosaves(self):
+        """Unit test for get_orphaned_autosaves"""
+
+        # Autosave of this process is not orphaned
+        own_autosave = Autosave(autosave_dir=AUTOSAVE_DIR)
+        own_autosave.save(self.data_array, None)
+        own_autosave.join()
+
+        assert get_orphaned_autosaves(AUTOSAVE_DIR) == []
+
+        # Process ids are far below 2 ** 30 on POSIX systems
+        crashed_autosave = Autosave(2 ** 30, autosave_dir=AUTOSAVE_DIR)
+        crashed_autosave.save(self.data_array, None)
+        crashed_autosave.join()
+
+        orphans = get_orphaned_autosaves(AUTOSAVE_DIR)
+
+        if os.name == "posix":
+            assert [orphan.pid for orphan in orphans] == [2 ** 30]
+            assert orphans[0].get_info()["filepath"] is None
+        else:
+            assert orphans == []
+
+    def test_get_orphaned_autosaves_no_dir(self):
+        """Unit test for get_orphaned_autosaves without autosave dir"""
+
+        assert get_orphaned_autosaves(AUTOSAVE_DIR) == []
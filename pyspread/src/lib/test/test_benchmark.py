@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_benchmark
+==============
+
+Unit tests for benchmark.py
+
+"""
+
+import os
+import sys
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.lib.benchmark import time_benchmark, compare_results
+from src.lib.benchmark import save_results, load_results
+from src.lib.testlib import params, pytest_generate_tests
+
+
+def _results(min_time):
+    """Returns result dict with one benchmark"""
+
+    return {"meta": {}, "results": {"dense_numeric": {"pys_save": {
+        "min": min_time, "mean": min_time, "timings": [min_time]}}}}
+
+
+def test_time_benchmark():
+    """Unit test for time_benchmark"""
+
+    calls = []
+
+    def setup():
+        calls.append("setup")
+        return lambda: calls.append("run")
+
+    timings = time_benchmark(setup, repeat=3)
+
+    assert len(timings) == 3
+    assert all(timing >= 0 for timing in timings)
+    assert calls == ["setup", "run"] * 3
+
+
+param_compare_results = [
+    {'old': 1.0, 'new': 1.0, 'tolerance': 0.1, 'res': []},
+    {'old': 1.0, 'new': 1.05, 'tolerance': 0.1, 'res': []},
+    {'old': 1.0, 'new': 0.5, 'tolerance': 0.1, 'res': []},
+    {'old': 1.0, 'new': 2.0, 'tolerance': 0.1,
+     'res': [("dense_numeric", "pys_save", 1.0, 2.0)]},
+    {'old': 1.0, 'new': 2.0, 'tolerance': 1.5, 'res': []},
+]
+
+
+@params(param_compare_results)
+def test_compare_results(old, new, tolerance, res):
+    """Unit test for compare_results"""
+
+    assert compare_results(_results(old), _results(new), tolerance) == res
+
+
+def test_save_load_results():
+    """Unit test for save_results and load_results"""
+
+    filepath = TESTPATH + "benchmark_test.json"
+
+    save_results(_results(1.5), filepath)
+    results = load_results(filepath)
+    os.remove(filepath)
+
+    assert results == _results(1.5)
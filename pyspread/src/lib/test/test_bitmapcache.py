@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_bitmapcache
+================
+
+Unit tests for bitmapcache.py
+
+"""
+
+import os
+import sys
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.lib.bitmapcache import BitmapCache, get_bitmap_nbytes
+from src.lib.testlib import params, pytest_generate_tests
+
+
+def test_get_bitmap_nbytes():
+    """Unit test for get_bitmap_nbytes"""
+
+    bmp = wx.EmptyBitmap(10, 20, 32)
+
+    assert get_bitmap_nbytes(bmp) == 10 * 20 * 4
+
+
+class TestBitmapCache(object):
+    """Unit tests for BitmapCache"""
+
+    def setup_method(self, method):
+        """Creates cache that takes string lengths as sizes"""
+
+        self.cache = BitmapCache(10, get_nbytes=len)
+
+    def test_lru(self):
+        """Least recently used entries are evicted first"""
+
+        self.cache["a"] = "aaaa"
+        self.cache["b"] = "bbbb"
+
+        # Marks a as recently used
+        assert self.cache["a"] == "aaaa"
+
+        self.cache["c"] = "cccc"
+
+        assert "a" in self.cache
+        assert "b" not in self.cache
+        assert "c" in self.cache
+        assert self.cache.nbytes == 8
+
+    def test_replace(self):
+        """Replacing an entry updates the accounted size"""
+
+        self.cache["a"] = "aaaa"
+        self.cache["a"] = "aa"
+
+        assert len(self.cache) == 1
+        assert self.cache.nbytes == 2
+
+    param_oversized = [
+        {'value': "a" * 10, 'res': 1},
+        {'value': "a" * 11, 'res': 0},
+    ]
+
+    @params(param_oversized)
+    def test_oversized(self, value, res):
+        """Entries that are larger than the budget are not cached"""
+
+        self.cache["a"] = value
+
+        assert len(self.cache) == res
+
+    def test_set_max_bytes(self):
+        """Lowering the budget evicts entries"""
+
+        for key in "abcde":
+            self.cache[key] = key * 2
+
+        self.cache.set_max_bytes(4)
+
+        assert len(self.cache) == 2
+        assert "e" in self.cache
+
+    def test_stats(self):
+        """Unit test for get_stats and clear"""
+
+        for key in "abcdef":
+            self.cache[key] = key * 2
+
+        self.cache["f"]
+
+        self.cache.clear()
+
+        assert self.cache.get_stats() == {
+            "entries": 0,
+            "nbytes": 0,
+            "max_bytes": 10,
+            "hits": 1,
+            "misses": 6,
+            "evictions": 1,
+        }
@@ -28,6 +28,7 @@ Unit tests for __csv.py
 
 """
 
+import csv
 import os
 import sys
 import types
@@ -43,7 +44,8 @@ sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
 from src.gui._main_window import MainWindow
 from src.lib.testlib import params, pytest_generate_tests
 import src.lib.__csv as __csv
-from src.lib.__csv import Digest, CsvInterface, TxtGenerator, sniff
+from src.lib.__csv import Digest, CsvExportData, CsvInterface, TxtGenerator
+from src.lib.__csv import sniff
 
 param_sniff = [
     {'filepath': TESTPATH + 'test1.csv', 'header': True, 'delimiter': ',',
@@ -103,6 +105,94 @@ def digested_line(line, digest_types, res):
     assert __csv.digested_line(line, digest_types) == res
 
 
+param_get_column_converter = [
+    {'digest_type': types.FloatType, 'values': ["1.5", "", None, "2"],
+     'res': ["1.5", "", None, "2.0"]},
+    {'digest_type': types.FloatType, 'values': ["1.5", "x"],
+     'res': ["1.5", ""]},
+    {'digest_type': types.IntType, 'values': ["1", "2.5", None],
+     'res': ["1", "", None]},
+    {'digest_type': types.UnicodeType, 'values': ["a", None],
+     'res': ["u'a'", None]},
+    {'digest_type': types.CodeType, 'values': ["[1, 2]", "1+"],
+     'res': [[1, 2], None]},
+]
+
+
+@params(param_get_column_converter)
+def test_get_column_converter(digest_type, values, res):
+    """Unit test for get_column_converter"""
+
+    converter = __csv.get_column_converter(digest_type)
+
+    assert converter(values) == res
+
+
+param_get_record_end = [
+    {'block': 'a\nb', 'quotechar': None, 'res': 2},
+    {'block': 'a,b', 'quotechar': None, 'res': None},
+    {'block': 'a,"b\nc"\nd,"e\n', 'quotechar': '"', 'res': 8},
+    {'block': '"a\nb', 'quotechar': '"', 'res': None},
+    {'block': 'a,"b""\n"\n', 'quotechar': '"', 'res': 9},
+]
+
+
+@params(param_get_record_end)
+def test_get_record_end(block, quotechar, res):
+    """Unit test for get_record_end"""
+
+    assert __csv.get_record_end(block, quotechar) == res
+
+
+param_chunk_range_gen = [
+    {'quotechar': None, 'chunk_bytes': 10},
+    {'quotechar': None, 'chunk_bytes': 1},
+    {'quotechar': '"', 'chunk_bytes': 10},
+    {'quotechar': '"', 'chunk_bytes': 1},
+]
+
+
+@params(param_chunk_range_gen)
+def test_chunk_range_gen(quotechar, chunk_bytes):
+    """Unit test for chunk_range_gen"""
+
+    filepath = TESTPATH + 'test1.csv'
+    ranges = list(__csv.chunk_range_gen(filepath, 5, chunk_bytes, quotechar))
+
+    assert ranges[0][0] == 5
+    assert ranges[-1][1] == os.path.getsize(filepath)
+
+    with open(filepath, "rb") as infile:
+        data = infile.read()
+
+    for (start, end), (next_start, __) in zip(ranges, ranges[1:]):
+        assert end == next_start
+        assert data[end - 1] == "\n"
+
+
+param_get_numeric_block = [
+    {'text': "1 2\n3 4\n", 'res': [["1", "2"], ["3", "4"]]},
+    {'text': " -1.5e3\t+2\r\n.5  7", 'res': [["-1.5e3", "+2"], [".5", "7"]]},
+    {'text': "1 2\n3\n", 'res': None},
+    {'text': "1 2\n\n", 'res': None},
+    {'text': "1 a\n", 'res': None},
+    {'text': "1,2\n", 'res': None},
+    {'text': "", 'res': None},
+]
+
+
+@params(param_get_numeric_block)
+def test_get_numeric_block(text, res):
+    """Unit test for get_numeric_block"""
+
+    block = __csv.get_numeric_block(text)
+
+    if res is None:
+        assert block is None
+    else:
+        assert block.tolist() == res
+
+
 def test_cell_key_val_gen():
     """Unit test for cell_key_val_gen"""
 
@@ -167,6 +257,37 @@ class TestCsvInterface(object):
         for ele, rele in zip(data, res):
             assert repr(ele) == rele
 
+    def test_iter_chunks(self):
+        """Unit test for iter_chunks"""
+
+        digest_types = [types.UnicodeType, types.IntType, types.FloatType]
+        interface = CsvInterface(self.main_window, TESTPATH + 'test1.csv',
+                                 self.dialect, digest_types, True)
+
+        chunks = list(interface.iter_chunks(chunk_rows=3))
+
+        assert chunks[0] == [["u'Text'", "u'Number'", "u'Float'", "u'Date'"]]
+        assert all(len(chunk) <= 3 for chunk in chunks[1:])
+        assert list(chunks[1][0]) == ["u'Test1'", "234", "3.34",
+                                      "u'2012/12/04'"]
+
+    def test_iter_chunks_parallel(self):
+        """Unit test for iter_chunks with worker processes"""
+
+        digest_types = [types.UnicodeType, types.IntType, types.FloatType]
+        interface = CsvInterface(self.main_window, TESTPATH + 'test1.csv',
+                                 self.dialect, digest_types, True)
+
+        serial_lines = [line for chunk in interface.iter_chunks(processes=1)
+                        for line in chunk]
+
+        chunks = list(interface.iter_chunks(chunk_rows=50, processes=2,
+                                            chunk_bytes=1000))
+        parallel_lines = [line for chunk in chunks for line in chunk]
+
+        assert all(len(chunk) <= 50 for chunk in chunks)
+        assert parallel_lines == serial_lines
+
     def test_write(self):
         """Unit test for write"""
 
@@ -183,6 +304,58 @@ class TestCsvInterface(object):
         os.remove(filepath)
 
 
+class TestCsvExportData(object):
+    """Unit tests for CsvExportData"""
+
+    def setup_method(self, method):
+        self.main_window = MainWindow(None, -1)
+        self.code_array = self.main_window.grid.code_array
+
+        self.code_array[1, 1, 0] = u"u'\xe4'"
+        self.code_array[3, 0, 0] = u"1.5"
+        self.code_array[3, 2, 0] = u"'a,b'"
+        self.code_array[2, 5, 0] = u"9"
+        self.code_array[1, 1, 1] = u"0"
+
+        self.export_data = CsvExportData(self.code_array, 0, 5, 0, 3, 0)
+        self.export_data.parallel_min_cells = 0
+
+    def test_iter(self):
+        """Unit test for __iter__"""
+
+        res = [list(line) for line in self.export_data]
+
+        assert res == [[None, None, None], [None, u"\xe4", None],
+                       [None, None, None], [1.5, None, "a,b"],
+                       [None, None, None]]
+
+    param_iter_csv_blocks = [
+        {'processes': 1},
+        {'processes': 2},
+    ]
+
+    @params(param_iter_csv_blocks)
+    def test_iter_csv_blocks(self, processes):
+        """Unit test for iter_csv_blocks"""
+
+        blocks = self.export_data.iter_csv_blocks(csv.excel,
+                                                  processes=processes)
+
+        assert "".join(blocks) == \
+            ',,\r\n,\xc3\xa4,\r\n,,\r\n1.5,,"a,b"\r\n,,\r\n'
+
+    def test_is_parallelizable(self):
+        """Unit test for _is_parallelizable"""
+
+        assert self.export_data._is_parallelizable()
+
+        self.code_array[0, 0, 0] = u"x = 1"
+        export_data = CsvExportData(self.code_array, 0, 5, 0, 3, 0)
+        export_data.parallel_min_cells = 0
+
+        assert not export_data._is_parallelizable()
+
+
 class TestTxtGenerator(object):
     """Unit tests for TxtGenerator"""
 
@@ -199,3 +372,40 @@ class TestTxtGenerator(object):
 
         res = [[ele for ele in line] for line in self.txtgen]
         assert res == [["Hallo", "Welt"], ["Test", "2"]]
+
+    def test_iter_chunks(self):
+        """Unit test for iter_chunks"""
+
+        chunks = list(self.txtgen.iter_chunks(chunk_rows=1))
+        assert chunks == [[["Hallo", "Welt"]], [["Test", "2"]]]
+
+    def test_iter_chunks_numeric(self):
+        """Unit test for iter_chunks with numeric chunks"""
+
+        filepath = TESTPATH + 'dummy.txt'
+
+        with open(filepath, "w") as txtfile:
+            txtfile.write("1 2\n3 4\n5 a\n")
+
+        txtgen = TxtGenerator(self.main_window, filepath)
+        chunks = list(txtgen.iter_chunks(chunk_rows=2))
+
+        os.remove(filepath)
+
+        assert chunks[0].tolist() == [["1", "2"], ["3", "4"]]
+        assert chunks[1] == [["5", "a"]]
+
+    def test_iter_chunks_parallel(self):
+        """Unit test for iter_chunks with worker processes"""
+
+        txtgen = TxtGenerator(self.main_window, TESTPATH + 'test1.csv')
+        serial_lines = [line for chunk in txtgen.iter_chunks(processes=1)
+                        for line in chunk]
+
+        txtgen = TxtGenerator(self.main_window, TESTPATH + 'test1.csv')
+        parallel_lines = [line for chunk in
+                          txtgen.iter_chunks(processes=2, chunk_bytes=1000)
+                          for line in chunk]
+
+        assert len(serial_lines) == 923
+        assert parallel_lines == serial_lines
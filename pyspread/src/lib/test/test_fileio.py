@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_fileio
+===========
+
+Unit tests for fileio.py
+
+"""
+
+import bz2
+import os
+import sys
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+import src.lib.fileio as fileio
+from src.lib.fileio import ParallelBz2File, decompress_stream
+from src.lib.testlib import params, pytest_generate_tests
+
+FILEPATH = TESTPATH + "fileio_test.bz2"
+
+LINES = ["{row}\t0\t0\t'Cell {row}'\n".format(row=row) for row in xrange(5000)]
+
+
+BZ2_STREAM_SIZE = fileio.BZ2_STREAM_SIZE
+BZ2_READ_SIZE = fileio.BZ2_READ_SIZE
+
+
+def setup_function(function):
+    """Uses small streams so that multi-stream files are tested"""
+
+    fileio.BZ2_STREAM_SIZE = 10000
+    fileio.BZ2_READ_SIZE = 1000
+
+
+def teardown_function(function):
+    """Restores stream sizes and removes test file"""
+
+    fileio.BZ2_STREAM_SIZE = BZ2_STREAM_SIZE
+    fileio.BZ2_READ_SIZE = BZ2_READ_SIZE
+
+    if os.path.exists(FILEPATH):
+        os.remove(FILEPATH)
+
+
+param_parallel_bz2_file = [
+    {'processes': 1, 'streams': 1},
+    {'processes': 2, 'streams': 11},
+    {'processes': 4, 'streams': 11},
+]
+
+
+@params(param_parallel_bz2_file)
+def test_parallel_bz2_file(processes, streams):
+    """Unit test for writing and reading ParallelBz2File"""
+
+    with ParallelBz2File(FILEPATH, "wb", processes=processes) as outfile:
+        for line in LINES:
+            outfile.write(line)
+
+    with open(FILEPATH, "rb") as infile:
+        data = infile.read()
+
+    assert len(fileio.BZ2_STREAM_START.findall(data)) == streams
+
+    with ParallelBz2File(FILEPATH, processes=processes) as infile:
+        assert list(infile) == LINES
+        infile.seek(0)
+        assert infile.read() == "".join(LINES)
+
+
+param_parallel_bz2_file_readlines = [
+    {'sizehint': 0},
+    {'sizehint': 1},
+    {'sizehint': 1000},
+    {'sizehint': 100000},
+]
+
+
+@params(param_parallel_bz2_file_readlines)
+def test_parallel_bz2_file_readlines(sizehint):
+    """Unit test for ParallelBz2File.readlines"""
+
+    with ParallelBz2File(FILEPATH, "wb", processes=2) as outfile:
+        outfile.write("".join(LINES))
+
+    lines = []
+
+    with ParallelBz2File(FILEPATH, processes=2) as infile:
+        for chunk in iter(lambda: infile.readlines(sizehint), []):
+            if sizehint:
+                assert sum(map(len, chunk[:-1])) < sizehint
+            lines.extend(chunk)
+
+    assert lines == LINES
+
+
+def test_parallel_bz2_file_single_stream():
+    """Small files are single-stream files that BZ2File reads completely"""
+
+    with ParallelBz2File(FILEPATH, "wb", processes=4) as outfile:
+        outfile.write("Test\n")
+
+    assert bz2.BZ2File(FILEPATH).read() == "Test\n"
+
+
+def test_parallel_bz2_file_false_stream_start():
+    """Stream headers inside compressed data fall back to sequential reading"""
+
+    with ParallelBz2File(FILEPATH, "wb", processes=2) as outfile:
+        for line in LINES:
+            outfile.write(line)
+
+    stream_start = fileio.BZ2_STREAM_START
+    fileio.BZ2_STREAM_START = fileio.re.compile(r"1AY&SY")
+
+    try:
+        with ParallelBz2File(FILEPATH, processes=2) as infile:
+            assert infile.read() == "".join(LINES)
+    finally:
+        fileio.BZ2_STREAM_START = stream_start
+
+
+param_decompress_stream = [
+    {'data': bz2.compress("Test"), 'res': "Test"},
+    {'data': bz2.compress("Test")[:-4], 'res': None},
+    {'data': bz2.compress("Test") * 2, 'res': None},
+    {'data': "Nonsense", 'res': None},
+]
+
+
+@params(param_decompress_stream)
+def test_decompress_stream(data, res):
+    """Unit test for decompress_stream"""
+
+    try:
+        assert decompress_stream(data) == res
+
+    except ValueError:
+        assert res is None
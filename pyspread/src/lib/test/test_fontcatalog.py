@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_fontcatalog
+================
+
+Unit tests for fontcatalog.py
+
+"""
+
+import os
+import sys
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.lib.fontcatalog import FontCatalog, get_dir_mtimes
+
+CATALOG_PATH = TESTPATH + "font_catalog_test.json"
+
+
+def test_get_dir_mtimes():
+    """Unit test for get_dir_mtimes"""
+
+    missing_dir = TESTPATH + "missing_font_dir"
+    dir_mtimes = get_dir_mtimes([TESTPATH, missing_dir])
+
+    assert dir_mtimes[TESTPATH] == os.stat(TESTPATH).st_mtime
+    assert dir_mtimes[missing_dir] is None
+
+
+class TestFontCatalog(object):
+    """Unit tests for FontCatalog"""
+
+    def setup_method(self, method):
+        """Creates FontCatalog with test catalog file"""
+
+        self.font_catalog = FontCatalog(CATALOG_PATH)
+
+    def teardown_method(self, method):
+        """Removes test catalog file"""
+
+        if os.path.exists(CATALOG_PATH):
+            os.remove(CATALOG_PATH)
+
+    def test_get_font_files(self):
+        """Unit test for get_font_files"""
+
+        font_files = self.font_catalog.get_font_files()
+
+        assert self.font_catalog.is_valid()
+        assert os.path.exists(CATALOG_PATH)
+
+        for font_file in font_files.values():
+            assert os.path.isfile(font_file)
+
+        # A new catalog uses the catalog file
+        font_catalog = FontCatalog(CATALOG_PATH)
+        assert font_catalog.load()
+        assert font_catalog.is_valid()
+        assert font_catalog.get_font_files() == font_files
+
+    def test_is_valid(self):
+        """Unit test for is_valid"""
+
+        assert not self.font_catalog.is_valid()
+
+        self.font_catalog.scan()
+        assert self.font_catalog.is_valid()
+
+        # A changed font directory invalidates the catalog
+        self.font_catalog.dir_mtimes[TESTPATH] = 0.0
+        assert not self.font_catalog.is_valid()
+
+    def test_load_error(self):
+        """Unit test for load with corrupt catalog file"""
+
+        with open(CATALOG_PATH, "w") as catalog_file:
+            catalog_file.write("{nonsense")
+
+        assert not self.font_catalog.load()
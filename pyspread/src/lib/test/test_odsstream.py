@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_odsstream
+==============
+
+Unit tests for odsstream.py
+
+"""
+
+import os
+import sys
+import zipfile
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.lib.odsstream import OdsStreamReader, OdsStreamWriter
+from src.lib.odsstream import text2paragraphs
+from src.lib.testlib import params, pytest_generate_tests
+
+ODS_PATH = TESTPATH + "odsstream_test.ods"
+
+CONTENT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content
+ xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+ xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+ xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">
+<office:body><office:spreadsheet>
+<table:table table:name="Sheet1">
+ <table:table-row>
+  <table:table-cell office:value-type="float" office:value="1.5">
+   <text:p>1,50</text:p>
+  </table:table-cell>
+  <table:table-cell table:number-columns-repeated="1000"/>
+  <table:table-cell office:value-type="string">
+   <text:p>a<text:s text:c="2"/>b</text:p><text:p>c</text:p>
+  </table:table-cell>
+ </table:table-row>
+ <table:table-row table:number-rows-repeated="1000000">
+  <table:table-cell table:number-columns-repeated="1024"/>
+ </table:table-row>
+ <table:table-row table:number-rows-repeated="2">
+  <table:table-cell office:value-type="boolean" office:boolean-value="true"
+   table:number-columns-repeated="2" table:number-columns-spanned="2">
+   <office:annotation><text:p>Comment</text:p></office:annotation>
+   <text:p>TRUE</text:p>
+  </table:table-cell>
+  <table:covered-table-cell/>
+  <table:table-cell office:value-type="string"><text:p>x</text:p>
+  </table:table-cell>
+ </table:table-row>
+</table:table>
+<table:table table:name="Sheet2"/>
+</office:spreadsheet></office:body>
+</office:document-content>
+"""
+
+
+class TestOdsStreamReader(object):
+    """Unit tests for OdsStreamReader"""
+
+    def setup_method(self, method):
+        """Writes test ods file"""
+
+        with zipfile.ZipFile(ODS_PATH, "w") as ods_file:
+            ods_file.writestr("mimetype",
+                              "application/vnd.oasis.opendocument.spreadsheet")
+            ods_file.writestr("content.xml", CONTENT_XML)
+
+    def teardown_method(self, method):
+        """Removes test ods file"""
+
+        if os.path.exists(ODS_PATH):
+            os.remove(ODS_PATH)
+
+    def test_iter(self):
+        """Unit test for __iter__"""
+
+        # Small chunks make sure that rows are parsed incrementally
+        reader = OdsStreamReader(ODS_PATH, chunk_size=7)
+
+        rows = list(reader)
+
+        assert rows == [
+            (0, 0, [(0, u"1.5"), (1001, u"a  b\nc")]),
+            (0, 1000001, [(0, u"True"), (1, u"True"), (3, u"x")]),
+            (0, 1000002, [(0, u"True"), (1, u"True"), (3, u"x")]),
+        ]
+        assert reader.table_names == [u"Sheet1", u"Sheet2"]
+
+    def test_iter_file(self):
+        """Unit test for __iter__ with file object"""
+
+        with open(ODS_PATH, "rb") as infile:
+            rows = list(OdsStreamReader(infile))
+
+        assert len(rows) == 3
+
+
+param_text2paragraphs = [
+    {'text': u"", 'res': u"<text:p></text:p>"},
+    {'text': u"a b", 'res': u"<text:p>a b</text:p>"},
+    {'text': u"a\nb", 'res': u"<text:p>a</text:p><text:p>b</text:p>"},
+    {'text': u" a  b ",
+     'res': u'<text:p><text:s/>a<text:s text:c="2"/>b<text:s/></text:p>'},
+    {'text': u"a\tb", 'res': u"<text:p>a<text:tab/>b</text:p>"},
+    {'text': u"<&>\x00", 'res': u"<text:p>&lt;&amp;&gt;</text:p>"},
+]
+
+
+@params(param_text2paragraphs)
+def test_text2paragraphs(text, res):
+    """Unit test for text2paragraphs"""
+
+    assert text2paragraphs(text) == res
+
+
+class TestOdsStreamWriter(object):
+    """Unit tests for OdsStreamWriter"""
+
+    def setup_method(self, method):
+        """Creates OdsStreamWriter for test ods file"""
+
+        self.writer = OdsStreamWriter(ODS_PATH)
+
+    def teardown_method(self, method):
+        """Removes test ods file"""
+
+        self.writer.close()
+
+        if os.path.exists(ODS_PATH):
+            os.remove(ODS_PATH)
+
+    def test_save(self):
+        """Unit test for save"""
+
+        writer = self.writer
+
+        column_style = writer.get_column_style("2.0000in")
+        row_style = writer.get_row_style("0.5000in")
+        cell_style = writer.get_cell_style(
+            (("table-cell", "fo:background-color", "#00ff00"),))
+
+        assert writer.get_column_style("2.0000in") == column_style
+        assert writer.get_cell_style(
+            (("table-cell", "fo:background-color", "#00ff00"),)) == cell_style
+
+        writer.start_table(u"0", [(3, column_style)])
+        writer.write_row(0, [(0, u"1.5", None), (5000, u"'a  b'", None)])
+        writer.write_row(100000, [(2, u"x\ny", cell_style)], row_style)
+        writer.write_row(100001, [], row_style)
+        writer.end_table()
+        writer.start_table(u"1")
+        writer.end_table()
+        writer.save()
+
+        with zipfile.ZipFile(ODS_PATH) as ods_file:
+            assert ods_file.namelist()[0] == "mimetype"
+            assert ods_file.read("mimetype") == \
+                "application/vnd.oasis.opendocument.spreadsheet"
+
+            content = ods_file.read("content.xml")
+            styles = ods_file.read("styles.xml")
+
+        assert 'table:number-rows-repeated="99999"' in content
+        assert 'table:number-columns-repeated="4999"' in content
+        assert 'style:column-width="2.0000in"' in content
+        assert 'style:row-height="0.5000in"' in content
+        assert 'office:value-type="float" office:value="1.5"' in content
+        assert 'fo:background-color="#00ff00"' in styles
+
+        reader = OdsStreamReader(ODS_PATH)
+
+        assert list(reader) == [
+            (0, 0, [(0, u"1.5"), (5000, u"'a  b'")]),
+            (0, 100000, [(2, u"x\ny")]),
+        ]
+        assert reader.table_names == [u"0", u"1"]
@@ -28,6 +28,7 @@ Unit tests for parsers.py
 
 """
 
+import ast
 import os
 import sys
 
@@ -44,6 +45,8 @@ from src.lib.testlib import params, pytest_generate_tests
 from src.lib.parsers import get_font_from_data, get_pen_from_data, common_start
 from src.lib.parsers import color_pack2rgb, color_rgb2pack, is_svg
 from src.lib.parsers import unquote_string, parse_dict_strings
+from src.lib.parsers import fast_literal_eval, parse_selection
+from src.lib.selection import Selection
 
 param_font = [
     {"fontdata": "Courier New 13", "face": "Courier New", "size": 13},
@@ -147,6 +150,73 @@ def test_param_parse_dict_strings(code, res):
     assert list(parse_dict_strings(code)) == res
 
 
+param_fast_literal_eval = [
+    {"code": "[]"},
+    {"code": "[(3, 4), (-1, 10)]"},
+    {"code": "[1, 2, -3]"},
+    {"code": "(2, 2, 3, 4)"},
+    {"code": "(1,)"},
+    {"code": "()"},
+    {"code": "'bgcolor'"},
+    {"code": "u'Sans Serif'"},
+    {"code": "\"it's\""},
+    {"code": "'\\n'"},
+    {"code": "u'\\xe4'"},
+    {"code": "True"},
+    {"code": "None"},
+    {"code": "42"},
+    {"code": "-7"},
+    {"code": "010"},
+    {"code": "12L"},
+    {"code": "1.5"},
+    {"code": "1e-05"},
+    {"code": "[(1, 2),(3, 4)]"},
+    {"code": "(1, 'a')"},
+]
+
+
+@params(param_fast_literal_eval)
+def test_fast_literal_eval(code):
+    """Unit test for fast_literal_eval"""
+
+    res = fast_literal_eval(code)
+    expected = ast.literal_eval(code)
+
+    assert res == expected
+    assert type(res) is type(expected)
+
+
+param_fast_literal_eval_error = [
+    {"code": ""},
+    {"code": "[1, 2"},
+    {"code": "(1, 2"},
+    {"code": "'abc"},
+    {"code": "Test"},
+    {"code": "abs(1)"},
+]
+
+
+@params(param_fast_literal_eval_error)
+def test_fast_literal_eval_error(code):
+    """Unit test for fast_literal_eval with malformed code"""
+
+    try:
+        fast_literal_eval(code)
+        assert False
+
+    except (ValueError, SyntaxError):
+        pass
+
+
+def test_parse_selection():
+    """Unit test for parse_selection"""
+
+    selection_strings = ["[(1, 2)]", "[(3, 4)]", "[5]", "[]", "[(7, 8)]"]
+    selection = parse_selection(selection_strings)
+
+    assert selection == Selection([(1, 2)], [(3, 4)], [5], [], [(7, 8)])
+
+
 param_common_start = [
     {"strings": [], "res": ""},
     {"strings": ["", ""], "res": ""},
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_progress
+=============
+
+Unit tests for progress.py
+
+"""
+
+import os
+import sys
+import time
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.lib.progress import format_size, progress_clock, ProgressReporter
+from src.lib.progress import PROGRESS_INTERVAL
+from src.lib.testlib import params, pytest_generate_tests
+
+param_format_size = [
+    {'nbytes': 0, 'res': u"0.0 B"},
+    {'nbytes': 1023, 'res': u"1023.0 B"},
+    {'nbytes': 1536, 'res': u"1.5 kB"},
+    {'nbytes': 3 * 1024 ** 2, 'res': u"3.0 MB"},
+    {'nbytes': 5 * 1024 ** 3, 'res': u"5.0 GB"},
+]
+
+
+@params(param_format_size)
+def test_format_size(nbytes, res):
+    """Unit test for format_size"""
+
+    assert format_size(nbytes) == res
+
+
+def test_progress_clock():
+    """Unit test for progress_clock"""
+
+    clock = progress_clock()
+
+    assert clock is progress_clock()
+    assert clock.daemon
+
+    ticks = clock.ticks
+    time.sleep(3 * PROGRESS_INTERVAL)
+
+    assert clock.ticks > ticks
+
+
+def test_progress_reporter_is_due():
+    """Unit test for ProgressReporter.is_due"""
+
+    progress = ProgressReporter(None, u"{done}")
+
+    progress.tick = progress.clock.ticks
+    assert not progress.is_due()
+
+    time.sleep(3 * PROGRESS_INTERVAL)
+
+    assert progress.is_due()
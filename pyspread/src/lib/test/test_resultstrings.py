@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+test_resultstrings
+==================
+
+Unit tests for resultstrings.py
+
+"""
+
+import os
+import sys
+
+import numpy
+
+import wx
+app = wx.App()
+
+TESTPATH = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-1]) + os.sep
+sys.path.insert(0, TESTPATH)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 3)
+sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
+
+from src.lib.resultstrings import get_result_string, is_parallelizable
+from src.lib.resultstrings import iter_result_strings
+from src.lib.testlib import params, pytest_generate_tests
+from src.model.model import CodeArray
+
+param_get_result_string = [
+    {'result': None, 'max_items': 10, 'res': u"None"},
+    {'result': 1, 'max_items': 10, 'res': u"1"},
+    {'result': u"\xe4", 'max_items': 10, 'res': u"\xe4"},
+    {'result': numpy.arange(3), 'max_items': 10, 'res': u"[0, 1, 2]"},
+    {'result': numpy.array([1, "a"], dtype="O"), 'max_items': 10,
+     'res': u"[1, 'a']"},
+]
+
+
+@params(param_get_result_string)
+def test_get_result_string(result, max_items, res):
+    """Unit test for get_result_string"""
+
+    assert get_result_string(result, max_items) == res
+
+
+def test_get_result_string_summary():
+    """Unit test for get_result_string with large array"""
+
+    res = get_result_string(numpy.arange(100000), max_items=10)
+
+    assert u"..." in res
+    assert len(res) < 100
+
+
+param_is_parallelizable = [
+    {'codes': ["1", "2"], 'safe_mode': False, 'min_cells': 2, 'res': True},
+    {'codes': ["1", "2"], 'safe_mode': False, 'min_cells': 3, 'res': False},
+    {'codes': ["1", "2"], 'safe_mode': True, 'min_cells': 2, 'res': False},
+    {'codes': ["1", "a = 2"], 'safe_mode': False, 'min_cells': 2,
+     'res': False},
+    {'codes': ["1", "a == 2"], 'safe_mode': False, 'min_cells': 2,
+     'res': True},
+]
+
+
+@params(param_is_parallelizable)
+def test_is_parallelizable(codes, safe_mode, min_cells, res):
+    """Unit test for is_parallelizable"""
+
+    code_array = CodeArray((100, 10, 3))
+    code_array.safe_mode = safe_mode
+
+    keys = [(row, 0, 0) for row in xrange(len(codes))]
+    for key, code in zip(keys, codes):
+        code_array[key] = code
+
+    assert is_parallelizable(code_array, keys, min_cells) == res
+
+
+param_iter_result_strings = [
+    {'processes': None},
+    {'processes': 1},
+    {'processes': 2},
+]
+
+
+@params(param_iter_result_strings)
+def test_iter_result_strings(processes):
+    """Unit test for iter_result_strings"""
+
+    code_array = CodeArray((100, 10, 3))
+
+    keys = [(row, col, 0) for row in xrange(20) for col in xrange(2)]
+    for row, col, tab in keys:
+        code_array[row, col, tab] = "{} * 10 + {}".format(row, col)
+
+    # Cached result
+    assert code_array[5, 1, 0] == 51
+
+    # Empty cell
+    keys.append((30, 0, 0))
+
+    chunks = list(iter_result_strings(code_array, keys, processes,
+                                      chunk_cells=7, min_cells=0))
+
+    assert chunks[0] == ([(5, 1, 0), (30, 0, 0)], [u"51", u"None"])
+    assert max(len(chunk_keys) for chunk_keys, __ in chunks) == 7
+
+    result_strings = {}
+    for chunk_keys, strings in chunks:
+        result_strings.update(zip(chunk_keys, strings))
+
+    assert len(result_strings) == len(keys)
+    assert result_strings[12, 1, 0] == u"121"
@@ -72,6 +72,7 @@ def basic_setup_test(grid, func, test_key, test_val, *args, **kwargs):
 
     func(*args, **kwargs)
     grid.code_array.result_cache.clear()
+    grid.code_array.result_versions.clear()
     assert grid.code_array(test_key) == test_val
 
 
@@ -40,10 +40,13 @@ import bz2
 from copy import copy
 import cStringIO
 import datetime
-from itertools import imap, ifilter, product
+from functools import partial
+from itertools import count, imap, ifilter, product
+from operator import itemgetter
 import re
 import sys
 from types import SliceType, IntType
+import weakref
 
 import numpy
 
@@ -70,24 +73,79 @@ class KeyValueStore(dict):
     The following methods mave been made undoable:
     * __setitem__
     * pop
+    * set_items
+
+    If changed_keys is a set then the keys of all changes, including
+    undo and redo, are added to it.
+
+    Each change, including undo and redo, gives the changed keys a new
+    version from version_counter, which is shared by the model classes.
+    Versions only increase, so that an unchanged version means an
+    unchanged value. Changes of more than max_versioned_keys keys renew
+    the versions of all keys instead.
 
     """
 
+    # Source of monotonic versions of keys, cell attributes and results
+    version_counter = count(1)
+
+    # Changes of more keys renew the versions of all keys
+    max_versioned_keys = 1000
+
     def __init__(self, default_value=None):
         dict.__init__(self)
 
         self.default_value = default_value
 
+        # Set of changed keys, changes are not tracked if None
+        self.changed_keys = None
+
+        # Maps changed keys to versions, other keys have version epoch
+        self.key_versions = {}
+        self.renew_versions()
+
     def __missing__(self, value):
         """Returns the default value None"""
 
         return self.default_value
 
+    def renew_versions(self):
+        """Gives all keys a new version"""
+
+        self.key_versions.clear()
+        self.epoch = next(self.version_counter)
+
+    def get_version(self, key):
+        """Returns version of key, which increases on each change of key"""
+
+        return self.key_versions.get(key, self.epoch)
+
+    def _mark_changed(self, keys):
+        """Adds keys to changed_keys and gives them a new version
+
+        Parameters
+        ----------
+        keys: List
+        \tChanged keys
+
+        """
+
+        if self.changed_keys is not None:
+            self.changed_keys.update(keys)
+
+        if len(keys) > self.max_versioned_keys:
+            self.renew_versions()
+        else:
+            version = next(self.version_counter)
+            self.key_versions.update((key, version) for key in keys)
+
     @undoable
     def __setitem__(self, key, value):
         old_value = self[key]
         dict.__setitem__(self, key, value)
 
+        self._mark_changed([key])
+
         yield "__setitem__"
         # Undo actions
         if old_value is None:
@@ -95,16 +153,65 @@ class KeyValueStore(dict):
         else:
             dict.__setitem__(self, key, old_value)
 
+        self._mark_changed([key])
+
     @undoable
     def pop(self, key, *args):
         res = dict.pop(self, key, *args)
 
+        self._mark_changed([key])
+
         yield "pop", res
 
         # Undo actions
         if res is not None:
             dict.__setitem__(self, key, res)
 
+        self._mark_changed([key])
+
+    @undoable
+    def set_items(self, items):
+        """Sets many items in one undo step, None values delete items
+
+        Parameters
+        ----------
+        items: List of 2-tuples
+        \tKey, value tuples. A list is required because redo sets the
+        \titems again.
+
+        """
+
+        if any(value is None for __, value in items):
+            old_items = []
+
+            for key, value in items:
+                if value is None:
+                    old_items.append((key, dict.pop(self, key, None)))
+                else:
+                    old_items.append((key, dict.get(self, key)))
+                    dict.__setitem__(self, key, value)
+
+        else:
+            # Without deletions, the items are set in bulk
+            keys = map(itemgetter(0), items)
+            old_items = zip(keys, map(partial(dict.get, self), keys))
+            dict.update(self, items)
+
+        changed_keys = map(itemgetter(0), old_items)
+
+        self._mark_changed(changed_keys)
+
+        yield "set_items"
+
+        # Undo actions
+        for key, old_value in reversed(old_items):
+            if old_value is None:
+                dict.pop(self, key, None)
+            else:
+                dict.__setitem__(self, key, old_value)
+
+        self._mark_changed(changed_keys)
+
 # End of class KeyValueStore
 
 # -----------------------------------------------------------------------------
@@ -127,6 +234,10 @@ class CellAttributes(list):
 
     List methods that may alter the list have been removed
 
+    get_versions returns versions of the attributes and of the borders
+    of a cell. They change when the resolved attributes of the cell
+    change. Resolved attributes are compared by hash.
+
     """
 
     def __init__(self, *args, **kwargs):
@@ -145,6 +256,13 @@ class CellAttributes(list):
         self.reverse = None
         self.sort = None
 
+        # Loaders for tables that have not been loaded yet, set by DictGrid
+        self.pending_tables = {}
+
+        # Maps keys to attribute hash, attribute version, border hash and
+        # border version for cells, of which versions have been requested
+        self._attr_versions = {}
+
     default_cell_attributes = {
         "borderwidth_bottom": 1,
         "borderwidth_right": 1,
@@ -172,6 +290,10 @@ class CellAttributes(list):
         "video_volume": None,
     }
 
+    # Attributes that are drawn as part of the borders of neighbor cells
+    border_attributes = ("borderwidth_bottom", "borderwidth_right",
+                         "bordercolor_bottom", "bordercolor_right")
+
     # Cache for __getattr__ maps key to tuple of len and attr_dict
 
     _attr_cache = {}
@@ -196,6 +318,9 @@ class CellAttributes(list):
 
         assert not any(type(key_ele) is SliceType for key_ele in key)
 
+        if self.pending_tables and key[2] in self.pending_tables:
+            self.pending_tables.pop(key[2])()
+
         if key in self._attr_cache:
             cache_len, cache_dict = self._attr_cache[key]
 
@@ -221,8 +346,75 @@ class CellAttributes(list):
         # Upddate cache with current length and dict
         self._attr_cache[key] = (len(self), result_dict)
 
+        if key in self._attr_versions:
+            self._update_versions(key, result_dict)
+
         return result_dict
 
+    def _update_versions(self, key, attr_dict):
+        """Updates and returns version entry of cell key
+
+        Parameters
+        ----------
+        key: 3-tuple of Integer
+        \tCell key
+        attr_dict: Dict
+        \tResolved attributes of cell key
+
+        """
+
+        try:
+            attr_hash = hash(frozenset(attr_dict.iteritems()))
+            border_hash = hash(tuple(attr_dict[attr]
+                                     for attr in self.border_attributes))
+
+        except TypeError:
+            # Unhashable attribute values
+            attr_hash = hash(repr(sorted(attr_dict.iteritems())))
+            border_hash = hash(repr([attr_dict[attr]
+                                     for attr in self.border_attributes]))
+
+        try:
+            old_attr_hash, attr_version, old_border_hash, border_version = \
+                self._attr_versions[key]
+
+        except KeyError:
+            old_attr_hash = old_border_hash = None
+
+        if attr_hash != old_attr_hash:
+            attr_version = next(KeyValueStore.version_counter)
+
+        if border_hash != old_border_hash:
+            border_version = next(KeyValueStore.version_counter)
+
+        entry = attr_hash, attr_version, border_hash, border_version
+        self._attr_versions[key] = entry
+
+        return entry
+
+    def get_versions(self, key):
+        """Returns attribute version and border version of cell key
+
+        The attribute version changes if any resolved attribute changes.
+        The border version changes if a border attribute changes.
+
+        Parameters
+        ----------
+        key: 3-tuple of Integer
+        \tCell key
+
+        """
+
+        attr_dict = self[key]
+
+        try:
+            entry = self._attr_versions[key]
+
+        except KeyError:
+            entry = self._update_versions(key, attr_dict)
+
+        return entry[1], entry[3]
+
     @undoable
     def __setitem__(self, key, value):
         """Undoable version of list.__setitem__"""
@@ -292,6 +484,249 @@ class CellAttributes(list):
 # End of class CellAttributes
 
 
+class ArrayBlocks(list):
+    """Stores numpy arrays that back rectangular grid areas in 5 - tuples
+
+    The elements of each tuple are top row, left column, table, array and
+    source. The source is a tuple of the path of the npy or npz file and
+    the array name within an npz file or None. Arrays may be memory maps.
+
+    Cell (top + i, left + j, tab) resolves to array[i, j]. Arrays with
+    one dimension fill a column. Cells with code hide the array values.
+    If blocks overlap then the block that has been appended last is used.
+
+    Blocks that are cut by row or column insertion or deletion hold a
+    slice of the file array. Their source is extended by the row and
+    column windows (start, stop) of the slice within the file array.
+
+    The following methods have been made undoable:
+    * append
+    * set_blocks
+
+    """
+
+    @undoable
+    def append(self, value):
+        list.append(self, value)
+
+        yield "append"
+
+        # Undo actions
+
+        list.pop(self)
+
+    @undoable
+    def set_blocks(self, blocks):
+        """Replaces all blocks in one undo step
+
+        Parameters
+        ----------
+        blocks: List of 5-tuples
+        \tTop, left, tab, array, source tuples of the new blocks
+
+        """
+
+        old_blocks = list(self)
+        list.__setitem__(self, slice(None), blocks)
+
+        yield "set_blocks"
+
+        # Undo actions
+
+        list.__setitem__(self, slice(None), old_blocks)
+
+    def _move_block(self, block, axis, position):
+        """Returns block with top row, left column or table position"""
+
+        block = list(block)
+        block[axis] = position
+
+        return tuple(block)
+
+    def _slice_block(self, block, start, stop, axis, position):
+        """Returns block of rows or columns start to stop - 1 of block
+
+        Parameters
+        ----------
+        block: 5-tuple
+        \tTop, left, tab, array, source tuple of the block that is sliced
+        start, stop: Integer
+        \tSlice of block rows or columns
+        axis: Integer in range(2)
+        \tSpecifies whether rows or columns are sliced
+        position: Integer
+        \tTop row or left column of the new block
+
+        """
+
+        top, left, tab, array, source = block
+        rows, cols = self.get_block_shape(array)
+
+        if len(source) > 2:
+            windows = list(source[2:])
+        else:
+            windows = [(0, rows), (0, cols)]
+
+        window_start = windows[axis][0]
+        windows[axis] = window_start + start, window_start + stop
+
+        if axis == 0:
+            array = array[start:stop]
+            top = position
+
+        else:
+            array = array[:, start:stop]
+            left = position
+
+        return top, left, tab, array, tuple(source[:2]) + tuple(windows)
+
+    def get_adjusted_blocks(self, insertion_point, no_to_insert, axis,
+                            tab=None):
+        """Returns list of blocks after an insertion or deletion
+
+        Rows, columns or tables are inserted as in DataArray.insert.
+        Blocks are shifted, cut into two blocks at insertion points,
+        clipped at deleted rows or columns or removed if they are deleted
+        completely.
+
+        Parameters
+        ----------
+        insertion_point: Integer
+        \tPoint on axis, at which insertion or deletion takes place
+        no_to_insert: Integer
+        \tNumber of rows/cols/tabs that are inserted, negative deletes
+        axis: Integer in range(3)
+        \tSpecifies number of dimension, i.e. 0 == row, 1 == col, ...
+        tab: Integer, defaults to None
+        \tIf given then insertion is limited to this tab for axis < 2
+
+        """
+
+        blocks = []
+
+        for block in self:
+            block_tab = block[2]
+
+            if axis == 2:
+                if no_to_insert < 0 and insertion_point <= block_tab < \
+                   insertion_point - no_to_insert:
+                    # Table is deleted
+                    continue
+
+                elif block_tab > insertion_point or no_to_insert < 0 and \
+                        block_tab >= insertion_point:
+                    block = self._move_block(block, axis,
+                                             block_tab + no_to_insert)
+
+                blocks.append(block)
+                continue
+
+            if tab is not None and block_tab != tab:
+                blocks.append(block)
+                continue
+
+            start = block[axis]
+            size = self.get_block_shape(block[3])[axis]
+
+            if no_to_insert >= 0:
+                if start > insertion_point:
+                    blocks.append(self._move_block(block, axis,
+                                                   start + no_to_insert))
+
+                elif start + size - 1 > insertion_point:
+                    # Insertion inside of the block cuts it into two
+                    cut = insertion_point - start + 1
+                    blocks.append(self._slice_block(block, 0, cut, axis,
+                                                    start))
+                    blocks.append(self._slice_block(
+                        block, cut, size, axis,
+                        insertion_point + 1 + no_to_insert))
+
+                else:
+                    blocks.append(block)
+
+                continue
+
+            deletion_end = insertion_point - no_to_insert
+
+            if start + size <= insertion_point:
+                blocks.append(block)
+
+            elif start >= deletion_end:
+                blocks.append(self._move_block(block, axis,
+                                               start + no_to_insert))
+
+            else:
+                # Clip deleted rows or columns
+                if start < insertion_point:
+                    blocks.append(self._slice_block(
+                        block, 0, insertion_point - start, axis, start))
+
+                if start + size > deletion_end:
+                    blocks.append(self._slice_block(
+                        block, deletion_end - start, size, axis,
+                        insertion_point))
+
+        return blocks
+
+    def get_block_shape(self, array):
+        """Returns number of rows and columns that array covers"""
+
+        if array.ndim == 0:
+            return 1, 1
+
+        elif array.ndim == 1:
+            return array.shape[0], 1
+
+        return array.shape[:2]
+
+    def get_value(self, key):
+        """Returns array value of cell key, raises KeyError if not present
+
+        Parameters
+        ----------
+        key: 3-tuple of Integer
+        \tKey of a single cell
+
+        """
+
+        row, col, tab = key
+
+        for top, left, block_tab, array, __ in reversed(self):
+            if block_tab != tab or row < top or col < left:
+                continue
+
+            rows, cols = self.get_block_shape(array)
+
+            if row < top + rows and col < left + cols:
+                if array.ndim == 0:
+                    return array[()]
+
+                elif array.ndim == 1:
+                    return array[row - top]
+
+                return array[row - top, col - left]
+
+        raise KeyError(key)
+
+    def get_bboxes(self, tab=None):
+        """Generator of top, left, bottom, right tuples of the blocks
+
+        Parameters
+        ----------
+        tab: Integer, defaults to None
+        \tOnly blocks of this table are considered if not None
+
+        """
+
+        for top, left, block_tab, array, __ in self:
+            if tab is None or block_tab == tab:
+                rows, cols = self.get_block_shape(array)
+                yield top, left, top + rows - 1, left + cols - 1
+
+# End of class ArrayBlocks
+
+
 class DictGrid(KeyValueStore):
     """The core data class with all information that is stored in a pys file.
 
@@ -299,7 +734,12 @@ class DictGrid(KeyValueStore):
     the following attributes:
 
     * cell_attributes: Stores cell formatting attributes
+    * array_blocks:    Stores arrays that back grid areas
     * macros:          String of all macros
+    * pending_tables:  Dict of tables that are loaded on first access
+
+    Tables in pending_tables are loaded when one of their cells is
+    accessed or when the whole grid is iterated.
 
     This class represents layer 1 of the model.
 
@@ -317,6 +757,8 @@ class DictGrid(KeyValueStore):
 
         self.cell_attributes = CellAttributes()
 
+        self.array_blocks = ArrayBlocks()
+
         self.macros = u""
 
         default_row_height = config["default_row_height"]
@@ -328,6 +770,29 @@ class DictGrid(KeyValueStore):
         # Keys have the format (col, table)
         self.col_widths = KeyValueStore(default_value=default_col_width)
 
+        # Maps table to a loader function without parameters
+        self.pending_tables = {}
+        self.cell_attributes.pending_tables = self.pending_tables
+
+    def load_table(self, tab):
+        """Loads table tab if it is pending
+
+        Parameters
+        ----------
+        tab: Integer
+        \tTable that shall be loaded
+
+        """
+
+        if tab in self.pending_tables:
+            self.pending_tables.pop(tab)()
+
+    def load_tables(self):
+        """Loads all pending tables"""
+
+        for tab in sorted(self.pending_tables):
+            self.load_table(tab)
+
     def __getitem__(self, key):
 
         shape = self.shape
@@ -338,8 +803,75 @@ class DictGrid(KeyValueStore):
                 msg = msg.format(key=key, shape=shape)
                 raise IndexError(msg)
 
+        if self.pending_tables and key[2] in self.pending_tables:
+            self.pending_tables.pop(key[2])()
+
         return KeyValueStore.__getitem__(self, key)
 
+    def __setitem__(self, key, value):
+        if self.pending_tables and key[2] in self.pending_tables:
+            self.pending_tables.pop(key[2])()
+
+        KeyValueStore.__setitem__(self, key, value)
+
+    def __contains__(self, key):
+        if self.pending_tables and key[2] in self.pending_tables:
+            self.pending_tables.pop(key[2])()
+
+        return dict.__contains__(self, key)
+
+    def pop(self, key, *args):
+        if self.pending_tables and key[2] in self.pending_tables:
+            self.pending_tables.pop(key[2])()
+
+        return KeyValueStore.pop(self, key, *args)
+
+    def set_items(self, items):
+        tabs = set(key[2] for key, __ in items)
+        for tab in tabs.intersection(self.pending_tables):
+            self.pending_tables.pop(tab)()
+
+        KeyValueStore.set_items(self, items)
+
+    # Operations on the whole grid require all tables
+
+    def __iter__(self):
+        self.load_tables()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.load_tables()
+        return dict.__len__(self)
+
+    def keys(self):
+        self.load_tables()
+        return dict.keys(self)
+
+    def values(self):
+        self.load_tables()
+        return dict.values(self)
+
+    def items(self):
+        self.load_tables()
+        return dict.items(self)
+
+    def iterkeys(self):
+        self.load_tables()
+        return dict.iterkeys(self)
+
+    def itervalues(self):
+        self.load_tables()
+        return dict.itervalues(self)
+
+    def iteritems(self):
+        self.load_tables()
+        return dict.iteritems(self)
+
+    def clear(self):
+        self.pending_tables.clear()
+        dict.clear(self)
+        self.renew_versions()
+
 # End of class DictGrid
 
 # -----------------------------------------------------------------------------
@@ -523,6 +1055,15 @@ class DataArray(object):
     cell_attributes = attributes = \
         property(_get_cell_attributes, _set_cell_attributes)
 
+    # Array blocks mask
+
+    def _get_array_blocks(self):
+        """Returns array_blocks list"""
+
+        return self.dict_grid.array_blocks
+
+    array_blocks = property(_get_array_blocks)
+
     def __iter__(self):
         """Returns iterator over self.dict_grid"""
 
@@ -557,6 +1098,46 @@ class DataArray(object):
 
         return self.dict_grid.pop(key)
 
+    def set_cells(self, items):
+        """Sets code of many cells in one undo step
+
+        Empty code deletes a cell. Cells that are merged into another
+        cell are not changed, as in __setitem__.
+
+        Parameters
+        ----------
+        items: Iterable of 2-tuples
+        \tKey, code tuples of single cells
+
+        """
+
+        # Merge areas that may cover cells
+        tab2merge_areas = {}
+        for __, tab, attr_dict in self.cell_attributes:
+            merge_area = attr_dict.get("merge_area")
+            if merge_area is not None:
+                tab2merge_areas.setdefault(tab, []).append(merge_area)
+
+        def is_merged(key):
+            """Returns True if cell key is merged into another cell"""
+
+            row, col, tab = key
+
+            for top, left, bottom, right in tab2merge_areas.get(tab, []):
+                if top <= row <= bottom and left <= col <= right:
+                    merging_cell = self.cell_attributes.get_merging_cell(key)
+                    return merging_cell not in (None, key)
+
+            return False
+
+        if tab2merge_areas:
+            cells = [(key, code or None) for key, code in items
+                     if not code or not is_merged(key)]
+        else:
+            cells = [(key, code or None) for key, code in items]
+
+        self.dict_grid.set_items(cells)
+
     # Shape mask
 
     def _get_shape(self):
@@ -575,6 +1156,9 @@ class DataArray(object):
 
         """
 
+        # Pending tables have to be present before cells are cut off
+        self.dict_grid.load_tables()
+
         # Delete each cell that is beyond new borders
 
         old_shape = self.shape
@@ -622,8 +1206,36 @@ class DataArray(object):
                 maxrow = max(row, maxrow)
                 maxcol = max(col, maxcol)
 
+        for __, __, bottom, right in self.array_blocks.get_bboxes(table):
+            maxrow = max(bottom, maxrow)
+            maxcol = max(right, maxcol)
+
         return maxrow, maxcol, table
 
+    def snapshot(self):
+        """Returns DataArray with a point-in-time copy of the grid data
+
+        Only the containers are copied. Cell code strings are immutable
+        and cell attribute entries are replaced but never altered by the
+        model, so that later changes do not affect the snapshot.
+        The snapshot may therefore be serialized in another thread.
+
+        """
+
+        self.dict_grid.load_tables()
+
+        snapshot = DataArray(self.shape)
+        dict_grid = snapshot.dict_grid
+
+        dict.update(dict_grid, self.dict_grid)
+        list.extend(dict_grid.cell_attributes, self.cell_attributes)
+        list.extend(dict_grid.array_blocks, self.array_blocks)
+        dict.update(dict_grid.row_heights, self.row_heights)
+        dict.update(dict_grid.col_widths, self.col_widths)
+        dict_grid.macros = self.macros
+
+        return snapshot
+
     # Pickle support
 
     def __getstate__(self):
@@ -980,6 +1592,27 @@ class DataArray(object):
         self.cell_attributes._attr_cache.clear()
         self.cell_attributes._update_table_cache()
 
+    def _adjust_array_blocks(self, insertion_point, no_to_insert, axis,
+                             tab=None):
+        """Adjusts array blocks on insertion/deletion
+
+        Parameters
+        ----------
+        insertion_point: Integer
+        \tPoint on axis, at which insertion or deletion takes place
+        no_to_insert: Integer
+        \tNumber of rows/cols/tabs that shall be inserted, negative deletes
+        axis: Integer in range(3)
+        \tSpecifies number of dimension, i.e. 0 == row, 1 == col, ...
+        tab: Integer, defaults to None
+        \tIf given then insertion is limited to this tab for axis < 2
+
+        """
+
+        if self.array_blocks:
+            self.array_blocks.set_blocks(self.array_blocks.get_adjusted_blocks(
+                insertion_point, no_to_insert, axis, tab))
+
     def insert(self, insertion_point, no_to_insert, axis, tab=None):
         """Inserts no_to_insert rows/cols/tabs/... before insertion_point
 
@@ -1023,6 +1656,7 @@ class DataArray(object):
 
         self._adjust_rowcol(insertion_point, no_to_insert, axis, tab=tab)
         self._adjust_cell_attributes(insertion_point, no_to_insert, axis, tab)
+        self._adjust_array_blocks(insertion_point, no_to_insert, axis, tab)
 
         for key in new_keys:
             self.__setitem__(key, new_keys[key])
@@ -1074,6 +1708,7 @@ class DataArray(object):
 
         self._adjust_rowcol(deletion_point, -no_to_delete, axis, tab=tab)
         self._adjust_cell_attributes(deletion_point, -no_to_delete, axis)
+        self._adjust_array_blocks(deletion_point, -no_to_delete, axis, tab)
 
     def set_row_height(self, row, tab, height):
         """Sets row height"""
@@ -1126,6 +1761,18 @@ class CodeArray(DataArray):
     # Custom font storage
     custom_fonts = {}
 
+    # Results of these types are compared by value for result versions
+    value_result_types = (type(None), bool, int, long, float, complex, str,
+                          unicode, numpy.generic)
+
+    def __init__(self, shape):
+        DataArray.__init__(self, shape)
+
+        # Maps keys to fingerprint, weak reference and version of the last
+        # result for cells, of which result versions have been requested.
+        # It is cleared whenever the result cache is reset.
+        self.result_versions = {}
+
     def __setitem__(self, key, value):
         """Sets cell code and resets result cache"""
 
@@ -1143,6 +1790,7 @@ class CodeArray(DataArray):
         if not unchanged:
             # Reset result cache
             self.result_cache = {}
+            self.result_versions.clear()
 
     def __getitem__(self, key):
         """Returns _eval_cell"""
@@ -1171,6 +1819,64 @@ class CodeArray(DataArray):
 
             return result
 
+        elif self.array_blocks:
+            # Empty cells may be backed by an array
+            try:
+                return self.array_blocks.get_value(key)
+
+            except KeyError:
+                pass
+
+    def get_result_version(self, key):
+        """Returns version of the result of cell key
+
+        The cell is evaluated if its result is not cached. The version
+        changes when a new result differs from the last one. Results of
+        value_result_types are compared by value, others by identity.
+        Results are not kept alive by their versions. Only their values,
+        ids and weak references are stored.
+
+        Parameters
+        ----------
+        key: 3-tuple of Integer
+        \tCell key
+
+        """
+
+        result = self[key]
+
+        ref = None
+
+        if isinstance(result, self.value_result_types):
+            fingerprint = type(result), result
+
+        else:
+            fingerprint = id(result)
+
+            try:
+                ref = weakref.ref(result)
+
+            except TypeError:
+                # Ids of results without weak references, e.g. lists,
+                # are valid while the results are in the result cache
+                pass
+
+        try:
+            old_fingerprint, old_ref, version = self.result_versions[key]
+
+        except KeyError:
+            pass
+
+        else:
+            if old_fingerprint == fingerprint and \
+               (old_ref is None or old_ref() is result):
+                return version
+
+        version = next(KeyValueStore.version_counter)
+        self.result_versions[key] = fingerprint, ref, version
+
+        return version
+
     def _make_nested_list(self, gen):
         """Makes nested list from generator for creating numpy.array"""
 
@@ -1291,6 +1997,7 @@ class CodeArray(DataArray):
 
             # Delete result cache because assignment changes results
             self.result_cache.clear()
+            self.result_versions.clear()
 
         else:
             glob_var = None
@@ -1355,8 +2062,36 @@ class CodeArray(DataArray):
         except KeyError:
             pass
 
+        self.result_versions.pop(key, None)
+
         return DataArray.pop(self, key)
 
+    def _adjust_array_blocks(self, insertion_point, no_to_insert, axis,
+                             tab=None):
+        """Adjusts array blocks on insertion/deletion, resets result cache"""
+
+        if self.array_blocks:
+            DataArray._adjust_array_blocks(self, insertion_point, no_to_insert,
+                                           axis, tab)
+
+            self.result_cache = {}
+            self.result_versions.clear()
+
+    def set_cells(self, items):
+        """Sets code of many cells in one undo step, resets result cache
+
+        Parameters
+        ----------
+        items: Iterable of 2-tuples
+        \tKey, code tuples of single cells
+
+        """
+
+        DataArray.set_cells(self, items)
+
+        self.result_cache = {}
+        self.result_versions.clear()
+
     def reload_modules(self):
         """Reloads modules that are available in cells"""
 
@@ -1377,7 +2112,8 @@ class CodeArray(DataArray):
                      '__file__', 'charts', 'sys', 'is_slice_like', '__name__',
                      'copy', 'imap', 'wx', 'ifilter', 'Selection', 'DictGrid',
                      'numpy', 'CodeArray', 'DataArray', 'datetime',
-                     'vlcpanel_factory']
+                     'vlcpanel_factory', 'partial', 'itemgetter',
+                     'ArrayBlocks', 'count', 'weakref']
 
         for key in globals().keys():
             if key not in base_keys:
@@ -1452,6 +2188,7 @@ class CodeArray(DataArray):
 
         # Reset result cache
         self.result_cache.clear()
+        self.result_versions.clear()
 
         # Reset frozen cache
         self.frozen_cache.clear()
@@ -48,7 +48,8 @@ sys.path.insert(0, TESTPATH + (os.sep + os.pardir) * 2)
 
 from src.lib.testlib import params, pytest_generate_tests, undotest_model
 
-from src.model.model import KeyValueStore, CellAttributes, DictGrid
+from src.model.model import KeyValueStore, CellAttributes, ArrayBlocks
+from src.model.model import DictGrid
 from src.model.model import DataArray, CodeArray
 
 from src.lib.selection import Selection
@@ -73,6 +74,54 @@ class TestKeyValueStore(object):
 
         assert self.k_v_store[key] == 7
 
+    def test_set_items(self):
+        """Unit test for set_items"""
+
+        self.k_v_store[(0, 0, 0)] = 1
+        self.k_v_store[(0, 0, 1)] = 2
+
+        self.k_v_store.set_items([((0, 0, 0), 3), ((0, 0, 1), None),
+                                  ((0, 0, 2), 4)])
+
+        assert self.k_v_store == {(0, 0, 0): 3, (0, 0, 2): 4}
+
+        undo_stack().undo()
+        assert self.k_v_store == {(0, 0, 0): 1, (0, 0, 1): 2}
+
+        undo_stack().redo()
+        assert self.k_v_store == {(0, 0, 0): 3, (0, 0, 2): 4}
+
+    def test_get_version(self):
+        """Unit test for get_version"""
+
+        key0 = 0, 0, 0
+        key1 = 0, 0, 1
+
+        version0 = self.k_v_store.get_version(key0)
+        version1 = self.k_v_store.get_version(key1)
+
+        self.k_v_store[key0] = 1
+
+        assert self.k_v_store.get_version(key0) > version0
+        assert self.k_v_store.get_version(key1) == version1
+
+        version0 = self.k_v_store.get_version(key0)
+        undo_stack().undo()
+
+        assert self.k_v_store.get_version(key0) > version0
+
+    def test_get_version_bulk(self):
+        """Bulk changes renew the versions of all keys"""
+
+        version = self.k_v_store.get_version((-1, 0, 0))
+
+        items = [((row, 0, 0), 1) for row in
+                 xrange(self.k_v_store.max_versioned_keys + 1)]
+        self.k_v_store.set_items(items)
+
+        assert not self.k_v_store.key_versions
+        assert self.k_v_store.get_version((-1, 0, 0)) > version
+
 
 class TestCellAttributes(object):
     """Unit tests for CellAttributes"""
@@ -108,6 +157,36 @@ class TestCellAttributes(object):
         assert self.cell_attr[32, 53, 0]["testattr"] == 2
         assert self.cell_attr[2, 2, 0]["testattr"] == 3
 
+    def test_get_versions(self):
+        """Unit test for get_versions"""
+
+        key = 1, 1, 0
+
+        attr_version, border_version = self.cell_attr.get_versions(key)
+
+        assert self.cell_attr.get_versions(key) == \
+            (attr_version, border_version)
+
+        # Other cell
+        selection = Selection([], [], [], [], [(2, 2)])
+        self.cell_attr.append((selection, 0, {"angle": 90.0}))
+
+        assert self.cell_attr.get_versions(key) == \
+            (attr_version, border_version)
+
+        selection = Selection([], [], [], [], [(1, 1)])
+        self.cell_attr.append((selection, 0, {"angle": 90.0}))
+
+        new_attr_version, new_border_version = \
+            self.cell_attr.get_versions(key)
+
+        assert new_attr_version > attr_version
+        assert new_border_version == border_version
+
+        self.cell_attr.append((selection, 0, {"borderwidth_right": 3}))
+
+        assert self.cell_attr.get_versions(key)[1] > border_version
+
     def test_get_merging_cell(self):
         """Test get_merging_cell"""
 
@@ -129,6 +208,133 @@ class TestCellAttributes(object):
         assert self.cell_attr.get_merging_cell((2, 2, 0)) == (2, 2, 0)
 
 
+class TestArrayBlocks(object):
+    """Unit tests for ArrayBlocks"""
+
+    def setup_method(self, method):
+        """Creates ArrayBlocks with a 2D, a 1D and a 0D array"""
+
+        self.array_blocks = ArrayBlocks()
+        undo_stack().clear()
+
+        self.array_blocks.append((2, 3, 0, numpy.arange(12).reshape(3, 4),
+                                  ("a.npy", None)))
+        self.array_blocks.append((4, 4, 0, numpy.array([7, 8, 9]),
+                                  ("b.npz", "x")))
+        self.array_blocks.append((0, 0, 1, numpy.array(5.5),
+                                  ("c.npy", None)))
+
+    def test_append(self):
+        """Test undo of append"""
+
+        assert undo_stack().undocount() == 3
+
+        undo_stack().undo()
+        assert len(self.array_blocks) == 2
+
+    param_get_value = [
+        {'key': (2, 3, 0), 'res': 0},
+        {'key': (3, 5, 0), 'res': 6},
+        {'key': (4, 3, 0), 'res': 8},
+        {'key': (4, 4, 0), 'res': 7},
+        {'key': (6, 4, 0), 'res': 9},
+        {'key': (0, 0, 1), 'res': 5.5},
+    ]
+
+    @params(param_get_value)
+    def test_get_value(self, key, res):
+        """Test get_value, blocks that are appended later take precedence"""
+
+        assert self.array_blocks.get_value(key) == res
+
+    param_get_value_error = [
+        {'key': (1, 3, 0)},
+        {'key': (2, 7, 0)},
+        {'key': (7, 4, 0)},
+        {'key': (2, 3, 1)},
+    ]
+
+    @params(param_get_value_error)
+    def test_get_value_error(self, key):
+        """Test get_value for cells outside of blocks"""
+
+        with pytest.raises(KeyError):
+            self.array_blocks.get_value(key)
+
+    def test_get_bboxes(self):
+        """Test get_bboxes"""
+
+        assert list(self.array_blocks.get_bboxes(0)) == \
+            [(2, 3, 4, 6), (4, 4, 6, 4)]
+        assert list(self.array_blocks.get_bboxes()) == \
+            [(2, 3, 4, 6), (4, 4, 6, 4), (0, 0, 0, 0)]
+
+    def test_set_blocks(self):
+        """Test set_blocks and its undo"""
+
+        self.array_blocks.set_blocks([])
+        assert not self.array_blocks
+
+        undo_stack().undo()
+        assert len(self.array_blocks) == 3
+
+    param_get_adjusted_blocks = [
+        {'args': (0, 2, 0, None),
+         'bboxes': [(4, 3, 6, 6), (6, 4, 8, 4), (0, 0, 0, 0)],
+         'values': {(4, 3, 0): 0, (8, 4, 0): 9}},
+        {'args': (2, 1, 0, 0),
+         'bboxes': [(2, 3, 2, 6), (4, 3, 5, 6), (5, 4, 7, 4), (0, 0, 0, 0)],
+         'values': {(2, 4, 0): 1, (4, 3, 0): 4, (5, 3, 0): 8, (6, 4, 0): 8}},
+        {'args': (3, -1, 0, None),
+         'bboxes': [(2, 3, 2, 6), (3, 3, 3, 6), (3, 4, 5, 4), (0, 0, 0, 0)],
+         'values': {(2, 3, 0): 0, (3, 3, 0): 8, (3, 5, 0): 10}},
+        {'args': (3, -4, 1, 0),
+         'bboxes': [(0, 0, 0, 0)],
+         'values': {(0, 0, 1): 5.5}},
+        {'args': (5, -1, 1, 0),
+         'bboxes': [(2, 3, 4, 4), (2, 5, 4, 5), (4, 4, 6, 4), (0, 0, 0, 0)],
+         'values': {(2, 4, 0): 1, (2, 5, 0): 3, (4, 5, 0): 11}},
+        {'args': (4, 1, 0, 1),
+         'bboxes': [(2, 3, 4, 6), (4, 4, 6, 4), (0, 0, 0, 0)],
+         'values': {(6, 4, 0): 9}},
+        {'args': (0, -1, 2, None),
+         'bboxes': [(0, 0, 0, 0)],
+         'values': {(0, 0, 0): 5.5}},
+        {'args': (0, 1, 2, None),
+         'bboxes': [(2, 3, 4, 6), (4, 4, 6, 4), (0, 0, 0, 0)],
+         'values': {(0, 0, 2): 5.5, (2, 3, 0): 0}},
+    ]
+
+    @params(param_get_adjusted_blocks)
+    def test_get_adjusted_blocks(self, args, bboxes, values):
+        """Test shifting, cutting and clipping of blocks"""
+
+        blocks = self.array_blocks.get_adjusted_blocks(*args)
+        self.array_blocks.set_blocks(blocks)
+
+        assert list(self.array_blocks.get_bboxes()) == bboxes
+
+        for key in values:
+            assert self.array_blocks.get_value(key) == values[key]
+
+    def test_get_adjusted_blocks_windows(self):
+        """Test that cut blocks record their windows in the source"""
+
+        blocks = self.array_blocks.get_adjusted_blocks(3, -1, 0)
+
+        assert blocks[0][4] == ("a.npy", None, (0, 1), (0, 4))
+        assert blocks[1][4] == ("a.npy", None, (2, 3), (0, 4))
+
+        # Shifted blocks keep their source
+        assert blocks[2][4] == ("b.npz", "x")
+
+        self.array_blocks.set_blocks(blocks)
+        blocks = self.array_blocks.get_adjusted_blocks(4, -1, 1)
+
+        assert blocks[2][4] == ("a.npy", None, (2, 3), (0, 1))
+        assert blocks[3][4] == ("a.npy", None, (2, 3), (2, 4))
+
+
 class TestDictGrid(object):
     """Unit tests for DictGrid"""
 
@@ -146,6 +352,28 @@ class TestDictGrid(object):
         self.dict_grid[(2, 4, 5)] = "Test"
         assert self.dict_grid[(2, 4, 5)] == "Test"
 
+    def test_pending_tables(self):
+        """Unit test for loading pending tables"""
+
+        def loader():
+            dict.__setitem__(self.dict_grid, (1, 2, 3), "Pending")
+
+        self.dict_grid.pending_tables[3] = loader
+
+        assert self.dict_grid[(1, 2, 2)] is None
+        assert 3 in self.dict_grid.pending_tables
+
+        assert self.dict_grid[(1, 2, 3)] == "Pending"
+        assert not self.dict_grid.pending_tables
+
+        self.dict_grid.pending_tables[4] = loader
+        self.dict_grid.clear()
+        assert not self.dict_grid.pending_tables
+
+        self.dict_grid.pending_tables[4] = loader
+        assert self.dict_grid.keys() == [(1, 2, 3)]
+        assert not self.dict_grid.pending_tables
+
 
 class TestDataArray(object):
     """Unit tests for DataArray"""
@@ -186,6 +414,25 @@ class TestDataArray(object):
 
         assert sorted(self.data_array.keys()) == [(1, 2, 4)]
 
+    @undotest_model
+    def test_set_cells(self):
+        """Unit test for set_cells"""
+
+        self.data_array[(1, 2, 3)] = "12"
+        self.data_array[(1, 2, 4)] = "13"
+
+        selection = Selection([(5, 5)], [(6, 6)], [], [], [])
+        self.data_array.cell_attributes.append(
+            (selection, 3, {"merge_area": (5, 5, 6, 6)}))
+
+        self.data_array.set_cells([((1, 2, 3), "21"), ((1, 2, 4), ""),
+                                   ((5, 5, 3), "55"), ((6, 6, 3), "66")])
+
+        assert self.data_array((1, 2, 3)) == "21"
+        assert self.data_array((1, 2, 4)) is None
+        assert self.data_array((5, 5, 3)) == "55"
+        assert self.data_array((6, 6, 3)) is None
+
     def test_get_shape(self):
         """Unit test for _get_shape"""
 
@@ -215,6 +462,40 @@ class TestDataArray(object):
 
         assert self.data_array.get_last_filled_cell(table)[:2] == res
 
+    def test_insert_delete_array_blocks(self):
+        """Unit test for insert and delete with array blocks"""
+
+        self.data_array.array_blocks.append((1, 2, 0, numpy.arange(3),
+                                             ("a.npy", None)))
+
+        self.data_array.insert(0, 2, 0)
+        assert list(self.data_array.array_blocks.get_bboxes()) == \
+            [(3, 2, 5, 2)]
+
+        self.data_array.delete(0, 1, 1)
+        assert list(self.data_array.array_blocks.get_bboxes()) == \
+            [(3, 1, 5, 1)]
+
+        self.data_array.delete(3, 2, 0)
+        assert list(self.data_array.array_blocks.get_bboxes()) == \
+            [(3, 1, 3, 1)]
+        assert self.data_array.array_blocks.get_value((3, 1, 0)) == 2
+
+        # Blocks on other tables are not changed
+        self.data_array.delete(0, 1, 0, tab=1)
+        assert list(self.data_array.array_blocks.get_bboxes()) == \
+            [(3, 1, 3, 1)]
+
+    def test_get_last_filled_cell_array_blocks(self):
+        """Unit test for get_last_filled_cell with array blocks"""
+
+        self.data_array[3, 0, 0] = "1"
+        self.data_array.array_blocks.append((1, 2, 0, numpy.zeros((5, 3)),
+                                             ("a.npy", None)))
+
+        assert self.data_array.get_last_filled_cell(0)[:2] == (5, 4)
+        assert self.data_array.get_last_filled_cell(1)[:2] == (0, 0)
+
     def test_getstate(self):
         """Unit test for __getstate__ (pickle support)"""
 
@@ -449,6 +730,36 @@ class TestDataArray(object):
         self.data_array.set_col_width(7, 1, 22.345)
         assert self.data_array.col_widths[7, 1] == 22.345
 
+    def test_snapshot(self):
+        """Unit test for snapshot"""
+
+        selection = Selection([], [], [], [], [(2, 3)])
+
+        self.data_array[1, 2, 3] = "12"
+        self.data_array.cell_attributes.append((selection, 3,
+                                                {"bgcolor": 0}))
+        self.data_array.set_row_height(7, 1, 22.345)
+        self.data_array.set_col_width(7, 1, 11.5)
+        self.data_array.macros = u"a = 1"
+
+        snapshot = self.data_array.snapshot()
+
+        # Later changes do not affect the snapshot
+        self.data_array[1, 2, 3] = "13"
+        self.data_array.pop((1, 2, 3))
+        self.data_array.cell_attributes.append((selection, 3,
+                                                {"bgcolor": 1}))
+        self.data_array.set_row_height(7, 1, 10)
+        self.data_array.macros = u"a = 2"
+        self.data_array.shape = (10, 10, 10)
+
+        assert snapshot.shape == (100, 100, 100)
+        assert snapshot[1, 2, 3] == "12"
+        assert snapshot.cell_attributes[2, 3, 3]["bgcolor"] == 0
+        assert snapshot.row_heights[7, 1] == 22.345
+        assert snapshot.col_widths[7, 1] == 11.5
+        assert snapshot.macros == u"a = 1"
+
 
 class TestCodeArray(object):
     """Unit tests for CodeArray"""
@@ -475,6 +786,71 @@ class TestCodeArray(object):
         for key in res_data:
             assert res_data[key] == self.code_array(key)
 
+    param_get_result_version = [
+        {'code': "1", 'new_code': "2 - 1"},
+        {'code': "'a' * 3", 'new_code': "'aaa'"},
+        {'code': "[1]", 'new_code': "[1] + []"},
+        {'code': "numpy.arange(3)", 'new_code': "numpy.arange(4)"},
+    ]
+
+    @params(param_get_result_version)
+    def test_get_result_version(self, code, new_code):
+        """Unit test for get_result_version"""
+
+        key = 0, 0, 0
+
+        self.code_array[key] = code
+        version = self.code_array.get_result_version(key)
+
+        # Cached result
+        assert self.code_array.get_result_version(key) == version
+
+        # Results are not referenced by their versions
+        result = self.code_array[key]
+        assert all(item is not result
+                   for item in self.code_array.result_versions[key])
+
+        # Code changes reset the result cache and the result versions
+        self.code_array[key] = new_code
+        assert not self.code_array.result_versions
+        assert self.code_array.get_result_version(key) != version
+
+        self.code_array.get_result_version(key)
+        self.code_array.pop(key)
+        assert key not in self.code_array.result_versions
+
+    def test_get_result_version_array_blocks(self):
+        """Unit test for get_result_version of array backed cells"""
+
+        self.code_array.array_blocks.append(
+            (0, 0, 0, numpy.arange(6).reshape(2, 3), ("a.npy", None)))
+
+        # Array values are compared by value
+        version = self.code_array.get_result_version((1, 2, 0))
+        assert self.code_array.get_result_version((1, 2, 0)) == version
+
+    def test_getitem_array_blocks(self):
+        """Unit test for __getitem__ of cells that are backed by arrays"""
+
+        self.code_array.array_blocks.append(
+            (1, 1, 0, numpy.arange(6).reshape(2, 3), ("a.npy", None)))
+        self.code_array[1, 2, 0] = "'code'"
+        self.code_array[5, 0, 0] = "S[2, 3, 0] + 10"
+
+        assert self.code_array[1, 1, 0] == 0
+        assert self.code_array[2, 3, 0] == 5
+        assert self.code_array[0, 0, 0] is None
+        assert self.code_array[1, 4, 0] is None
+        assert self.code_array[1, 1, 1] is None
+
+        # Cells with code hide array values
+        assert self.code_array[1, 2, 0] == "code"
+
+        # Cells may reference array values
+        assert self.code_array[5, 0, 0] == 15
+
+        assert list(self.code_array[2, 1:4, 0]) == [3, 4, 5]
+
     def test_slicing(self):
         """Unit test for __getitem__ and __setitem__"""
 
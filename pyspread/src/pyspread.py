@@ -219,6 +219,11 @@ class MainApplication(wx.App, GridActionEventMixin):
                                attr={"filepath": filename})
             self.main_window.filepath = filename
 
+        else:
+            # Offer recovery of autosaves from sessions that crashed
+            post_command_event(self.main_window,
+                               self.main_window.AutosaveRecoveryMsg)
+
         return True
 
 
@@ -225,6 +225,19 @@ def get_dependencies():
         dep_attrs["version"] = None
     dependencies.append(dep_attrs)
 
+    # openpyxl
+    dep_attrs = {
+        "name": "openpyxl",
+        "min_version": "2.6.0",
+        "description": "for loading and saving Excel xlsx files",
+    }
+    try:
+        import openpyxl
+        dep_attrs["version"] = openpyxl.__version__
+    except ImportError:
+        dep_attrs["version"] = None
+    dependencies.append(dep_attrs)
+
     # Jedi
     dep_attrs = {
         "name": "jedi",
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+runbenchmarks
+=============
+
+Runs the pyspread benchmark suite and stores the results as JSON.
+
+Usage examples:
+
+    python runbenchmarks.py -o before.json
+    python runbenchmarks.py -o after.json -c before.json
+    python runbenchmarks.py -r 10000 -w dense_numeric -b pys_save pys_load
+
+"""
+
+import argparse
+import os
+import sys
+
+import wx
+app = wx.App()
+
+BASEPATH = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(BASEPATH, "pyspread"))
+
+from src.gui._main_window import MainWindow
+from src.lib.benchmark import WORKBOOKS, BENCHMARKS, DEFAULT_ROWS
+from src.lib.benchmark import DEFAULT_COLS, run_benchmarks, save_results
+from src.lib.benchmark import load_results, compare_results
+
+
+def get_parser():
+    """Returns command line argument parser"""
+
+    parser = argparse.ArgumentParser(description="pyspread benchmarks")
+
+    parser.add_argument("-o", "--output", default="benchmark.json",
+                        help="JSON file for the results")
+    parser.add_argument("-c", "--compare", default=None,
+                        help="JSON file with reference results")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.1,
+                        help="Relative slowdown that is no regression")
+    parser.add_argument("-r", "--rows", type=int, default=DEFAULT_ROWS,
+                        help="Rows of each synthetic workbook")
+    parser.add_argument("-n", "--cols", type=int, default=DEFAULT_COLS,
+                        help="Columns of each synthetic workbook")
+    parser.add_argument("-p", "--repeat", type=int, default=3,
+                        help="Timed runs per benchmark")
+    parser.add_argument("-w", "--workbooks", nargs="+", default=None,
+                        choices=WORKBOOKS.keys(),
+                        help="Workbooks to be used")
+    parser.add_argument("-b", "--benchmarks", nargs="+", default=None,
+                        choices=BENCHMARKS.keys(),
+                        help="Benchmarks to be run")
+
+    return parser
+
+
+def main():
+    """Runs benchmarks, returns 1 if regressions are found else 0"""
+
+    args = get_parser().parse_args()
+
+    main_window = MainWindow(None, title="pyspread", S=None)
+
+    def progress(workbook_name, benchmark_name):
+        sys.stderr.write("{} / {}\n".format(workbook_name, benchmark_name))
+
+    results = run_benchmarks(main_window.grid, rows=args.rows,
+                             cols=args.cols, repeat=args.repeat,
+                             workbooks=args.workbooks,
+                             benchmarks=args.benchmarks, progress=progress)
+
+    save_results(results, args.output)
+
+    for workbook_name, workbook_results in results["results"].iteritems():
+        for benchmark_name, timing in workbook_results.iteritems():
+            print "{:<20} {:<24} {:10.4f} s".format(
+                workbook_name, benchmark_name, timing["min"])
+
+    if args.compare is None:
+        return 0
+
+    regressions = compare_results(load_results(args.compare), results,
+                                  tolerance=args.tolerance)
+
+    for workbook_name, benchmark_name, old_min, new_min in regressions:
+        print "Regression in {} / {}: {:.4f} s -> {:.4f} s".format(
+            workbook_name, benchmark_name, old_min, new_min)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -47,6 +47,22 @@ class PyTest(Command):
         raise SystemExit(errno)
 
 
+class Benchmark(Command):
+    """Class for running the benchmark suite via setup.py"""
+
+    user_options = []
+
+    def initialize_options(self):
+        pass
+
+    def finalize_options(self):
+        pass
+
+    def run(self):
+        errno = subprocess.call([sys.executable, 'runbenchmarks.py'])
+        raise SystemExit(errno)
+
+
 setup(
     name='pyspread',
     version='1.1.1',
@@ -64,17 +80,19 @@ setup(
 #        'GPG': ['gnupg>=0.3.0'],
 #        'SVG': [],  # May require python_rsvg if not shipped with pyCairo
 #        'XLS': ['xlrd>=0.9.1', 'xlwt>=0.7.5'],
+#        'XLSX': ['openpyxl>=2.6', 'lxml'],
 #        'code_completion': ['jedi>=0.8'],
 #        'basemap': ['basemap>=1.0.7'],
 #    },
     packages=['pyspread'],
     scripts=['pyspread/pyspread'],
-    cmdclass={'test': PyTest},
+    cmdclass={'test': PyTest, 'benchmark': Benchmark},
     package_data={'pyspread': [
             '*.py',
             '../pyspread.sh',
             '../pyspread.bat',
             '../runtests.py',
+            '../runbenchmarks.py',
             'src/*.py',
             'src/pyspread',
             'src/*/*.py',